@@ -1,5 +1,5 @@
 # admin_side/app.py
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import OperationalError
@@ -10,10 +10,20 @@ import time
 # Initialize Flask extensions
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config_object='config.Config'):
     # Create and configure the app
     app = Flask(__name__)
-    app.config.from_object('config.Config')
+    app.config.from_object(config_object)
+    
+    # Per-subsystem trace levels and the background log writer
+    from utils.tracing import init_tracing
+    init_tracing(app)
+    
+    # Faster JSON serialization (orjson when installed) and response compression
+    from utils.json_provider import init_json_provider
+    from utils.compression import init_compression
+    init_json_provider(app)
+    init_compression(app)
     
     # Initialize CORS with more specific settings
     CORS(app, resources={
@@ -33,20 +43,43 @@ def create_app():
     from routes.student_routes import student_bp
     from routes.professor_routes import professor_bp
     from routes.module_routes import module_bp
+    from routes.job_routes import job_bp
+    from routes.event_routes import event_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(quiz_bp, url_prefix='/api/quizzes')
     app.register_blueprint(student_bp, url_prefix='/api/students')
     app.register_blueprint(professor_bp, url_prefix='/api/professors')
     app.register_blueprint(module_bp, url_prefix='/api/modules')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+    app.register_blueprint(event_bp, url_prefix='/api/events')
+    
+    # Keep the token -> principal cache in sync with user changes
+    from utils.jwt_utils import register_principal_cache_events
+    register_principal_cache_events()
+    
+    # Keep the student module catalog cache in sync with assignments and attempts
+    from services.module_catalog_service import register_catalog_cache_events
+    register_catalog_cache_events()
+    
+    # Publish quiz and result events to /api/events subscribers once their transaction commits
+    from services.event_hub import event_hub, register_event_hub_events
+    event_hub.configure(app.config)
+    register_event_hub_events()
+    
+    # Per-request query counts, database time and the slow-query log
+    from utils.profiler import init_profiler
+    with app.app_context():
+        init_profiler(app, db.engine)
     
     # Create database tables with improved error handling
     with app.app_context():
         # Import all models to ensure they're registered with SQLAlchemy
         from models.UserModel import User, Student, Professor
         from models.QuizModel import Quiz, Question
-        from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel
+        from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel, TopicKnowledgeState
         from models.ModuleModel import Module
+        from models.AnalyticsModel import StudentAnalytics
         
         # Database initialization with retry logic
         max_retries = 5
@@ -106,4 +139,72 @@ def create_app():
             })
         return jsonify({'routes': routes})
     
+    # Statistics routes below expose file paths and usage counters, so only professors may read them
+    from functools import wraps
+    from utils.jwt_utils import principal_required
+    
+    def professor_debug_route(f):
+        @wraps(f)
+        @principal_required
+        def decorated(current_user, *args, **kwargs):
+            if current_user.user_type != 'professor':
+                return jsonify({'message': 'Not authorized'}), 403
+            return f(*args, **kwargs)
+        return decorated
+    
+    # Debug route for the loaded ML model version and usage counters
+    @app.route('/debug/ml-model')
+    @professor_debug_route
+    def ml_model_stats():
+        from services.model_registry import model_registry
+        return jsonify({'model': model_registry.stats()})
+    
+    # Per-endpoint query statistics and recent slow queries
+    @app.route('/debug/perf', methods=['GET', 'DELETE'])
+    @professor_debug_route
+    def perf_stats():
+        from utils.profiler import profiler
+        if request.method == 'DELETE':
+            profiler.reset()
+            return jsonify({'message': 'Performance statistics reset'}), 200
+        
+        sort = request.args.get('sort', 'db_ms')
+        limit = request.args.get('limit', type=int)
+        return jsonify({'perf': profiler.stats(sort=sort, limit=limit)}), 200
+    
+    # Debug route for the background job queue
+    @app.route('/debug/jobs')
+    @professor_debug_route
+    def job_queue_stats():
+        from services.job_queue import batch_job_queue, job_queue
+        return jsonify({'jobs': job_queue.stats(), 'batch_jobs': batch_job_queue.stats()})
+    
+    # Debug route for the token -> principal cache
+    @app.route('/debug/auth-cache')
+    @professor_debug_route
+    def auth_cache_stats():
+        from utils.jwt_utils import principal_cache
+        return jsonify({'auth_cache': principal_cache.stats()})
+    
+    # Debug route for the student module catalog cache
+    @app.route('/debug/catalog-cache')
+    @professor_debug_route
+    def catalog_cache_stats():
+        from services.module_catalog_service import catalog_cache
+        return jsonify({'catalog_cache': catalog_cache.stats()})
+    
+    # Debug route for the per-quiz question payload cache
+    @app.route('/debug/question-cache')
+    @professor_debug_route
+    def question_cache_stats():
+        from services.question_payload_service import question_payload_cache
+        return jsonify({'question_cache': question_payload_cache.stats()})
+    
+    # Debug route for the server-sent event hub
+    @app.route('/debug/events')
+    @professor_debug_route
+    def event_hub_stats():
+        from services.event_hub import event_hub
+        return jsonify({'events': event_hub.stats()})
+    
     return app
\ No newline at end of file
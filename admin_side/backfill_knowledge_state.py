@@ -0,0 +1,73 @@
+import argparse
+from app import create_app, db
+from models.ProgressModel import StudentQuiz, TopicKnowledgeState
+from services.job_queue import job_queue
+from services.ml_service import (
+    find_unreconciled_students, get_completed_quiz_stats, rebuild_topic_knowledge_states, reconcile_knowledge_levels
+)
+
+app = create_app()
+
+BATCH_SIZE = 200
+
+def backfill_knowledge_state():
+    """Build the running topic sums for every student from their full quiz history"""
+    with app.app_context():
+        try:
+            # Create the topic_knowledge_states table if it doesn't exist yet
+            TopicKnowledgeState.__table__.create(db.engine, checkfirst=True)
+            
+            student_ids = [
+                row[0] for row in db.session.query(StudentQuiz.student_id)
+                .filter(StudentQuiz.status == 'completed')
+                .distinct()
+                .order_by(StudentQuiz.student_id)
+            ]
+            print(f"Backfilling running sums for {len(student_ids)} students...")
+            
+            for start in range(0, len(student_ids), BATCH_SIZE):
+                batch = student_ids[start:start + BATCH_SIZE]
+                quiz_stats = get_completed_quiz_stats(batch)
+                
+                for student_id in batch:
+                    rebuild_topic_knowledge_states(student_id, quiz_stats.get(student_id))
+                
+                db.session.commit()
+                print(f"  {min(start + BATCH_SIZE, len(student_ids))}/{len(student_ids)} students done")
+            
+            print("Backfill completed successfully!")
+            
+        except Exception as e:
+            print(f"Backfill failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+def reconcile_knowledge_state():
+    """Rebuild the sums and levels of students with completed attempts whose update was lost"""
+    with app.app_context():
+        student_ids = find_unreconciled_students()
+        print(f"Found {len(student_ids)} students with completed attempts missing from their knowledge levels")
+        
+        failed = 0
+        for student_id in student_ids:
+            try:
+                reconcile_knowledge_levels(student_id)
+            except Exception as e:
+                print(f"  Student {student_id} failed: {str(e)}")
+                db.session.rollback()
+                failed += 1
+        
+        # Let the queued analytics refreshes finish before exiting
+        job_queue.join()
+        print(f"Reconciled {len(student_ids) - failed} students, {failed} failed")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or repair the running knowledge sums')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='only rebuild students whose sums miss a completed attempt (e.g. after a lost update)')
+    args = parser.parse_args()
+
+    if args.reconcile:
+        reconcile_knowledge_state()
+    else:
+        backfill_knowledge_state()
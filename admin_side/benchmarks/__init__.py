@@ -0,0 +1 @@
+# admin_side/benchmarks/__init__.py
@@ -0,0 +1,155 @@
+# admin_side/benchmarks/data.py
+"""
+Synthetic data for benchmarks: N students, M modules, K quizzes and an
+answer history, written with bulk inserts so large datasets load quickly.
+"""
+import csv
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app import db
+from models.UserModel import Student, Professor
+from models.ModuleModel import Module
+from models.QuizModel import Quiz, Question
+from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel
+from services.analytics_service import refresh_student_analytics
+
+TOPICS = ['Variables', 'Loops', 'Arrays', 'Functions', 'Recursion', 'Sorting', 'Objects', 'Testing']
+
+# Rows per INSERT statement
+INSERT_CHUNK_SIZE = 1000
+
+@dataclass
+class Dataset:
+    professor_id: int
+    student_ids: list
+    module_ids: list
+    quiz_ids: list
+    # {student_id: [quiz ids still to submit]}
+    pending: dict = field(default_factory=dict)
+    answers: int = 0
+
+def _insert(model, rows):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + INSERT_CHUNK_SIZE])
+
+def write_question_pool(path, per_topic=40, seed=0):
+    """Write a question pool CSV in the format of the real pool; returns the number of questions"""
+    rng = random.Random(seed)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['QID', 'Question Text', 'Answer 1', 'Answer 2', 'Answer 3', 'Answer 4',
+                         'Correct Answer', 'Question Weight', 'Topic'])
+        for topic in TOPICS:
+            for n in range(per_topic):
+                writer.writerow([f'{topic[:3].upper()}{n:04d}', f'{topic} question {n}: which statement is true?',
+                                 'The first option', 'The second option', 'The third option', 'None of these',
+                                 rng.randrange(4), rng.choice([1, 1.5, 2, 3]), topic])
+                count += 1
+    return count
+
+def generate_dataset(students=200, modules=5, quizzes=20, questions_per_quiz=10, history=0.6, seed=0):
+    """
+    Create a professor, students, modules and quizzes (every quiz assigned to
+    every student). A history fraction of the assignments are completed with
+    answers and knowledge levels; the rest stay open for submit benchmarks.
+    The analytics snapshot is refreshed at the end.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    professor = Professor(email='bench.professor@example.com', first_name='Bench', last_name='Professor')
+    db.session.add(professor)
+    db.session.flush()
+
+    student_objects = [
+        Student(email=f'bench.student{n}@example.com', first_name='Student', last_name=str(n),
+                student_id=f'BENCH{n:06d}', faculty='Computing', intake_no=str(20 + n % 4), academic_year='2026')
+        for n in range(students)
+    ]
+    db.session.add_all(student_objects)
+
+    module_objects = [Module(name=f'Module {n}', description=f'Benchmark module {n}', professor_id=professor.id)
+                      for n in range(modules)]
+    db.session.add_all(module_objects)
+    db.session.flush()
+
+    student_ids = [student.id for student in student_objects]
+    module_ids = [module.id for module in module_objects]
+
+    quiz_objects = [
+        Quiz(title=f'Quiz {n}', description=f'Benchmark quiz {n}', professor_id=professor.id,
+             module_id=module_ids[n % len(module_ids)] if module_ids else None,
+             start_time=now - timedelta(days=30), end_time=now + timedelta(days=30), duration_minutes=20)
+        for n in range(quizzes)
+    ]
+    db.session.add_all(quiz_objects)
+    db.session.flush()
+    quiz_ids = [quiz.id for quiz in quiz_objects]
+
+    # Questions, kept in memory for grading the history
+    question_rows = []
+    for quiz_id in quiz_ids:
+        for n in range(questions_per_quiz):
+            question_rows.append({
+                'quiz_id': quiz_id, 'text': f'Question {n} of quiz {quiz_id}', 'option_1': 'A', 'option_2': 'B',
+                'option_3': 'C', 'option_4': 'D', 'correct_answer': rng.randrange(4),
+                'weight': rng.choice([1.0, 1.5, 2.0]), 'topic': TOPICS[(quiz_id + n) % len(TOPICS)]
+            })
+    _insert(Question, question_rows)
+    questions = {}
+    for question in db.session.query(Question.id, Question.quiz_id, Question.correct_answer, Question.topic):
+        questions.setdefault(question.quiz_id, []).append(question)
+
+    # Assignments: completed history first, then the open ones
+    dataset = Dataset(professor.id, student_ids, module_ids, quiz_ids)
+    assignment_rows = []
+    for student_id in student_ids:
+        # Each student has an ability that drives their answers
+        for quiz_id in quiz_ids:
+            if rng.random() < history:
+                started = now - timedelta(days=rng.randrange(1, 30), minutes=rng.randrange(600))
+                assignment_rows.append({'student_id': student_id, 'quiz_id': quiz_id, 'status': 'completed',
+                                        'start_time': started, 'end_time': started + timedelta(minutes=15)})
+            else:
+                assignment_rows.append({'student_id': student_id, 'quiz_id': quiz_id, 'status': 'uncompleted'})
+                dataset.pending.setdefault(student_id, []).append(quiz_id)
+    _insert(StudentQuiz, assignment_rows)
+
+    ability = {student_id: rng.uniform(0.3, 0.95) for student_id in student_ids}
+    answer_rows = []
+    score_updates = []
+    topic_totals = {}
+    completed = db.session.query(StudentQuiz.id, StudentQuiz.student_id, StudentQuiz.quiz_id) \
+        .filter(StudentQuiz.status == 'completed')
+    for student_quiz_id, student_id, quiz_id in completed:
+        correct_count = 0
+        for question in questions.get(quiz_id, []):
+            is_correct = rng.random() < ability[student_id]
+            selected = question.correct_answer if is_correct else (question.correct_answer + rng.randrange(1, 4)) % 4
+            answer_rows.append({'student_quiz_id': student_quiz_id, 'question_id': question.id,
+                                'selected_option': selected, 'is_correct': is_correct})
+            correct_count += is_correct
+            totals = topic_totals.setdefault((student_id, question.topic), [0, 0])
+            totals[0] += is_correct
+            totals[1] += 1
+        total = len(questions.get(quiz_id, [])) or 1
+        score_updates.append({'id': student_quiz_id, 'score': correct_count / total * 100})
+    _insert(StudentAnswer, answer_rows)
+    # Bulk UPDATE by primary key
+    for start in range(0, len(score_updates), INSERT_CHUNK_SIZE):
+        db.session.execute(db.update(StudentQuiz), score_updates[start:start + INSERT_CHUNK_SIZE])
+    dataset.answers = len(answer_rows)
+
+    knowledge_rows = []
+    for (student_id, topic), (correct, answered) in topic_totals.items():
+        score = correct / answered
+        level = 'Low' if score < 0.5 else 'Normal' if score < 0.8 else 'High'
+        knowledge_rows.append({'student_id': student_id, 'topic': topic, 'score': score, 'level': level})
+    _insert(KnowledgeLevel, knowledge_rows)
+
+    refresh_student_analytics(student_ids)
+    db.session.commit()
+    return dataset
@@ -0,0 +1,283 @@
+# admin_side/benchmarks/load_test.py
+"""
+Endpoint load test against a synthetic dataset in an embedded SQLite database.
+
+    python -m benchmarks.load_test [--students 200] [--quizzes 20] [--requests 200] [--concurrency 8]
+    python -m benchmarks.load_test --update-baseline
+
+Each scenario drives one endpoint through the Flask test client from
+--concurrency threads and reports latency percentiles and the query count
+per request (from the profiler's Server-Timing header). The report is
+compared with benchmarks/baseline.json; the run exits with status 1 when a
+scenario is slower or issues more queries than the baseline allows.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Allowed growth over the baseline before a run fails (0.5 = 50% slower)
+DEFAULT_BUDGET = {'latency': 0.5, 'queries': 0.1}
+# Latencies this close to the baseline never count as a regression (timer noise)
+LATENCY_SLACK_MS = 2.0
+
+_SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+class LoadTestContext:
+    """Dataset, tokens and the queue of assignments left to submit"""
+
+    def __init__(self, dataset, professor_token, student_tokens, quiz_questions):
+        self.dataset = dataset
+        self.professor_token = professor_token
+        self.student_tokens = student_tokens
+        self.quiz_questions = quiz_questions
+        self.pending = deque(
+            (student_id, quiz_id)
+            for student_id, quiz_ids in sorted(dataset.pending.items())
+            for quiz_id in quiz_ids
+        )
+        self._local = threading.local()
+
+    def rng(self):
+        if not hasattr(self._local, 'rng'):
+            self._local.rng = random.Random(threading.get_ident())
+        return self._local.rng
+
+# Scenarios: each builds one request as (method, path, token, json body)
+
+def submit_request(context):
+    try:
+        student_id, quiz_id = context.pending.popleft()
+    except IndexError:
+        raise RuntimeError("No assignments left to submit; generate more students or quizzes") from None
+    rng = context.rng()
+    answers = [{'question_id': question_id, 'selected_option': rng.randrange(4)}
+               for question_id in context.quiz_questions[quiz_id]]
+    return 'POST', f'/api/students/quizzes/{quiz_id}/submit', context.student_tokens[student_id], {'answers': answers}
+
+def results_request(context):
+    quiz_id = context.rng().choice(context.dataset.quiz_ids)
+    return 'GET', f'/api/quizzes/{quiz_id}/results', context.professor_token, None
+
+def analytics_request(context):
+    return 'GET', '/api/professors/analytics/students?per_page=50', context.professor_token, None
+
+def modules_request(context):
+    student_id = context.rng().choice(context.dataset.student_ids)
+    return 'GET', '/api/modules/available', context.student_tokens[student_id], None
+
+def generate_request(context):
+    student_id = context.rng().choice(context.dataset.student_ids)
+    body = {'student_id': student_id, 'title': 'Benchmark quiz', 'num_questions': 15}
+    return 'POST', '/api/quizzes/generate', context.professor_token, body
+
+SCENARIOS = {
+    'submit': submit_request,
+    'results': results_request,
+    'analytics': analytics_request,
+    'modules': modules_request,
+    'generate': generate_request
+}
+
+def prepare(app, students=200, modules=5, quizzes=20, questions_per_quiz=10, history=0.6, seed=0):
+    """Recreate the database with a synthetic dataset and return a LoadTestContext"""
+    from app import db
+    from models.QuizModel import Question
+    from utils.jwt_utils import generate_token
+    from benchmarks.data import generate_dataset, write_question_pool
+
+    # Quiz generation draws from a synthetic pool next to the database
+    pool_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'question_pool.csv')
+    write_question_pool(pool_path, seed=seed)
+    app.config['QUESTION_POOL_PATH'] = pool_path
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        dataset = generate_dataset(students, modules, quizzes, questions_per_quiz, history, seed)
+
+        quiz_questions = {}
+        for question_id, quiz_id in db.session.query(Question.id, Question.quiz_id).order_by(Question.id):
+            quiz_questions.setdefault(quiz_id, []).append(question_id)
+
+        professor_token = generate_token(dataset.professor_id, 'professor')
+        student_tokens = {student_id: generate_token(student_id, 'student') for student_id in dataset.student_ids}
+        db.session.remove()
+
+    return LoadTestContext(dataset, professor_token, student_tokens, quiz_questions)
+
+def summarize(latencies_ms, queries, errors):
+    latencies = np.asarray(latencies_ms, dtype=np.float64)
+    query_counts = np.asarray(queries, dtype=np.float64)
+    return {
+        'requests': int(latencies.size),
+        'errors': errors,
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'mean_queries': round(float(query_counts.mean()), 2) if query_counts.size else None,
+        'max_queries': int(query_counts.max()) if query_counts.size else None
+    }
+
+def run_scenario(app, context, name, requests=200, concurrency=8, warmup=10):
+    """Send requests for one scenario from concurrency threads; returns its summary"""
+    build_request = SCENARIOS[name]
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, queries, errors = [], [], []
+
+    def send(record):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        method, path, token, body = build_request(context)
+
+        started = time.perf_counter()
+        response = local.client.open(path, method=method, json=body, headers={'Authorization': f'Bearer {token}'})
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if not record:
+            return
+        match = _SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+        with lock:
+            latencies.append(elapsed_ms)
+            if match:
+                queries.append(int(match.group(1)))
+            if response.status_code >= 400:
+                errors.append(f"{method} {path}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Warm caches and connections before measuring
+        list(executor.map(send, [False] * warmup))
+        list(executor.map(send, [True] * requests))
+
+    summary = summarize(latencies, queries, len(errors))
+    if errors:
+        summary['first_error'] = errors[0]
+    return summary
+
+def compare(report, baseline, budget=None):
+    """Regressions of a report against a baseline, as human-readable strings"""
+    budget = {**DEFAULT_BUDGET, **baseline.get('budget', {}), **(budget or {})}
+    regressions = []
+
+    for name, current in report['scenarios'].items():
+        if current['errors']:
+            regressions.append(f"{name}: {current['errors']} failed requests ({current.get('first_error')})")
+
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+
+        for metric in ('p50_ms', 'p90_ms', 'p99_ms'):
+            allowed = previous[metric] * (1 + budget['latency']) + LATENCY_SLACK_MS
+            if current[metric] > allowed:
+                regressions.append(f"{name}: {metric} {current[metric]} > {allowed:.3f} (baseline {previous[metric]})")
+
+        for metric in ('mean_queries', 'max_queries'):
+            if previous.get(metric) is None or current.get(metric) is None:
+                continue
+            allowed = previous[metric] * (1 + budget['queries'])
+            if current[metric] > allowed:
+                regressions.append(f"{name}: {metric} {current[metric]} > {allowed:.2f} (baseline {previous[metric]})")
+
+    return regressions
+
+def run(scenarios=None, students=200, modules=5, quizzes=20, questions_per_quiz=10, history=0.6,
+        requests=200, concurrency=8, warmup=10, seed=0, config_object='config.BenchmarkConfig'):
+    """Build the dataset and run each scenario; returns the report"""
+    from app import create_app
+
+    app = create_app(config_object)
+    context = prepare(app, students, modules, quizzes, questions_per_quiz, history, seed)
+
+    report = {
+        'settings': {
+            'students': students, 'modules': modules, 'quizzes': quizzes,
+            'questions_per_quiz': questions_per_quiz, 'history': history,
+            'requests': requests, 'concurrency': concurrency, 'seed': seed,
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0]
+        },
+        'scenarios': {}
+    }
+    for name in scenarios or SCENARIOS:
+        report['scenarios'][name] = run_scenario(app, context, name, requests, concurrency, warmup)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable; default: all)')
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--modules', type=int, default=5)
+    parser.add_argument('--quizzes', type=int, default=20)
+    parser.add_argument('--questions-per-quiz', type=int, default=10)
+    parser.add_argument('--history', type=float, default=0.6, help='Fraction of assignments already completed')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config', default='config.BenchmarkConfig')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--latency-budget', type=float, help='Allowed latency growth, e.g. 0.5 for 50%%')
+    parser.add_argument('--query-budget', type=float, help='Allowed query count growth')
+    parser.add_argument('--output', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.scenario, args.students, args.modules, args.quizzes, args.questions_per_quiz, args.history,
+                 args.requests, args.concurrency, args.warmup, args.seed, args.config)
+
+    print(f"{'scenario':<10} {'requests':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'queries':>8} {'errors':>7}")
+    for name, summary in report['scenarios'].items():
+        print(f"{name:<10} {summary['requests']:>8} {summary['p50_ms']:>9.2f} {summary['p90_ms']:>9.2f} "
+              f"{summary['p99_ms']:>9.2f} {summary['max_ms']:>9.2f} {summary['mean_queries']!s:>8} {summary['errors']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    budget = {}
+    if args.latency_budget is not None:
+        budget['latency'] = args.latency_budget
+    if args.query_budget is not None:
+        budget['queries'] = args.query_budget
+
+    if args.update_baseline:
+        previous_budget = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                previous_budget = json.load(file).get('budget', {})
+        with open(args.baseline, 'w') as file:
+            json.dump({**report, 'budget': {**DEFAULT_BUDGET, **previous_budget, **budget}}, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get('settings') != report['settings']:
+        print("Warning: baseline was recorded with different settings")
+
+    regressions = compare(report, baseline, budget)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# admin_side/benchmarks/serialization.py
+"""
+Serialization time and bytes on the wire for our largest JSON payloads.
+
+    python -m benchmarks.serialization [--students 300] [--repeat 20]
+
+Payloads are synthetic but shaped like the real endpoints, with datetime
+objects left for the JSON provider to serialize.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from utils.compression import available_encodings, compress
+from utils.json_provider import OrjsonJSONProvider, StdlibJSONProvider, orjson
+
+def quiz_results_payload(students, questions=20):
+    """GET /api/quizzes/<id>/results for a professor"""
+    started = datetime(2026, 3, 1, 9, 0)
+    return {
+        'quiz': {'id': 1, 'title': 'Loops and Arrays', 'total_questions': questions},
+        'results': [
+            {
+                'student': {'id': s, 'name': f'Student {s}', 'email': f's{s}@example.com', 'student_id': f'IT{s:06d}'},
+                'attempt': {'id': s, 'status': 'completed', 'start_time': started,
+                            'end_time': started + timedelta(minutes=18), 'score_percentage': 72.5},
+                'questions': [
+                    {
+                        'question_id': q, 'question_text': f'What does snippet {q} print?', 'question_topic': 'Loops',
+                        'question_weight': 1.5, 'options': ['1', '2', '3', 'None of the above'],
+                        'correct_answer': q % 4, 'student_answer': (q + s) % 4, 'is_correct': (q + s) % 4 == q % 4,
+                        'points_earned': 1.5, 'answered_at': started + timedelta(seconds=50 * q)
+                    }
+                    for q in range(questions)
+                ]
+            }
+            for s in range(students)
+        ]
+    }
+
+def student_analytics_payload(students):
+    """GET /api/professors/analytics/students"""
+    refreshed = datetime(2026, 3, 1, 12, 0)
+    return {
+        'students': [
+            {
+                'student_id': s,
+                'student_info': {'first_name': 'Student', 'last_name': str(s), 'email': f's{s}@example.com',
+                                 'student_id': f'IT{s:06d}', 'registration_date': refreshed - timedelta(days=s % 300)},
+                'overall_level': 'Normal', 'overall_score': 0.64, 'completed_quizzes': 12, 'average_score': 68.2,
+                'topic_knowledge': [
+                    {'topic': f'Topic {t}', 'score': 0.5 + t / 40, 'level': 'Normal', 'updated_at': refreshed}
+                    for t in range(8)
+                ],
+                'refreshed_at': refreshed
+            }
+            for s in range(students * 4)
+        ],
+        'generated_at': refreshed
+    }
+
+def incorrect_answer_feed_payload(rows=500):
+    """GET /api/students/quiz-results, one full page"""
+    completed = datetime(2026, 3, 1, 9, 0)
+    return {
+        'incorrect_answers': [
+            {
+                'quiz_id': r // 10, 'quiz_title': f'Quiz {r // 10}', 'quiz_completed_at': completed - timedelta(days=r // 10),
+                'quiz_score': 55.0, 'module_name': 'Programming Fundamentals', 'question_id': r,
+                'question_text': f'Which statement about recursion case {r} is true?', 'question_topic': 'Recursion',
+                'question_weight': 2.0, 'options': ['A base case is optional', 'It always terminates', 'Each call gets a frame', 'None'],
+                'correct_answer': 2, 'student_answer': 0, 'answered_at': completed, 'points_lost': 2.0
+            }
+            for r in range(rows)
+        ],
+        'pagination': {'limit': rows, 'next_cursor': 'WyIyMDI2LTAzLTAxVDA5OjAwOjAwIiwgMSwgMl0', 'has_more': True}
+    }
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def run(students=300, repeat=20):
+    app = Flask(__name__)
+    providers = {'stdlib': StdlibJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonJSONProvider(app)
+
+    payloads = {
+        'quiz results': quiz_results_payload(students),
+        'analytics/students': student_analytics_payload(students),
+        'incorrect-answer feed': incorrect_answer_feed_payload()
+    }
+
+    results = []
+    for name, payload in payloads.items():
+        row = {'payload': name}
+        for provider_name, provider in providers.items():
+            row[f'{provider_name}_ms'] = round(best_of(repeat, lambda: provider.response(payload).get_data()), 2)
+
+        body = providers['stdlib'].response(payload).get_data()
+        row['identity_bytes'] = len(body)
+        for encoding in available_encodings():
+            row[f'{encoding}_bytes'] = len(compress(body, encoding))
+        results.append(row)
+
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='JSON serialization and compression benchmark')
+    parser.add_argument('--students', type=int, default=300, help='students in the generated payloads')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    results = run(args.students, args.repeat)
+    columns = list(results[0].keys())
+    print('  '.join(f'{column:>22}' for column in columns))
+    for row in results:
+        print('  '.join(f'{row[column]!s:>22}' for column in columns))
@@ -0,0 +1,166 @@
+# admin_side/benchmarks/sse_load_test.py
+"""
+Database load of idle clients that poll compared with clients that subscribe
+to /api/events.
+
+    python -m benchmarks.sse_load_test [--clients 1000] [--rounds 4] [--events 3]
+
+Every client is a student with a quiz list to keep fresh. Each round stands
+for one polling interval: the polling clients each fetch their quiz list,
+while the subscribed clients stay connected, the transition watcher runs its
+one check and a few events are published and read from every stream. SQL
+statements are counted on the engine for both phases. The run exits with
+status 1 when subscribing does not cut the statements by --min-reduction.
+"""
+import argparse
+import json
+import sys
+import time
+from sqlalchemy import event
+
+def count_statements(engine):
+    """A list that grows by one entry per statement until the returned stop() is called"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements, lambda: event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def run_polling(app, context, rounds):
+    """Every client fetches its quiz list once per round"""
+    from app import db
+
+    client = app.test_client()
+    errors = 0
+    with app.app_context():
+        statements, stop = count_statements(db.engine)
+    started = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            for token in context.student_tokens.values():
+                response = client.get('/api/students/quizzes', headers={'Authorization': f'Bearer {token}'})
+                errors += response.status_code >= 400
+    finally:
+        stop()
+    requests = rounds * len(context.student_tokens)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'queries': len(statements),
+        'queries_per_round': round(len(statements) / rounds, 1),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def run_subscribed(app, context, rounds, events):
+    """Every client holds an event stream; each round runs one transition check and publishes events"""
+    from app import db
+    from services.event_hub import event_hub
+    from services.quiz_events import publish_quiz_transitions
+    from utils.timezone_utils import get_ist_datetime_for_db
+
+    client = app.test_client()
+    student_ids = list(context.student_tokens)
+    with app.app_context():
+        statements, stop = count_statements(db.engine)
+    started = time.perf_counter()
+    streams = []
+    try:
+        for token in context.student_tokens.values():
+            response = client.get('/api/events', buffered=False, headers={'Authorization': f'Bearer {token}'})
+            if response.status_code != 200:
+                raise RuntimeError(f"Subscribing failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+            chunks = iter(response.response)
+            next(chunks)  # retry: interval
+            streams.append((response, chunks))
+        connect_queries = len(statements)
+
+        delivered = 0
+        since = get_ist_datetime_for_db()
+        for _ in range(rounds):
+            with app.app_context():
+                now = get_ist_datetime_for_db()
+                publish_quiz_transitions(since, now)
+                db.session.remove()
+                since = now
+            for number in range(events):
+                event_hub.publish('quiz.availability_changed', {'quiz_id': number}, user_ids=student_ids)
+            # Reading the streams must not touch the database
+            for _, chunks in streams:
+                for _ in range(events):
+                    delivered += next(chunks).startswith(b'id: ')
+    finally:
+        for response, _ in streams:
+            response.close()
+        stop()
+
+    return {
+        'subscribers': len(streams),
+        'connect_queries': connect_queries,
+        'queries': len(statements),
+        'queries_per_round': round((len(statements) - connect_queries) / rounds, 1),
+        'events_delivered': delivered,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+def run(clients=1000, rounds=4, events=3, quizzes=10, seed=0, config_object='config.BenchmarkConfig'):
+    """Build the dataset, run both phases and return the report"""
+    from app import create_app
+    from services.event_hub import event_hub
+    from benchmarks.load_test import prepare
+
+    app = create_app(config_object)
+    # The benchmark drives the transition checks itself, one per round
+    app.config.update(
+        EVENTS_TRANSITIONS_ENABLED=False,
+        EVENTS_MAX_SUBSCRIBERS=max(clients, app.config.get('EVENTS_MAX_SUBSCRIBERS', 0)),
+        EVENTS_QUEUE_SIZE=max(events, app.config.get('EVENTS_QUEUE_SIZE', 0))
+    )
+    event_hub.configure(app.config)
+    context = prepare(app, students=clients, modules=2, quizzes=quizzes, questions_per_quiz=3, history=0.5, seed=seed)
+
+    polling = run_polling(app, context, rounds)
+    subscribed = run_subscribed(app, context, rounds, events)
+    return {
+        'settings': {'clients': clients, 'rounds': rounds, 'events': events, 'quizzes': quizzes, 'seed': seed},
+        'polling': polling,
+        'subscribed': subscribed,
+        'reduction': round(1 - subscribed['queries'] / polling['queries'], 4) if polling['queries'] else None
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=4, help='Polling intervals to simulate')
+    parser.add_argument('--events', type=int, default=3, help='Events published to every client per round')
+    parser.add_argument('--quizzes', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--config', default='config.BenchmarkConfig')
+    parser.add_argument('--min-reduction', type=float, default=0.9, help='Required drop in statements, e.g. 0.9 for 90%%')
+    parser.add_argument('--output', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args.clients, args.rounds, args.events, args.quizzes, args.seed, args.config)
+    polling, subscribed = report['polling'], report['subscribed']
+
+    print(f"{'clients':<11} {'queries':>8} {'per round':>10} {'seconds':>8}")
+    print(f"{'polling':<11} {polling['queries']:>8} {polling['queries_per_round']:>10} {polling['seconds']:>8}")
+    print(f"{'subscribed':<11} {subscribed['queries']:>8} {subscribed['queries_per_round']:>10} {subscribed['seconds']:>8}")
+    print(f"Subscribing issued {subscribed['connect_queries']} statements to connect and delivered "
+          f"{subscribed['events_delivered']} events; statements down {report['reduction']:.1%}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if polling['errors']:
+        print(f"{polling['errors']} polling requests failed")
+        return 1
+    if report['reduction'] is None or report['reduction'] < args.min_reduction:
+        print(f"Statements dropped by less than {args.min_reduction:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -33,4 +33,106 @@ class Config:
     
     SECRET_KEY = os.getenv('SECRET_KEY')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
-    JWT_ACCESS_TOKEN_EXPIRES = 86400
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = 86400
+    
+    # Verified token -> principal cache (seconds, entries)
+    AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', 300))
+    AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', 10000))
+    
+    # Per-student module catalog cache (seconds, entries)
+    MODULE_CATALOG_CACHE_TTL = int(os.getenv('MODULE_CATALOG_CACHE_TTL', 300))
+    MODULE_CATALOG_CACHE_SIZE = int(os.getenv('MODULE_CATALOG_CACHE_SIZE', 5000))
+    
+    # Per-quiz question payload cache (seconds, entries)
+    QUESTION_PAYLOAD_CACHE_TTL = int(os.getenv('QUESTION_PAYLOAD_CACHE_TTL', 3600))
+    QUESTION_PAYLOAD_CACHE_SIZE = int(os.getenv('QUESTION_PAYLOAD_CACHE_SIZE', 1000))
+    
+    # Question pool CSV (loaded once per process, reloaded when the file changes)
+    QUESTION_POOL_PATH = os.getenv('QUESTION_POOL_PATH')
+    
+    # Background jobs (knowledge level updates after quiz submission)
+    JOB_QUEUE_ASYNC = os.getenv('JOB_QUEUE_ASYNC', 'true').lower() == 'true'
+    JOB_QUEUE_WORKERS = int(os.getenv('JOB_QUEUE_WORKERS', 4))
+    # Seconds before a failed job is retried, times the attempt number
+    JOB_QUEUE_RETRY_DELAY = float(os.getenv('JOB_QUEUE_RETRY_DELAY', 1.0))
+    # Separate workers for long batch jobs (cohort quiz generation)
+    BATCH_JOB_QUEUE_WORKERS = int(os.getenv('BATCH_JOB_QUEUE_WORKERS', 1))
+    
+    # JSON provider: 'orjson' (falls back to 'stdlib' if not installed), 'stdlib' or an import path
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    JSON_SORT_KEYS = os.getenv('JSON_SORT_KEYS', 'true').lower() == 'true'
+    
+    # Negotiated gzip / brotli compression of responses of at least COMPRESS_MIN_SIZE bytes
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    
+    # Query profiler: per-endpoint statistics at /debug/perf and a log of statements slower than
+    # PERF_SLOW_QUERY_MS; PERF_EXPLAIN_SLOW_QUERIES also captures their query plan
+    PERF_ENABLED = os.getenv('PERF_ENABLED', 'true').lower() == 'true'
+    PERF_SLOW_QUERY_MS = float(os.getenv('PERF_SLOW_QUERY_MS', 100))
+    PERF_EXPLAIN_SLOW_QUERIES = os.getenv('PERF_EXPLAIN_SLOW_QUERIES', 'false').lower() == 'true'
+    PERF_SLOW_QUERY_LOG_SIZE = int(os.getenv('PERF_SLOW_QUERY_LOG_SIZE', 200))
+    
+    # Tracing: default level, per-subsystem levels ('quiz=DEBUG,api=WARNING') and sample rates for
+    # records below WARNING ('quiz=0.01'). Records are written by a background thread unless TRACE_ASYNC is off
+    TRACE_LEVEL = os.getenv('TRACE_LEVEL', 'INFO')
+    TRACE_LEVELS = os.getenv('TRACE_LEVELS', '')
+    TRACE_SAMPLE_RATES = os.getenv('TRACE_SAMPLE_RATES', '')
+    TRACE_ASYNC = os.getenv('TRACE_ASYNC', 'true').lower() == 'true'
+    TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', 10000))
+    
+    # Worker processes for cohort quiz generation (1 selects in the job's own thread); kept small
+    # because each spawned worker is a fresh interpreter that imports the services
+    BATCH_QUIZ_WORKERS = int(os.getenv('BATCH_QUIZ_WORKERS', min(4, os.cpu_count() or 1)))
+    
+    # Server-sent events at /api/events: connection limits, the per-connection queue, events kept for
+    # Last-Event-ID replay, heartbeat and reconnect timing, and how often quiz windows are checked
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', 2000))
+    EVENTS_MAX_CONNECTIONS_PER_USER = int(os.getenv('EVENTS_MAX_CONNECTIONS_PER_USER', 5))
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_REPLAY_SIZE = int(os.getenv('EVENTS_REPLAY_SIZE', 500))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_MAX_CONNECTION_SECONDS = float(os.getenv('EVENTS_MAX_CONNECTION_SECONDS', 3600))
+    EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', 5000))
+    EVENTS_TRANSITIONS_ENABLED = os.getenv('EVENTS_TRANSITIONS_ENABLED', 'true').lower() == 'true'
+    EVENTS_TRANSITION_INTERVAL = float(os.getenv('EVENTS_TRANSITION_INTERVAL', 15))
+
+class TestConfig(Config):
+    """In-memory SQLite configuration for the test suite"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SECRET_KEY = 'test-secret-key'
+    JWT_SECRET_KEY = 'test-jwt-secret-key'
+    JOB_QUEUE_ASYNC = False
+    JOB_QUEUE_RETRY_DELAY = 0
+    BATCH_QUIZ_WORKERS = 1
+    TRACE_ASYNC = False
+    # Tests drive quiz transitions directly instead of through the watcher thread
+    EVENTS_TRANSITIONS_ENABLED = False
+    EVENTS_HEARTBEAT_SECONDS = 0.05
+
+class BenchmarkConfig(Config):
+    """File-backed SQLite configuration for the benchmark and load-test suite"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCHMARK_DATABASE_URL',
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'benchmark.db')
+    )
+    # Shared between the load-test threads; writers wait for the lock instead of failing
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'connect_args': {
+            'check_same_thread': False,
+            'timeout': 30
+        }
+    }
+    SECRET_KEY = 'benchmark-secret-key'
+    JWT_SECRET_KEY = 'benchmark-jwt-secret-key'
+    # Background work runs inside the request, so it is part of the measured latency
+    JOB_QUEUE_ASYNC = False
+    BATCH_QUIZ_WORKERS = 1
+    # Query counts come from the profiler's Server-Timing header; keep the slow-query log quiet
+    PERF_ENABLED = True
+    PERF_SLOW_QUERY_MS = float(os.getenv('PERF_SLOW_QUERY_MS', 1000))
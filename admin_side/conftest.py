@@ -0,0 +1,92 @@
+# admin_side/conftest.py
+import pytest
+from app import create_app, db
+from models.UserModel import Student, Professor
+from models.QuizModel import Quiz
+from models.ProgressModel import StudentQuiz
+
+def reset_process_caches():
+    """Empty every cache shared by the whole process, so no test sees another test's entries"""
+    from services.event_hub import event_hub
+    from services.model_registry import model_registry
+    from services.module_catalog_service import availability_cache, catalog_cache
+    from services.question_payload_service import question_payload_cache
+    from utils.csv_utils import invalidate_question_pool
+    from utils.jwt_utils import principal_cache
+    from utils.profiler import profiler
+
+    principal_cache.clear()
+    catalog_cache.clear()
+    availability_cache.clear()
+    question_payload_cache.clear()
+    model_registry.clear()
+    invalidate_question_pool()
+    profiler.reset()
+    event_hub.close_all()
+
+@pytest.fixture
+def app():
+    """Application backed by an in-memory SQLite database"""
+    app = create_app('config.TestConfig')
+    reset_process_caches()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+    reset_process_caches()
+
+@pytest.fixture
+def query_counter(app):
+    """Count the SQL statements executed while the fixture is active"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+# Shared factories; they flush so the rows have ids, and the caller commits
+
+def create_professor(number=1, **fields):
+    """Professor number n: prof@example.com for the first, prof<n>@example.com after that"""
+    email = 'prof@example.com' if number == 1 else f'prof{number}@example.com'
+    professor = Professor(**{'email': email, 'first_name': 'Test', 'last_name': 'Professor', **fields})
+    db.session.add(professor)
+    db.session.flush()
+    return professor
+
+def create_students(count=1, start=1, **fields):
+    """Students numbered start.. with emails student<n>@example.com and student ids TEST<nnn>"""
+    students = [
+        Student(**{
+            'email': f'student{number}@example.com',
+            'first_name': 'Test',
+            'last_name': 'Student',
+            'student_id': f'TEST{number:03d}',
+            **fields
+        })
+        for number in range(start, start + count)
+    ]
+    db.session.add_all(students)
+    db.session.flush()
+    return students
+
+def create_student(number=1, **fields):
+    return create_students(1, number, **fields)[0]
+
+def create_quiz(professor, title='Quiz', **fields):
+    quiz = Quiz(title=title, professor_id=professor.id, **fields)
+    db.session.add(quiz)
+    db.session.flush()
+    return quiz
+
+def create_attempts(quiz, students, status='uncompleted', **fields):
+    """Assign quiz to every student; returns the StudentQuiz rows in the same order"""
+    attempts = [StudentQuiz(student_id=student.id, quiz_id=quiz.id, status=status, **fields) for student in students]
+    db.session.add_all(attempts)
+    db.session.flush()
+    return attempts
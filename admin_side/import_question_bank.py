@@ -0,0 +1,30 @@
+from app import create_app, db
+from models.QuizModel import QuestionBankItem
+from services.question_bank_service import import_question_bank, link_existing_questions
+
+app = create_app()
+
+def run_import():
+    """Import the question pool into the bank once and link previously copied questions to it"""
+    with app.app_context():
+        try:
+            # Create the question_bank_items table if migrations have not been run yet
+            QuestionBankItem.__table__.create(db.engine, checkfirst=True)
+            
+            created = import_question_bank()
+            db.session.commit()
+            print(f"Imported {created} new question bank items")
+            
+            linked = link_existing_questions()
+            db.session.commit()
+            print(f"Linked {linked} existing quiz questions to the bank")
+            
+            print("Question bank import completed successfully!")
+            
+        except Exception as e:
+            print(f"Question bank import failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    run_import()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+from app import create_app, db
+from migrations.plans import core_queries
+from migrations.runner import get_applied_versions, run_migrations, verify_query_plans
+from migrations.versions import MIGRATIONS
+
+def show_status():
+    """Print every migration and whether it has been applied"""
+    applied = get_applied_versions(db.engine)
+    for migration in MIGRATIONS:
+        state = 'applied' if migration.version in applied else 'pending'
+        print(f"{migration.version}  {state:8}  {migration.description}")
+
+def migrate(target=None):
+    """Apply pending migrations; never drops tables or data"""
+    try:
+        applied = run_migrations(db.engine, MIGRATIONS, target=target)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Database schema is up to date")
+    except Exception as e:
+        print(f"Migration failed: {str(e)}")
+        raise
+
+def verify():
+    """EXPLAIN the core queries; returns False if any does a full scan"""
+    problems = verify_query_plans(db.engine, core_queries())
+    for problem in problems:
+        print(f"Full scan in '{problem['query']}':")
+        for row in problem['plan']:
+            print(f"    {row}")
+    if not problems:
+        print("All core queries use an index")
+    return not problems
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Versioned database migrations')
+    parser.add_argument('--status', action='store_true', help='list migrations and exit')
+    parser.add_argument('--target', help='apply migrations up to this version')
+    parser.add_argument('--verify', action='store_true', help='EXPLAIN the core queries after migrating')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.status:
+            show_status()
+            sys.exit(0)
+
+        migrate(args.target)
+        if args.verify and not verify():
+            sys.exit(1)
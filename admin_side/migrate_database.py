@@ -69,3 +69,8 @@ def migrate_database():
 
 if __name__ == '__main__':
     migrate_database()
+    
+    # Later schema changes are versioned migrations (see migrate.py)
+    from migrate import migrate
+    with app.app_context():
+        migrate()
@@ -0,0 +1,2 @@
+# admin_side/migrations/__init__.py
+"""Versioned, non-destructive schema migrations (see migrate.py)"""
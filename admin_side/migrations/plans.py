@@ -0,0 +1,39 @@
+# admin_side/migrations/plans.py
+from datetime import datetime
+from sqlalchemy import select
+from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel, TopicKnowledgeState
+from models.QuizModel import Quiz, Question
+from services.availability_index import open_window_filter
+
+def core_queries():
+    """
+    The hottest read paths as (name, statement) pairs, with sample parameters.
+    verify_query_plans() fails if any of them scans a whole table.
+    """
+    return [
+        ('completed attempts of a student', select(StudentQuiz.id, StudentQuiz.end_time).where(
+            StudentQuiz.student_id == 1, StudentQuiz.status == 'completed'
+        ).order_by(StudentQuiz.end_time)),
+        ('completed attempts of a quiz', select(StudentQuiz.id).where(
+            StudentQuiz.quiz_id == 1, StudentQuiz.status == 'completed'
+        )),
+        ('assignment of a student to a quiz', select(StudentQuiz.id).where(
+            StudentQuiz.student_id == 1, StudentQuiz.quiz_id == 1
+        )),
+        ('answers of an attempt', select(StudentAnswer.question_id, StudentAnswer.is_correct).where(
+            StudentAnswer.student_quiz_id == 1
+        )),
+        ('answer to a question', select(StudentAnswer.id).where(
+            StudentAnswer.student_quiz_id == 1, StudentAnswer.question_id == 1
+        )),
+        ('knowledge level of a topic', select(KnowledgeLevel.score).where(
+            KnowledgeLevel.student_id == 1, KnowledgeLevel.topic == 'Loops'
+        )),
+        ('topic knowledge state of a student', select(TopicKnowledgeState.topic).where(
+            TopicKnowledgeState.student_id == 1
+        )),
+        ('questions of a quiz', select(Question.id, Question.correct_answer, Question.weight).where(
+            Question.quiz_id == 1
+        ).order_by(Question.id)),
+        ('open quizzes', select(Quiz.id).where(*open_window_filter(datetime(2026, 1, 1)))),
+    ]
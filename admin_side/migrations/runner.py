@@ -0,0 +1,165 @@
+# admin_side/migrations/runner.py
+import time
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Index, MetaData, String, Table, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+
+# Bookkeeping table, kept out of db.metadata so create_all() never touches it
+migration_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', migration_metadata,
+    Column('version', String(50), primary_key=True),
+    Column('description', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Float, nullable=False)
+)
+
+class Migration:
+    """
+    One versioned schema change. upgrade(connection) must be idempotent: a
+    database created by create_all() already has most of the schema, and a
+    failed run may have applied part of a migration.
+    """
+
+    def __init__(self, version, description, upgrade):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f'<Migration {self.version}: {self.description}>'
+
+def table_exists(connection, table_name):
+    return inspect(connection).has_table(table_name)
+
+def column_exists(connection, table_name, column_name):
+    return any(column['name'] == column_name for column in inspect(connection).get_columns(table_name))
+
+def index_exists(connection, table_name, index_name):
+    """True if the table has an index or unique constraint with this name"""
+    inspector = inspect(connection)
+    names = {index['name'] for index in inspector.get_indexes(table_name)}
+    names.update(constraint['name'] for constraint in inspector.get_unique_constraints(table_name))
+    return index_name in names
+
+def create_table(connection, table):
+    """Create a model's table (with its indexes) if it doesn't exist yet"""
+    table.create(connection, checkfirst=True)
+
+def add_column(connection, table_name, column_ddl):
+    """Add a column, e.g. add_column(conn, 'quizzes', 'module_id INT'), if it's missing"""
+    column_name = column_ddl.split()[0]
+    if not column_exists(connection, table_name, column_name):
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_ddl}'))
+
+def create_index(connection, index):
+    """
+    Create a model's index (or a unique key) without dropping or copying data.
+    On MySQL this is an in-place ALTER that keeps the table readable and
+    writable while the index is built.
+    """
+    table_name = index.table.name
+    if index_exists(connection, table_name, index.name):
+        return False
+
+    if connection.dialect.name == 'mysql':
+        columns = ', '.join(column.name for column in index.columns)
+        kind = 'UNIQUE INDEX' if index.unique else 'INDEX'
+        connection.execute(text(
+            f'ALTER TABLE {table_name} ADD {kind} {index.name} ({columns}), ALGORITHM=INPLACE, LOCK=NONE'
+        ))
+    else:
+        connection.execute(CreateIndex(index))
+    return True
+
+def unique_index(table, name, *columns):
+    """Index object for a unique key declared with UniqueConstraint on the model"""
+    return Index(name, *(table.c[column] for column in columns), unique=True)
+
+def delete_duplicates(connection, table_name, partition_columns, order_by='id'):
+    """
+    Delete all but the first row (by order_by) of every group of rows sharing
+    partition_columns, so a unique key can be added. Returns the deleted ids.
+    """
+    partition = ', '.join(partition_columns)
+    duplicate_ids = [row[0] for row in connection.execute(text(f"""
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {order_by}) AS row_number_in_group
+            FROM {table_name}
+        ) ranked
+        WHERE row_number_in_group > 1
+    """))]
+
+    for start in range(0, len(duplicate_ids), 1000):
+        chunk = ', '.join(str(int(i)) for i in duplicate_ids[start:start + 1000])
+        connection.execute(text(f'DELETE FROM {table_name} WHERE id IN ({chunk})'))
+
+    return duplicate_ids
+
+def ensure_migration_table(engine):
+    migration_metadata.create_all(engine, checkfirst=True)
+
+def get_applied_versions(engine):
+    """Versions already recorded in schema_migrations"""
+    ensure_migration_table(engine)
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(select(schema_migrations.c.version))}
+
+def get_pending_migrations(engine, migrations):
+    applied = get_applied_versions(engine)
+    return [migration for migration in migrations if migration.version not in applied]
+
+def run_migrations(engine, migrations, target=None, log=print):
+    """
+    Apply pending migrations in version order, each in its own transaction, and
+    record them in schema_migrations. Stops at target (inclusive) if given.
+    Returns the versions applied.
+    """
+    applied = []
+    for migration in sorted(get_pending_migrations(engine, migrations), key=lambda m: m.version):
+        if target is not None and migration.version > target:
+            break
+
+        log(f"Applying {migration.version}: {migration.description}...")
+        started = time.perf_counter()
+        # MySQL commits DDL implicitly, which is why every upgrade is idempotent
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.utcnow(),
+                duration_ms=round((time.perf_counter() - started) * 1000, 3)
+            ))
+        applied.append(migration.version)
+
+    return applied
+
+def _is_full_scan(dialect_name, plan_row):
+    """Whether one EXPLAIN row reads a whole table or index"""
+    if dialect_name == 'mysql':
+        # type ALL is a table scan, index is a full index scan
+        return plan_row.get('type') in ('ALL', 'index')
+    if dialect_name == 'sqlite':
+        # EXPLAIN QUERY PLAN detail: 'SEARCH t USING INDEX ...' is fine, 'SCAN t ...' is not
+        return str(plan_row.get('detail', '')).startswith('SCAN ')
+    return False
+
+def explain(connection, statement):
+    """Run EXPLAIN on a statement and return the plan rows as dicts"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    return [dict(row._mapping) for row in connection.execute(text(prefix + sql))]
+
+def verify_query_plans(engine, queries):
+    """
+    EXPLAIN each (name, statement) pair and return the problems found:
+    [{'query', 'plan'}] for every query that does a full table or index scan.
+    """
+    problems = []
+    with engine.connect() as connection:
+        for name, statement in queries:
+            plan = explain(connection, statement)
+            if any(_is_full_scan(connection.dialect.name, row) for row in plan):
+                problems.append({'query': name, 'plan': plan})
+    return problems
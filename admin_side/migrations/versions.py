@@ -0,0 +1,98 @@
+# admin_side/migrations/versions.py
+from sqlalchemy import inspect, text
+from migrations.runner import (
+    Migration, add_column, create_index, create_table, delete_duplicates, index_exists, unique_index
+)
+from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel, TopicKnowledgeState
+from models.QuizModel import Quiz, Question, QuestionBankItem
+from models.AnalyticsModel import StudentAnalytics
+
+def create_topic_knowledge_states(connection):
+    """Running time-decayed topic sums for incremental knowledge updates"""
+    create_table(connection, TopicKnowledgeState.__table__)
+
+def add_student_quiz_unique_key(connection):
+    """One assignment per (student, quiz), needed by the bulk INSERT IGNORE assignment"""
+    if index_exists(connection, 'student_quizzes', 'uq_student_quizzes_student_quiz'):
+        return
+
+    # Keep one row per (student, quiz): a completed attempt if there is one, else the oldest
+    duplicate_ids = [row[0] for row in connection.execute(text("""
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY student_id, quiz_id
+                ORDER BY CASE WHEN status = 'completed' THEN 0 ELSE 1 END, id
+            ) AS row_number_in_group
+            FROM student_quizzes
+        ) ranked
+        WHERE row_number_in_group > 1
+    """))]
+    for start in range(0, len(duplicate_ids), 1000):
+        chunk = ', '.join(str(int(i)) for i in duplicate_ids[start:start + 1000])
+        connection.execute(text(f"DELETE FROM student_answers WHERE student_quiz_id IN ({chunk})"))
+        connection.execute(text(f"DELETE FROM student_quizzes WHERE id IN ({chunk})"))
+
+    create_index(connection, unique_index(StudentQuiz.__table__, 'uq_student_quizzes_student_quiz', 'student_id', 'quiz_id'))
+
+def create_student_analytics(connection):
+    """Precomputed per-student analytics for the professor dashboard"""
+    create_table(connection, StudentAnalytics.__table__)
+
+def add_student_answer_unique_key(connection):
+    """One answer per (attempt, question), needed by the bulk answer upsert"""
+    if index_exists(connection, 'student_answers', 'uq_student_answers_attempt_question'):
+        return
+
+    # Keep the first answer per question, which is what results already show
+    delete_duplicates(connection, 'student_answers', ['student_quiz_id', 'question_id'])
+    create_index(connection, unique_index(StudentAnswer.__table__, 'uq_student_answers_attempt_question',
+                                          'student_quiz_id', 'question_id'))
+
+def add_composite_indexes(connection):
+    """Composite indexes for the hottest filters"""
+    for model, name in (
+        (StudentQuiz, 'ix_student_quizzes_student_status_end'),
+        (StudentQuiz, 'ix_student_quizzes_quiz_status'),
+        (KnowledgeLevel, 'ix_knowledge_levels_student_topic'),
+        (Question, 'ix_questions_quiz_id'),
+        (StudentAnalytics, 'ix_student_analytics_level_score'),
+    ):
+        index = next(index for index in model.__table__.indexes if index.name == name)
+        create_index(connection, index)
+
+def create_question_bank(connection):
+    """Shared question bank referenced by generated quizzes instead of copied content"""
+    create_table(connection, QuestionBankItem.__table__)
+    add_column(connection, 'questions', 'bank_item_id INTEGER NULL')
+    create_index(connection, next(index for index in Question.__table__.indexes if index.name == 'ix_questions_bank_item_id'))
+
+    if connection.dialect.name == 'mysql':
+        # Bank-linked questions leave their content columns empty
+        for column in ('text', 'option_1', 'option_2', 'option_3', 'option_4'):
+            connection.execute(text(f'ALTER TABLE questions MODIFY COLUMN {column} TEXT NULL'))
+        if not any(fk['name'] == 'fk_questions_bank_item_id' for fk in inspect(connection).get_foreign_keys('questions')):
+            connection.execute(text("""
+                ALTER TABLE questions 
+                ADD CONSTRAINT fk_questions_bank_item_id 
+                FOREIGN KEY (bank_item_id) REFERENCES question_bank_items(id)
+            """))
+
+def add_quiz_window_index(connection):
+    """Index on quiz availability windows for open-quiz lookups"""
+    create_index(connection, next(index for index in Quiz.__table__.indexes if index.name == 'ix_quizzes_window'))
+
+def add_applied_attempts(connection):
+    """Count of attempts in the running sums; existing rows start at 0 and are rebuilt on their next update"""
+    add_column(connection, 'topic_knowledge_states', 'applied_attempts INTEGER NOT NULL DEFAULT 0')
+
+# Applied in version order; never edit or reorder a migration once it has shipped
+MIGRATIONS = [
+    Migration('0001', 'Create topic_knowledge_states', create_topic_knowledge_states),
+    Migration('0002', 'Add unique key on student_quizzes (student_id, quiz_id)', add_student_quiz_unique_key),
+    Migration('0003', 'Create student_analytics', create_student_analytics),
+    Migration('0004', 'Add unique key on student_answers (student_quiz_id, question_id)', add_student_answer_unique_key),
+    Migration('0005', 'Add composite indexes for attempts, knowledge levels and questions', add_composite_indexes),
+    Migration('0006', 'Create question_bank_items and link questions to it', create_question_bank),
+    Migration('0007', 'Add availability window index on quizzes', add_quiz_window_index),
+    Migration('0008', 'Add applied_attempts to topic_knowledge_states', add_applied_attempts),
+]
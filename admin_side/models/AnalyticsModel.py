@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+from app import db
+
+class StudentAnalytics(db.Model):
+    """Precomputed per-student analytics for the professor dashboard"""
+    __tablename__ = 'student_analytics'
+    __table_args__ = (
+        db.Index('ix_student_analytics_level_score', 'level_priority', 'overall_score'),
+    )
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    overall_level = db.Column(db.String(20), nullable=False, default='No Data')  # 'Low', 'Normal', 'High', 'No Data'
+    level_priority = db.Column(db.Integer, nullable=False, default=0)  # High=3, Normal=2, Low=1, No Data=0
+    overall_score = db.Column(db.Float, nullable=False, default=0.0)
+    overall_updated_at = db.Column(db.DateTime)
+    completed_quizzes = db.Column(db.Integer, nullable=False, default=0)
+    average_score = db.Column(db.Float, nullable=False, default=0.0)
+    total_topics = db.Column(db.Integer, nullable=False, default=0)
+    strong_topics = db.Column(db.Integer, nullable=False, default=0)
+    developing_topics = db.Column(db.Integer, nullable=False, default=0)
+    weak_topics = db.Column(db.Integer, nullable=False, default=0)
+    topic_knowledge = db.Column(db.Text)  # JSON list of {topic, score, level, updated_at}
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'overall_knowledge': {
+                'level': self.overall_level,
+                'score': round(self.overall_score, 3) if self.overall_score else 0,
+                'updated_at': self.overall_updated_at.isoformat() if self.overall_updated_at else None
+            },
+            'topic_knowledge': json.loads(self.topic_knowledge) if self.topic_knowledge else [],
+            'quiz_statistics': {
+                'completed_quizzes': self.completed_quizzes,
+                'average_score': round(self.average_score, 2)
+            },
+            'knowledge_summary': {
+                'total_topics_assessed': self.total_topics,
+                'strong_topics': self.strong_topics,
+                'developing_topics': self.developing_topics,
+                'weak_topics': self.weak_topics
+            },
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
@@ -3,6 +3,13 @@ from app import db
 
 class StudentQuiz(db.Model):
     __tablename__ = 'student_quizzes'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'quiz_id', name='uq_student_quizzes_student_quiz'),
+        # A student's completed attempts in completion order
+        db.Index('ix_student_quizzes_student_status_end', 'student_id', 'status', 'end_time'),
+        # A quiz's completed attempts (results, item statistics)
+        db.Index('ix_student_quizzes_quiz_status', 'quiz_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -30,6 +37,9 @@ class StudentQuiz(db.Model):
 
 class StudentAnswer(db.Model):
     __tablename__ = 'student_answers'
+    __table_args__ = (
+        db.UniqueConstraint('student_quiz_id', 'question_id', name='uq_student_answers_attempt_question'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_quiz_id = db.Column(db.Integer, db.ForeignKey('student_quizzes.id'), nullable=False)
@@ -50,6 +60,9 @@ class StudentAnswer(db.Model):
 
 class KnowledgeLevel(db.Model):
     __tablename__ = 'knowledge_levels'
+    __table_args__ = (
+        db.Index('ix_knowledge_levels_student_topic', 'student_id', 'topic'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -66,4 +79,36 @@ class KnowledgeLevel(db.Model):
             'score': self.score,
             'level': self.level,
             'updated_at': self.updated_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class TopicKnowledgeState(db.Model):
+    """Running time-decayed answer sums per student and topic"""
+    __tablename__ = 'topic_knowledge_states'
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'topic', name='uq_topic_knowledge_states_student_topic'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    topic = db.Column(db.String(100), nullable=False)
+    weighted_correct = db.Column(db.Float, nullable=False, default=0.0)  # Decayed to last_update
+    weighted_total = db.Column(db.Float, nullable=False, default=0.0)  # Decayed to last_update
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    last_update = db.Column(db.DateTime, nullable=False)  # Quiz end time the sums are decayed to
+    applied_attempts = db.Column(db.Integer, nullable=False, default=0)  # Completed attempts folded into the sums
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'topic': self.topic,
+            'weighted_correct': self.weighted_correct,
+            'weighted_total': self.weighted_total,
+            'correct': self.correct,
+            'total': self.total,
+            'last_update': self.last_update.isoformat(),
+            'applied_attempts': self.applied_attempts,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
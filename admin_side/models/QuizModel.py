@@ -4,6 +4,10 @@ from app import db
 
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
+    __table_args__ = (
+        # Open quizzes: windows that have not ended yet, then by start
+        db.Index('ix_quizzes_window', 'end_time', 'start_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -41,39 +45,83 @@ class Quiz(db.Model):
             
         return result
 
-class Question(db.Model):
-    __tablename__ = 'questions'
+class QuestionBankItem(db.Model):
+    """A question of the shared pool, stored once and referenced by generated quizzes"""
+    __tablename__ = 'question_bank_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    source_qid = db.Column(db.String(50), nullable=False, unique=True)  # QID from the pool CSV
     text = db.Column(db.Text, nullable=False)
-    question_type = db.Column(db.String(50), default='multiple_choice')
     option_1 = db.Column(db.Text, nullable=False)
     option_2 = db.Column(db.Text, nullable=False)
     option_3 = db.Column(db.Text, nullable=False)
     option_4 = db.Column(db.Text, nullable=False)
+    correct_answer = db.Column(db.Integer, nullable=False)
+    explanation = db.Column(db.Text)
+    weight = db.Column(db.Float, default=1.0)
+    topic = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source_qid': self.source_qid,
+            'text': self.text,
+            'options': [opt for opt in (self.option_1, self.option_2, self.option_3, self.option_4) if opt.strip()],
+            'correct_answer': self.correct_answer,
+            'explanation': self.explanation,
+            'weight': self.weight,
+            'topic': self.topic
+        }
+
+class Question(db.Model):
+    __tablename__ = 'questions'
+    __table_args__ = (
+        # A quiz's questions in display order
+        db.Index('ix_questions_quiz_id', 'quiz_id', 'id'),
+        db.Index('ix_questions_bank_item_id', 'bank_item_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    # Content columns are NULL for questions linked to a bank item (see content)
+    text = db.Column(db.Text)
+    question_type = db.Column(db.String(50), default='multiple_choice')
+    option_1 = db.Column(db.Text)
+    option_2 = db.Column(db.Text)
+    option_3 = db.Column(db.Text)
+    option_4 = db.Column(db.Text)
     correct_answer = db.Column(db.Integer, nullable=False)  # 0, 1, 2, or 3 (0-based index)
     explanation = db.Column(db.Text)
     points = db.Column(db.Float, default=1.0)
     weight = db.Column(db.Float, default=1.0)
     topic = db.Column(db.String(100))
     source_qid = db.Column(db.String(50))  # Original QID from CSV
+    bank_item_id = db.Column(db.Integer, db.ForeignKey('question_bank_items.id'), nullable=True)
     
     # Relationships
     student_answers = db.relationship('StudentAnswer', backref='question', lazy=True, cascade="all, delete-orphan")
+    # Joined so loading questions never needs a query per bank item
+    bank_item = db.relationship('QuestionBankItem', lazy='joined')
+    
+    @property
+    def content(self):
+        """Where the text, options and explanation live: the bank item or the question itself"""
+        return self.bank_item if self.bank_item_id is not None else self
+    
+    @property
+    def options(self):
+        content = self.content
+        return [content.option_1, content.option_2, content.option_3, content.option_4]
     
     def to_dict(self, include_answer=False, include_metadata=True):
         result = {
             'id': self.id,
             'quiz_id': self.quiz_id,
-            'text': self.text,
+            'text': self.content.text,
             'question_type': self.question_type,
-            'options': [
-                self.option_1,
-                self.option_2,
-                self.option_3,
-                self.option_4
-            ],
+            'options': self.options,
             'topic': self.topic,
             'points': self.points
         }
@@ -81,7 +129,7 @@ class Question(db.Model):
         if include_answer:
             result.update({
                 'correct_answer': self.correct_answer,
-                'explanation': self.explanation,
+                'explanation': self.content.explanation,
                 'weight': self.weight,
                 'source_qid': self.source_qid
             })
@@ -89,6 +137,6 @@ class Question(db.Model):
         if include_metadata:
             # Filter out empty options for cleaner response
             result['options'] = [opt for opt in result['options'] if opt.strip()]
-            result['has_explanation'] = bool(self.explanation)
+            result['has_explanation'] = bool(self.content.explanation)
             
         return result
\ No newline at end of file
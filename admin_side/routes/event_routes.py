@@ -0,0 +1,76 @@
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
+from services.event_hub import SubscriptionLimitError, event_hub
+from services.quiz_events import transition_watcher
+from utils.jwt_utils import authenticate, get_request_token
+
+event_bp = Blueprint('events', __name__)
+
+def stream_events(subscription, missed, heartbeat_seconds, max_seconds, retry_ms):
+    """Server-sent event frames for one subscriber; unsubscribes when the client goes away"""
+    try:
+        # How long the browser waits before reconnecting
+        yield f'retry: {retry_ms}\n\n'
+        for event in missed:
+            yield event.frame
+        
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            event = subscription.get(timeout=heartbeat_seconds)
+            if subscription.closed:
+                break
+            # A comment line keeps proxies from closing an idle stream and reveals dead clients
+            yield event.frame if event is not None else ': heartbeat\n\n'
+    finally:
+        event_hub.unsubscribe(subscription)
+
+@event_bp.route('', methods=['GET'])
+def subscribe_events():
+    """
+    Subscribe to quiz, assignment, result and knowledge events as server-sent events.
+    EventSource can't send headers, so the token may also be passed as ?token=.
+    """
+    token = get_request_token() or request.args.get('token')
+    if not token:
+        return jsonify({'message': 'Token is missing'}), 401
+    
+    try:
+        principal, _ = authenticate(token)
+    except Exception as e:
+        return jsonify({'message': f'Token error: {str(e)}'}), 401
+    
+    # Browsers resend the last id they saw when reconnecting
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        return jsonify({'message': 'Last-Event-ID must be an integer'}), 400
+    
+    config = current_app.config
+    try:
+        subscription, missed = event_hub.subscribe(
+            principal.id,
+            principal.user_type,
+            max_queue=config.get('EVENTS_QUEUE_SIZE', 100),
+            last_event_id=last_event_id
+        )
+    except SubscriptionLimitError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    
+    if config.get('EVENTS_TRANSITIONS_ENABLED', True):
+        transition_watcher.start(current_app._get_current_object())
+    
+    # The generator never touches the database, so no connection is held while idle
+    response = Response(
+        stream_events(
+            subscription,
+            missed,
+            config.get('EVENTS_HEARTBEAT_SECONDS', 15),
+            config.get('EVENTS_MAX_CONNECTION_SECONDS', 3600),
+            config.get('EVENTS_RETRY_MS', 5000)
+        ),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from utils.jwt_utils import principal_required
+from services.job_queue import get_job
+
+job_bp = Blueprint('jobs', __name__)
+
+@job_bp.route('/<job_id>', methods=['GET'])
+@principal_required
+def get_job_status(current_user, job_id):
+    """Poll the status of a background job"""
+    job = get_job(job_id)
+    
+    # Students can only see their own jobs
+    if not job or (current_user.user_type != 'professor' and job.owner_id != current_user.id):
+        return jsonify({'message': 'Job not found'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
@@ -4,13 +4,23 @@ from models.QuizModel import Quiz, Question
 from models.ProgressModel import StudentQuiz, KnowledgeLevel
 from models.ModuleModel import Module
 from app import db
-from utils.jwt_utils import token_required
+from utils.jwt_utils import principal_required
+from services.assignment_service import assign_quiz, unassign_quiz
+from services.quiz_events import publish_availability_change
+from services.analytics_service import (
+    ANALYTICS_SORT_COLUMNS, get_overall_level_counts, get_student_analytics_page,
+    get_topic_distribution, refresh_missing_student_analytics, refresh_student_analytics
+)
+from services.question_payload_service import invalidate_question_payload
+from services.question_bank_service import get_bank_item_statistics
+from services.aggregation_service import aggregate_module_performance, empty_module_performance
 from datetime import datetime, timedelta
+from utils.timezone_utils import get_ist_datetime_for_db
 
 professor_bp = Blueprint('professor', __name__)
 
 @professor_bp.route('/<int:professor_id>', methods=['GET'])
-@token_required
+@principal_required
 def get_professor(current_user, professor_id):
     """Get a specific professor (professors only)"""
     if current_user.user_type != 'professor' and current_user.id != professor_id:
@@ -24,7 +34,7 @@ def get_professor(current_user, professor_id):
     return jsonify({'professor': professor.to_dict()}), 200
 
 @professor_bp.route('/<int:professor_id>/profile', methods=['PUT'])
-@token_required
+@principal_required
 def update_profile(current_user, professor_id):
     """Update a professor's profile"""
     # Authorization check
@@ -58,7 +68,7 @@ def update_profile(current_user, professor_id):
     }), 200
 
 @professor_bp.route('/dashboard', methods=['GET'])
-@token_required
+@principal_required
 def get_dashboard_data(current_user):
     """Get dashboard data for a professor"""
     if current_user.user_type != 'professor':
@@ -76,7 +86,7 @@ def get_dashboard_data(current_user):
     }), 200
 
 @professor_bp.route('/quizzes', methods=['GET'])
-@token_required
+@principal_required
 def get_professor_quizzes(current_user):
     """Get all quizzes created by the current professor"""
     if current_user.user_type != 'professor':
@@ -90,7 +100,7 @@ def get_professor_quizzes(current_user):
     }), 200
 
 @professor_bp.route('/quizzes', methods=['POST'])
-@token_required
+@principal_required
 def create_quiz(current_user):
     """Create a new quiz"""
     if current_user.user_type != 'professor':
@@ -182,7 +192,7 @@ def create_quiz(current_user):
         return jsonify({'message': f'Failed to create quiz: {str(e)}'}), 500
 
 @professor_bp.route('/quizzes/<int:quiz_id>', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_details(current_user, quiz_id):
     """Get detailed information about a specific quiz"""
     if current_user.user_type != 'professor':
@@ -203,7 +213,7 @@ def get_quiz_details(current_user, quiz_id):
     return jsonify({'quiz': quiz_data}), 200
 
 @professor_bp.route('/quizzes/<int:quiz_id>', methods=['PUT'])
-@token_required
+@principal_required
 def update_quiz(current_user, quiz_id):
     """Update an existing quiz"""
     if current_user.user_type != 'professor':
@@ -236,6 +246,9 @@ def update_quiz(current_user, quiz_id):
         
         db.session.commit()
         
+        # Cached question payloads carry the quiz title
+        invalidate_question_payload(quiz_id)
+        
         return jsonify({
             'message': 'Quiz updated successfully',
             'quiz': quiz.to_dict()
@@ -246,7 +259,7 @@ def update_quiz(current_user, quiz_id):
         return jsonify({'message': f'Failed to update quiz: {str(e)}'}), 500
 
 @professor_bp.route('/quizzes/<int:quiz_id>', methods=['DELETE'])
-@token_required
+@principal_required
 def delete_quiz(current_user, quiz_id):
     """Delete a quiz"""
     if current_user.user_type != 'professor':
@@ -264,6 +277,7 @@ def delete_quiz(current_user, quiz_id):
         # Delete the quiz (cascade will delete questions and student_quizzes)
         db.session.delete(quiz)
         db.session.commit()
+        invalidate_question_payload(quiz_id)
         
         return jsonify({'message': 'Quiz deleted successfully'}), 200
         
@@ -272,7 +286,7 @@ def delete_quiz(current_user, quiz_id):
         return jsonify({'message': f'Failed to delete quiz: {str(e)}'}), 500
 
 @professor_bp.route('/quizzes/<int:quiz_id>/availability', methods=['POST', 'PUT'])
-@token_required
+@principal_required
 def set_quiz_availability(current_user, quiz_id):
     """Set availability settings for a quiz"""
     if current_user.user_type != 'professor':
@@ -319,74 +333,25 @@ def set_quiz_availability(current_user, quiz_id):
         quiz.end_time = end_datetime
         quiz.duration_minutes = duration_minutes
         
-        # Clear existing assignments if deactivating
+        # Apply the student assignments as one set-based diff
         if not is_active:
-            existing_assignments = StudentQuiz.query.filter_by(
-                quiz_id=quiz_id,
-                status='uncompleted'
-            ).all()
-            for assignment in existing_assignments:
-                db.session.delete(assignment)
-        
-        # Handle student assignments based on target_type and is_active
-        if is_active:
-            if target_type == 'all':
-                # Assign quiz to all students
-                all_students = Student.query.all()
-                for student in all_students:
-                    # Check if student quiz already exists
-                    existing_sq = StudentQuiz.query.filter_by(
-                        student_id=student.id,
-                        quiz_id=quiz_id
-                    ).first()
-                    
-                    if not existing_sq:
-                        # Create new student quiz assignment
-                        student_quiz = StudentQuiz(
-                            student_id=student.id,
-                            quiz_id=quiz_id,
-                            status='uncompleted'
-                        )
-                        db.session.add(student_quiz)
-            
-            elif target_type == 'specific' and target_students:
-                # First, remove assignments for students not in the target list
-                existing_assignments = StudentQuiz.query.filter_by(
-                    quiz_id=quiz_id,
-                    status='uncompleted'
-                ).all()
-                
-                for assignment in existing_assignments:
-                    if assignment.student_id not in target_students:
-                        db.session.delete(assignment)
-                
-                # Then assign quiz to specific students
-                for student_id in target_students:
-                    # Verify student exists
-                    student = Student.query.get(student_id)
-                    if not student:
-                        continue
-                    
-                    # Check if student quiz already exists
-                    existing_sq = StudentQuiz.query.filter_by(
-                        student_id=student_id,
-                        quiz_id=quiz_id
-                    ).first()
-                    
-                    if not existing_sq:
-                        # Create new student quiz assignment
-                        student_quiz = StudentQuiz(
-                            student_id=student_id,
-                            quiz_id=quiz_id,
-                            status='uncompleted'
-                        )
-                        db.session.add(student_quiz)
+            # Clear existing uncompleted assignments when deactivating
+            assignment_result = unassign_quiz(quiz_id)
+        elif target_type == 'all':
+            # Assign quiz to all students
+            assignment_result = assign_quiz(quiz_id)
+        else:
+            # Assign quiz to specific students, removing everyone else's uncompleted assignment
+            assignment_result = assign_quiz(quiz_id, target_students, replace=True)
+        
+        # Students already holding the quiz are told about the new window
+        publish_availability_change(quiz)
         
         # Commit all changes
         db.session.commit()
         
         # Get final count of assigned students
-        assigned_count = StudentQuiz.query.filter_by(quiz_id=quiz_id).count()
+        assigned_count = assignment_result['assigned']
         
         # Prepare response data
         response_data = {
@@ -400,7 +365,8 @@ def set_quiz_availability(current_user, quiz_id):
                 'target_students': target_students if target_type == 'specific' else None,
                 'is_active': is_active,
                 'assigned_students_count': assigned_count
-            }
+            },
+            'assignment': assignment_result
         }
         
         return jsonify(response_data), 200
@@ -412,7 +378,7 @@ def set_quiz_availability(current_user, quiz_id):
         return jsonify({'message': f'Failed to update quiz availability: {str(e)}'}), 500
 
 @professor_bp.route('/quizzes/<int:quiz_id>/availability', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_availability(current_user, quiz_id):
     """Get availability settings for a quiz"""
     if current_user.user_type != 'professor':
@@ -443,8 +409,8 @@ def get_quiz_availability(current_user, quiz_id):
                     'email': student.email
                 })
         
-        # Determine if quiz is active (has future or current availability)
-        now = datetime.utcnow()
+        # Determine if quiz is active (has future or current availability); windows are stored in IST
+        now = get_ist_datetime_for_db()
         is_active = quiz.start_time is not None and quiz.end_time is not None and quiz.end_time > now
         
         # Determine target type based on assignment pattern
@@ -477,7 +443,7 @@ def get_quiz_availability(current_user, quiz_id):
         return jsonify({'message': f'Failed to fetch quiz availability: {str(e)}'}), 500
 
 @professor_bp.route('/quizzes/<int:quiz_id>/assign-students', methods=['POST'])
-@token_required
+@principal_required
 def assign_quiz_to_students(current_user, quiz_id):
     """Assign a quiz to specific students or all students"""
     if current_user.user_type != 'professor':
@@ -496,55 +462,23 @@ def assign_quiz_to_students(current_user, quiz_id):
     student_ids = data.get('student_ids', [])
     
     try:
-        assignments_created = 0
-        
         if target_type == 'all':
             # Assign to all students
-            all_students = Student.query.all()
-            for student in all_students:
-                # Check if assignment already exists
-                existing = StudentQuiz.query.filter_by(
-                    student_id=student.id,
-                    quiz_id=quiz_id
-                ).first()
-                
-                if not existing:
-                    student_quiz = StudentQuiz(
-                        student_id=student.id,
-                        quiz_id=quiz_id,
-                        status='uncompleted'
-                    )
-                    db.session.add(student_quiz)
-                    assignments_created += 1
-        
+            assignment_result = assign_quiz(quiz_id)
         elif target_type == 'specific' and student_ids:
             # Assign to specific students
-            for student_id in student_ids:
-                # Verify student exists
-                student = Student.query.get(student_id)
-                if not student:
-                    continue
-                
-                # Check if assignment already exists
-                existing = StudentQuiz.query.filter_by(
-                    student_id=student_id,
-                    quiz_id=quiz_id
-                ).first()
-                
-                if not existing:
-                    student_quiz = StudentQuiz(
-                        student_id=student_id,
-                        quiz_id=quiz_id,
-                        status='uncompleted'
-                    )
-                    db.session.add(student_quiz)
-                    assignments_created += 1
+            assignment_result = assign_quiz(quiz_id, student_ids)
+        else:
+            assignment_result = {'created': 0, 'removed': 0, 'timings': {}}
+        
+        assignments_created = assignment_result['created']
         
         db.session.commit()
         
         return jsonify({
             'message': f'Quiz assigned successfully to {assignments_created} students',
-            'assignments_created': assignments_created
+            'assignments_created': assignments_created,
+            'timings': assignment_result['timings']
         }), 200
         
     except Exception as e:
@@ -552,7 +486,7 @@ def assign_quiz_to_students(current_user, quiz_id):
         return jsonify({'message': f'Failed to assign quiz: {str(e)}'}), 500
 
 @professor_bp.route('/modules', methods=['POST'])
-@token_required
+@principal_required
 def create_module(current_user):
     """Create a new module"""
     if current_user.user_type != 'professor':
@@ -592,7 +526,7 @@ def create_module(current_user):
         return jsonify({'message': f'Failed to create module: {str(e)}'}), 500
 
 @professor_bp.route('/modules', methods=['GET'])
-@token_required
+@principal_required
 def get_modules(current_user):
     """Get all modules created by the current professor"""
     if current_user.user_type != 'professor':
@@ -601,12 +535,21 @@ def get_modules(current_user):
     # Get all modules created by this professor
     modules = Module.query.filter_by(professor_id=current_user.id).order_by(Module.created_at.desc()).all()
     
+    # Quiz, assignment and score statistics for all modules from one GROUP BY query
+    statistics = aggregate_module_performance(professor_id=current_user.id)
+    
+    module_list = []
+    for module in modules:
+        module_data = module.to_dict()
+        module_data['statistics'] = statistics.get(module.id) or empty_module_performance(module)
+        module_list.append(module_data)
+    
     return jsonify({
-        'modules': [module.to_dict() for module in modules]
+        'modules': module_list
     }), 200
 
 @professor_bp.route('/modules/<int:module_id>', methods=['GET'])
-@token_required
+@principal_required
 def get_module(current_user, module_id):
     """Get a specific module"""
     if current_user.user_type != 'professor':
@@ -620,10 +563,14 @@ def get_module(current_user, module_id):
     if module.professor_id != current_user.id:
         return jsonify({'message': 'Not authorized to access this module'}), 403
     
-    return jsonify({'module': module.to_dict()}), 200
+    module_data = module.to_dict()
+    statistics = aggregate_module_performance(module_ids=[module.id])
+    module_data['statistics'] = statistics.get(module.id) or empty_module_performance(module)
+    
+    return jsonify({'module': module_data}), 200
 
 @professor_bp.route('/modules/<int:module_id>', methods=['PUT'])
-@token_required
+@principal_required
 def update_module(current_user, module_id):
     """Update an existing module"""
     if current_user.user_type != 'professor':
@@ -667,7 +614,7 @@ def update_module(current_user, module_id):
         return jsonify({'message': f'Failed to update module: {str(e)}'}), 500
 
 @professor_bp.route('/modules/<int:module_id>', methods=['DELETE'])
-@token_required
+@principal_required
 def delete_module(current_user, module_id):
     """Delete a module"""
     if current_user.user_type != 'professor':
@@ -700,93 +647,46 @@ def delete_module(current_user, module_id):
         return jsonify({'message': f'Failed to delete module: {str(e)}'}), 500
 
 @professor_bp.route('/analytics/students', methods=['GET'])
-@token_required
+@principal_required
 def get_students_knowledge_analytics(current_user):
-    """Get total number of students and their knowledge levels for analytics"""
+    """
+    Get total number of students and their knowledge levels for analytics.
+    Reads the precomputed student_analytics snapshot, which is refreshed in the
+    background whenever a quiz is scored. Optional query parameters: sort
+    (level, score, completed_quizzes, average_score, weak_topics, name,
+    registration_date), order (asc/desc), page and per_page.
+    """
     if current_user.user_type != 'professor':
         return jsonify({'message': 'Not authorized'}), 403
     
+    sort = request.args.get('sort', 'level')
+    order = request.args.get('order', 'desc')
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    
+    if sort not in ANALYTICS_SORT_COLUMNS:
+        return jsonify({'message': f'sort must be one of: {", ".join(ANALYTICS_SORT_COLUMNS)}'}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({'message': 'order must be either "asc" or "desc"'}), 400
+    if page is not None or per_page is not None:
+        page = page or 1
+        per_page = min(per_page or 50, 500)
+        if page < 1 or per_page < 1:
+            return jsonify({'message': 'page and per_page must be positive'}), 400
+    
     try:
-        # Get all students
-        students = Student.query.all()
-        total_students = len(students)
+        # Rebuild every snapshot on demand, otherwise only fill in new students
+        if request.args.get('refresh', 'false').lower() == 'true':
+            refresh_student_analytics()
+            db.session.commit()
+        elif refresh_missing_student_analytics():
+            db.session.commit()
         
-        # Get knowledge levels for all students
-        student_analytics = []
-        overall_stats = {
-            'total_low': 0,
-            'total_normal': 0,
-            'total_high': 0,
-            'total_no_data': 0
-        }
+        rows, total_students = get_student_analytics_page(sort, order, page, per_page)
+        level_counts = get_overall_level_counts()
         
-        for student in students:
-            # Get student's knowledge levels
-            knowledge_levels = KnowledgeLevel.query.filter_by(student_id=student.id).all()
-            
-            # Get overall knowledge level (OVERALL topic)
-            overall_kl = KnowledgeLevel.query.filter_by(
-                student_id=student.id,
-                topic='OVERALL'
-            ).first()
-            
-            # Calculate topic-specific knowledge levels
-            topic_levels = []
-            for kl in knowledge_levels:
-                if kl.topic != 'OVERALL':  # Exclude overall from topic list
-                    topic_levels.append({
-                        'topic': kl.topic,
-                        'score': round(kl.score, 3),
-                        'level': kl.level,
-                        'updated_at': kl.updated_at.isoformat()
-                    })
-            
-            # Get completed quiz count
-            completed_quizzes = StudentQuiz.query.filter_by(
-                student_id=student.id,
-                status='completed'
-            ).count()
-            
-            # Calculate average quiz score
-            quiz_scores = StudentQuiz.query.filter_by(
-                student_id=student.id,
-                status='completed'
-            ).all()
-            
-            avg_quiz_score = 0
-            if quiz_scores:
-                scores = [sq.score for sq in quiz_scores if sq.score is not None]
-                avg_quiz_score = sum(scores) / len(scores) if scores else 0
-            
-            # Determine overall level and update stats
-            if overall_kl:
-                overall_level = overall_kl.level
-                overall_score = overall_kl.score
-            elif topic_levels:
-                # Calculate from topic averages if no overall record
-                topic_scores = [tl['score'] for tl in topic_levels]
-                overall_score = sum(topic_scores) / len(topic_scores)
-                if overall_score < 0.5:
-                    overall_level = 'Low'
-                elif overall_score < 0.8:
-                    overall_level = 'Normal'
-                else:
-                    overall_level = 'High'
-            else:
-                overall_level = 'No Data'
-                overall_score = 0
-            
-            # Update overall statistics
-            if overall_level == 'Low':
-                overall_stats['total_low'] += 1
-            elif overall_level == 'Normal':
-                overall_stats['total_normal'] += 1
-            elif overall_level == 'High':
-                overall_stats['total_high'] += 1
-            else:
-                overall_stats['total_no_data'] += 1
-            
-            # Add student data
+        student_analytics = []
+        for student, analytics in rows:
             student_data = {
                 'student_id': student.id,
                 'student_info': {
@@ -794,68 +694,18 @@ def get_students_knowledge_analytics(current_user):
                     'last_name': student.last_name,
                     'email': student.email,
                     'student_id': student.student_id,
-                    'registration_date': student.created_at.isoformat()
-                },
-                'overall_knowledge': {
-                    'level': overall_level,
-                    'score': round(overall_score, 3) if overall_score else 0,
-                    'updated_at': overall_kl.updated_at.isoformat() if overall_kl else None
-                },
-                'topic_knowledge': topic_levels,
-                'quiz_statistics': {
-                    'completed_quizzes': completed_quizzes,
-                    'average_score': round(avg_quiz_score, 2)
-                },
-                'knowledge_summary': {
-                    'total_topics_assessed': len(topic_levels),
-                    'strong_topics': len([tl for tl in topic_levels if tl['level'] == 'High']),
-                    'developing_topics': len([tl for tl in topic_levels if tl['level'] == 'Normal']),
-                    'weak_topics': len([tl for tl in topic_levels if tl['level'] == 'Low'])
+                    'registration_date': student.created_at
                 }
             }
-            
+            student_data.update(analytics.to_dict())
             student_analytics.append(student_data)
         
-        # Sort students by overall knowledge level and then by score
-        def get_sort_key(student_data):
-            level = student_data['overall_knowledge']['level']
-            score = student_data['overall_knowledge']['score']
-            level_priority = {'High': 3, 'Normal': 2, 'Low': 1, 'No Data': 0}
-            return (level_priority.get(level, 0), score)
-        
-        student_analytics.sort(key=get_sort_key, reverse=True)
-        
-        # Calculate additional analytics
-        topic_distribution = {}
-        for student_data in student_analytics:
-            for topic_data in student_data['topic_knowledge']:
-                topic = topic_data['topic']
-                level = topic_data['level']
-                
-                if topic not in topic_distribution:
-                    topic_distribution[topic] = {
-                        'total_assessments': 0,
-                        'high_count': 0,
-                        'normal_count': 0,
-                        'low_count': 0,
-                        'average_score': 0
-                    }
-                
-                topic_distribution[topic]['total_assessments'] += 1
-                topic_distribution[topic][f'{level.lower()}_count'] += 1
-        
-        # Calculate average scores for each topic
-        for topic in topic_distribution:
-            topic_scores = []
-            for student_data in student_analytics:
-                for topic_data in student_data['topic_knowledge']:
-                    if topic_data['topic'] == topic:
-                        topic_scores.append(topic_data['score'])
-            
-            if topic_scores:
-                topic_distribution[topic]['average_score'] = round(
-                    sum(topic_scores) / len(topic_scores), 3
-                )
+        overall_stats = {
+            'total_high': level_counts.get('High', 0),
+            'total_normal': level_counts.get('Normal', 0),
+            'total_low': level_counts.get('Low', 0)
+        }
+        overall_stats['total_no_data'] = total_students - sum(overall_stats.values())
         
         # Prepare response
         response_data = {
@@ -874,12 +724,41 @@ def get_students_knowledge_analytics(current_user):
                     'no_data': round((overall_stats['total_no_data'] / total_students) * 100, 1) if total_students > 0 else 0
                 }
             },
-            'topic_analytics': topic_distribution,
+            'topic_analytics': get_topic_distribution(),
             'students': student_analytics,
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total_students,
+                'sort': sort,
+                'order': order
+            },
             'generated_at': datetime.utcnow().isoformat()
         }
         
         return jsonify(response_data), 200
         
     except Exception as e:
-        return jsonify({'message': f'Failed to fetch student analytics: {str(e)}'}), 500
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'message': f'Failed to fetch student analytics: {str(e)}'}), 500
+
+@professor_bp.route('/question-bank/statistics', methods=['GET'])
+@principal_required
+def get_question_bank_statistics(current_user):
+    """Item statistics per question bank item across every quiz that uses it"""
+    if current_user.user_type != 'professor':
+        return jsonify({'message': 'Not authorized'}), 403
+    
+    try:
+        topic = request.args.get('topic')
+        min_answers = max(1, request.args.get('min_answers', 1, type=int))
+        
+        statistics = get_bank_item_statistics(topic=topic, min_answers=min_answers)
+        
+        return jsonify({
+            'items': statistics,
+            'total_items': len(statistics)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': f'Failed to fetch question bank statistics: {str(e)}'}), 500
@@ -5,14 +5,38 @@ from models.UserModel import Student
 from models.ModuleModel import Module
 from app import db
 from datetime import datetime
-from utils.jwt_utils import token_required
-from services.quiz_service import generate_quiz_for_student
+from utils.jwt_utils import principal_required
+from services.quiz_service import AttemptAlreadyCompletedError, generate_quiz_for_student, score_quiz
+from services.batch_quiz_service import resolve_cohort, schedule_cohort_quizzes
+from services.grading_service import grade_submission
+from services.assignment_service import assign_quiz, unassign_quiz
+from services.quiz_events import publish_availability_change
 from sqlalchemy.orm import joinedload
+from services.results_service import get_quiz_results as get_quiz_results_payload
+from services.question_payload_service import etag_json_response, get_question_payload, get_saved_answers
+from services.availability_index import open_quiz_ids
+from utils.timezone_utils import get_ist_datetime_for_db
+from utils.tracing import get_tracer
 
 quiz_bp = Blueprint('quiz', __name__)
+trace = get_tracer('api.quizzes')
+
+# Upper bound on questions per generated quiz
+MAX_GENERATED_QUESTIONS = 100
+
+def parse_num_questions(data, default=15):
+    """The requested question count as an int, or None if it is not between 1 and MAX_GENERATED_QUESTIONS"""
+    value = data.get('num_questions', default)
+    if isinstance(value, bool):
+        return None
+    try:
+        num_questions = int(value)
+    except (TypeError, ValueError):
+        return None
+    return num_questions if 1 <= num_questions <= MAX_GENERATED_QUESTIONS else None
 
 @quiz_bp.route('/', methods=['GET'])
-@token_required
+@principal_required
 def get_all_quizzes(current_user):
     """Get all quizzes (different behavior for students and professors)"""
     if current_user.user_type == 'professor':
@@ -40,7 +64,7 @@ def get_all_quizzes(current_user):
         }), 200
 
 @quiz_bp.route('/', methods=['POST'])
-@token_required
+@principal_required
 def create_quiz(current_user):
     """Create a new quiz (professors only)"""
     if current_user.user_type != 'professor':
@@ -87,7 +111,7 @@ def create_quiz(current_user):
     }), 201
 
 @quiz_bp.route('/generate', methods=['POST'])
-@token_required
+@principal_required
 def generate_quiz(current_user):
     """Generate a quiz for a student (professors only)"""
     if current_user.user_type != 'professor':
@@ -96,7 +120,13 @@ def generate_quiz(current_user):
     data = request.get_json()
     student_id = data['student_id']
     title = data['title']
-    num_questions = data.get('num_questions', 15)
+    num_questions = parse_num_questions(data)
+    if num_questions is None:
+        return jsonify({'message': f'num_questions must be an integer between 1 and {MAX_GENERATED_QUESTIONS}'}), 400
+    # Optional, to regenerate the same selection
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        return jsonify({'message': 'seed must be a non-negative integer'}), 400
     
     try:
         student = Student.query.get(student_id)
@@ -104,11 +134,8 @@ def generate_quiz(current_user):
             return jsonify({'message': 'Student not found'}), 404
         
         # Generate quiz
-        quiz = generate_quiz_for_student(student, title, num_questions)
-        
-        # Set the professor_id for the generated quiz
-        quiz.professor_id = current_user.id
-        db.session.commit()
+        # professor_id is required before the quiz is first flushed
+        quiz = generate_quiz_for_student(student, title, num_questions, seed=seed, professor_id=current_user.id)
         
         return jsonify({
             'message': 'Quiz generated successfully',
@@ -118,8 +145,62 @@ def generate_quiz(current_user):
         db.session.rollback()
         return jsonify({'message': f'Failed to generate quiz: {str(e)}'}), 500
 
+@quiz_bp.route('/generate-batch', methods=['POST'])
+@principal_required
+def generate_quiz_batch(current_user):
+    """Generate a personalized quiz for every student of a cohort (professors only)"""
+    if current_user.user_type != 'professor':
+        return jsonify({'message': 'Not authorized'}), 403
+    
+    data = request.get_json() or {}
+    title = data.get('title')
+    if not title:
+        return jsonify({'message': 'title is required'}), 400
+    
+    num_questions = parse_num_questions(data)
+    if num_questions is None:
+        return jsonify({'message': f'num_questions must be an integer between 1 and {MAX_GENERATED_QUESTIONS}'}), 400
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        return jsonify({'message': 'seed must be a non-negative integer'}), 400
+    
+    try:
+        # Either explicit student ids or a whole intake
+        if 'student_ids' in data:
+            student_ids = data['student_ids']
+        elif data.get('intake_no'):
+            student_ids = list(resolve_cohort(
+                intake_no=data['intake_no'],
+                academic_year=data.get('academic_year'),
+                faculty=data.get('faculty')
+            ))
+        else:
+            return jsonify({'message': 'student_ids or intake_no is required'}), 400
+        
+        if not student_ids:
+            return jsonify({'message': 'No students in the cohort'}), 400
+        
+        # Runs in the background; poll /api/jobs/<id> for progress
+        job = schedule_cohort_quizzes(
+            current_user.id,
+            student_ids,
+            title,
+            num_questions=num_questions,
+            description=data.get('description'),
+            module_id=data.get('module_id'),
+            seed=seed
+        )
+        
+        return jsonify({
+            'message': f'Generating quizzes for {len(set(student_ids))} students',
+            'job': job.to_dict()
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to start batch generation: {str(e)}'}), 500
+
 @quiz_bp.route('/<int:quiz_id>', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz(current_user, quiz_id):
     """Get a specific quiz with its questions"""
     quiz = Quiz.query.options(joinedload(Quiz.module)).get(quiz_id)
@@ -146,7 +227,7 @@ def get_quiz(current_user, quiz_id):
     return jsonify({'quiz': quiz_data}), 200
 
 @quiz_bp.route('/<int:quiz_id>/start', methods=['POST'])
-@token_required
+@principal_required
 def start_quiz(current_user, quiz_id):
     """Start a quiz for a student"""
     if current_user.user_type != 'student':
@@ -183,7 +264,7 @@ def start_quiz(current_user, quiz_id):
     }), 200
 
 @quiz_bp.route('/<int:quiz_id>/submit', methods=['POST'])
-@token_required
+@principal_required
 def submit_quiz(current_user, quiz_id):
     """Submit answers for a quiz"""
     if current_user.user_type != 'student':
@@ -203,61 +284,24 @@ def submit_quiz(current_user, quiz_id):
         return jsonify({'message': 'Quiz not found or already completed'}), 400
     
     try:
-        # Process answers
-        total_points = 0
-        max_points = 0
-        
-        for answer_data in answers:
-            question_id = answer_data['question_id']
-            selected_option = answer_data['selected_option']
-            
-            # Get the question
-            question = Question.query.get(question_id)
-            if not question:
-                continue
-            
-            # Check if answer is correct
-            is_correct = (selected_option == question.correct_answer)
-            
-            # Add points if correct
-            if is_correct:
-                total_points += question.weight
-            
-            max_points += question.weight
-            
-            # Save student answer
-            student_answer = StudentAnswer(
-                student_quiz_id=student_quiz.id,
-                question_id=question_id,
-                selected_option=selected_option,
-                is_correct=is_correct
-            )
-            db.session.add(student_answer)
-        
-        # Calculate score as percentage
-        score = (total_points / max_points * 100) if max_points > 0 else 0
-        
-        # Update student quiz record
-        student_quiz.status = 'completed'
-        student_quiz.end_time = datetime.utcnow()
-        student_quiz.score = score
-        
-        db.session.commit()
-        
-        # Update knowledge levels (this would be done by a background task in production)
-        from services.ml_service import update_knowledge_levels
-        update_knowledge_levels(current_user.id)
+        # Grade every answer at once and write them with one bulk upsert
+        grade = grade_submission(student_quiz, answers)
+        score, job = score_quiz(student_quiz, grade=grade, end_time=datetime.utcnow())
         
         return jsonify({
             'message': 'Quiz submitted successfully',
-            'score': score
+            'score': score,
+            'knowledge_update_job': job.to_dict() if job else None
         }), 200
+    except AttemptAlreadyCompletedError:
+        # A concurrent submission of the same attempt completed it first
+        return jsonify({'message': 'Quiz not found or already completed'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Failed to submit quiz: {str(e)}'}), 500
 
 @quiz_bp.route('/<int:quiz_id>/questions', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_questions(current_user, quiz_id):
     """Get all questions for a specific quiz with relevant data"""
     quiz = Quiz.query.options(joinedload(Quiz.module)).get(quiz_id)
@@ -284,43 +328,24 @@ def get_quiz_questions(current_user, quiz_id):
         if quiz.professor_id != current_user.id:
             return jsonify({'message': 'Not authorized to access this quiz'}), 403
     
-    # Get all questions for the quiz
-    questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
-    
-    # Prepare questions data based on user type
+    # Pre-serialized questions, shared between requests
     include_answers = (current_user.user_type == 'professor')
-    questions_data = []
+    questions_data = get_question_payload(quiz, 'full' if include_answers else 'public')
     
-    for question in questions:
-        question_dict = question.to_dict(include_answer=include_answers)
-        
-        # Add additional relevant data
-        question_dict.update({
-            'quiz_title': quiz.title,
-            'question_number': len(questions_data) + 1,
-            'total_questions': len(questions)
-        })
-        
-        # If student, check if they've already answered this question
-        if current_user.user_type == 'student':
-            student_quiz = StudentQuiz.query.filter_by(
-                student_id=current_user.id,
-                quiz_id=quiz_id
-            ).first()
-            
-            if student_quiz:
-                existing_answer = StudentAnswer.query.filter_by(
-                    student_quiz_id=student_quiz.id,
-                    question_id=question.id
-                ).first()
-                
-                if existing_answer:
-                    question_dict['student_answer'] = {
-                        'selected_option': existing_answer.selected_option,
-                        'answered_at': existing_answer.created_at.isoformat()
-                    }
-        
-        questions_data.append(question_dict)
+    # If student, merge their saved answers from one bulk query
+    if current_user.user_type == 'student':
+        saved_answers = get_saved_answers(student_quiz.id)
+        merged = []
+        for question_dict in questions_data:
+            existing_answer = saved_answers.get(question_dict['id'])
+            if existing_answer:
+                question_dict = dict(question_dict)
+                question_dict['student_answer'] = {
+                    'selected_option': existing_answer.selected_option,
+                    'answered_at': existing_answer.created_at.isoformat()
+                }
+            merged.append(question_dict)
+        questions_data = merged
     
     # Prepare response with quiz metadata
     response_data = {
@@ -331,31 +356,25 @@ def get_quiz_questions(current_user, quiz_id):
             'duration_minutes': quiz.duration_minutes,
             'start_time': quiz.start_time.isoformat() if quiz.start_time else None,
             'end_time': quiz.end_time.isoformat() if quiz.end_time else None,
-            'total_questions': len(questions)
+            'total_questions': len(questions_data)
         },
         'questions': questions_data
     }
     
     # Add student-specific data if applicable
     if current_user.user_type == 'student':
-        student_quiz = StudentQuiz.query.filter_by(
-            student_id=current_user.id,
-            quiz_id=quiz_id
-        ).first()
-        
-        if student_quiz:
-            response_data['student_progress'] = {
-                'status': student_quiz.status,
-                'start_time': student_quiz.start_time.isoformat() if student_quiz.start_time else None,
-                'end_time': student_quiz.end_time.isoformat() if student_quiz.end_time else None,
-                'score': student_quiz.score,
-                'answered_questions': len([q for q in questions_data if 'student_answer' in q])
-            }
+        response_data['student_progress'] = {
+            'status': student_quiz.status,
+            'start_time': student_quiz.start_time.isoformat() if student_quiz.start_time else None,
+            'end_time': student_quiz.end_time.isoformat() if student_quiz.end_time else None,
+            'score': student_quiz.score,
+            'answered_questions': len([q for q in questions_data if 'student_answer' in q])
+        }
     
-    return jsonify(response_data), 200
+    return etag_json_response(response_data)
 
 @quiz_bp.route('/<int:quiz_id>/availability', methods=['PUT'])
-@token_required
+@principal_required
 def set_quiz_availability(current_user, quiz_id):
     """Set availability settings for a quiz"""
     if current_user.user_type != 'professor':
@@ -404,74 +423,25 @@ def set_quiz_availability(current_user, quiz_id):
         quiz.end_time = end_datetime
         quiz.duration_minutes = duration_minutes
         
-        # Clear existing assignments if deactivating
+        # Apply the student assignments as one set-based diff
         if not is_active:
-            existing_assignments = StudentQuiz.query.filter_by(
-                quiz_id=quiz_id,
-                status='uncompleted'
-            ).all()
-            for assignment in existing_assignments:
-                db.session.delete(assignment)
-        
-        # Handle student assignments based on target_type and is_active
-        if is_active:
-            if target_type == 'all':
-                # Assign quiz to all students
-                all_students = Student.query.all()
-                for student in all_students:
-                    # Check if student quiz already exists
-                    existing_sq = StudentQuiz.query.filter_by(
-                        student_id=student.id,
-                        quiz_id=quiz_id
-                    ).first()
-                    
-                    if not existing_sq:
-                        # Create new student quiz assignment
-                        student_quiz = StudentQuiz(
-                            student_id=student.id,
-                            quiz_id=quiz_id,
-                            status='uncompleted'
-                        )
-                        db.session.add(student_quiz)
-            
-            elif target_type == 'specific' and target_students:
-                # First, remove assignments for students not in the target list
-                existing_assignments = StudentQuiz.query.filter_by(
-                    quiz_id=quiz_id,
-                    status='uncompleted'
-                ).all()
-                
-                for assignment in existing_assignments:
-                    if assignment.student_id not in target_students:
-                        db.session.delete(assignment)
-                
-                # Then assign quiz to specific students
-                for student_id in target_students:
-                    # Verify student exists
-                    student = Student.query.get(student_id)
-                    if not student:
-                        continue
-                    
-                    # Check if student quiz already exists
-                    existing_sq = StudentQuiz.query.filter_by(
-                        student_id=student_id,
-                        quiz_id=quiz_id
-                    ).first()
-                    
-                    if not existing_sq:
-                        # Create new student quiz assignment
-                        student_quiz = StudentQuiz(
-                            student_id=student_id,
-                            quiz_id=quiz_id,
-                            status='uncompleted'
-                        )
-                        db.session.add(student_quiz)
+            # Clear existing uncompleted assignments when deactivating
+            assignment_result = unassign_quiz(quiz_id)
+        elif target_type == 'all':
+            # Assign quiz to all students
+            assignment_result = assign_quiz(quiz_id)
+        else:
+            # Assign quiz to specific students, removing everyone else's uncompleted assignment
+            assignment_result = assign_quiz(quiz_id, target_students, replace=True)
+        
+        # Students already holding the quiz are told about the new window
+        publish_availability_change(quiz)
         
         # Commit all changes
         db.session.commit()
         
         # Get final count of assigned students
-        assigned_count = StudentQuiz.query.filter_by(quiz_id=quiz_id).count()
+        assigned_count = assignment_result['assigned']
         
         # Prepare response data
         response_data = {
@@ -485,7 +455,8 @@ def set_quiz_availability(current_user, quiz_id):
                 'target_students': target_students if target_type == 'specific' else None,
                 'is_active': is_active,
                 'assigned_students_count': assigned_count
-            }
+            },
+            'assignment': assignment_result
         }
         
         return jsonify(response_data), 200
@@ -497,7 +468,7 @@ def set_quiz_availability(current_user, quiz_id):
         return jsonify({'message': f'Failed to update quiz availability: {str(e)}'}), 500
 
 @quiz_bp.route('/<int:quiz_id>/availability', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_availability(current_user, quiz_id):
     """Get availability settings for a quiz"""
     # Get the quiz
@@ -523,8 +494,8 @@ def get_quiz_availability(current_user, quiz_id):
         return jsonify({'message': 'Not authorized'}), 403
     
     try:
-        # Determine if quiz is active
-        now = datetime.utcnow()
+        # Determine if quiz is active (quiz windows are stored in IST)
+        now = get_ist_datetime_for_db()
         is_active = quiz.start_time is not None and quiz.end_time is not None and quiz.end_time > now
         
         # Determine status based on quiz timing
@@ -576,7 +547,7 @@ def get_quiz_availability(current_user, quiz_id):
             ).first()
             
             if student_quiz:
-                is_available = quiz.start_time is not None and quiz.start_time <= now <= quiz.end_time if quiz.end_time else False
+                is_available = quiz.id in open_quiz_ids(current_user.id, now)
                 availability_data['student_status'] = {
                     'status': student_quiz.status,
                     'score': student_quiz.score,
@@ -591,7 +562,7 @@ def get_quiz_availability(current_user, quiz_id):
         return jsonify({'message': f'Failed to fetch quiz availability: {str(e)}'}), 500
 
 @quiz_bp.route('/<int:quiz_id>/results', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_results(current_user, quiz_id):
     """Get detailed quiz results including all answers and scoring"""
     try:
@@ -615,188 +586,32 @@ def get_quiz_results(current_user, quiz_id):
             if student_quiz.status != 'completed':
                 return jsonify({'message': 'Quiz not completed yet'}), 400
             
-            student_quizzes = [student_quiz]
-            
         elif current_user.user_type == 'professor':
             # Professors can view results for their own quizzes
             if quiz.professor_id != current_user.id:
                 return jsonify({'message': 'Not authorized to view this quiz results'}), 403
             
-            # Get all student attempts for this quiz
-            student_quizzes = StudentQuiz.query.filter_by(
-                quiz_id=quiz_id,
-                status='completed'
-            ).all()
         else:
             return jsonify({'message': 'Not authorized'}), 403
         
-        # Prepare results data
-        quiz_results = {
-            'quiz': {
-                'id': quiz.id,
-                'title': quiz.title,
-                'description': quiz.description,
-                'duration_minutes': quiz.duration_minutes,
-                'total_questions': Question.query.filter_by(quiz_id=quiz_id).count()
-            },
-            'results': []
-        }
-        
-        # Process each student's quiz attempt
-        for sq in student_quizzes:
-            # Get student info
-            student = Student.query.get(sq.student_id)
-            if not student:
-                continue
-            
-            # Get all answers for this attempt
-            answers = StudentAnswer.query.filter_by(student_quiz_id=sq.id).all()
-            
-            # Get all questions for detailed analysis
-            questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
-            
-            # Build detailed answer information
-            answer_details = []
-            total_correct = 0
-            total_points = 0
-            max_possible_points = 0
-            
-            for question in questions:
-                # Find the student's answer for this question
-                student_answer = next(
-                    (a for a in answers if a.question_id == question.id), 
-                    None
-                )
-                
-                # Calculate points
-                question_points = question.weight
-                max_possible_points += question_points
-                
-                if student_answer:
-                    is_correct = student_answer.is_correct
-                    if is_correct:
-                        total_correct += 1
-                        total_points += question_points
-                    
-                    answer_detail = {
-                        'question_id': question.id,
-                        'question_text': question.text,
-                        'question_topic': question.topic,
-                        'question_weight': question.weight,
-                        'options': [
-                            question.option_1,
-                            question.option_2,
-                            question.option_3,
-                            question.option_4
-                        ],
-                        'correct_answer': question.correct_answer,
-                        'student_answer': student_answer.selected_option,
-                        'is_correct': is_correct,
-                        'points_earned': question_points if is_correct else 0,
-                        'answered_at': student_answer.created_at.isoformat()
-                    }
-                else:
-                    # Question not answered
-                    answer_detail = {
-                        'question_id': question.id,
-                        'question_text': question.text,
-                        'question_topic': question.topic,
-                        'question_weight': question.weight,
-                        'options': [
-                            question.option_1,
-                            question.option_2,
-                            question.option_3,
-                            question.option_4
-                        ],
-                        'correct_answer': question.correct_answer,
-                        'student_answer': None,
-                        'is_correct': False,
-                        'points_earned': 0,
-                        'answered_at': None
-                    }
-                
-                # Filter out empty options
-                answer_detail['options'] = [opt for opt in answer_detail['options'] if opt.strip()]
-                answer_details.append(answer_detail)
-            
-            # Calculate topic-wise performance
-            topic_performance = {}
-            for answer_detail in answer_details:
-                topic = answer_detail['question_topic']
-                if topic and topic.strip():
-                    if topic not in topic_performance:
-                        topic_performance[topic] = {
-                            'total_questions': 0,
-                            'correct_answers': 0,
-                            'total_points': 0,
-                            'earned_points': 0
-                        }
-                    
-                    topic_performance[topic]['total_questions'] += 1
-                    topic_performance[topic]['total_points'] += answer_detail['question_weight']
-                    
-                    if answer_detail['is_correct']:
-                        topic_performance[topic]['correct_answers'] += 1
-                        topic_performance[topic]['earned_points'] += answer_detail['points_earned']
-            
-            # Calculate topic scores
-            for topic in topic_performance:
-                perf = topic_performance[topic]
-                perf['accuracy'] = (perf['correct_answers'] / perf['total_questions']) * 100 if perf['total_questions'] > 0 else 0
-                perf['score_percentage'] = (perf['earned_points'] / perf['total_points']) * 100 if perf['total_points'] > 0 else 0
-            
-            # Add student result to the results list
-            student_result = {
-                'student': {
-                    'id': student.id,
-                    'first_name': student.first_name,
-                    'last_name': student.last_name,
-                    'email': student.email,
-                    'student_id': student.student_id
-                } if current_user.user_type == 'professor' else None,
-                'attempt': {
-                    'id': sq.id,
-                    'status': sq.status,
-                    'start_time': sq.start_time.isoformat() if sq.start_time else None,
-                    'end_time': sq.end_time.isoformat() if sq.end_time else None,
-                    'duration_taken': None,  # Calculate if both times available
-                    'score_percentage': sq.score,
-                    'total_correct': total_correct,
-                    'total_questions': len(questions),
-                    'total_points': total_points,
-                    'max_possible_points': max_possible_points
-                },
-                'topic_performance': topic_performance,
-                'answers': answer_details
-            }
-            
-            # Calculate duration taken if both times are available
-            if sq.start_time and sq.end_time:
-                duration = sq.end_time - sq.start_time
-                student_result['attempt']['duration_taken'] = {
-                    'total_seconds': duration.total_seconds(),
-                    'minutes': int(duration.total_seconds() // 60),
-                    'seconds': int(duration.total_seconds() % 60)
-                }
-            
-            quiz_results['results'].append(student_result)
-        
-        # Add summary statistics for professors
-        if current_user.user_type == 'professor' and quiz_results['results']:
-            scores = [result['attempt']['score_percentage'] for result in quiz_results['results'] if result['attempt']['score_percentage'] is not None]
-            
-            quiz_results['summary'] = {
-                'total_attempts': len(quiz_results['results']),
-                'average_score': sum(scores) / len(scores) if scores else 0,
-                'highest_score': max(scores) if scores else 0,
-                'lowest_score': min(scores) if scores else 0,
-                'completion_rate': len([r for r in quiz_results['results'] if r['attempt']['status'] == 'completed']) / len(quiz_results['results']) * 100
-            }
+        # Optional keyset pagination over attempts (professors)
+        cursor = request.args.get('cursor', type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, 500))
+        
+        # Questions, attempts and answers are each loaded with one query
+        quiz_results = get_quiz_results_payload(
+            quiz,
+            student_id=current_user.id if current_user.user_type == 'student' else None,
+            cursor=cursor,
+            limit=limit,
+            # Class statistics cover every attempt, so only send them with the first page
+            include_statistics=cursor is None
+        )
         
         return jsonify(quiz_results), 200
         
     except Exception as e:
-        print(f"Error in get_quiz_results: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_quiz_results: %s', e)
         return jsonify({'message': f'Failed to fetch quiz results: {str(e)}'}), 500
\ No newline at end of file
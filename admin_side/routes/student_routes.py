@@ -4,17 +4,28 @@ from models.ProgressModel import KnowledgeLevel, StudentQuiz, StudentAnswer
 from models.QuizModel import Quiz, Question
 from models.ModuleModel import Module
 from app import db
-from utils.jwt_utils import token_required
-from services.ml_service import get_personalized_guidance, update_knowledge_levels
+from utils.jwt_utils import token_required, principal_required
+from services.ml_service import get_personalized_guidance
 from sqlalchemy.orm import joinedload
+from services.results_service import get_quiz_results as get_quiz_results_payload
+from services.aggregation_service import aggregate_module_performance, get_student_quiz_scores_by_module
+from services.question_payload_service import etag_json_response, get_question_payload, get_saved_answers
+from services.review_service import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, get_incorrect_answer_page,
+    get_incorrect_answer_totals, get_incorrect_topic_analysis
+)
 from datetime import datetime
-from services.quiz_service import is_quiz_available
+from services.quiz_service import AttemptAlreadyCompletedError, is_quiz_available, score_quiz
+from services.availability_index import open_quiz_ids
+from services.grading_service import grade_submission
 from utils.timezone_utils import get_ist_datetime_for_db, format_ist_datetime, convert_utc_to_ist_naive, get_current_ist_naive
+from utils.tracing import get_tracer
 
 student_bp = Blueprint('student', __name__)
+trace = get_tracer('api.students')
 
 @student_bp.route('/', methods=['GET'])
-@token_required
+@principal_required
 def get_all_students(current_user):
     """Get all students (professors only)"""
     if current_user.user_type != 'professor':
@@ -28,7 +39,7 @@ def get_all_students(current_user):
     }), 200
 
 @student_bp.route('/<int:student_id>', methods=['GET'])
-@token_required
+@principal_required
 def get_student(current_user, student_id):
     """Get a specific student (professors or the student themselves)"""
     # Authorization check
@@ -43,7 +54,7 @@ def get_student(current_user, student_id):
     return jsonify({'student': student.to_dict()}), 200
 
 @student_bp.route('/<int:student_id>/knowledge', methods=['GET'])
-@token_required
+@principal_required
 def get_knowledge_levels(current_user, student_id):
     """Get knowledge levels for a student"""
     # Authorization check
@@ -79,7 +90,7 @@ def get_knowledge_levels(current_user, student_id):
     }), 200
 
 @student_bp.route('/<int:student_id>/guidance', methods=['GET'])
-@token_required
+@principal_required
 def get_guidance(current_user, student_id):
     """Get personalized guidance for a student"""
     # Authorization check
@@ -97,7 +108,7 @@ def get_guidance(current_user, student_id):
     return jsonify(guidance), 200
 
 @student_bp.route('/<int:student_id>/quizzes', methods=['GET'])
-@token_required
+@principal_required
 def get_student_quizzes(current_user, student_id):
     """Get quizzes for a student"""
     # Authorization check
@@ -132,7 +143,7 @@ def get_student_quizzes(current_user, student_id):
     return jsonify({'quizzes': result}), 200
 
 @student_bp.route('/<int:student_id>/profile', methods=['PUT'])
-@token_required
+@principal_required
 def update_profile(current_user, student_id):
     """Update a student's profile"""
     # Authorization check
@@ -170,7 +181,7 @@ def update_profile(current_user, student_id):
     }), 200
 
 @student_bp.route('/quiz-participants', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_participants(current_user):
     """Get all students in the system"""
     if current_user.user_type != 'professor':
@@ -179,7 +190,7 @@ def get_quiz_participants(current_user):
     # Get all students from the students table
     all_students = Student.query.all()
     
-    print(f"Found {len(all_students)} total students in database")
+    trace.debug('Found %s students for the participants list', len(all_students))
     
     # Format response according to specified format
     student_list = []
@@ -193,7 +204,6 @@ def get_quiz_participants(current_user):
         }
         
         student_list.append(student_data)
-        print(f"Processed student: {student.first_name} {student.last_name}")
     
     return jsonify({
         'students': student_list,
@@ -201,7 +211,7 @@ def get_quiz_participants(current_user):
     }), 200
 
 @student_bp.route('/debug-db', methods=['GET'])
-@token_required
+@principal_required
 def debug_database_state(current_user):
     """Debug endpoint to check database state"""
     if current_user.user_type != 'professor':
@@ -252,7 +262,7 @@ def debug_database_state(current_user):
     }), 200
 
 @student_bp.route('/quizzes', methods=['GET'])
-@token_required
+@principal_required
 def get_student_quizzes_list(current_user):
     """Get all quizzes assigned to the current student"""
     if current_user.user_type != 'student':
@@ -266,17 +276,16 @@ def get_student_quizzes_list(current_user):
             joinedload(StudentQuiz.quiz).joinedload(Quiz.module)
         ).order_by(StudentQuiz.created_at.desc()).all()
         
+        # Open quizzes from the availability index, with one clock read for the whole list
+        open_ids = open_quiz_ids(current_user.id, get_ist_datetime_for_db())
+        
         quiz_list = []
         for sq in student_quizzes:
             quiz = sq.quiz
             if not quiz:
                 continue
             
-            # Check if quiz is currently available
-            now = datetime.utcnow()
-            is_available = True
-            if quiz.start_time and quiz.end_time:
-                is_available = quiz.start_time <= now <= quiz.end_time
+            is_available = quiz.id in open_ids
             
             quiz_data = {
                 'id': quiz.id,
@@ -305,13 +314,11 @@ def get_student_quizzes_list(current_user):
         }), 200
         
     except Exception as e:
-        print(f"Error in get_student_quizzes_list: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_student_quizzes_list: %s', e)
         return jsonify({'message': f'Failed to fetch quizzes: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/questions', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_questions_for_student(current_user, quiz_id):
     """Get quiz questions for a student"""
     if current_user.user_type != 'student':
@@ -352,39 +359,20 @@ def get_quiz_questions_for_student(current_user, quiz_id):
             student_quiz.start_time = current_ist_time
             db.session.commit()
         
-        # Get quiz questions (without correct answers)
-        questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
+        # Pre-serialized questions (without correct answers), shared between requests
+        questions = get_question_payload(quiz, 'student')
         
+        # Restore saved answers from one bulk query
+        saved_answers = get_saved_answers(student_quiz.id)
         questions_data = []
-        for i, question in enumerate(questions):
-            # Check if student has already answered this question
-            existing_answer = StudentAnswer.query.filter_by(
-                student_quiz_id=student_quiz.id,
-                question_id=question.id
-            ).first()
-            
-            question_data = {
-                'id': question.id,
-                'question_number': i + 1,
-                'text': question.text,
-                'options': [
-                    question.option_1,
-                    question.option_2,
-                    question.option_3,
-                    question.option_4
-                ],
-                'topic': question.topic,
-                'points': question.points,
+        for question in questions:
+            existing_answer = saved_answers.get(question['id'])
+            questions_data.append({
+                **question,
                 'selected_answer': existing_answer.selected_option if existing_answer else None
-            }
-            
-            # Filter out empty options
-            question_data['options'] = [opt for opt in question_data['options'] if opt.strip()]
-            questions_data.append(question_data)
-
-            print(questions_data)
+            })
         
-        return jsonify({
+        return etag_json_response({
             'quiz': {
                 'id': quiz.id,
                 'title': quiz.title,
@@ -399,16 +387,14 @@ def get_quiz_questions_for_student(current_user, quiz_id):
                 'time_remaining': None  # You can calculate this based on duration and start time
             },
             'questions': questions_data
-        }), 200
+        })
         
     except Exception as e:
-        print(f"Error in get_quiz_questions_for_student: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_quiz_questions_for_student: %s', e)
         return jsonify({'message': f'Failed to fetch quiz questions: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/submit', methods=['POST'])
-@token_required
+@principal_required
 def submit_quiz_answers(current_user, quiz_id):
     """Submit answers for a quiz"""
     if current_user.user_type != 'student':
@@ -433,80 +419,33 @@ def submit_quiz_answers(current_user, quiz_id):
         if not quiz:
             return jsonify({'message': 'Quiz not found'}), 404
         
-        # Process each answer
-        total_points = 0
-        max_points = 0
-        
-        for answer_data in answers:
-            question_id = answer_data.get('question_id')
-            selected_option = answer_data.get('selected_option')
-            
-            # Get the question
-            question = Question.query.get(question_id)
-            if not question or question.quiz_id != quiz_id:
-                continue
-            
-            # Check if answer already exists
-            existing_answer = StudentAnswer.query.filter_by(
-                student_quiz_id=student_quiz.id,
-                question_id=question_id
-            ).first()
-            
-            # Determine if answer is correct (0-based indexing)
-            is_correct = (selected_option == question.correct_answer)
-            
-            if existing_answer:
-                # Update existing answer
-                existing_answer.selected_option = selected_option
-                existing_answer.is_correct = is_correct
-            else:
-                # Create new answer
-                student_answer = StudentAnswer(
-                    student_quiz_id=student_quiz.id,
-                    question_id=question_id,
-                    selected_option=selected_option,
-                    is_correct=is_correct
-                )
-                db.session.add(student_answer)
-            
-            # Calculate points
-            if is_correct:
-                total_points += question.weight
-            max_points += question.weight
-        
-        # Calculate final score
-        score = (total_points / max_points * 100) if max_points > 0 else 0
+        # Grade every answer at once and write them with one bulk upsert
+        grade = grade_submission(student_quiz, answers)
         
-        # Update student quiz
-        student_quiz.status = 'completed'
-        student_quiz.end_time = datetime.utcnow()
-        student_quiz.score = score
-        
-        db.session.commit()
-        
-        # Update knowledge levels
-        try:
-            update_knowledge_levels(current_user.id)
-        except Exception as e:
-            print(f"Error updating knowledge levels: {str(e)}")
+        # Record the score and update knowledge levels in the background
+        score, job = score_quiz(student_quiz, grade=grade, end_time=datetime.utcnow())
+        total_points = grade.total_points
+        max_points = grade.max_points
         
         return jsonify({
             'message': 'Quiz submitted successfully',
             'score': score,
             'total_points': total_points,
             'max_points': max_points,
-            'percentage': score
+            'percentage': score,
+            'knowledge_update_job': job.to_dict() if job else None
         }), 200
         
+    except AttemptAlreadyCompletedError:
+        # A concurrent submission of the same attempt completed it first
+        return jsonify({'message': 'Quiz not found or already completed'}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"Error in submit_quiz_answers: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in submit_quiz_answers: %s', e)
         return jsonify({'message': f'Failed to submit quiz: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/attempt', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_attempt_details(current_user, quiz_id):
     """Get details of a student's quiz attempt"""
     if current_user.user_type != 'student':
@@ -536,7 +475,7 @@ def get_quiz_attempt_details(current_user, quiz_id):
             if question:
                 answer_details.append({
                     'question_id': question.id,
-                    'question_text': question.text,
+                    'question_text': question.content.text,
                     'selected_option': answer.selected_option,
                     'correct_answer': question.correct_answer,
                     'is_correct': answer.is_correct,
@@ -569,13 +508,11 @@ def get_quiz_attempt_details(current_user, quiz_id):
         }), 200
         
     except Exception as e:
-        print(f"Error in get_quiz_attempt_details: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_quiz_attempt_details: %s', e)
         return jsonify({'message': f'Failed to fetch quiz attempt details: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/debug-time', methods=['GET'])
-@token_required
+@principal_required
 def debug_quiz_time(current_user, quiz_id):
     """Debug endpoint to check quiz timing issues"""
     if current_user.user_type != 'student':
@@ -628,13 +565,11 @@ def debug_quiz_time(current_user, quiz_id):
         }), 200
         
     except Exception as e:
-        print(f"Error in debug_quiz_time: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in debug_quiz_time: %s', e)
         return jsonify({'message': f'Debug failed: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/start', methods=['POST'])
-@token_required
+@principal_required
 def start_quiz_for_student(current_user, quiz_id):
     """Start a quiz for the current student"""
     if current_user.user_type != 'student':
@@ -697,13 +632,11 @@ def start_quiz_for_student(current_user, quiz_id):
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in start_quiz_for_student: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in start_quiz_for_student: %s', e)
         return jsonify({'message': f'Failed to start quiz: {str(e)}'}), 500
 
 @student_bp.route('/quizzes/<int:quiz_id>/results', methods=['GET'])
-@token_required
+@principal_required
 def get_quiz_results(current_user, quiz_id):
     """Get detailed quiz results including all answers and scoring"""
     try:
@@ -727,190 +660,34 @@ def get_quiz_results(current_user, quiz_id):
             if student_quiz.status != 'completed':
                 return jsonify({'message': 'Quiz not completed yet'}), 400
             
-            student_quizzes = [student_quiz]
-            
         elif current_user.user_type == 'professor':
             # Professors can view results for their own quizzes
             if quiz.professor_id != current_user.id:
                 return jsonify({'message': 'Not authorized to view this quiz results'}), 403
             
-            # Get all student attempts for this quiz
-            student_quizzes = StudentQuiz.query.filter_by(
-                quiz_id=quiz_id,
-                status='completed'
-            ).all()
         else:
             return jsonify({'message': 'Not authorized'}), 403
         
-        # Prepare results data
-        quiz_results = {
-            'quiz': {
-                'id': quiz.id,
-                'title': quiz.title,
-                'description': quiz.description,
-                'duration_minutes': quiz.duration_minutes,
-                'total_questions': Question.query.filter_by(quiz_id=quiz_id).count()
-            },
-            'results': []
-        }
-        
-        # Process each student's quiz attempt
-        for sq in student_quizzes:
-            # Get student info
-            student = Student.query.get(sq.student_id)
-            if not student:
-                continue
-            
-            # Get all answers for this attempt
-            answers = StudentAnswer.query.filter_by(student_quiz_id=sq.id).all()
-            
-            # Get all questions for detailed analysis
-            questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
-            
-            # Build detailed answer information
-            answer_details = []
-            total_correct = 0
-            total_points = 0
-            max_possible_points = 0
-            
-            for question in questions:
-                # Find the student's answer for this question
-                student_answer = next(
-                    (a for a in answers if a.question_id == question.id), 
-                    None
-                )
-                
-                # Calculate points
-                question_points = question.weight
-                max_possible_points += question_points
-                
-                if student_answer:
-                    is_correct = student_answer.is_correct
-                    if is_correct:
-                        total_correct += 1
-                        total_points += question_points
-                    
-                    answer_detail = {
-                        'question_id': question.id,
-                        'question_text': question.text,
-                        'question_topic': question.topic,
-                        'question_weight': question.weight,
-                        'options': [
-                            question.option_1,
-                            question.option_2,
-                            question.option_3,
-                            question.option_4
-                        ],
-                        'correct_answer': question.correct_answer,
-                        'student_answer': student_answer.selected_option,
-                        'is_correct': is_correct,
-                        'points_earned': question_points if is_correct else 0,
-                        'answered_at': student_answer.created_at.isoformat()
-                    }
-                else:
-                    # Question not answered
-                    answer_detail = {
-                        'question_id': question.id,
-                        'question_text': question.text,
-                        'question_topic': question.topic,
-                        'question_weight': question.weight,
-                        'options': [
-                            question.option_1,
-                            question.option_2,
-                            question.option_3,
-                            question.option_4
-                        ],
-                        'correct_answer': question.correct_answer,
-                        'student_answer': None,
-                        'is_correct': False,
-                        'points_earned': 0,
-                        'answered_at': None
-                    }
-                
-                # Filter out empty options
-                answer_detail['options'] = [opt for opt in answer_detail['options'] if opt.strip()]
-                answer_details.append(answer_detail)
-            
-            # Calculate topic-wise performance
-            topic_performance = {}
-            for answer_detail in answer_details:
-                topic = answer_detail['question_topic']
-                if topic and topic.strip():
-                    if topic not in topic_performance:
-                        topic_performance[topic] = {
-                            'total_questions': 0,
-                            'correct_answers': 0,
-                            'total_points': 0,
-                            'earned_points': 0
-                        }
-                    
-                    topic_performance[topic]['total_questions'] += 1
-                    topic_performance[topic]['total_points'] += answer_detail['question_weight']
-                    
-                    if answer_detail['is_correct']:
-                        topic_performance[topic]['correct_answers'] += 1
-                        topic_performance[topic]['earned_points'] += answer_detail['points_earned']
-            
-            # Calculate topic scores
-            for topic in topic_performance:
-                perf = topic_performance[topic]
-                perf['accuracy'] = (perf['correct_answers'] / perf['total_questions']) * 100 if perf['total_questions'] > 0 else 0
-                perf['score_percentage'] = (perf['earned_points'] / perf['total_points']) * 100 if perf['total_points'] > 0 else 0
-            
-            # Add student result to the results list
-            student_result = {
-                'student': {
-                    'id': student.id,
-                    'first_name': student.first_name,
-                    'last_name': student.last_name,
-                    'email': student.email,
-                    'student_id': student.student_id
-                } if current_user.user_type == 'professor' else None,
-                'attempt': {
-                    'id': sq.id,
-                    'status': sq.status,
-                    'start_time': sq.start_time.isoformat() if sq.start_time else None,
-                    'end_time': sq.end_time.isoformat() if sq.end_time else None,
-                    'duration_taken': None,  # Calculate if both times available
-                    'score_percentage': sq.score,
-                    'total_correct': total_correct,
-                    'total_questions': len(questions),
-                    'total_points': total_points,
-                    'max_possible_points': max_possible_points
-                },
-                'topic_performance': topic_performance,
-                'answers': answer_details
-            }
-            
-            # Calculate duration taken if both times are available
-            if sq.start_time and sq.end_time:
-                duration = sq.end_time - sq.start_time
-                student_result['attempt']['duration_taken'] = {
-                    'total_seconds': duration.total_seconds(),
-                    'minutes': int(duration.total_seconds() // 60),
-                    'seconds': int(duration.total_seconds() % 60)
-                }
-            
-            quiz_results['results'].append(student_result)
-        
-        # Add summary statistics for professors
-        if current_user.user_type == 'professor' and quiz_results['results']:
-            scores = [result['attempt']['score_percentage'] for result in quiz_results['results'] if result['attempt']['score_percentage'] is not None]
-            
-            quiz_results['summary'] = {
-                'total_attempts': len(quiz_results['results']),
-                'average_score': sum(scores) / len(scores) if scores else 0,
-                'highest_score': max(scores) if scores else 0,
-                'lowest_score': min(scores) if scores else 0,
-                'completion_rate': len([r for r in quiz_results['results'] if r['attempt']['status'] == 'completed']) / len(quiz_results['results']) * 100
-            }
+        # Optional keyset pagination over attempts (professors)
+        cursor = request.args.get('cursor', type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, 500))
+        
+        # Questions, attempts and answers are each loaded with one query
+        quiz_results = get_quiz_results_payload(
+            quiz,
+            student_id=current_user.id if current_user.user_type == 'student' else None,
+            cursor=cursor,
+            limit=limit,
+            # Class statistics cover every attempt, so only send them with the first page
+            include_statistics=cursor is None
+        )
         
         return jsonify(quiz_results), 200
         
     except Exception as e:
-        print(f"Error in get_quiz_results: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_quiz_results: %s', e)
         return jsonify({'message': f'Failed to fetch quiz results: {str(e)}'}), 500
 
 @student_bp.route('/module-performance', methods=['GET'])
@@ -921,85 +698,37 @@ def get_module_performance(current_user):
         return jsonify({'message': 'Not authorized'}), 403
     
     try:
-        # Get all completed quizzes for this student with module information
-        student_quizzes = StudentQuiz.query.filter_by(
-            student_id=current_user.id,
-            status='completed'
-        ).join(Quiz).join(Module).all()
+        # Per-module counts and averages from one GROUP BY query
+        aggregates = aggregate_module_performance(student_id=current_user.id)
         
-        if not student_quizzes:
+        # Only modules with at least one completed quiz are reported
+        aggregates = {module_id: data for module_id, data in aggregates.items() if data['completed_count'] > 0}
+        
+        if not aggregates:
             return jsonify({
                 'modules': [],
                 'total_modules': 0,
                 'message': 'No completed quizzes found'
             }), 200
         
-        # Group quizzes by module
-        module_performance = {}
+        # Scored quizzes of every module with one more query
+        quiz_scores = get_student_quiz_scores_by_module(current_user.id)
         
-        for sq in student_quizzes:
-            quiz = sq.quiz
-            module = quiz.module
-            
-            if not module:
-                continue  # Skip quizzes without modules
-            
-            module_id = module.id
-            module_name = module.name
-            
-            # Initialize module data if not exists
-            if module_id not in module_performance:
-                module_performance[module_id] = {
-                    'module_name': module_name,
-                    'module_id': module_id,
-                    'total_quizzes': 0,
-                    'completed_quizzes': 0,
-                    'total_score': 0,
-                    'quiz_scores': []
-                }
-            
-            # Add quiz score to module performance
-            if sq.score is not None:
-                module_performance[module_id]['completed_quizzes'] += 1
-                module_performance[module_id]['total_score'] += sq.score
-                module_performance[module_id]['quiz_scores'].append({
-                    'quiz_id': quiz.id,
-                    'quiz_title': quiz.title,
-                    'score': sq.score,
-                    'completed_at': sq.end_time.isoformat() if sq.end_time else None
-                })
-        
-        # Get total quiz count per module (including uncompleted ones)
-        for module_id in module_performance:
-            total_quizzes_in_module = StudentQuiz.query.filter_by(
-                student_id=current_user.id
-            ).join(Quiz).filter(Quiz.module_id == module_id).count()
-            
-            module_performance[module_id]['total_quizzes'] = total_quizzes_in_module
-        
-        # Calculate average performance for each module
         module_results = []
-        for module_id, data in module_performance.items():
-            completed_quizzes = data['completed_quizzes']
-            total_score = data['total_score']
+        for module_id, data in aggregates.items():
+            # Completed quizzes without a score don't count towards the average or completion
+            completed_quizzes = data['scored_count']
+            completion_rate = (completed_quizzes / data['assigned_count']) * 100 if data['assigned_count'] > 0 else 0
             
-            # Calculate average percentage
-            average_percentage = (total_score / completed_quizzes) if completed_quizzes > 0 else 0
-            
-            # Calculate completion rate
-            completion_rate = (completed_quizzes / data['total_quizzes']) * 100 if data['total_quizzes'] > 0 else 0
-            
-            module_result = {
+            module_results.append({
                 'module_id': module_id,
                 'module_name': data['module_name'],
-                'total_quizzes': data['total_quizzes'],
+                'total_quizzes': data['assigned_count'],
                 'completed_quizzes': completed_quizzes,
-                'average_percentage': round(average_percentage, 2),
+                'average_percentage': round(data['average_score'], 2),
                 'completion_rate': round(completion_rate, 2),
-                'quiz_details': data['quiz_scores']
-            }
-            
-            module_results.append(module_result)
+                'quiz_details': quiz_scores.get(module_id, [])
+            })
         
         # Sort modules by average percentage (descending)
         module_results.sort(key=lambda x: x['average_percentage'], reverse=True)
@@ -1012,123 +741,61 @@ def get_module_performance(current_user):
         }), 200
         
     except Exception as e:
-        print(f"Error in get_module_performance: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_module_performance: %s', e)
         return jsonify({'message': f'Failed to fetch module performance: {str(e)}'}), 500
 
 @student_bp.route('/quiz-results', methods=['GET'])
 @token_required
 def get_incorrect_quiz_answers(current_user):
-    """Get all incorrectly answered questions from all quizzes for the current student"""
+    """Get incorrectly answered questions from all quizzes for the current student, newest first"""
     if current_user.user_type != 'student':
         return jsonify({'message': 'Not authorized'}), 403
     
     try:
-        # Get all completed quizzes for this student
-        student_quizzes = StudentQuiz.query.filter_by(
-            student_id=current_user.id,
-            status='completed'
-        ).order_by(StudentQuiz.end_time.desc()).all()
-        
-        if not student_quizzes:
-            return jsonify({
-                'incorrect_answers': [],
-                'total_incorrect': 0,
-                'total_quizzes': 0,
-                'message': 'No completed quizzes found'
-            }), 200
+        # Keyset pagination: the cursor token comes from the previous page's next_cursor
+        cursor_token = request.args.get('cursor')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
         
-        incorrect_answers = []
-        total_incorrect = 0
-        
-        for sq in student_quizzes:
-            # Get the quiz details
-            quiz = Quiz.query.get(sq.quiz_id)
-            if not quiz:
-                continue
-            
-            # Get all incorrect answers for this quiz
-            incorrect_student_answers = StudentAnswer.query.filter_by(
-                student_quiz_id=sq.id,
-                is_correct=False
-            ).all()
-            
-            for answer in incorrect_student_answers:
-                # Get the question details
-                question = Question.query.get(answer.question_id)
-                if not question:
-                    continue
-                
-                # Build the incorrect answer details
-                incorrect_answer_data = {
-                    'quiz_id': quiz.id,
-                    'quiz_title': quiz.title,
-                    'quiz_completed_at': sq.end_time.isoformat() if sq.end_time else None,
-                    'quiz_score': sq.score,
-                    'module_name': quiz.module.name if quiz.module else None,
-                    'question_id': question.id,
-                    'question_text': question.text,
-                    'question_topic': question.topic,
-                    'question_weight': question.weight,
-                    'options': [
-                        question.option_1,
-                        question.option_2,
-                        question.option_3,
-                        question.option_4
-                    ],
-                    'correct_answer': question.correct_answer,
-                    'student_answer': answer.selected_option,
-                    'answered_at': answer.created_at.isoformat(),
-                    'points_lost': question.weight
-                }
-                
-                # Filter out empty options
-                incorrect_answer_data['options'] = [opt for opt in incorrect_answer_data['options'] if opt.strip()]
-                
-                incorrect_answers.append(incorrect_answer_data)
-                total_incorrect += 1
-        
-        # Group by topics for better analysis
-        topic_analysis = {}
-        for answer in incorrect_answers:
-            topic = answer['question_topic']
-            if topic and topic.strip():
-                if topic not in topic_analysis:
-                    topic_analysis[topic] = {
-                        'topic': topic,
-                        'incorrect_count': 0,
-                        'total_points_lost': 0,
-                        'questions': []
-                    }
-                
-                topic_analysis[topic]['incorrect_count'] += 1
-                topic_analysis[topic]['total_points_lost'] += answer['points_lost']
-                topic_analysis[topic]['questions'].append({
-                    'quiz_title': answer['quiz_title'],
-                    'question_text': answer['question_text'],
-                    'correct_answer': answer['correct_answer'],
-                    'student_answer': answer['student_answer']
-                })
+        try:
+            cursor = decode_cursor(cursor_token) if cursor_token else None
+        except ValueError:
+            return jsonify({'message': 'Invalid cursor'}), 400
         
-        # Convert topic analysis to list and sort by incorrect count
-        topic_analysis_list = list(topic_analysis.values())
-        topic_analysis_list.sort(key=lambda x: x['incorrect_count'], reverse=True)
+        incorrect_answers, next_cursor = get_incorrect_answer_page(current_user.id, cursor=cursor, limit=limit)
         
-        return jsonify({
+        response = {
             'incorrect_answers': incorrect_answers,
-            'total_incorrect': total_incorrect,
-            'total_quizzes': len(student_quizzes),
-            'topic_analysis': topic_analysis_list,
+            'pagination': {
+                'limit': limit,
+                'cursor': cursor_token,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            },
             'student_info': {
                 'id': current_user.id,
                 'name': f"{current_user.first_name} {current_user.last_name}",
                 'email': current_user.email
             }
-        }), 200
+        }
+        
+        # Totals and topic grouping cover the whole feed, so only the first page carries them
+        if cursor is None:
+            total_quizzes, total_incorrect = get_incorrect_answer_totals(current_user.id)
+            if not total_quizzes:
+                return jsonify({
+                    'incorrect_answers': [],
+                    'total_incorrect': 0,
+                    'total_quizzes': 0,
+                    'message': 'No completed quizzes found'
+                }), 200
+            
+            response['total_incorrect'] = total_incorrect
+            response['total_quizzes'] = total_quizzes
+            response['topic_analysis'] = get_incorrect_topic_analysis(current_user.id)
+        
+        return jsonify(response), 200
         
     except Exception as e:
-        print(f"Error in get_incorrect_quiz_answers: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Error in get_incorrect_quiz_answers: %s', e)
         return jsonify({'message': f'Failed to fetch incorrect answers: {str(e)}'}), 500
\ No newline at end of file
@@ -0,0 +1,102 @@
+# admin_side/services/aggregation_service.py
+from sqlalchemy import and_, case, distinct, func
+from models.ModuleModel import Module
+from models.QuizModel import Quiz
+from models.ProgressModel import StudentQuiz
+from app import db
+
+def aggregate_module_performance(student_id=None, professor_id=None, module_ids=None):
+    """
+    Per-module quiz statistics from one GROUP BY module query with conditional aggregates.
+
+    Filter by student_id for a student's own dashboard, or by professor_id /
+    module_ids for the professor views. Returns {module_id: {...}} with:
+    - quiz_count: quizzes in the module (with at least one assignment when filtering by student)
+    - assigned_count: student quiz assignments
+    - completed_count: completed assignments
+    - scored_count: completed assignments with a score
+    - average_score: average score of the scored assignments (0-100)
+    - student_count: distinct students with an assignment
+    - completion_rate: completed_count / assigned_count (0-100)
+    """
+    is_completed = StudentQuiz.status == 'completed'
+
+    query = db.session.query(
+        Module.id,
+        Module.name,
+        func.count(distinct(Quiz.id)),
+        func.count(StudentQuiz.id),
+        func.sum(case((is_completed, 1), else_=0)),
+        func.sum(case((and_(is_completed, StudentQuiz.score.isnot(None)), 1), else_=0)),
+        # AVG ignores the NULLs produced for attempts that don't count
+        func.avg(case((is_completed, StudentQuiz.score))),
+        func.count(distinct(StudentQuiz.student_id))
+    ).join(
+        Quiz, Quiz.module_id == Module.id
+    )
+
+    if student_id is not None:
+        query = query.join(StudentQuiz, and_(StudentQuiz.quiz_id == Quiz.id, StudentQuiz.student_id == student_id))
+    else:
+        query = query.outerjoin(StudentQuiz, StudentQuiz.quiz_id == Quiz.id)
+
+    if professor_id is not None:
+        query = query.filter(Module.professor_id == professor_id)
+    if module_ids is not None:
+        query = query.filter(Module.id.in_(list(module_ids)))
+
+    performance = {}
+    for module_id, module_name, quiz_count, assigned, completed, scored, average, students in \
+            query.group_by(Module.id, Module.name):
+        assigned = int(assigned or 0)
+        completed = int(completed or 0)
+        performance[module_id] = {
+            'module_id': module_id,
+            'module_name': module_name,
+            'quiz_count': int(quiz_count or 0),
+            'assigned_count': assigned,
+            'completed_count': completed,
+            'scored_count': int(scored or 0),
+            'average_score': float(average) if average is not None else 0.0,
+            'student_count': int(students or 0),
+            'completion_rate': (completed / assigned * 100) if assigned > 0 else 0.0
+        }
+
+    return performance
+
+def empty_module_performance(module):
+    """Statistics for a module without quizzes"""
+    return {
+        'module_id': module.id,
+        'module_name': module.name,
+        'quiz_count': 0,
+        'assigned_count': 0,
+        'completed_count': 0,
+        'scored_count': 0,
+        'average_score': 0.0,
+        'student_count': 0,
+        'completion_rate': 0.0
+    }
+
+def get_student_quiz_scores_by_module(student_id):
+    """A student's scored, completed quizzes grouped by module with one joined query"""
+    rows = db.session.query(
+        Quiz.module_id, Quiz.id, Quiz.title, StudentQuiz.score, StudentQuiz.end_time
+    ).join(
+        Quiz, Quiz.id == StudentQuiz.quiz_id
+    ).filter(
+        StudentQuiz.student_id == student_id,
+        StudentQuiz.status == 'completed',
+        StudentQuiz.score.isnot(None),
+        Quiz.module_id.isnot(None)
+    ).order_by(StudentQuiz.id).all()
+
+    scores = {}
+    for module_id, quiz_id, quiz_title, score, end_time in rows:
+        scores.setdefault(module_id, []).append({
+            'quiz_id': quiz_id,
+            'quiz_title': quiz_title,
+            'score': score,
+            'completed_at': end_time.isoformat() if end_time else None
+        })
+    return scores
@@ -0,0 +1,199 @@
+# admin_side/services/analytics_service.py
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert
+from models.AnalyticsModel import StudentAnalytics
+from models.ProgressModel import KnowledgeLevel
+from models.UserModel import Student
+from services.ml_service import get_completed_quiz_stats, STUDENT_ID_CHUNK_SIZE
+from services.job_queue import job_queue
+from app import db
+
+LEVEL_PRIORITY = {'High': 3, 'Normal': 2, 'Low': 1, 'No Data': 0}
+
+# Server-side sort options for the analytics listing
+ANALYTICS_SORT_COLUMNS = {
+    'level': (StudentAnalytics.level_priority, StudentAnalytics.overall_score),
+    'score': (StudentAnalytics.overall_score,),
+    'completed_quizzes': (StudentAnalytics.completed_quizzes,),
+    'average_score': (StudentAnalytics.average_score,),
+    'weak_topics': (StudentAnalytics.weak_topics,),
+    'name': (Student.last_name, Student.first_name),
+    'registration_date': (Student.created_at,)
+}
+
+def _chunks(values, size=STUDENT_ID_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _level_from_score(score):
+    if score < 0.5:
+        return 'Low'
+    elif score < 0.8:
+        return 'Normal'
+    return 'High'
+
+def build_student_analytics(student_ids):
+    """Compute analytics snapshot rows for many students with bulk queries"""
+    knowledge_levels = defaultdict(list)
+    for chunk in _chunks(student_ids):
+        for kl in KnowledgeLevel.query.filter(KnowledgeLevel.student_id.in_(chunk)).order_by(KnowledgeLevel.id):
+            knowledge_levels[kl.student_id].append(kl)
+
+    quiz_stats = get_completed_quiz_stats(student_ids)
+    now = datetime.utcnow()
+    rows = []
+
+    for student_id in student_ids:
+        overall_kl = None
+        topic_levels = []
+        for kl in knowledge_levels.get(student_id, []):
+            if kl.topic == 'OVERALL':
+                overall_kl = overall_kl or kl
+            else:
+                topic_levels.append({
+                    'topic': kl.topic,
+                    'score': round(kl.score, 3),
+                    'level': kl.level,
+                    'updated_at': kl.updated_at.isoformat()
+                })
+
+        # Determine overall level
+        if overall_kl:
+            overall_level = overall_kl.level
+            overall_score = overall_kl.score
+        elif topic_levels:
+            # Calculate from topic averages if no overall record
+            overall_score = sum(tl['score'] for tl in topic_levels) / len(topic_levels)
+            overall_level = _level_from_score(overall_score)
+        else:
+            overall_level = 'No Data'
+            overall_score = 0
+
+        student_quiz_stats = quiz_stats.get(student_id)
+        average_score = 0
+        if student_quiz_stats and student_quiz_stats['scored'] > 0:
+            average_score = student_quiz_stats['total_score'] / student_quiz_stats['scored']
+
+        rows.append({
+            'student_id': student_id,
+            'overall_level': overall_level or 'No Data',
+            'level_priority': LEVEL_PRIORITY.get(overall_level, 0),
+            'overall_score': overall_score or 0.0,
+            'overall_updated_at': overall_kl.updated_at if overall_kl else None,
+            'completed_quizzes': student_quiz_stats['completed'] if student_quiz_stats else 0,
+            'average_score': average_score,
+            'total_topics': len(topic_levels),
+            'strong_topics': len([tl for tl in topic_levels if tl['level'] == 'High']),
+            'developing_topics': len([tl for tl in topic_levels if tl['level'] == 'Normal']),
+            'weak_topics': len([tl for tl in topic_levels if tl['level'] == 'Low']),
+            'topic_knowledge': json.dumps(topic_levels),
+            'refreshed_at': now
+        })
+
+    return rows
+
+def refresh_student_analytics(student_ids=None):
+    """
+    Recompute the analytics snapshot for some students (None for everyone).
+    The caller commits. Returns the number of refreshed students.
+    """
+    if student_ids is None:
+        student_ids = [row[0] for row in db.session.query(Student.id)]
+    student_ids = list(dict.fromkeys(student_ids))
+
+    rows = build_student_analytics(student_ids)
+
+    for chunk in _chunks(rows):
+        db.session.execute(
+            delete(StudentAnalytics).where(StudentAnalytics.student_id.in_([row['student_id'] for row in chunk])),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(insert(StudentAnalytics), chunk)
+
+    return len(rows)
+
+def refresh_missing_student_analytics():
+    """Build snapshots for students that don't have one yet (e.g. new registrations)"""
+    missing_ids = [
+        row[0] for row in db.session.query(Student.id)
+        .outerjoin(StudentAnalytics, StudentAnalytics.student_id == Student.id)
+        .filter(StudentAnalytics.student_id.is_(None))
+    ]
+    if not missing_ids:
+        return 0
+    return refresh_student_analytics(missing_ids)
+
+def refresh_student_analytics_job(student_id):
+    """Background job: refresh one student's snapshot after a quiz was scored"""
+    refresh_student_analytics([student_id])
+    db.session.commit()
+
+def schedule_analytics_refresh(student_id):
+    """
+    Queue a snapshot refresh for a student on the same worker as the student's
+    knowledge level updates. update_knowledge_levels_incremental submits it
+    after committing, so a queued refresh always runs after the latest update;
+    another submission while it is queued folds into it.
+    """
+    return job_queue.submit(
+        'analytics_refresh',
+        student_id,
+        refresh_student_analytics_job,
+        {'student_id': student_id},
+        merge=lambda queued_payload, payload: None,
+        owner_id=student_id
+    )
+
+def get_student_analytics_page(sort='level', order='desc', page=None, per_page=None):
+    """
+    Read snapshot rows joined with student details, sorted in the database.
+    Returns (rows of (Student, StudentAnalytics), total count).
+    """
+    sort_columns = ANALYTICS_SORT_COLUMNS.get(sort, ANALYTICS_SORT_COLUMNS['level'])
+    order_by = [column.asc() if order == 'asc' else column.desc() for column in sort_columns]
+
+    query = db.session.query(Student, StudentAnalytics) \
+        .join(StudentAnalytics, StudentAnalytics.student_id == Student.id) \
+        .order_by(*order_by, Student.id)
+
+    total = db.session.query(func.count(StudentAnalytics.student_id)).scalar()
+
+    if page is not None and per_page is not None:
+        query = query.offset((page - 1) * per_page).limit(per_page)
+
+    return query.all(), total
+
+def get_overall_level_counts():
+    """Count students per overall level from the snapshot table"""
+    return dict(
+        db.session.query(StudentAnalytics.overall_level, func.count(StudentAnalytics.student_id))
+        .group_by(StudentAnalytics.overall_level)
+        .all()
+    )
+
+def get_topic_distribution():
+    """Aggregate topic knowledge levels across all students with one GROUP BY"""
+    rows = db.session.query(
+        KnowledgeLevel.topic,
+        func.count(KnowledgeLevel.id),
+        func.sum(case((KnowledgeLevel.level == 'High', 1), else_=0)),
+        func.sum(case((KnowledgeLevel.level == 'Normal', 1), else_=0)),
+        func.sum(case((KnowledgeLevel.level == 'Low', 1), else_=0)),
+        func.avg(KnowledgeLevel.score)
+    ).filter(
+        KnowledgeLevel.topic != 'OVERALL'
+    ).group_by(KnowledgeLevel.topic).all()
+
+    return {
+        topic: {
+            'total_assessments': total,
+            'high_count': int(high or 0),
+            'normal_count': int(normal or 0),
+            'low_count': int(low or 0),
+            'average_score': round(float(average or 0), 3)
+        }
+        for topic, total, high, normal, low, average in rows
+    }
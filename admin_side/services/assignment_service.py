@@ -0,0 +1,161 @@
+# admin_side/services/assignment_service.py
+import time
+from sqlalchemy import delete, insert, select
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from models.UserModel import Student
+from services.module_catalog_service import mark_catalog_stale
+from services.quiz_events import publish_assignment_changes
+from app import db
+
+# Keep IN (...) lists and multi-row inserts within database parameter limits
+ASSIGNMENT_CHUNK_SIZE = 1000
+
+def _chunks(values, size=ASSIGNMENT_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class _Timer:
+    """Collects the duration of each step in milliseconds"""
+
+    def __init__(self):
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._started) * 1000, 3)
+        self._started = now
+
+def get_existing_student_ids(student_ids):
+    """Get the ids in student_ids that belong to a student, as a set"""
+    existing = set()
+    for chunk in _chunks(set(student_ids)):
+        existing.update(
+            row[0] for row in db.session.query(Student.id).filter(Student.id.in_(chunk))
+        )
+    return existing
+
+def get_quiz_assignments(quiz_id):
+    """Get {student_id: status} for every assignment of a quiz with one query"""
+    return dict(
+        db.session.query(StudentQuiz.student_id, StudentQuiz.status)
+        .filter(StudentQuiz.quiz_id == quiz_id)
+        .all()
+    )
+
+def insert_assignments(quiz_id, student_ids):
+    """
+    Bulk insert uncompleted assignments, skipping rows that already exist.
+    Relies on the (student_id, quiz_id) unique constraint, so concurrent
+    requests can't create duplicates.
+    """
+    statement = insert(StudentQuiz) \
+        .prefix_with('IGNORE', dialect='mysql') \
+        .prefix_with('OR IGNORE', dialect='sqlite')
+
+    mark_catalog_stale(db.session(), student_ids)
+
+    for chunk in _chunks(sorted(student_ids)):
+        db.session.execute(statement, [
+            {'student_id': student_id, 'quiz_id': quiz_id, 'status': 'uncompleted'}
+            for student_id in chunk
+        ])
+
+def delete_uncompleted_assignments(quiz_id, student_ids=None):
+    """
+    Bulk delete uncompleted assignments (and their saved answers) of a quiz.
+    Pass student_ids to only remove those students' assignments.
+    """
+    chunks = [None] if student_ids is None else list(_chunks(sorted(student_ids)))
+    mark_catalog_stale(db.session(), student_ids)
+
+    for chunk in chunks:
+        assignment_ids = select(StudentQuiz.id).where(
+            StudentQuiz.quiz_id == quiz_id,
+            StudentQuiz.status == 'uncompleted'
+        )
+        if chunk is not None:
+            assignment_ids = assignment_ids.where(StudentQuiz.student_id.in_(chunk))
+
+        # Bulk deletes skip the ORM cascade, so remove saved answers first
+        db.session.execute(
+            delete(StudentAnswer).where(StudentAnswer.student_quiz_id.in_(assignment_ids)),
+            execution_options={'synchronize_session': False}
+        )
+
+        statement = delete(StudentQuiz).where(
+            StudentQuiz.quiz_id == quiz_id,
+            StudentQuiz.status == 'uncompleted'
+        )
+        if chunk is not None:
+            statement = statement.where(StudentQuiz.student_id.in_(chunk))
+        db.session.execute(statement, execution_options={'synchronize_session': False})
+
+def assign_quiz(quiz_id, student_ids=None, replace=False):
+    """
+    Assign a quiz to a set of students with set-based statements.
+
+    student_ids=None targets every student; unknown ids are ignored. With
+    replace=True, uncompleted assignments of students outside the target set
+    are removed. Completed attempts are never touched. The caller commits.
+    Returns the number of created and removed assignments plus step timings.
+    """
+    timer = _Timer()
+
+    if student_ids is None:
+        targets = {row[0] for row in db.session.query(Student.id)}
+    else:
+        targets = get_existing_student_ids(student_ids)
+    timer.lap('load_students_ms')
+
+    existing = get_quiz_assignments(quiz_id)
+    timer.lap('load_assignments_ms')
+
+    to_add = targets - existing.keys()
+    to_remove = set()
+    if replace:
+        to_remove = {
+            student_id for student_id, status in existing.items()
+            if status == 'uncompleted' and student_id not in targets
+        }
+
+    if to_remove:
+        delete_uncompleted_assignments(quiz_id, to_remove)
+    timer.lap('delete_ms')
+
+    if to_add:
+        insert_assignments(quiz_id, to_add)
+    timer.lap('insert_ms')
+
+    publish_assignment_changes(quiz_id, added=to_add, removed=to_remove)
+
+    return {
+        'created': len(to_add),
+        'removed': len(to_remove),
+        'assigned': len(existing) - len(to_remove) + len(to_add),
+        'timings': timer.timings
+    }
+
+def unassign_quiz(quiz_id):
+    """Remove every uncompleted assignment of a quiz. The caller commits."""
+    timer = _Timer()
+
+    # The ids, not just a count, so the students can be told
+    removed = [row[0] for row in db.session.query(StudentQuiz.student_id).filter(
+        StudentQuiz.quiz_id == quiz_id,
+        StudentQuiz.status == 'uncompleted'
+    )]
+    timer.lap('load_assignments_ms')
+
+    if removed:
+        delete_uncompleted_assignments(quiz_id)
+        publish_assignment_changes(quiz_id, removed=removed)
+    timer.lap('delete_ms')
+
+    return {
+        'created': 0,
+        'removed': len(removed),
+        'assigned': db.session.query(StudentQuiz).filter(StudentQuiz.quiz_id == quiz_id).count(),
+        'timings': timer.timings
+    }
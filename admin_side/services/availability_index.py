@@ -0,0 +1,137 @@
+# admin_side/services/availability_index.py
+"""
+Which quizzes are open at a given time.
+
+Quiz windows are naive IST datetimes (see utils.timezone_utils); a missing
+start or end leaves that side of the window open, as in is_quiz_available.
+Both ends are inclusive. Every caller reads the clock through
+get_ist_datetime_for_db so listings agree with the checks made when a quiz
+is started.
+"""
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import or_
+from models.QuizModel import Quiz
+from models.ProgressModel import StudentQuiz
+from utils.timezone_utils import get_ist_datetime_for_db
+from app import db
+
+def window_bounds(start_time, end_time):
+    """Closed interval for a quiz window, with missing ends unbounded"""
+    return (start_time or datetime.min, end_time or datetime.max)
+
+class AvailabilityIndex:
+    """
+    Centered interval tree over quiz windows.
+
+    Built once in O(n log n); open_at(t) returns the quizzes whose window
+    contains t in O(log n + k) for k results. The index is immutable:
+    changed windows mean building a new one.
+    """
+
+    def __init__(self, windows):
+        # windows: iterable of (quiz_id, start_time, end_time)
+        self.windows = {quiz_id: window_bounds(start, end) for quiz_id, start, end in windows}
+        self._root = self._build([(start, end, quiz_id) for quiz_id, (start, end) in self.windows.items()])
+
+    @classmethod
+    def _build(cls, intervals):
+        if not intervals:
+            return None
+
+        # Split on the median endpoint so each side gets at most half the intervals
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        return (
+            center,
+            sorted(overlapping, key=lambda interval: interval[0]),                # by start, ascending
+            sorted(overlapping, key=lambda interval: interval[1], reverse=True),  # by end, descending
+            cls._build(left),
+            cls._build(right)
+        )
+
+    def open_at(self, when):
+        """Ids of the quizzes open at when"""
+        found = []
+        node = self._root
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if when < center:
+                # Every interval here ends at or after the center, so only the start matters
+                for start, _, quiz_id in by_start:
+                    if start > when:
+                        break
+                    found.append(quiz_id)
+                node = left
+            elif when > center:
+                for _, end, quiz_id in by_end:
+                    if end < when:
+                        break
+                    found.append(quiz_id)
+                node = right
+            else:
+                found.extend(quiz_id for _, _, quiz_id in by_start)
+                break
+        return found
+
+    def is_open(self, quiz_id, when):
+        window = self.windows.get(quiz_id)
+        return window is not None and window[0] <= when <= window[1]
+
+    def __len__(self):
+        return len(self.windows)
+
+def load_student_windows(student_id):
+    """(quiz_id, start_time, end_time) of every quiz assigned to a student, with one query"""
+    return db.session.query(Quiz.id, Quiz.start_time, Quiz.end_time) \
+        .join(StudentQuiz, StudentQuiz.quiz_id == Quiz.id) \
+        .filter(StudentQuiz.student_id == student_id) \
+        .all()
+
+def get_student_availability(student_id):
+    """
+    A student's AvailabilityIndex, shared between requests. It is cached next
+    to the module catalog and dropped by the same commit events, so assignment
+    and availability edits are picked up on the next read.
+    """
+    from services.module_catalog_service import availability_cache
+
+    index = availability_cache.get(student_id)
+    if index is None:
+        index = AvailabilityIndex(load_student_windows(student_id))
+        ttl = current_app.config.get('MODULE_CATALOG_CACHE_TTL', 300)
+        if ttl > 0:
+            availability_cache.put(student_id, index, ttl, current_app.config.get('MODULE_CATALOG_CACHE_SIZE', 5000))
+    return index
+
+def open_quiz_ids(student_id, now=None):
+    """Ids of the student's quizzes that are open now (the quiz clock by default)"""
+    return set(get_student_availability(student_id).open_at(now or get_ist_datetime_for_db()))
+
+def open_window_filter(now):
+    """SQL condition for quizzes open at now; served by ix_quizzes_window"""
+    return (
+        or_(Quiz.start_time.is_(None), Quiz.start_time <= now),
+        or_(Quiz.end_time.is_(None), Quiz.end_time >= now)
+    )
+
+def query_open_quiz_ids(now=None, student_id=None):
+    """
+    Database path for the same question, for callers that need fresh rows
+    or every open quiz rather than one student's.
+    """
+    now = now or get_ist_datetime_for_db()
+    query = db.session.query(Quiz.id).filter(*open_window_filter(now))
+    if student_id is not None:
+        query = query.join(StudentQuiz, StudentQuiz.quiz_id == Quiz.id).filter(StudentQuiz.student_id == student_id)
+    return {row[0] for row in query}
@@ -0,0 +1,249 @@
+# admin_side/services/batch_quiz_service.py
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, select, update
+from models.QuizModel import Quiz, Question
+from models.ProgressModel import StudentQuiz, KnowledgeLevel
+from models.UserModel import Student
+from services.job_queue import batch_job_queue, report_progress
+from services.module_catalog_service import mark_catalog_stale
+from services.quiz_events import publish_assignment_changes
+from services.question_bank_service import ensure_bank_items, pool_question_rows
+from services.question_sampler import get_question_sampler, init_sampler_worker, select_adaptive_batch
+from utils.csv_utils import get_question_pool
+from utils.timezone_utils import get_ist_datetime_for_db
+from utils.tracing import get_tracer
+from app import db
+
+trace = get_tracer('quiz.batch')
+
+# Keep IN (...) lists within database parameter limits
+COHORT_QUERY_CHUNK_SIZE = 1000
+# Students whose quizzes are saved in one transaction
+COHORT_SAVE_CHUNK_SIZE = 200
+# Students per task sent to a worker process
+COHORT_SELECT_CHUNK_SIZE = 100
+# Smaller cohorts are selected in-process; starting workers costs more than it saves
+PARALLEL_MIN_STUDENTS = 500
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def resolve_cohort(student_ids=None, intake_no=None, academic_year=None, faculty=None):
+    """Get {student id: Student} for explicit ids and/or an intake, with one query per chunk"""
+    query = db.session.query(Student)
+    if intake_no:
+        query = query.filter(Student.intake_no == intake_no)
+    if academic_year:
+        query = query.filter(Student.academic_year == academic_year)
+    if faculty:
+        query = query.filter(Student.faculty == faculty)
+
+    if student_ids is None:
+        return {student.id: student for student in query}
+
+    students = {}
+    for chunk in _chunks(set(student_ids), COHORT_QUERY_CHUNK_SIZE):
+        students.update((student.id, student) for student in query.filter(Student.id.in_(chunk)))
+    return students
+
+def get_cohort_topic_levels(student_ids):
+    """Get {student_id: {topic: knowledge score}} for every student with one query per chunk"""
+    cohort_levels = {student_id: {} for student_id in student_ids}
+    for chunk in _chunks(sorted(cohort_levels), COHORT_QUERY_CHUNK_SIZE):
+        rows = db.session.query(KnowledgeLevel.student_id, KnowledgeLevel.topic, KnowledgeLevel.score) \
+            .filter(KnowledgeLevel.student_id.in_(chunk))
+        for student_id, topic, score in rows:
+            cohort_levels[student_id][topic] = score
+    return cohort_levels
+
+def select_cohort_questions(sampler, cohort_levels, num_questions, seed=None, workers=1):
+    """
+    Adaptive selections for a cohort as {student_id: pool indices}.
+    Large cohorts are split across worker processes; each worker receives
+    the read-only pool once, when it starts.
+    """
+    tasks = sorted(cohort_levels.items())
+    selections = {}
+
+    if workers <= 1 or len(tasks) < PARALLEL_MIN_STUDENTS:
+        for chunk in _chunks(tasks, COHORT_SELECT_CHUNK_SIZE):
+            selections.update(select_adaptive_batch(chunk, num_questions, seed, sampler))
+            report_progress(selected=len(selections))
+        return selections
+
+    # Spawned, not forked: the web process runs other threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_sampler_worker,
+        initargs=(sampler.questions,)
+    ) as executor:
+        futures = [
+            executor.submit(select_adaptive_batch, chunk, num_questions, seed)
+            for chunk in _chunks(tasks, COHORT_SELECT_CHUNK_SIZE)
+        ]
+        for future in as_completed(futures):
+            selections.update(future.result())
+            report_progress(selected=len(selections))
+
+    return selections
+
+def insert_quizzes(rows, returning=None):
+    """
+    Insert quiz rows and return their ids in row order.
+    Uses one INSERT ... RETURNING where the dialect supports it (returning=None
+    detects this). MySQL has no RETURNING, so there the rows are inserted under
+    a title unique to this batch, read back by it and renamed; quizzes that
+    other requests or processes create at the same moment can't be mistaken
+    for them.
+    """
+    if returning is None:
+        returning = db.session.get_bind().dialect.insert_returning
+    if returning:
+        # One multi-row statement assigns ascending ids in row order
+        return sorted(db.session.scalars(insert(Quiz).values(rows).returning(Quiz.id)))
+
+    batch_title = f'cohort-batch-{uuid.uuid4().hex}'
+    professor_ids = {row['professor_id'] for row in rows}
+    db.session.execute(insert(Quiz).values([{**row, 'title': batch_title} for row in rows]))
+
+    # A single statement assigns ascending ids in row order
+    quiz_ids = db.session.scalars(
+        select(Quiz.id)
+        .where(Quiz.professor_id.in_(professor_ids), Quiz.title == batch_title)
+        .order_by(Quiz.id)
+    ).all()
+    if len(quiz_ids) != len(rows):
+        raise RuntimeError(f"Expected {len(rows)} new quizzes, found {len(quiz_ids)}")
+
+    ids_by_title = {}
+    for quiz_id, row in zip(quiz_ids, rows):
+        ids_by_title.setdefault(row['title'], []).append(quiz_id)
+    for title, title_ids in ids_by_title.items():
+        db.session.execute(
+            update(Quiz).where(Quiz.id.in_(title_ids)).values(title=title),
+            execution_options={'synchronize_session': False}
+        )
+    return quiz_ids
+
+def save_cohort_quizzes(professor_id, student_names, selections, pool_questions, title, description=None,
+                        module_id=None, duration_minutes=20):
+    """
+    Persist one quiz per student with bulk inserts, one transaction per chunk
+    of students. Chunks already committed stay saved if a later one fails.
+    student_names is {student_id: display name}. Returns {student_id: quiz_id}.
+    """
+    selected = {
+        student_id: [pool_questions[index] for index in indices]
+        for student_id, indices in selections.items()
+    }
+
+    # Every bank item the cohort needs, in one pass
+    bank_ids = ensure_bank_items(q_data for questions in selected.values() for q_data in questions)
+    db.session.commit()
+
+    # Same availability window as a single generated quiz
+    start_time = get_ist_datetime_for_db()
+    end_time = start_time + timedelta(days=7)
+
+    quiz_ids = {}
+    for chunk in _chunks(sorted(selected), COHORT_SAVE_CHUNK_SIZE):
+        created_at = datetime.utcnow()
+        try:
+            chunk_quiz_ids = insert_quizzes([
+                {
+                    'title': title,
+                    'description': description or f"Personalized quiz for {student_names[student_id]}",
+                    'professor_id': professor_id,
+                    'module_id': module_id,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'duration_minutes': duration_minutes,
+                    'created_at': created_at
+                }
+                for student_id in chunk
+            ])
+
+            question_rows = []
+            for student_id, quiz_id in zip(chunk, chunk_quiz_ids):
+                question_rows.extend(pool_question_rows(quiz_id, selected[student_id], bank_ids))
+            if question_rows:
+                db.session.execute(insert(Question), question_rows)
+
+            db.session.execute(insert(StudentQuiz), [
+                {'student_id': student_id, 'quiz_id': quiz_id, 'status': 'uncompleted'}
+                for student_id, quiz_id in zip(chunk, chunk_quiz_ids)
+            ])
+            # Bulk statements skip the ORM events that keep the catalog cache in sync
+            mark_catalog_stale(db.session(), chunk)
+            for student_id, quiz_id in zip(chunk, chunk_quiz_ids):
+                publish_assignment_changes(quiz_id, added=[student_id])
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        quiz_ids.update(zip(chunk, chunk_quiz_ids))
+        report_progress(saved=len(quiz_ids))
+
+    return quiz_ids
+
+def generate_cohort_quizzes(professor_id, student_ids, title, num_questions=15, description=None,
+                            module_id=None, seed=None, workers=None):
+    """
+    Generate a personalized quiz for every student of a cohort.
+    Unknown student ids are skipped. Returns {student_id: quiz_id}.
+    """
+    if workers is None:
+        workers = current_app.config.get('BATCH_QUIZ_WORKERS', 1)
+
+    student_names = {
+        student.id: f"{student.first_name} {student.last_name}"
+        for student in resolve_cohort(student_ids).values()
+    }
+    report_progress(total=len(student_names), selected=0, saved=0,
+                    skipped=len(set(student_ids)) - len(student_names))
+    if not student_names:
+        return {}
+
+    sampler = get_question_sampler(get_question_pool())
+    cohort_levels = get_cohort_topic_levels(student_names)
+    selections = select_cohort_questions(sampler, cohort_levels, num_questions, seed, workers)
+
+    return save_cohort_quizzes(professor_id, student_names, selections, sampler.questions, title,
+                               description=description, module_id=module_id)
+
+def generate_cohort_quizzes_job(**payload):
+    """Background job: generate a cohort's quizzes"""
+    quiz_ids = generate_cohort_quizzes(**payload)
+    trace.info('Generated %s personalized quizzes for professor %s', len(quiz_ids), payload['professor_id'])
+
+def schedule_cohort_quizzes(professor_id, student_ids, title, num_questions=15, description=None,
+                            module_id=None, seed=None):
+    """
+    Queue cohort quiz generation on the batch queue, away from the per-student
+    knowledge and analytics jobs. Batches of the same professor run one after
+    the other; poll the job for progress (total, selected, saved).
+    """
+    return batch_job_queue.submit(
+        'cohort_quiz_generation',
+        f'cohort-{professor_id}',
+        generate_cohort_quizzes_job,
+        {
+            'professor_id': professor_id,
+            'student_ids': sorted(set(student_ids)),
+            'title': title,
+            'num_questions': num_questions,
+            'description': description,
+            'module_id': module_id,
+            'seed': seed
+        },
+        owner_id=professor_id
+    )
@@ -0,0 +1,201 @@
+# admin_side/services/event_hub.py
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+class SubscriptionLimitError(Exception):
+    """Raised when a new subscriber would exceed a connection limit"""
+
+    def __init__(self, message, status_code=503):
+        super().__init__(message)
+        self.status_code = status_code
+
+class Event:
+    """One published event, encoded once as a server-sent event frame"""
+
+    __slots__ = ('id', 'type', 'data', 'user_ids', 'user_type', 'frame')
+
+    def __init__(self, event_id, event_type, data, user_ids=None, user_type=None):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.user_ids = user_ids
+        self.user_type = user_type
+        payload = json.dumps({'type': event_type, 'at': datetime.utcnow().isoformat(), **data},
+                             separators=(',', ':'), default=str)
+        self.frame = f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+    def is_for(self, subscription):
+        if self.user_ids is not None:
+            return subscription.user_id in self.user_ids
+        return self.user_type is None or self.user_type == subscription.user_type
+
+class Subscription:
+    """One connected client: a bounded queue of events waiting to be sent"""
+
+    def __init__(self, user_id, user_type, max_queue=100):
+        self.user_id = user_id
+        self.user_type = user_type
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self._events = deque()
+        self._condition = threading.Condition()
+
+    def put(self, event):
+        with self._condition:
+            # A client that stopped reading loses its oldest events, not the server's memory
+            if len(self._events) >= self.max_queue:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout):
+        """Next event, or None after timeout seconds (time for a heartbeat) or once closed"""
+        with self._condition:
+            if not self._events and not self.closed:
+                self._condition.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+class EventHub:
+    """
+    In-process publish/subscribe hub for server-sent events.
+
+    Events go to specific users, to every user of a type, or to everyone.
+    Subscriptions are indexed by user, so publishing to a few students costs
+    the same with ten or ten thousand idle subscribers. Recent events are
+    kept for clients reconnecting with Last-Event-ID. Publishing never
+    touches the database.
+    """
+
+    def __init__(self, max_subscribers=2000, max_per_user=5, replay_size=500):
+        self.max_subscribers = max_subscribers
+        self.max_per_user = max_per_user
+        self._lock = threading.Lock()
+        self._by_user = {}  # user id -> set of Subscriptions
+        self._count = 0
+        self._next_id = 1
+        self._recent = deque(maxlen=replay_size)
+        self._counts = {'published': 0, 'delivered': 0, 'rejected': 0}
+
+    def configure(self, config):
+        self.max_subscribers = config.get('EVENTS_MAX_SUBSCRIBERS', 2000)
+        self.max_per_user = config.get('EVENTS_MAX_CONNECTIONS_PER_USER', 5)
+        with self._lock:
+            self._recent = deque(self._recent, maxlen=config.get('EVENTS_REPLAY_SIZE', 500))
+
+    def subscribe(self, user_id, user_type, max_queue=100, last_event_id=None):
+        """
+        Register a subscriber and return (subscription, missed events).
+        Missed events are the retained ones after last_event_id that are
+        addressed to this user. Raises SubscriptionLimitError when full.
+        """
+        subscription = Subscription(user_id, user_type, max_queue)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                self._counts['rejected'] += 1
+                raise SubscriptionLimitError('Too many event subscribers, try again later', 503)
+            user_subscriptions = self._by_user.setdefault(user_id, set())
+            if len(user_subscriptions) >= self.max_per_user:
+                self._counts['rejected'] += 1
+                if not user_subscriptions:
+                    del self._by_user[user_id]
+                raise SubscriptionLimitError('Too many open event streams for this user', 429)
+            user_subscriptions.add(subscription)
+            self._count += 1
+
+            missed = []
+            if last_event_id is not None:
+                missed = [event for event in self._recent if event.id > last_event_id and event.is_for(subscription)]
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            user_subscriptions = self._by_user.get(subscription.user_id)
+            if user_subscriptions and subscription in user_subscriptions:
+                user_subscriptions.discard(subscription)
+                self._count -= 1
+                if not user_subscriptions:
+                    del self._by_user[subscription.user_id]
+
+    def publish(self, event_type, data, user_ids=None, user_type=None):
+        """
+        Publish an event to user_ids, else to every user of user_type, else to
+        everyone. Returns the Event.
+        """
+        if user_ids is not None:
+            user_ids = frozenset(user_ids)
+
+        with self._lock:
+            event = Event(self._next_id, event_type, data, user_ids, user_type)
+            self._next_id += 1
+            self._recent.append(event)
+            self._counts['published'] += 1
+
+            if user_ids is not None:
+                targets = [subscription for user_id in user_ids for subscription in self._by_user.get(user_id, ())]
+            else:
+                targets = [subscription for subscriptions in self._by_user.values() for subscription in subscriptions
+                           if event.is_for(subscription)]
+            self._counts['delivered'] += len(targets)
+
+        for subscription in targets:
+            subscription.put(event)
+        return event
+
+    def has_subscribers(self):
+        return self._count > 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': self._count,
+                'users': len(self._by_user),
+                'max_subscribers': self.max_subscribers,
+                'max_per_user': self.max_per_user,
+                'last_event_id': self._next_id - 1,
+                **self._counts
+            }
+
+    def close_all(self):
+        """Disconnect every subscriber (their streams end on the next read)"""
+        with self._lock:
+            subscriptions = [subscription for subscriptions in self._by_user.values() for subscription in subscriptions]
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+
+# Shared hub for the whole process
+event_hub = EventHub()
+
+def publish_after_commit(session, event_type, data, user_ids=None, user_type=None):
+    """
+    Publish an event once the session commits; a rollback discards it.
+    Use this wherever the event describes a database change.
+    """
+    session.info.setdefault('pending_events', []).append((event_type, data, user_ids, user_type))
+
+def _on_commit(session):
+    for event_type, data, user_ids, user_type in session.info.pop('pending_events', ()):
+        event_hub.publish(event_type, data, user_ids, user_type)
+
+def _on_rollback(session, previous_transaction):
+    session.info.pop('pending_events', None)
+
+def register_event_hub_events():
+    """Publish pending events after each commit"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    for name, listener in (('after_commit', _on_commit), ('after_soft_rollback', _on_rollback)):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
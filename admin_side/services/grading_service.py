@@ -0,0 +1,164 @@
+# admin_side/services/grading_service.py
+import numpy as np
+from datetime import datetime
+from sqlalchemy import delete, insert
+from models.QuizModel import Question
+from models.ProgressModel import StudentAnswer
+from app import db
+
+# Submitted options outside this range can't be stored or compared as int64
+OPTION_RANGE = np.iinfo(np.int64)
+
+def normalize_option(option):
+    """
+    A submitted option as an int, or None when it can't be an option index.
+    Integral floats (2.0 from some JSON encoders) count as their int value, like
+    the old == comparison; booleans, other floats, strings and out-of-range
+    integers are invalid.
+    """
+    if isinstance(option, float) and option.is_integer():
+        option = int(option)
+    if isinstance(option, int) and not isinstance(option, bool) and OPTION_RANGE.min <= option <= OPTION_RANGE.max:
+        return option
+    return None
+
+class AnswerKey:
+    """A quiz's answer key as compact arrays, aligned by question position"""
+
+    def __init__(self, question_ids, correct_answers, weights):
+        self.question_ids = np.asarray(question_ids, dtype=np.int64)
+        self.correct_answers = np.asarray(correct_answers, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=float)
+        self.positions = {int(question_id): i for i, question_id in enumerate(self.question_ids)}
+
+    def __len__(self):
+        return len(self.question_ids)
+
+class GradeResult:
+    """Outcome of grading one submission"""
+
+    def __init__(self, rows, total_points, max_points):
+        self.rows = rows  # one dict per graded answer, ready for insert
+        self.total_points = total_points
+        self.max_points = max_points
+        self.score = (total_points / max_points * 100) if max_points > 0 else 0
+
+def load_answer_key(quiz_id):
+    """Load a quiz's correct answers and weights with one column query"""
+    rows = db.session.query(
+        Question.id, Question.correct_answer, Question.weight
+    ).filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+
+    return AnswerKey(
+        [row[0] for row in rows],
+        [row[1] for row in rows],
+        [row[2] if row[2] is not None else 1.0 for row in rows]
+    )
+
+def grade_answers(answer_key, student_quiz_id, answers):
+    """
+    Grade submitted answers against the answer key in one vectorized pass.
+
+    answers is the posted list of {'question_id', 'selected_option'}. Questions
+    outside the quiz are ignored and the last answer per question wins. Only
+    answered questions count towards max_points, as before. Options go through
+    normalize_option, so invalid ones are graded and stored as unanswered.
+    """
+    submitted = {}
+    for answer_data in answers:
+        try:
+            position = answer_key.positions.get(int(answer_data.get('question_id')))
+        except (TypeError, ValueError):
+            continue
+        if position is not None:
+            submitted[position] = normalize_option(answer_data.get('selected_option'))
+
+    if not submitted:
+        return GradeResult([], 0, 0)
+
+    positions = np.fromiter(submitted.keys(), dtype=np.int64, count=len(submitted))
+    # Unanswered and invalid (None) options never match a 0-based option index
+    selected = np.array([-1 if option is None else option for option in submitted.values()], dtype=np.int64)
+
+    is_correct = selected == answer_key.correct_answers[positions]
+    weights = answer_key.weights[positions]
+
+    rows = [
+        {
+            'student_quiz_id': student_quiz_id,
+            'question_id': int(question_id),
+            'selected_option': option,
+            'is_correct': bool(correct)
+        }
+        for question_id, option, correct in zip(answer_key.question_ids[positions], submitted.values(), is_correct)
+    ]
+
+    return GradeResult(rows, float(weights[is_correct].sum()), float(weights.sum()))
+
+def upsert_answers(rows):
+    """
+    Write graded answers with one bulk statement, updating answers that were
+    already saved. Relies on the (student_quiz_id, question_id) unique key.
+    The caller commits.
+    """
+    if not rows:
+        return
+
+    now = datetime.utcnow()
+    rows = [{**row, 'created_at': now} for row in rows]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(StudentAnswer)
+        statement = statement.on_duplicate_key_update(
+            selected_option=statement.inserted.selected_option,
+            is_correct=statement.inserted.is_correct
+        )
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as conflict_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as conflict_insert
+        statement = conflict_insert(StudentAnswer)
+        statement = statement.on_conflict_do_update(
+            index_elements=['student_quiz_id', 'question_id'],
+            set_={
+                'selected_option': statement.excluded.selected_option,
+                'is_correct': statement.excluded.is_correct
+            }
+        )
+    else:
+        # No upsert syntax: replace the attempt's answers to these questions
+        db.session.execute(
+            delete(StudentAnswer).where(
+                StudentAnswer.student_quiz_id == rows[0]['student_quiz_id'],
+                StudentAnswer.question_id.in_([row['question_id'] for row in rows])
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        statement = insert(StudentAnswer)
+
+    db.session.execute(statement, rows)
+
+def grade_submission(student_quiz, answers):
+    """Load the answer key once, grade the posted answers and upsert them. The caller commits."""
+    answer_key = load_answer_key(student_quiz.quiz_id)
+    result = grade_answers(answer_key, student_quiz.id, answers)
+    upsert_answers(result.rows)
+    return result
+
+def grade_stored_answers(student_quiz_id):
+    """Grade an attempt from its saved answers with one joined query"""
+    rows = db.session.query(
+        StudentAnswer.is_correct, Question.weight
+    ).join(
+        Question, Question.id == StudentAnswer.question_id
+    ).filter(StudentAnswer.student_quiz_id == student_quiz_id).all()
+
+    if not rows:
+        return GradeResult([], 0, 0)
+
+    is_correct = np.array([bool(row[0]) for row in rows])
+    weights = np.array([row[1] if row[1] is not None else 1.0 for row in rows], dtype=float)
+    return GradeResult([], float(weights[is_correct].sum()), float(weights.sum()))
@@ -0,0 +1,218 @@
+# admin_side/services/job_queue.py
+import queue
+import threading
+import time
+import uuid
+from itertools import islice
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from app import db
+from utils.tracing import get_tracer
+
+trace = get_tracer('jobs')
+
+class Job:
+    """A unit of background work and its status"""
+
+    def __init__(self, kind, key, func, payload, owner_id=None, retries=0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.func = func
+        self.payload = payload
+        self.owner_id = owner_id
+        self.retries = retries  # extra attempts after a failure
+        self.attempts = 0
+        self.status = 'queued'  # 'queued', 'running', 'finished', 'failed'
+        self.coalesced = 0
+        self.progress = None  # set by the job itself through report_progress
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status in ('finished', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'coalesced': self.coalesced,
+            'attempts': self.attempts,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+# The job running on the current thread, for report_progress
+_current = threading.local()
+
+def report_progress(**progress):
+    """Update the progress of the job running on this thread; does nothing outside a job"""
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job.progress = {**(job.progress or {}), **progress}
+
+class JobQueue:
+    """
+    In-process background job queue, so no external broker is needed.
+
+    Jobs with the same key always run on the same worker thread, one after
+    the other. While a job is still queued, submitting another job of the
+    same kind and key merges the new payload into it instead of queueing a duplicate.
+    A failing job is run again up to its retries, JOB_QUEUE_RETRY_DELAY seconds
+    apart (times the attempt). Job status is kept in memory for the most recent jobs only.
+    """
+
+    def __init__(self, max_jobs=1000, workers_setting='JOB_QUEUE_WORKERS', default_workers=4, name='job'):
+        self.workers_setting = workers_setting
+        self.default_workers = default_workers
+        self.name = name
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+        self._pending = {}  # (kind, key) -> queued Job, for coalescing
+        self._queues = []
+        self._max_jobs = max_jobs
+        self._counts = {'submitted': 0, 'coalesced': 0, 'retried': 0, 'finished': 0, 'failed': 0}
+
+    def _start_workers(self, count):
+        # Called with the lock held; workers are started on first use
+        while len(self._queues) < max(count, 1):
+            work_queue = queue.Queue()
+            worker = threading.Thread(
+                target=self._worker,
+                args=(work_queue,),
+                name=f'{self.name}-worker-{len(self._queues)}',
+                daemon=True
+            )
+            self._queues.append(work_queue)
+            worker.start()
+
+    def _remember(self, job):
+        # Called with the lock held; forget the oldest completed jobs, skipping ones still queued or running
+        self._jobs[job.id] = job
+        excess = len(self._jobs) - self._max_jobs
+        if excess > 0:
+            done_ids = list(islice((job_id for job_id, tracked in self._jobs.items() if tracked.done), excess))
+            for job_id in done_ids:
+                del self._jobs[job_id]
+
+    def submit(self, kind, key, func, payload, merge=None, owner_id=None, retries=0):
+        """
+        Run func(**payload) in the background and return its Job.
+        When merge is given and a job of the same kind and key is still queued,
+        merge(queued_payload, payload) is called and the queued job is returned.
+        With JOB_QUEUE_ASYNC disabled the job runs right away in the caller.
+        """
+        if not current_app.config.get('JOB_QUEUE_ASYNC', True):
+            job = Job(kind, key, func, payload, owner_id, retries)
+            with self._lock:
+                self._counts['submitted'] += 1
+                self._remember(job)
+            self._run(job)
+            return job
+
+        with self._lock:
+            pending = self._pending.get((kind, key))
+            if pending is not None and merge is not None:
+                merge(pending.payload, payload)
+                pending.coalesced += 1
+                self._counts['coalesced'] += 1
+                return pending
+
+            job = Job(kind, key, func, payload, owner_id, retries)
+            self._pending[(kind, key)] = job
+            self._counts['submitted'] += 1
+            self._remember(job)
+            self._start_workers(current_app.config.get(self.workers_setting, self.default_workers))
+            work_queue = self._queues[hash(key) % len(self._queues)]
+
+        work_queue.put((current_app._get_current_object(), job))
+        return job
+
+    def _worker(self, work_queue):
+        while True:
+            app, job = work_queue.get()
+            try:
+                with app.app_context():
+                    try:
+                        self._run(job)
+                    finally:
+                        db.session.remove()
+            finally:
+                work_queue.task_done()
+
+    def _run(self, job):
+        with self._lock:
+            # From now on new submissions for this key need a new job
+            if self._pending.get((job.kind, job.key)) is job:
+                del self._pending[(job.kind, job.key)]
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+
+        # Synchronous jobs can run inside another job
+        outer_job = getattr(_current, 'job', None)
+        _current.job = job
+        try:
+            while True:
+                job.attempts += 1
+                try:
+                    job.func(**job.payload)
+                    status = 'finished'
+                    break
+                except Exception as e:
+                    job.error = str(e)
+                    if job.attempts > job.retries:
+                        trace.exception('Background job %s %s failed: %s', job.kind, job.id, e)
+                        status = 'failed'
+                        break
+                    trace.warning('Background job %s %s failed, retrying: %s', job.kind, job.id, e, attempt=job.attempts)
+                    with self._lock:
+                        self._counts['retried'] += 1
+                    db.session.rollback()
+                    time.sleep(current_app.config.get('JOB_QUEUE_RETRY_DELAY', 1.0) * job.attempts)
+        finally:
+            _current.job = outer_job
+
+        with self._lock:
+            job.status = status
+            job.finished_at = datetime.utcnow()
+            self._counts[status] += 1
+
+    def get(self, job_id):
+        """Get a job by its id (None once it has been forgotten)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def join(self):
+        """Block until every queued job has run"""
+        for work_queue in list(self._queues):
+            work_queue.join()
+
+    def stats(self):
+        """Describe the queue depth and job counters"""
+        with self._lock:
+            return {
+                'workers': len(self._queues),
+                'queued': sum(work_queue.qsize() for work_queue in self._queues),
+                'pending_keys': len(self._pending),
+                'tracked_jobs': len(self._jobs),
+                **self._counts
+            }
+
+# Shared queue for the whole process
+job_queue = JobQueue()
+
+# Long-running batch work (cohort quiz generation) gets its own workers, so
+# it never holds up the per-student jobs that hash to the same worker above
+batch_job_queue = JobQueue(workers_setting='BATCH_JOB_QUEUE_WORKERS', default_workers=1, name='batch-job')
+
+def get_job(job_id):
+    """Get a job from either queue by its id"""
+    return job_queue.get(job_id) or batch_job_queue.get(job_id)
@@ -1,103 +1,167 @@
 # admin_side/services/ml_service.py
-from models.ProgressModel import KnowledgeLevel, StudentQuiz, StudentAnswer
+from models.ProgressModel import KnowledgeLevel, StudentQuiz, StudentAnswer, TopicKnowledgeState
 from models.QuizModel import Question
 from app import db
+from sqlalchemy import delete, func, insert, update
 import numpy as np
 from collections import defaultdict
 from sklearn.metrics import f1_score
 from sklearn.ensemble import RandomForestClassifier
 from datetime import datetime, timedelta
 import math
-import pickle
 import os
 from flask import current_app
+from services.model_registry import model_registry
+from services.job_queue import job_queue
+from utils.tracing import get_tracer
+from services.quiz_events import publish_knowledge_updated
+
+trace = get_tracer('ml')
+
+def get_ml_model_paths():
+    """Get the paths of the trained model and label encoder files"""
+    model_path = os.path.join(current_app.root_path, 'models', 'best_student_classifier.pkl')
+    encoder_path = os.path.join(current_app.root_path, 'models', 'label_encoder.pkl')
+    return model_path, encoder_path
+
+def get_ml_model_version():
+    """Get the loaded model version from the registry (None if unavailable)"""
+    model_path, encoder_path = get_ml_model_paths()
+    
+    version = model_registry.get(model_path, encoder_path)
+    if version is None:
+        current_app.logger.warning("ML model unavailable, using fallback rule-based approach")
+    return version
 
 # Load the ML model and label encoder
 def load_ml_model():
-    """Load the trained model and label encoder for knowledge level prediction"""
-    try:
-        model_path = os.path.join(current_app.root_path, 'models', 'best_student_classifier.pkl')
-        encoder_path = os.path.join(current_app.root_path, 'models', 'label_encoder.pkl')
-        
-        # Check if files exist
-        if not os.path.exists(model_path) or not os.path.exists(encoder_path):
-            current_app.logger.warning("ML model files not found, using fallback rule-based approach")
-            return None, None
-        
-        # Try to load with different protocols to handle version issues
-        try:
-            with open(model_path, 'rb') as f:
-                model = pickle.load(f)
-            
-            with open(encoder_path, 'rb') as f:
-                label_encoder = pickle.load(f)
-                
-            return model, label_encoder
-        except (UnicodeDecodeError, ValueError) as e:
-            current_app.logger.warning(f"Error loading ML model (protocol issue): {e}")
-            # Try with older protocol
-            with open(model_path, 'rb') as f:
-                model = pickle.load(f, encoding='latin1')
-            
-            with open(encoder_path, 'rb') as f:
-                label_encoder = pickle.load(f, encoding='latin1')
-                
-            return model, label_encoder
-            
-    except Exception as e:
-        # Fallback to rule-based approach if model files not found or corrupted
-        current_app.logger.warning(f"ML model loading failed: {e}, using fallback rule-based approach")
+    """
+    Load the trained model and label encoder for knowledge level prediction.
+    The files are unpickled once per process and reloaded only when they change.
+    """
+    version = get_ml_model_version()
+    if version is None:
         return None, None
+    return version.model, version.label_encoder
 
-def calculate_student_average_score(student_id):
-    """Calculate the average quiz score for a student"""
-    completed_quizzes = StudentQuiz.query.filter_by(
-        student_id=student_id,
-        status='completed'
-    ).all()
+# Map the model's class labels to our knowledge level names
+MODEL_LEVEL_MAPPING = {
+    'low': 'Low',
+    'medium': 'Normal',
+    'high': 'High'
+}
+
+# Keep IN (...) lists a reasonable size for the database
+STUDENT_ID_CHUNK_SIZE = 1000
+
+def get_completed_quiz_stats(student_ids=None):
+    """
+    Aggregate completed quiz statistics for many students in one GROUP BY query.
+    Returns {student_id: {'completed': n, 'scored': n_with_score, 'total_score': sum,
+    'latest_end_time': most recent completion}}.
+    Pass student_ids=None to aggregate over every student.
+    """
+    query_columns = (
+        StudentQuiz.student_id,
+        func.count(StudentQuiz.id),
+        func.count(StudentQuiz.score),
+        func.sum(StudentQuiz.score),
+        func.max(StudentQuiz.end_time)
+    )
+    
+    if student_ids is None:
+        id_chunks = [None]
+    else:
+        student_ids = list(student_ids)
+        id_chunks = [student_ids[i:i + STUDENT_ID_CHUNK_SIZE]
+                     for i in range(0, len(student_ids), STUDENT_ID_CHUNK_SIZE)]
     
-    if not completed_quizzes:
-        return 0.0
+    stats = {}
+    for chunk in id_chunks:
+        query = db.session.query(*query_columns).filter(StudentQuiz.status == 'completed')
+        if chunk is not None:
+            query = query.filter(StudentQuiz.student_id.in_(chunk))
+        
+        for student_id, completed, scored, total_score, latest_end_time in query.group_by(StudentQuiz.student_id):
+            stats[student_id] = {
+                'completed': completed,
+                'scored': scored,
+                'total_score': float(total_score or 0.0),
+                'latest_end_time': latest_end_time
+            }
     
-    total_score = sum(quiz.score for quiz in completed_quizzes if quiz.score is not None)
-    return total_score / len(completed_quizzes)
+    return stats
 
-def determine_knowledge_level_with_model(student_id):
-    """Determine knowledge level using the ML model based on average quiz scores"""
-    # Calculate average quiz score
-    avg_score = calculate_student_average_score(student_id)
+def calculate_student_average_scores(student_ids):
+    """Calculate the average quiz score for many students (0-100 scale)"""
+    stats = get_completed_quiz_stats(student_ids)
     
-    # Convert to 0-1 scale by dividing by 100
-    model_input = avg_score / 100.0
+    averages = {}
+    for student_id in student_ids:
+        student_stats = stats.get(student_id)
+        if not student_stats or student_stats['completed'] == 0:
+            averages[student_id] = 0.0
+        else:
+            averages[student_id] = student_stats['total_score'] / student_stats['completed']
+    return averages
+
+def calculate_student_average_score(student_id):
+    """Calculate the average quiz score for a student"""
+    return calculate_student_average_scores([student_id])[student_id]
+
+def predict_knowledge_levels(model_inputs):
+    """
+    Predict knowledge levels for a batch of 0-1 average scores with a single
+    model call. Falls back to the rule-based thresholds if the model is unavailable.
+    """
+    features = np.asarray(model_inputs, dtype=float).reshape(-1, 1)
+    if features.shape[0] == 0:
+        return []
     
-    # Load ML model
-    model, label_encoder = load_ml_model()
+    # Load ML model (cached by the model registry)
+    model_version = get_ml_model_version()
     
-    if model is not None and label_encoder is not None:
+    if model_version is not None:
         try:
-            # Use the ML model to predict
-            prediction = model.predict([[model_input]])[0]
-            level = label_encoder.inverse_transform([prediction])[0]
+            # Use the ML model to predict the whole batch at once
+            predictions = model_version.model.predict(features)
+            labels = model_version.label_encoder.inverse_transform(predictions)
+            model_registry.record_predictions(model_version, len(labels))
             
             # Map model output to our expected format
-            level_mapping = {
-                'low': 'Low',
-                'medium': 'Normal',
-                'high': 'High'
-            }
-            return level_mapping.get(level.lower(), 'Normal')
+            return [MODEL_LEVEL_MAPPING.get(str(label).lower(), 'Normal') for label in labels]
         except Exception as e:
             current_app.logger.error(f"Error using ML model: {e}")
             # Fall back to rule-based approach
             pass
     
     # Fallback rule-based approach (matches the model logic you described)
-    if model_input < 0.5:
-        return 'Low'
-    elif model_input < 0.8:
-        return 'Normal'
-    else:
-        return 'High'
+    scores = features[:, 0]
+    levels = np.where(scores < 0.5, 'Low', np.where(scores < 0.8, 'Normal', 'High'))
+    return levels.tolist()
+
+def determine_knowledge_levels_with_model(student_ids):
+    """
+    Determine knowledge levels for many students using the ML model.
+    Average scores come from one aggregate query and the model is invoked once.
+    Returns {student_id: level}.
+    """
+    # Remove duplicates but keep the caller's order
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        return {}
+    
+    averages = calculate_student_average_scores(student_ids)
+    
+    # Convert to 0-1 scale by dividing by 100
+    model_inputs = np.array([averages[student_id] for student_id in student_ids]) / 100.0
+    
+    levels = predict_knowledge_levels(model_inputs)
+    return dict(zip(student_ids, levels))
+
+def determine_knowledge_level_with_model(student_id):
+    """Determine knowledge level using the ML model based on average quiz scores"""
+    return determine_knowledge_levels_with_model([student_id])[student_id]
 
 def determine_knowledge_level(score):
     """Determine knowledge level based on score with more nuanced thresholds"""
@@ -108,196 +172,366 @@ def determine_knowledge_level(score):
     else:
         return 'High'
 
+# Time decay rate for quiz relevance (~30-day half-life)
+TIME_DECAY_RATE = 0.023
+
+# Weight of the new score when blending with the stored one
+SMOOTHING_ALPHA = 0.7
+
+# Extra attempts for a failed background knowledge update
+KNOWLEDGE_UPDATE_RETRIES = 2
+
+def get_topic_answer_rows(student_id, student_quiz_ids=None):
+    """
+    Get (end_time, topic, weight, is_correct) for every answer in the student's
+    completed quizzes with a single join of student_quizzes, student_answers and questions.
+    Pass student_quiz_ids to only read the answers of those quizzes.
+    """
+    query = db.session.query(
+        StudentQuiz.end_time,
+        Question.topic,
+        Question.weight,
+        StudentAnswer.is_correct
+    ).join(
+        StudentAnswer, StudentAnswer.student_quiz_id == StudentQuiz.id
+    ).join(
+        Question, Question.id == StudentAnswer.question_id
+    ).filter(
+        StudentQuiz.student_id == student_id,
+        StudentQuiz.status == 'completed',
+        StudentQuiz.end_time.isnot(None)
+    )
+    
+    if student_quiz_ids is not None:
+        query = query.filter(StudentQuiz.id.in_(student_quiz_ids))
+    
+    return query.all()
+
+def decay_factors(reference_time, end_times):
+    """
+    Time decay for each quiz end time relative to the reference time.
+    Uses fractional days so decayed sums can be rescaled later without drift:
+    decay(a -> c) == decay(a -> b) * decay(b -> c).
+    """
+    days = np.array([(reference_time - end_time).total_seconds() for end_time in end_times], dtype=float) / 86400.0
+    return np.exp(-TIME_DECAY_RATE * days)
+
+def aggregate_topic_performance(answer_rows, latest_quiz_time):
+    """
+    Group answer rows by topic with NumPy and apply the time decay.
+    Returns {topic: {'correct', 'total', 'weighted_correct', 'weighted_total'}}.
+    """
+    topics = []
+    end_times = []
+    weights = []
+    correct = []
+    
+    for end_time, topic, weight, is_correct in answer_rows:
+        # Questions without a topic can't contribute to a topic level
+        if not topic or topic.strip() == '':
+            continue
+        topics.append(topic.strip())
+        end_times.append(end_time)
+        weights.append(weight or 1.0)  # Default weight if None
+        correct.append(bool(is_correct))
+    
+    if not topics:
+        return {}
+    
+    # Calculate time decay factors (more recent quizzes have higher weight)
+    decayed_weights = np.asarray(weights, dtype=float) * decay_factors(latest_quiz_time, end_times)
+    correct = np.asarray(correct, dtype=float)
+    
+    # Group by topic
+    topic_names, topic_index = np.unique(np.asarray(topics, dtype=object), return_inverse=True)
+    num_topics = len(topic_names)
+    
+    totals = np.bincount(topic_index, minlength=num_topics)
+    correct_counts = np.bincount(topic_index, weights=correct, minlength=num_topics)
+    weighted_totals = np.bincount(topic_index, weights=decayed_weights, minlength=num_topics)
+    weighted_correct = np.bincount(topic_index, weights=decayed_weights * correct, minlength=num_topics)
+    
+    return {
+        topic: {
+            'correct': int(correct_counts[i]),
+            'total': int(totals[i]),
+            'weighted_correct': float(weighted_correct[i]),
+            'weighted_total': float(weighted_totals[i])
+        }
+        for i, topic in enumerate(topic_names)
+    }
+
+def upsert_knowledge_levels(student_id, new_levels):
+    """
+    Write knowledge levels for a student with bulk statements.
+    new_levels maps topic -> (score, level, smooth); when smooth is set and a
+    record already exists, the stored score is blended with the new one.
+    """
+    # Load the existing records once (the first record per topic wins)
+    existing = {}
+    for kl_id, topic, score in db.session.query(
+        KnowledgeLevel.id, KnowledgeLevel.topic, KnowledgeLevel.score
+    ).filter(KnowledgeLevel.student_id == student_id).order_by(KnowledgeLevel.id):
+        existing.setdefault(topic, (kl_id, score))
+    
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+    
+    for topic, (score, level, smooth) in new_levels.items():
+        if topic in existing:
+            kl_id, old_score = existing[topic]
+            if smooth:
+                # Apply smoothing to the score update (blend old and new scores)
+                score = SMOOTHING_ALPHA * score + (1 - SMOOTHING_ALPHA) * old_score
+                if level is None:
+                    level = determine_knowledge_level(score)
+            updates.append({'id': kl_id, 'score': score, 'level': level, 'updated_at': now})
+        else:
+            inserts.append({
+                'student_id': student_id,
+                'topic': topic,
+                'score': score,
+                'level': level if level is not None else determine_knowledge_level(score),
+                'updated_at': now
+            })
+    
+    if updates:
+        db.session.execute(update(KnowledgeLevel), updates)
+    if inserts:
+        db.session.execute(insert(KnowledgeLevel), inserts)
+
+def store_knowledge_levels(student_id, quiz_stats, topic_performance):
+    """
+    Write the topic and overall knowledge levels for a student.
+    topic_performance maps topic -> {'weighted_correct', 'weighted_total', ...}.
+    """
+    # Overall knowledge level from the ML model
+    overall_score = quiz_stats['total_score'] / quiz_stats['completed'] / 100.0
+    overall_level = predict_knowledge_levels([overall_score])[0]
+    trace.debug('Overall level for student %s: %s', student_id, overall_level, score=overall_score)
+    
+    new_levels = {}
+    
+    if not topic_performance:
+        # If no topics were found, only store the overall record (without smoothing)
+        trace.debug('No topics found for student %s, storing the overall level only', student_id)
+        new_levels['OVERALL'] = (overall_score, overall_level, False)
+    else:
+        # Process topic-specific knowledge levels
+        for topic, perf in topic_performance.items():
+            if perf['weighted_total'] > 0:
+                # Calculate weighted score (0.0 to 1.0)
+                score = perf['weighted_correct'] / perf['weighted_total']
+                new_levels[topic] = (score, None, True)
+        
+        # Special topic name for overall knowledge level, smoothed like the topics
+        new_levels['OVERALL'] = (overall_score, overall_level, True)
+    
+    upsert_knowledge_levels(student_id, new_levels)
+
 def update_knowledge_levels(student_id):
     """
     Update a student's knowledge levels based on their quiz answers.
     Now uses ML model for overall level determination.
+    All answers are read with one joined query and aggregated with NumPy.
     """
-    print(f"DEBUG ML: Starting knowledge level update for student {student_id}")
+    trace.debug('Knowledge level update for student %s', student_id)
     
     try:
-        # Get all student quiz attempts
-        student_quizzes = StudentQuiz.query.filter_by(
-            student_id=student_id,
-            status='completed'
-        ).order_by(StudentQuiz.end_time.desc()).all()
-        
-        print(f"DEBUG ML: Found {len(student_quizzes)} completed quizzes")
+        # Completed quiz count, average score and latest completion in one query
+        quiz_stats = get_completed_quiz_stats([student_id]).get(student_id)
         
-        if not student_quizzes:
-            print("DEBUG ML: No completed quizzes found, returning")
+        if not quiz_stats or quiz_stats['completed'] == 0:
+            trace.debug('No completed quizzes for student %s', student_id)
             return
         
-        # Create a dictionary to track performance by topic
-        topic_performance = defaultdict(lambda: {'correct': 0, 'total': 0, 'weighted_correct': 0, 'weighted_total': 0})
-        
         # Get the most recent quiz completion time
-        latest_quiz_time = student_quizzes[0].end_time if student_quizzes[0].end_time else datetime.utcnow()
-        print(f"DEBUG ML: Latest quiz time: {latest_quiz_time}")
+        latest_quiz_time = quiz_stats['latest_end_time'] or datetime.utcnow()
         
-        # Process all completed quizzes with time decay
-        for sq in student_quizzes:
-            print(f"DEBUG ML: Processing quiz {sq.id} with end_time: {sq.end_time}")
-            
-            # Skip quizzes without completion time
-            if not sq.end_time:
-                print(f"DEBUG ML: Skipping quiz {sq.id} - no end_time")
-                continue
-                
-            # Calculate time decay factor (more recent quizzes have higher weight)
-            # We use a 30-day half-life for quiz relevance
-            days_since_completion = (latest_quiz_time - sq.end_time).days
-            time_decay_factor = math.exp(-0.023 * days_since_completion)  # ~30-day half-life
-            print(f"DEBUG ML: Time decay factor for quiz {sq.id}: {time_decay_factor}")
-            
-            # Get all answers for this quiz
-            answers = StudentAnswer.query.filter_by(student_quiz_id=sq.id).all()
-            print(f"DEBUG ML: Found {len(answers)} answers for quiz {sq.id}")
-            
-            for answer in answers:
-                # Get the question
-                question = Question.query.get(answer.question_id)
-                if not question:
-                    print(f"DEBUG ML: Question {answer.question_id} not found")
-                    continue
-                    
-                if not question.topic or question.topic.strip() == '':
-                    print(f"DEBUG ML: Question {question.id} has no topic assigned (topic='{question.topic}')")
-                    continue
-                
-                # Update topic performance with time decay applied
-                topic = question.topic.strip()  # Remove any whitespace
-                question_weight = question.weight or 1.0  # Default weight if None
-                
-                print(f"DEBUG ML: Processing answer for topic '{topic}' - correct: {answer.is_correct}, weight: {question_weight}")
-                
-                # Record raw score (no time decay)
-                if answer.is_correct:
-                    topic_performance[topic]['correct'] += 1
-                topic_performance[topic]['total'] += 1
-                
-                # Record weighted score (with time decay)
-                if answer.is_correct:
-                    topic_performance[topic]['weighted_correct'] += question_weight * time_decay_factor
-                topic_performance[topic]['weighted_total'] += question_weight * time_decay_factor
+        # Every answer with its question's topic and weight
+        answer_rows = get_topic_answer_rows(student_id)
+        topic_performance = aggregate_topic_performance(answer_rows, latest_quiz_time)
+        trace.debug('Aggregated %s answers of %s quizzes into %s topics', len(answer_rows),
+                    quiz_stats['completed'], len(topic_performance), student_id=student_id)
         
-        print(f"DEBUG ML: Topic performance calculated: {dict(topic_performance)}")
+        store_knowledge_levels(student_id, quiz_stats, topic_performance)
+        publish_knowledge_updated(student_id)
         
-        # If no topics were found, create a fallback overall record
-        if not topic_performance:
-            print("DEBUG ML: No topics found in any questions, creating fallback overall knowledge level")
-            avg_score = calculate_student_average_score(student_id)
-            overall_score = avg_score / 100.0
-            overall_level = determine_knowledge_level_with_model(student_id)
-            
-            # Create overall knowledge level record
-            overall_knowledge_level = KnowledgeLevel.query.filter_by(
-                student_id=student_id,
-                topic='OVERALL'
-            ).first()
-            
-            if overall_knowledge_level:
-                overall_knowledge_level.score = overall_score
-                overall_knowledge_level.level = overall_level
-            else:
-                overall_knowledge_level = KnowledgeLevel(
-                    student_id=student_id,
-                    topic='OVERALL',
-                    score=overall_score,
-                    level=overall_level
-                )
-                db.session.add(overall_knowledge_level)
-            
+        try:
             db.session.commit()
-            print("DEBUG ML: Created fallback overall knowledge level")
+        except Exception as e:
+            trace.error('Failed to commit knowledge levels of student %s: %s', student_id, e)
+            db.session.rollback()
+            raise
+            
+    except Exception as e:
+        trace.exception('Unexpected error in update_knowledge_levels: %s', e)
+
+def get_topic_knowledge_states(student_id):
+    """Get the stored running sums for a student as {topic: {...}}"""
+    states = {}
+    for state_id, topic, weighted_correct, weighted_total, correct, total, last_update, applied_attempts in db.session.query(
+        TopicKnowledgeState.id,
+        TopicKnowledgeState.topic,
+        TopicKnowledgeState.weighted_correct,
+        TopicKnowledgeState.weighted_total,
+        TopicKnowledgeState.correct,
+        TopicKnowledgeState.total,
+        TopicKnowledgeState.last_update,
+        TopicKnowledgeState.applied_attempts
+    ).filter(TopicKnowledgeState.student_id == student_id):
+        states[topic] = {
+            'id': state_id,
+            'weighted_correct': weighted_correct,
+            'weighted_total': weighted_total,
+            'correct': correct,
+            'total': total,
+            'last_update': last_update,
+            'applied_attempts': applied_attempts
+        }
+    return states
+
+def count_applied_attempts(states):
+    """Completed attempts folded into a student's running sums (0 without any)"""
+    return min((state['applied_attempts'] for state in states.values()), default=0)
+
+def write_topic_knowledge_states(student_id, topic_performance, reference_time, applied_attempts, existing=None):
+    """
+    Store running sums decayed to reference_time with bulk statements.
+    applied_attempts is the number of completed attempts the sums include.
+    existing is the result of get_topic_knowledge_states (topics in it are updated).
+    """
+    existing = existing or {}
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+    
+    for topic, perf in topic_performance.items():
+        values = {
+            'weighted_correct': perf['weighted_correct'],
+            'weighted_total': perf['weighted_total'],
+            'correct': perf['correct'],
+            'total': perf['total'],
+            'last_update': reference_time,
+            'applied_attempts': applied_attempts,
+            'updated_at': now
+        }
+        if topic in existing:
+            updates.append({'id': existing[topic]['id'], **values})
+        else:
+            inserts.append({'student_id': student_id, 'topic': topic, **values})
+    
+    if updates:
+        db.session.execute(update(TopicKnowledgeState), updates)
+    if inserts:
+        db.session.execute(insert(TopicKnowledgeState), inserts)
+
+def rebuild_topic_knowledge_states(student_id, quiz_stats=None):
+    """
+    Recompute a student's running sums from their full answer history.
+    Used by the backfill script and whenever the sums don't include every completed attempt.
+    Returns the topic performance it stored (the caller commits).
+    """
+    if quiz_stats is None:
+        quiz_stats = get_completed_quiz_stats([student_id]).get(student_id)
+    
+    db.session.execute(delete(TopicKnowledgeState).where(TopicKnowledgeState.student_id == student_id))
+    
+    if not quiz_stats or quiz_stats['completed'] == 0:
+        return {}
+    
+    latest_quiz_time = quiz_stats['latest_end_time'] or datetime.utcnow()
+    topic_performance = aggregate_topic_performance(get_topic_answer_rows(student_id), latest_quiz_time)
+    write_topic_knowledge_states(student_id, topic_performance, latest_quiz_time, quiz_stats['completed'])
+    
+    return topic_performance
+
+def merge_topic_performance(states, new_performance, reference_time):
+    """
+    Rescale stored sums to reference_time and add the new quiz answers.
+    new_performance must already be decayed to reference_time. Every stored
+    topic is returned, so all rows are rewritten with the new applied count.
+    """
+    empty = {'weighted_correct': 0.0, 'weighted_total': 0.0, 'correct': 0, 'total': 0}
+    merged = {}
+    for topic in list(states) + [topic for topic in new_performance if topic not in states]:
+        perf = new_performance.get(topic, empty)
+        state = states.get(topic)
+        if state is None:
+            merged[topic] = dict(perf)
+            continue
+        
+        decay = decay_factors(reference_time, [state['last_update']])[0]
+        merged[topic] = {
+            'weighted_correct': state['weighted_correct'] * decay + perf['weighted_correct'],
+            'weighted_total': state['weighted_total'] * decay + perf['weighted_total'],
+            'correct': state['correct'] + perf['correct'],
+            'total': state['total'] + perf['total']
+        }
+    return merged
+
+def update_knowledge_levels_incremental(student_id, student_quiz_ids):
+    """
+    Update a student's knowledge levels after new quizzes were completed.
+    Only the answers of student_quiz_ids are read; the rest of the history
+    comes from the stored running sums, which are rescaled by the elapsed decay.
+    The sums record how many completed attempts they include; when that plus
+    the new attempts doesn't match the completed count (a lost or repeated
+    update, or history older than the sums), they are rebuilt from scratch.
+    With no student_quiz_ids only that check and rebuild are done.
+    """
+    trace.debug('Incremental knowledge level update for student %s', student_id, attempts=student_quiz_ids)
+    
+    try:
+        quiz_stats = get_completed_quiz_stats([student_id]).get(student_id)
+        
+        if not quiz_stats or quiz_stats['completed'] == 0:
+            trace.debug('No completed quizzes for student %s', student_id)
             return
         
-        # Process topic-specific knowledge levels
-        for topic, perf in topic_performance.items():
-            if perf['weighted_total'] > 0:
-                # Calculate weighted score (0.0 to 1.0)
-                score = perf['weighted_correct'] / perf['weighted_total']
-                
-                # Calculate raw score (for comparison)
-                raw_score = perf['correct'] / perf['total'] if perf['total'] > 0 else 0
-                
-                # Apply a smoothing function to make transitions between levels more gradual
-                # This helps prevent frequent fluctuations between levels
-                level = determine_knowledge_level(score)
-                
-                print(f"DEBUG ML: Topic '{topic}' - Score: {score:.3f}, Level: {level}")
-                
-                # Update or create knowledge level record
-                knowledge_level = KnowledgeLevel.query.filter_by(
-                    student_id=student_id,
-                    topic=topic
-                ).first()
-                
-                if knowledge_level:
-                    print(f"DEBUG ML: Updating existing knowledge level for topic '{topic}'")
-                    # Apply smoothing to the score update (blend old and new scores)
-                    # This gives more stability to the knowledge level over time
-                    alpha = 0.7  # Weight for new score (0.7 means 70% new score, 30% old score)
-                    smoothed_score = alpha * score + (1 - alpha) * knowledge_level.score
-                    knowledge_level.score = smoothed_score
-                    knowledge_level.level = determine_knowledge_level(smoothed_score)
-                else:
-                    print(f"DEBUG ML: Creating new knowledge level for topic '{topic}'")
-                    knowledge_level = KnowledgeLevel(
-                        student_id=student_id,
-                        topic=topic,
-                        score=score,
-                        level=determine_knowledge_level(score)
-                    )
-                    db.session.add(knowledge_level)
+        reference_time = quiz_stats['latest_end_time'] or datetime.utcnow()
+        states = get_topic_knowledge_states(student_id)
+        applied_attempts = count_applied_attempts(states) + len(set(student_quiz_ids))
         
-        # NOW ADD OVERALL KNOWLEDGE LEVEL USING ML MODEL
-        # Calculate overall knowledge level using ML model
-        try:
-            overall_level = determine_knowledge_level_with_model(student_id)
-            avg_score = calculate_student_average_score(student_id)
-            overall_score = avg_score / 100.0
-            
-            print(f"DEBUG ML: Overall level: {overall_level}, Overall score: {overall_score}")
-            
-            # Update or create overall knowledge level record
-            overall_knowledge_level = KnowledgeLevel.query.filter_by(
-                student_id=student_id,
-                topic='OVERALL'  # Special topic name for overall knowledge level
-            ).first()
+        if not student_quiz_ids and applied_attempts == quiz_stats['completed']:
+            trace.debug('Running sums of student %s are up to date', student_id)
+            return
+        
+        if applied_attempts != quiz_stats['completed']:
+            trace.warning('Running sums of student %s cover %s of %s completed attempts, rebuilding from full history',
+                          student_id, applied_attempts, quiz_stats['completed'])
+            topic_performance = rebuild_topic_knowledge_states(student_id, quiz_stats)
+        else:
+            answer_rows = get_topic_answer_rows(student_id, student_quiz_ids)
+            trace.debug('Found %s new answers for student %s', len(answer_rows), student_id)
             
-            if overall_knowledge_level:
-                print("DEBUG ML: Updating existing overall knowledge level")
-                # Apply smoothing for overall score too
-                alpha = 0.7
-                smoothed_overall_score = alpha * overall_score + (1 - alpha) * overall_knowledge_level.score
-                overall_knowledge_level.score = smoothed_overall_score
-                overall_knowledge_level.level = overall_level
-            else:
-                print("DEBUG ML: Creating new overall knowledge level")
-                overall_knowledge_level = KnowledgeLevel(
-                    student_id=student_id,
-                    topic='OVERALL',
-                    score=overall_score,
-                    level=overall_level
-                )
-                db.session.add(overall_knowledge_level)
-        except Exception as e:
-            print(f"DEBUG ML: Error calculating overall level: {e}")
+            new_performance = aggregate_topic_performance(answer_rows, reference_time)
+            # Untouched topics keep their score: a common decay factor cancels out
+            topic_performance = merge_topic_performance(states, new_performance, reference_time)
+            write_topic_knowledge_states(student_id, topic_performance, reference_time, applied_attempts, states)
+        
+        store_knowledge_levels(student_id, quiz_stats, topic_performance)
+        publish_knowledge_updated(student_id)
         
         try:
             db.session.commit()
-            print("DEBUG ML: Successfully committed knowledge level changes to database")
         except Exception as e:
-            print(f"ERROR ML: Failed to commit changes: {e}")
+            trace.error('Failed to commit knowledge levels of student %s: %s', student_id, e)
             db.session.rollback()
             raise
             
     except Exception as e:
-        print(f"ERROR ML: Unexpected error in update_knowledge_levels: {e}")
-        import traceback
-        traceback.print_exc()
+        trace.exception('Unexpected error in update_knowledge_levels_incremental: %s', e)
+        # Let the background job record the failure
         raise
+    
+    # Submitted only now, so the refresh is queued behind this update and sees the committed levels
+    try:
+        from services.analytics_service import schedule_analytics_refresh
+        schedule_analytics_refresh(student_id)
+    except Exception as e:
+        trace.exception('Error scheduling analytics refresh for student %s: %s', student_id, e)
 
 def get_personalized_guidance(student_id):
     """
@@ -589,4 +823,48 @@ def get_milestones(level, knowledge_levels, topic_prerequisites):
             'isCompleted': False
         })
     
-    return milestones
\ No newline at end of file
+    return milestones
+
+def find_unreconciled_students():
+    """Ids of students whose running sums don't cover every completed attempt, in one query"""
+    completed = db.session.query(
+        StudentQuiz.student_id.label('student_id'),
+        func.count(StudentQuiz.id).label('completed')
+    ).filter(StudentQuiz.status == 'completed').group_by(StudentQuiz.student_id).subquery()
+    applied = db.session.query(
+        TopicKnowledgeState.student_id.label('student_id'),
+        func.min(TopicKnowledgeState.applied_attempts).label('applied')
+    ).group_by(TopicKnowledgeState.student_id).subquery()
+    
+    rows = db.session.query(completed.c.student_id) \
+        .outerjoin(applied, applied.c.student_id == completed.c.student_id) \
+        .filter(func.coalesce(applied.c.applied, 0) != completed.c.completed) \
+        .order_by(completed.c.student_id)
+    return [row[0] for row in rows]
+
+def reconcile_knowledge_levels(student_id):
+    """Rebuild a student's running sums and levels if a completed attempt was never applied"""
+    update_knowledge_levels_incremental(student_id, [])
+
+def _merge_knowledge_update(queued_payload, payload):
+    """Fold another completed quiz into a knowledge update that hasn't started yet"""
+    for student_quiz_id in payload['student_quiz_ids']:
+        if student_quiz_id not in queued_payload['student_quiz_ids']:
+            queued_payload['student_quiz_ids'].append(student_quiz_id)
+
+def schedule_knowledge_update(student_id, student_quiz_id):
+    """
+    Queue the knowledge level update for a newly completed quiz.
+    Updates for the same student are coalesced while queued and never run concurrently,
+    and a failed update is retried KNOWLEDGE_UPDATE_RETRIES times.
+    The update refreshes the student's professor analytics snapshot once it has committed.
+    """
+    return job_queue.submit(
+        'knowledge_update',
+        student_id,
+        update_knowledge_levels_incremental,
+        {'student_id': student_id, 'student_quiz_ids': [student_quiz_id]},
+        merge=_merge_knowledge_update,
+        owner_id=student_id,
+        retries=KNOWLEDGE_UPDATE_RETRIES
+    )
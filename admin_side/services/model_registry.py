@@ -0,0 +1,154 @@
+# admin_side/services/model_registry.py
+import hashlib
+import io
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+import joblib
+from flask import current_app
+
+class ModelVersion:
+    """A loaded classifier/label encoder pair and where it came from"""
+
+    def __init__(self, model, label_encoder, key, version, load_seconds):
+        self.model = model
+        self.label_encoder = label_encoder
+        self.key = key
+        self.version = version
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.utcnow()
+
+class ModelRegistry:
+    """
+    Process-wide cache of the knowledge level model.
+
+    Each model version is unpickled once and keyed by the file paths plus their
+    mtime and size. When either file changes on disk the new version is loaded
+    and swapped in with a single reference assignment, so concurrent requests
+    always see a complete model/encoder pair.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = None
+        self._failed_key = None
+        self._load_count = 0
+        self._prediction_count = 0
+        self._predictions_by_version = {}
+
+    @staticmethod
+    def _file_key(model_path, encoder_path):
+        """Build the cache key for the model files, or None if they are missing"""
+        try:
+            model_stat = os.stat(model_path)
+            encoder_stat = os.stat(encoder_path)
+        except OSError:
+            return None
+
+        return (
+            model_path, model_stat.st_mtime_ns, model_stat.st_size,
+            encoder_path, encoder_stat.st_mtime_ns, encoder_stat.st_size
+        )
+
+    @staticmethod
+    def _unpickle(data):
+        # The classifier files are written with joblib, which stores numpy
+        # arrays outside the pickle stream, so plain pickle can't read them
+        try:
+            return joblib.load(io.BytesIO(data))
+        except Exception:
+            pass
+
+        try:
+            return pickle.loads(data)
+        except (UnicodeDecodeError, ValueError) as e:
+            current_app.logger.warning(f"Error loading ML model (protocol issue): {e}")
+            # Try with older protocol
+            return pickle.loads(data, encoding='latin1')
+
+    def _load(self, model_path, encoder_path, key):
+        started = time.perf_counter()
+
+        with open(model_path, 'rb') as f:
+            model_bytes = f.read()
+        with open(encoder_path, 'rb') as f:
+            encoder_bytes = f.read()
+
+        version = hashlib.sha256(model_bytes + encoder_bytes).hexdigest()[:12]
+
+        # Same content under a new mtime (e.g. a re-deploy): keep the loaded objects
+        current = self._current
+        if current is not None and current.version == version:
+            return ModelVersion(current.model, current.label_encoder, key, version, current.load_seconds)
+
+        model = self._unpickle(model_bytes)
+        label_encoder = self._unpickle(encoder_bytes)
+
+        self._load_count += 1
+        return ModelVersion(model, label_encoder, key, version, time.perf_counter() - started)
+
+    def get(self, model_path, encoder_path):
+        """Get the current model version for the given files, loading it if needed"""
+        key = self._file_key(model_path, encoder_path)
+        if key is None:
+            return None
+
+        current = self._current
+        if current is not None and current.key == key:
+            return current
+
+        # Don't retry a broken file on every call, only once it changes again
+        if key == self._failed_key:
+            return current
+
+        with self._lock:
+            current = self._current
+            if current is not None and current.key == key:
+                return current
+            if key == self._failed_key:
+                return current
+
+            try:
+                loaded = self._load(model_path, encoder_path, key)
+            except Exception as e:
+                current_app.logger.warning(f"ML model loading failed: {e}")
+                self._failed_key = key
+                return current
+
+            self._current = loaded
+            self._failed_key = None
+            current_app.logger.info(f"Loaded ML model version {loaded.version} in {loaded.load_seconds:.3f}s")
+            return loaded
+
+    def record_predictions(self, version, count=1):
+        """Count predictions made with a model version"""
+        with self._lock:
+            self._prediction_count += count
+            self._predictions_by_version[version.version] = \
+                self._predictions_by_version.get(version.version, 0) + count
+
+    def clear(self):
+        """Forget the loaded model so the next call reloads it from disk"""
+        with self._lock:
+            self._current = None
+            self._failed_key = None
+
+    def stats(self):
+        """Describe the loaded model version and usage counters"""
+        current = self._current
+        return {
+            'loaded': current is not None,
+            'version': current.version if current else None,
+            'loaded_at': current.loaded_at.isoformat() if current else None,
+            'load_seconds': round(current.load_seconds, 4) if current else None,
+            'model_path': current.key[0] if current else None,
+            'encoder_path': current.key[3] if current else None,
+            'load_count': self._load_count,
+            'prediction_count': self._prediction_count,
+            'predictions_by_version': dict(self._predictions_by_version)
+        }
+
+# Shared registry for the whole process
+model_registry = ModelRegistry()
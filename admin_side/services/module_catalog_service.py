@@ -0,0 +1,276 @@
+# admin_side/services/module_catalog_service.py
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy.orm import object_session
+from models.ModuleModel import Module
+from models.QuizModel import Quiz
+from models.ProgressModel import StudentQuiz
+from services.availability_index import AvailabilityIndex
+from utils.timezone_utils import get_ist_datetime_for_db
+from app import db
+
+class StudentCatalogCache:
+    """
+    Per-student cache of the module catalog read model.
+
+    Entries only hold data that doesn't depend on the current time, so the
+    availability flags are still computed on every read. Entries are dropped
+    after a commit that changes the student's assignments or attempts, or any
+    quiz or module, and expire after MODULE_CATALOG_CACHE_TTL seconds anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # student id -> (catalog, expires_at), least recently used first
+        self._counts = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, student_id):
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(student_id, None)
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self._counts['hits'] += 1
+            return entry[0]
+
+    def put(self, student_id, catalog, ttl, max_size):
+        with self._lock:
+            self._entries[student_id] = (catalog, time.monotonic() + ttl)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, student_ids):
+        with self._lock:
+            for student_id in student_ids:
+                if self._entries.pop(student_id, None) is not None:
+                    self._counts['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counts['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), **self._counts}
+
+# Shared caches for the whole process
+catalog_cache = StudentCatalogCache()
+# Per-student AvailabilityIndex over every assigned quiz, for callers without a catalog;
+# invalidated together with the catalog
+availability_cache = StudentCatalogCache()
+
+def load_student_catalog(student_id):
+    """
+    Build a student's module catalog with one query joining student_quizzes,
+    quizzes and modules. Returns [{module fields..., 'quizzes': [...]}] ordered
+    by module, without any time-dependent flags.
+    """
+    rows = db.session.query(
+        Module.id, Module.name, Module.description, Module.created_at,
+        Quiz.id, Quiz.title, Quiz.description, Quiz.duration_minutes,
+        Quiz.start_time, Quiz.end_time, Quiz.created_at,
+        StudentQuiz.status, StudentQuiz.score, StudentQuiz.start_time, StudentQuiz.end_time
+    ).join(
+        Quiz, Quiz.id == StudentQuiz.quiz_id
+    ).join(
+        Module, Module.id == Quiz.module_id
+    ).filter(
+        StudentQuiz.student_id == student_id
+    ).order_by(Module.id, StudentQuiz.id).all()
+
+    modules = OrderedDict()
+    for (module_id, module_name, module_description, module_created_at,
+         quiz_id, title, description, duration_minutes, quiz_start, quiz_end, quiz_created_at,
+         status, score, attempt_start, attempt_end) in rows:
+        module = modules.get(module_id)
+        if module is None:
+            module = modules[module_id] = {
+                'id': module_id,
+                'name': module_name,
+                'description': module_description,
+                'created_at': module_created_at.isoformat(),
+                'quizzes': []
+            }
+        module['quizzes'].append({
+            'id': quiz_id,
+            'title': title,
+            'description': description,
+            'duration_minutes': duration_minutes,
+            'status': status,
+            'score': score,
+            'quiz_start_time': quiz_start,
+            'quiz_end_time': quiz_end,
+            'start_time': attempt_start,
+            'end_time': attempt_end,
+            'created_at': quiz_created_at.isoformat()
+        })
+
+    return list(modules.values())
+
+def get_student_catalog_entry(student_id):
+    """
+    Get a student's (catalog, AvailabilityIndex) from the cache, loading it on
+    a miss. The index is built from the catalog rows, so a miss is one query.
+    """
+    entry = catalog_cache.get(student_id)
+    if entry is None:
+        catalog = load_student_catalog(student_id)
+        windows = [(quiz['id'], quiz['quiz_start_time'], quiz['quiz_end_time'])
+                   for module in catalog for quiz in module['quizzes']]
+        entry = (catalog, AvailabilityIndex(windows))
+        ttl = current_app.config.get('MODULE_CATALOG_CACHE_TTL', 300)
+        if ttl > 0:
+            catalog_cache.put(student_id, entry, ttl, current_app.config.get('MODULE_CATALOG_CACHE_SIZE', 5000))
+    return entry
+
+def get_student_catalog(student_id):
+    """Get a student's module catalog from the cache, loading it on a miss"""
+    return get_student_catalog_entry(student_id)[0]
+
+def quiz_availability(quiz, is_available):
+    """Availability flags for one catalog quiz"""
+    return {
+        'is_available': is_available,
+        'can_start': is_available and quiz['status'] == 'uncompleted' and not quiz['start_time'],
+        'can_continue': quiz['status'] == 'uncompleted' and quiz['start_time'] is not None,
+        'is_completed': quiz['status'] == 'completed'
+    }
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def build_available_modules(student_id, now=None):
+    """Modules with the student's quizzes and availability flags (one clock read)"""
+    catalog, availability = get_student_catalog_entry(student_id)
+    open_ids = set(availability.open_at(now or get_ist_datetime_for_db()))
+
+    module_list = []
+    for module in catalog:
+        quiz_data = []
+        for quiz in module['quizzes']:
+            quiz_info = {
+                'id': quiz['id'],
+                'title': quiz['title'],
+                'description': quiz['description'],
+                'duration_minutes': quiz['duration_minutes'],
+                'status': quiz['status'],
+                'score': quiz['score']
+            }
+            quiz_info.update(quiz_availability(quiz, quiz['id'] in open_ids))
+            quiz_info['start_time'] = _isoformat(quiz['quiz_start_time'])
+            quiz_info['end_time'] = _isoformat(quiz['quiz_end_time'])
+            quiz_data.append(quiz_info)
+
+        module_list.append({
+            'id': module['id'],
+            'name': module['name'],
+            'description': module['description'],
+            'created_at': module['created_at'],
+            'quizzes': quiz_data,
+            'total_quizzes': len(quiz_data),
+            'completed_quizzes': len([q for q in quiz_data if q['is_completed']]),
+            'available_quizzes': len([q for q in quiz_data if q['is_available']])
+        })
+
+    return module_list
+
+def build_module_details(student_id, module_id, now=None):
+    """One module of the student's catalog with quiz details, or None if not assigned"""
+    catalog, availability = get_student_catalog_entry(student_id)
+    module = next((m for m in catalog if m['id'] == module_id), None)
+    if module is None:
+        return None
+
+    open_ids = set(availability.open_at(now or get_ist_datetime_for_db()))
+
+    quiz_details = []
+    for quiz in module['quizzes']:
+        quiz_info = {
+            'id': quiz['id'],
+            'title': quiz['title'],
+            'description': quiz['description'],
+            'duration_minutes': quiz['duration_minutes'],
+            'status': quiz['status'],
+            'score': quiz['score'],
+            'start_time': _isoformat(quiz['start_time']),
+            'end_time': _isoformat(quiz['end_time'])
+        }
+        quiz_info.update(quiz_availability(quiz, quiz['id'] in open_ids))
+        quiz_info['quiz_start_time'] = _isoformat(quiz['quiz_start_time'])
+        quiz_info['quiz_end_time'] = _isoformat(quiz['quiz_end_time'])
+        quiz_info['created_at'] = quiz['created_at']
+        quiz_details.append(quiz_info)
+
+    # Calculate module progress
+    total_quizzes = len(quiz_details)
+    completed_quizzes = len([q for q in quiz_details if q['is_completed']])
+    average_score = 0
+    if completed_quizzes > 0:
+        scores = [q['score'] for q in quiz_details if q['score'] is not None]
+        average_score = sum(scores) / len(scores) if scores else 0
+
+    return {
+        'id': module['id'],
+        'name': module['name'],
+        'description': module['description'],
+        'created_at': module['created_at'],
+        'quizzes': quiz_details,
+        'progress': {
+            'total_quizzes': total_quizzes,
+            'completed_quizzes': completed_quizzes,
+            'completion_percentage': (completed_quizzes / total_quizzes * 100) if total_quizzes > 0 else 0,
+            'average_score': average_score
+        }
+    }
+
+def mark_catalog_stale(session, student_ids=None):
+    """
+    Invalidate cached catalogs once the session commits.
+    student_ids=None invalidates every student (quiz or module changes).
+    Bulk statements skip the ORM events, so callers using them mark the students here.
+    """
+    if student_ids is None:
+        session.info['catalog_clear'] = True
+    else:
+        session.info.setdefault('catalog_students', set()).update(student_ids)
+
+def _on_student_quiz_change(mapper, connection, target):
+    mark_catalog_stale(object_session(target), [target.student_id])
+
+def _on_quiz_or_module_change(mapper, connection, target):
+    mark_catalog_stale(object_session(target))
+
+def _on_commit(session):
+    if session.info.pop('catalog_clear', False):
+        catalog_cache.clear()
+        availability_cache.clear()
+        session.info.pop('catalog_students', None)
+        return
+    student_ids = session.info.pop('catalog_students', None)
+    if student_ids:
+        catalog_cache.invalidate(student_ids)
+        availability_cache.invalidate(student_ids)
+
+def _on_rollback(session, previous_transaction):
+    session.info.pop('catalog_clear', None)
+    session.info.pop('catalog_students', None)
+
+def register_catalog_cache_events():
+    """Keep the catalog cache in sync with assignment, attempt, quiz and module changes"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    listeners = [(StudentQuiz, name, _on_student_quiz_change) for name in ('after_insert', 'after_update', 'after_delete')]
+    listeners += [(model, name, _on_quiz_or_module_change)
+                  for model in (Quiz, Module) for name in ('after_update', 'after_delete')]
+    listeners += [(Session, 'after_commit', _on_commit), (Session, 'after_soft_rollback', _on_rollback)]
+
+    for target, name, listener in listeners:
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
@@ -0,0 +1,212 @@
+# admin_side/services/question_bank_service.py
+import math
+from sqlalchemy import case, distinct, func, insert, select, update
+from models.QuizModel import Question, QuestionBankItem
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from app import db
+
+# Keep IN (...) lists and multi-row inserts within database parameter limits
+BANK_CHUNK_SIZE = 500
+
+def _chunks(values, size=BANK_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _clean(value, default=''):
+    """CSV cell as text; pandas gives NaN for empty cells"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return default
+    return str(value)
+
+def pool_qid(q_data):
+    """Normalized QID of a pool question, or None if it has none"""
+    qid = q_data.get('QID')
+    if isinstance(qid, float):
+        if math.isnan(qid):
+            return None
+        if qid.is_integer():
+            qid = int(qid)
+    qid = _clean(qid).strip()
+    return qid or None
+
+def parse_pool_question(q_data):
+    """Question content fields from a pool CSV row"""
+    # Parse the correct answer index
+    try:
+        correct_answer = int(q_data.get('Correct Answer', '1'))
+    except (ValueError, TypeError):
+        correct_answer = 1  # Default to first option
+
+    # Get weight or use default
+    try:
+        weight = float(q_data.get('Question Weight', 1.0))
+    except (ValueError, TypeError):
+        weight = 1.0
+    if math.isnan(weight):
+        weight = 1.0
+
+    topic = _clean(q_data.get('Topic')).strip()
+    if not topic:
+        # If no topic in CSV, try alternative column names
+        topic = _clean(q_data.get('topic', q_data.get('TOPIC', q_data.get('Subject'))), 'Unknown')
+
+    return {
+        'text': _clean(q_data.get('Question Text')),
+        'option_1': _clean(q_data.get('Answer 1')),
+        'option_2': _clean(q_data.get('Answer 2')),
+        'option_3': _clean(q_data.get('Answer 3')),
+        'option_4': _clean(q_data.get('Answer 4')),
+        'correct_answer': correct_answer,
+        'explanation': _clean(q_data.get('Explanation'), None),
+        'weight': weight,
+        'topic': topic
+    }
+
+def get_bank_item_ids(qids):
+    """Get {source_qid: bank item id} for the given QIDs"""
+    ids = {}
+    for chunk in _chunks(set(qids)):
+        ids.update(
+            db.session.query(QuestionBankItem.source_qid, QuestionBankItem.id)
+            .filter(QuestionBankItem.source_qid.in_(chunk))
+        )
+    return ids
+
+def ensure_bank_items(pool_questions):
+    """
+    Make sure every pool question with a QID has a bank item and return
+    {source_qid: bank item id}. Only missing items are inserted; existing
+    items are never rewritten, so quizzes keep the content they were built
+    with (give an edited question a new QID). The caller commits.
+    """
+    by_qid = {}
+    for q_data in pool_questions:
+        qid = pool_qid(q_data)
+        if qid:
+            by_qid.setdefault(qid, q_data)
+
+    ids = get_bank_item_ids(by_qid)
+    missing = [qid for qid in by_qid if qid not in ids]
+    if missing:
+        # Another process may import the same questions concurrently
+        statement = insert(QuestionBankItem) \
+            .prefix_with('IGNORE', dialect='mysql') \
+            .prefix_with('OR IGNORE', dialect='sqlite')
+        for chunk in _chunks(missing):
+            db.session.execute(statement, [
+                {'source_qid': qid, **parse_pool_question(by_qid[qid])} for qid in chunk
+            ])
+        ids.update(get_bank_item_ids(missing))
+
+    return ids
+
+def import_question_bank(pool=None):
+    """Import the whole question pool into the bank. Returns the number of items created. The caller commits."""
+    if pool is None:
+        from utils.csv_utils import get_question_pool
+        pool = get_question_pool()
+
+    before = db.session.query(func.count(QuestionBankItem.id)).scalar()
+    ensure_bank_items(pool.questions)
+    return db.session.query(func.count(QuestionBankItem.id)).scalar() - before
+
+def link_existing_questions():
+    """Point copied questions at the bank item with the same QID. Returns the number linked. The caller commits."""
+    bank_item_id = select(QuestionBankItem.id).where(
+        QuestionBankItem.source_qid == Question.source_qid
+    ).scalar_subquery()
+
+    result = db.session.execute(
+        update(Question).where(
+            Question.bank_item_id.is_(None),
+            Question.source_qid.isnot(None),
+            Question.source_qid.in_(select(QuestionBankItem.source_qid))
+        ).values(bank_item_id=bank_item_id),
+        execution_options={'synchronize_session': False}
+    )
+    return result.rowcount
+
+def pool_question_rows(quiz_id, pool_questions, bank_ids):
+    """
+    Question rows for a quiz: thin rows that reference the bank when the
+    QID is in bank_ids ({source_qid: bank item id}), full copies otherwise
+    """
+    rows = []
+    for q_data in pool_questions:
+        qid = pool_qid(q_data)
+        content = parse_pool_question(q_data)
+        row = {
+            'quiz_id': quiz_id,
+            'correct_answer': content['correct_answer'],
+            'weight': content['weight'],
+            'topic': content['topic'],
+            'source_qid': qid or ''
+        }
+        if qid in bank_ids:
+            # The content stays in the bank
+            row.update({key: None for key in ('text', 'option_1', 'option_2', 'option_3', 'option_4', 'explanation')})
+            row['bank_item_id'] = bank_ids[qid]
+        else:
+            row.update(content)
+            row['bank_item_id'] = None
+        rows.append(row)
+    return rows
+
+def add_pool_questions(quiz_id, pool_questions):
+    """
+    Add selected pool questions to a quiz with one bulk insert of thin rows
+    that reference the bank: only the answer key, weight and topic are stored
+    per quiz. Questions without a QID are copied in full. The caller commits.
+    """
+    rows = pool_question_rows(quiz_id, pool_questions, ensure_bank_items(pool_questions))
+
+    # One statement, in selection order so question ids follow display order
+    if rows:
+        db.session.execute(insert(Question), rows)
+
+    return len(rows)
+
+def get_bank_item_statistics(bank_item_ids=None, topic=None, min_answers=1):
+    """
+    Item statistics across every quiz using a bank item, from one GROUP BY
+    bank item query over answers of completed attempts. Hardest items first.
+    """
+    answers = func.count(StudentAnswer.id)
+    correct = func.sum(case((StudentAnswer.is_correct == True, 1), else_=0))  # noqa: E712
+
+    query = db.session.query(
+        QuestionBankItem.id, QuestionBankItem.source_qid, QuestionBankItem.topic, QuestionBankItem.weight,
+        answers, correct, func.count(distinct(Question.quiz_id))
+    ).join(
+        Question, Question.bank_item_id == QuestionBankItem.id
+    ).join(
+        StudentAnswer, StudentAnswer.question_id == Question.id
+    ).join(
+        StudentQuiz, StudentQuiz.id == StudentAnswer.student_quiz_id
+    ).filter(StudentQuiz.status == 'completed')
+
+    if bank_item_ids is not None:
+        query = query.filter(QuestionBankItem.id.in_(list(bank_item_ids)))
+    if topic:
+        query = query.filter(QuestionBankItem.topic == topic)
+
+    rows = query.group_by(
+        QuestionBankItem.id, QuestionBankItem.source_qid, QuestionBankItem.topic, QuestionBankItem.weight
+    ).having(answers >= min_answers).all()
+
+    statistics = [
+        {
+            'bank_item_id': item_id,
+            'source_qid': source_qid,
+            'topic': item_topic,
+            'weight': weight,
+            'answers': int(answer_count),
+            'correct': int(correct_count or 0),
+            'p_value': round(int(correct_count or 0) / answer_count, 4) if answer_count else None,
+            'quizzes': int(quiz_count)
+        }
+        for item_id, source_qid, item_topic, weight, answer_count, correct_count, quiz_count in rows
+    ]
+    statistics.sort(key=lambda item: (item['p_value'], item['bank_item_id']))
+    return statistics
@@ -0,0 +1,115 @@
+# admin_side/services/question_payload_service.py
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, jsonify, request
+from models.QuizModel import Question
+from models.ProgressModel import StudentAnswer
+
+class QuestionPayloadCache:
+    """
+    Per-quiz cache of serialized question payloads.
+
+    Question content doesn't change once a quiz is created, so entries live
+    until the quiz is updated or deleted (see invalidate_question_payload) or
+    QUESTION_PAYLOAD_CACHE_TTL seconds pass. Cached lists are shared between
+    requests and must not be modified; copy a question before adding to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # quiz id -> (payload, expires_at), least recently used first
+        self._counts = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def get(self, quiz_id):
+        with self._lock:
+            entry = self._entries.get(quiz_id)
+            if entry is None or entry[1] <= time.monotonic():
+                self._entries.pop(quiz_id, None)
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(quiz_id)
+            self._counts['hits'] += 1
+            return entry[0]
+
+    def put(self, quiz_id, payload, ttl, max_size):
+        with self._lock:
+            self._entries[quiz_id] = (payload, time.monotonic() + ttl)
+            self._entries.move_to_end(quiz_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, quiz_id):
+        with self._lock:
+            if self._entries.pop(quiz_id, None) is not None:
+                self._counts['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counts['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), **self._counts}
+
+# Shared cache for the whole process
+question_payload_cache = QuestionPayloadCache()
+
+def load_question_payload(quiz):
+    """
+    Serialize a quiz's questions once, in display order, for every view:
+    - 'student': the student quiz-taking view (no answers)
+    - 'public': the quiz questions view without answers
+    - 'full': the quiz questions view with answers (quiz owner)
+    """
+    questions = Question.query.filter_by(quiz_id=quiz.id).order_by(Question.id).all()
+    total = len(questions)
+
+    payload = {'student': [], 'public': [], 'full': []}
+    for number, question in enumerate(questions, start=1):
+        payload['student'].append({
+            'id': question.id,
+            'question_number': number,
+            'text': question.content.text,
+            # Filter out empty options
+            'options': [opt for opt in question.options if opt.strip()],
+            'topic': question.topic,
+            'points': question.points
+        })
+
+        extra = {'quiz_title': quiz.title, 'question_number': number, 'total_questions': total}
+        payload['public'].append({**question.to_dict(include_answer=False), **extra})
+        payload['full'].append({**question.to_dict(include_answer=True), **extra})
+
+    return payload
+
+def get_question_payload(quiz, view):
+    """Get one view of a quiz's question payload from the cache, loading it on a miss"""
+    payload = question_payload_cache.get(quiz.id)
+    if payload is None:
+        payload = load_question_payload(quiz)
+        ttl = current_app.config.get('QUESTION_PAYLOAD_CACHE_TTL', 3600)
+        if ttl > 0:
+            question_payload_cache.put(quiz.id, payload, ttl, current_app.config.get('QUESTION_PAYLOAD_CACHE_SIZE', 1000))
+    return payload[view]
+
+def invalidate_question_payload(quiz_id):
+    """Drop a quiz's cached payload after the quiz is updated or deleted"""
+    question_payload_cache.invalidate(quiz_id)
+
+def get_saved_answers(student_quiz_id):
+    """Get {question_id: StudentAnswer} for an attempt with one query. The first answer per question wins."""
+    answers = {}
+    for answer in StudentAnswer.query.filter_by(student_quiz_id=student_quiz_id).order_by(StudentAnswer.id):
+        answers.setdefault(answer.question_id, answer)
+    return answers
+
+def etag_json_response(data, status=200):
+    """JSON response with a strong ETag of its body; answers 304 when the client's copy matches"""
+    response = jsonify(data)
+    response.status_code = status
+    response.add_etag()
+    # Per-user content: browsers may keep it but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
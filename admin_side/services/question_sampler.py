@@ -0,0 +1,233 @@
+# admin_side/services/question_sampler.py
+import threading
+import numpy as np
+from utils.csv_utils import parse_question_weight
+
+# Slice of a topic's questions (sorted easiest first) to draw from, as fractions of its length
+DIFFICULTY_BANDS = {
+    'easy': (0.0, 0.6),
+    'medium': (0.2, 0.8),
+    'hard': (0.4, 1.0)
+}
+
+def band_for_score(score):
+    """Difficulty band for a knowledge score between 0 and 1"""
+    if score < 0.4:
+        return 'easy'
+    if score < 0.7:
+        return 'medium'
+    return 'hard'
+
+def band_for_level(level):
+    """Difficulty band for a knowledge level label (Low / Normal / High)"""
+    if level == 'Low':
+        return 'easy'
+    if level == 'Normal':
+        return 'medium'
+    return 'hard'
+
+class QuestionSampler:
+    """
+    Per-topic index arrays over a question pool, built once per pool load.
+
+    Questions are addressed by their position in the pool, so a draw only
+    moves integer indices around and never compares question dicts.
+    """
+
+    def __init__(self, questions):
+        self.questions = questions
+
+        weights = np.array([parse_question_weight(q) for q in questions], dtype=float)
+        self.weights = np.nan_to_num(weights, nan=1.0)
+
+        topic_positions = {}
+        for index, q in enumerate(questions):
+            topic_positions.setdefault(q.get('Topic', 'Unknown'), []).append(index)
+
+        # File order, and easiest first (stable, so ties keep file order)
+        self.topic_indices = {
+            topic: np.array(positions, dtype=np.intp) for topic, positions in topic_positions.items()
+        }
+        self.topic_indices_by_weight = {
+            topic: positions[np.argsort(self.weights[positions], kind='stable')]
+            for topic, positions in self.topic_indices.items()
+        }
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def topics(self):
+        return list(self.topic_indices.keys())
+
+    def topic_size(self, topic):
+        return len(self.topic_indices.get(topic, ()))
+
+    def band_indices(self, topic, band=None):
+        """Pool indices of a topic's questions in a difficulty band (all of them if band is None)"""
+        if band is None:
+            return self.topic_indices.get(topic, np.empty(0, dtype=np.intp))
+
+        by_weight = self.topic_indices_by_weight.get(topic, np.empty(0, dtype=np.intp))
+        low, high = DIFFICULTY_BANDS[band]
+        banded = by_weight[int(len(by_weight) * low):int(len(by_weight) * high)]
+        # Tiny topics can have an empty band: use the whole topic instead
+        return banded if len(banded) else by_weight
+
+    def draw(self, seed=None):
+        """Start a selection; the same seed gives the same questions"""
+        return QuestionDraw(self, seed)
+
+class QuestionDraw:
+    """One quiz's selection: samples without replacement across every call"""
+
+    def __init__(self, sampler, seed=None):
+        self.sampler = sampler
+        self.rng = np.random.default_rng(seed)
+        self.taken = np.zeros(len(sampler), dtype=bool)
+        self.selected = []
+
+    def _take(self, candidates, count):
+        candidates = candidates[~self.taken[candidates]]
+        count = min(count, len(candidates))
+        if count <= 0:
+            return 0
+
+        chosen = self.rng.choice(candidates, size=count, replace=False)
+        self.taken[chosen] = True
+        self.selected.extend(chosen.tolist())
+        return count
+
+    def sample_topic(self, topic, count, band=None):
+        """Draw up to count questions of a topic, optionally from a difficulty band. Returns the number drawn."""
+        return self._take(self.sampler.band_indices(topic, band), count)
+
+    def fill(self, total):
+        """Top the selection up to total with random questions from the whole pool"""
+        return self._take(np.flatnonzero(~self.taken), total - len(self.selected))
+
+    def indices(self, limit=None, shuffle=True):
+        """Pool indices of the selection, truncated to limit and shuffled to mix topics"""
+        indices = np.array(self.selected[:limit], dtype=np.intp)
+        if shuffle:
+            indices = self.rng.permutation(indices)
+        return indices.tolist()
+
+    def questions(self, limit=None, shuffle=True):
+        """The selected question dicts, truncated to limit and shuffled to mix topics"""
+        return [self.sampler.questions[index] for index in self.indices(limit, shuffle)]
+
+def plan_topic_distribution(topic_levels, topics, num_questions):
+    """
+    How many questions to take from each topic, given {topic: knowledge score}.
+    Uses the inverse of the knowledge score as weight, so weaker topics get
+    more questions. topics are the pool's topics, in pool order.
+    """
+    if not topics:
+        return {}
+
+    # Sort topics by knowledge level (prioritize weaker topics)
+    sorted_topics = sorted(topic_levels.items(), key=lambda x: x[1])
+    total_weight = sum(1 - score for _, score in sorted_topics) if sorted_topics else 0
+
+    if total_weight == 0 or not sorted_topics:
+        # If no knowledge levels exist or weights sum to zero,
+        # just distribute questions evenly across all topics
+        return {topic: max(1, num_questions // len(topics)) for topic in topics}
+
+    topic_distribution = {}
+    remaining_questions = num_questions
+
+    for topic, score in sorted_topics:
+        # Invert and normalize the score to get a weight
+        weight = (1 - score) / total_weight
+
+        # Allocate questions proportionally to weight, but ensure at least 1
+        # and don't allocate more than we have left
+        topic_questions = min(max(1, int(num_questions * weight)), remaining_questions)
+
+        topic_distribution[topic] = topic_questions
+        remaining_questions -= topic_questions
+
+    # If we have remaining questions due to rounding, assign them to the weakest topics
+    for topic, _ in sorted_topics:
+        if remaining_questions <= 0:
+            break
+        topic_distribution[topic] += 1
+        remaining_questions -= 1
+
+    # For topics not in knowledge levels, assign a small number of questions.
+    # Pool order (not a set) keeps seeded selections identical across processes.
+    unknown_topics = [topic for topic in topics if topic not in topic_levels]
+    questions_for_unknowns = min(num_questions // 5, len(unknown_topics))
+    if questions_for_unknowns > 0:
+        # Reduce questions from known topics proportionally
+        reduction_factor = (num_questions - questions_for_unknowns) / num_questions
+        for topic in topic_distribution:
+            topic_distribution[topic] = max(1, int(topic_distribution[topic] * reduction_factor))
+
+        # Distribute remaining questions to unknown topics
+        for topic in unknown_topics:
+            topic_distribution[topic] = max(1, questions_for_unknowns // len(unknown_topics))
+
+    return topic_distribution
+
+def select_adaptive_indices(sampler, topic_levels, num_questions, seed=None):
+    """
+    Pool indices of an adaptive selection for {topic: knowledge score}.
+    Known topics are drawn from the difficulty band for the score, unknown
+    ones at random; shortfalls are filled from the whole pool.
+    """
+    draw = sampler.draw(seed)
+    for topic, count in plan_topic_distribution(topic_levels, sampler.topics, num_questions).items():
+        band = band_for_score(topic_levels[topic]) if topic in topic_levels else None
+        draw.sample_topic(topic, count, band)
+
+    draw.fill(num_questions)
+    return draw.indices(limit=num_questions)
+
+def select_adaptive_questions(sampler, topic_levels, num_questions, seed=None):
+    """The question dicts of select_adaptive_indices"""
+    return [sampler.questions[index] for index in select_adaptive_indices(sampler, topic_levels, num_questions, seed)]
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+def get_question_sampler(pool):
+    """Get the sampler for a question pool, rebuilt only when the pool is reloaded"""
+    global _sampler
+
+    sampler = _sampler
+    if sampler is not None and sampler.questions is pool.questions:
+        return sampler
+
+    with _sampler_lock:
+        sampler = _sampler
+        if sampler is None or sampler.questions is not pool.questions:
+            sampler = QuestionSampler(pool.questions)
+            _sampler = sampler
+
+    return sampler
+
+# Sampler of a worker process, built once from the pool sent by init_sampler_worker
+_worker_sampler = None
+
+def init_sampler_worker(questions):
+    """Process pool initializer: receive the read-only pool once per worker"""
+    global _worker_sampler
+    _worker_sampler = QuestionSampler(questions)
+
+def student_seed(seed, student_id):
+    """Per-student seed, so a cohort selection doesn't depend on how students are split up"""
+    return None if seed is None else [seed, student_id]
+
+def select_adaptive_batch(tasks, num_questions, seed=None, sampler=None):
+    """
+    Adaptive selections for [(student_id, {topic: knowledge score})], as
+    [(student_id, pool indices)]. Runs in a pool worker unless a sampler is given.
+    """
+    sampler = sampler or _worker_sampler
+    return [
+        (student_id, select_adaptive_indices(sampler, topic_levels, num_questions, student_seed(seed, student_id)))
+        for student_id, topic_levels in tasks
+    ]
@@ -1,10 +1,13 @@
 # admin_side/services/question_service.py
-import random
-from datetime import datetime, timedelta
+from datetime import timedelta
 from models.QuizModel import Quiz, Question
 from models.ProgressModel import KnowledgeLevel, StudentQuiz
 from app import db
-from utils.csv_utils import get_questions_from_csv
+from utils.csv_utils import get_question_pool, parse_question_weight
+from services.question_bank_service import add_pool_questions
+from services.question_sampler import band_for_level, get_question_sampler
+from utils.timezone_utils import get_ist_datetime_for_db
+from services.quiz_events import publish_assignment_changes
 
 def filter_questions_by_topic(questions, topic):
     """
@@ -25,11 +28,7 @@ def select_questions_by_knowledge_level(questions, knowledge_level):
     Select questions appropriate for a given knowledge level
     """
     # Sort questions by weight (difficulty)
-    try:
-        sorted_questions = sorted(questions, key=lambda q: float(q.get('Question Weight', 1.0)))
-    except (ValueError, TypeError):
-        # If conversion fails, use default order
-        sorted_questions = questions
+    sorted_questions = sorted(questions, key=parse_question_weight)
     
     # Determine which difficulty range to use based on knowledge level
     if knowledge_level == 'Low':
@@ -87,122 +86,60 @@ def get_topic_distribution_by_knowledge(knowledge_levels, num_questions=15):
     
     return topic_distribution
 
-def create_personalized_quiz(student_id, title, description=None, num_questions=15):
+def create_personalized_quiz(student_id, title, description=None, num_questions=15, seed=None):
     """
-    Create a personalized quiz for a student based on their knowledge levels
+    Create a personalized quiz for a student based on their knowledge levels.
+    Pass a seed to make the question selection reproducible.
     """
     # Get student's knowledge levels
     knowledge_levels = KnowledgeLevel.query.filter_by(student_id=student_id).all()
     
-    # Get question pool from CSV
-    all_questions = get_questions_from_csv()
+    # Get the shared question pool
+    question_pool = get_question_pool()
     
-    # Create new quiz
+    # Create new quiz; windows are stored in IST like every other quiz
+    start_time = get_ist_datetime_for_db()
     quiz = Quiz(
         title=title,
         description=description or f"Personalized quiz based on your knowledge profile",
-        start_time=datetime.utcnow(),
-        end_time=datetime.utcnow() + timedelta(days=7),  # Available for 7 days
+        start_time=start_time,
+        end_time=start_time + timedelta(days=7),  # Available for 7 days
         duration_minutes=20  # Default 20 minutes
     )
     
     db.session.add(quiz)
     db.session.flush()  # Get quiz ID without committing yet
     
-    selected_questions = []
+    # Sample by index from the pool's per-topic arrays, without replacement across topics
+    draw = get_question_sampler(question_pool).draw(seed)
     
     # If student has knowledge levels, use them to personalize the quiz
     if knowledge_levels:
         # Get question distribution by topic
         topic_distribution = get_topic_distribution_by_knowledge(knowledge_levels, num_questions)
+        levels = {kl.topic: kl.level for kl in knowledge_levels}
         
-        # Group questions by topic
-        topic_questions = {}
-        for q in all_questions:
-            topic = q.get('Topic', 'Unknown')
-            if topic not in topic_questions:
-                topic_questions[topic] = []
-            topic_questions[topic].append(q)
-        
-        # Select questions for each topic
+        # Select questions for each topic from the difficulty band for its knowledge level
         for topic, count in topic_distribution.items():
-            if topic in topic_questions and topic_questions[topic]:
-                # Get topic questions
-                available_questions = topic_questions[topic]
-                
-                # Get knowledge level for this topic
-                topic_level = next((kl.level for kl in knowledge_levels if kl.topic == topic), 'Normal')
-                
-                # Select questions appropriate for this level
-                level_questions = select_questions_by_knowledge_level(available_questions, topic_level)
-                
-                # Randomly select the requested number
-                num_to_select = min(count, len(level_questions))
-                if num_to_select > 0:
-                    selected_questions.extend(random.sample(level_questions, num_to_select))
+            draw.sample_topic(topic, count, band_for_level(levels.get(topic, 'Normal')))
     else:
         # If no knowledge levels yet, select random questions from various topics
-        topics = set(q.get('Topic', 'Unknown') for q in all_questions)
-        topics = [t for t in topics if t != 'Unknown']
+        topics = [t for t in question_pool.topics if t != 'Unknown']
         
         # Try to balance questions across topics
         questions_per_topic = max(1, num_questions // len(topics)) if topics else num_questions
         
         for topic in topics:
-            topic_qs = [q for q in all_questions if q.get('Topic', '') == topic]
-            if topic_qs:
-                num_to_select = min(questions_per_topic, len(topic_qs))
-                if num_to_select > 0:
-                    selected_questions.extend(random.sample(topic_qs, num_to_select))
+            draw.sample_topic(topic, questions_per_topic)
                     
         # If we still don't have enough, add random questions
-        if len(selected_questions) < num_questions:
-            remaining = num_questions - len(selected_questions)
-            remaining_questions = [q for q in all_questions if q not in selected_questions]
-            if remaining_questions and remaining > 0:
-                num_to_select = min(remaining, len(remaining_questions))
-                selected_questions.extend(random.sample(remaining_questions, num_to_select))
+        draw.fill(num_questions)
     
     # Limit to the desired number and shuffle
-    selected_questions = selected_questions[:num_questions]
-    random.shuffle(selected_questions)
+    selected_questions = draw.questions(limit=num_questions)
     
-    # Create Question objects for each selected question
-    for q_data in selected_questions:
-        # Parse the options
-        options = [
-            q_data.get('Answer 1', ''),
-            q_data.get('Answer 2', ''),
-            q_data.get('Answer 3', ''),
-            q_data.get('Answer 4', '')
-        ]
-        
-        # Parse the correct answer (1-based index)
-        try:
-            correct_answer = int(q_data.get('Correct Answer', '1'))
-        except (ValueError, TypeError):
-            correct_answer = 1  # Default to first option
-        
-        # Get weight or use default
-        try:
-            weight = float(q_data.get('Question Weight', 1.0))
-        except (ValueError, TypeError):
-            weight = 1.0
-        
-        # Create the question
-        question = Question(
-            quiz_id=quiz.id,
-            text=q_data.get('Question Text', ''),
-            option_1=options[0] if len(options) > 0 else '',
-            option_2=options[1] if len(options) > 1 else '',
-            option_3=options[2] if len(options) > 2 else '',
-            option_4=options[3] if len(options) > 3 else '',
-            correct_answer=correct_answer,
-            weight=weight,
-            topic=q_data.get('Topic', ''),
-            source_qid=q_data.get('QID', '')
-        )
-        db.session.add(question)
+    # Link the selected questions to the quiz through the shared question bank
+    add_pool_questions(quiz.id, selected_questions)
     
     # Create the student quiz record
     student_quiz = StudentQuiz(
@@ -211,6 +148,7 @@ def create_personalized_quiz(student_id, title, description=None, num_questions=
         status='uncompleted'
     )
     db.session.add(student_quiz)
+    publish_assignment_changes(quiz.id, added=[student_id])
     
     # Commit all changes
     db.session.commit()
@@ -221,28 +159,23 @@ def get_topic_statistics():
     """
     Get statistics about the question pool
     """
-    all_questions = get_questions_from_csv()
+    question_pool = get_question_pool()
     
-    # Count questions by topic
+    # Count questions and collect weights by topic
     topic_counts = {}
     topic_weights = {}
     
-    for q in all_questions:
-        topic = q.get('Topic', 'Unknown')
-        
-        # Count topics
-        if topic not in topic_counts:
-            topic_counts[topic] = 0
-            topic_weights[topic] = []
-            
-        topic_counts[topic] += 1
+    for topic, topic_qs in question_pool.by_topic.items():
+        topic_counts[topic] = len(topic_qs)
         
         # Track weights
-        try:
-            weight = float(q.get('Question Weight', 1.0))
-            topic_weights[topic].append(weight)
-        except (ValueError, TypeError):
-            pass
+        weights = []
+        for q in topic_qs:
+            try:
+                weights.append(float(q.get('Question Weight', 1.0)))
+            except (ValueError, TypeError):
+                pass
+        topic_weights[topic] = weights
     
     # Calculate statistics for each topic
     topic_stats = []
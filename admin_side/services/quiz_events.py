@@ -0,0 +1,140 @@
+# admin_side/services/quiz_events.py
+"""
+Quiz, assignment, result and knowledge events published to the event hub,
+so clients can subscribe to /api/events instead of polling.
+
+    quiz.opened / quiz.closed     a quiz window started or ended (assigned students)
+    quiz.availability_changed     a professor edited a window (assigned students)
+    assignment.added / .removed   a quiz was assigned or unassigned (those students)
+    quiz.scored                   an attempt was scored (the student and the quiz's professor)
+    knowledge.updated             knowledge levels were recomputed (the student and professors)
+"""
+import threading
+from sqlalchemy import and_
+from models.QuizModel import Quiz
+from models.ProgressModel import StudentQuiz
+from services.event_hub import event_hub, publish_after_commit
+from utils.timezone_utils import get_ist_datetime_for_db
+from utils.tracing import get_tracer
+from app import db
+
+trace = get_tracer('events')
+
+def get_assigned_student_ids(quiz_ids, status=None):
+    """{quiz_id: [student ids]} for the quizzes' assignments, with one query"""
+    assigned = {quiz_id: [] for quiz_id in quiz_ids}
+    if not assigned:
+        return assigned
+    query = db.session.query(StudentQuiz.quiz_id, StudentQuiz.student_id).filter(StudentQuiz.quiz_id.in_(assigned))
+    if status is not None:
+        query = query.filter(StudentQuiz.status == status)
+    for quiz_id, student_id in query:
+        assigned[quiz_id].append(student_id)
+    return assigned
+
+def publish_assignment_changes(quiz_id, added=(), removed=()):
+    """Tell students a quiz was assigned to or removed from them, once the session commits"""
+    session = db.session()
+    if added:
+        publish_after_commit(session, 'assignment.added', {'quiz_id': quiz_id}, user_ids=added)
+    if removed:
+        publish_after_commit(session, 'assignment.removed', {'quiz_id': quiz_id}, user_ids=removed)
+
+def publish_availability_change(quiz):
+    """Tell the quiz's students its window changed, once the session commits"""
+    student_ids = get_assigned_student_ids([quiz.id])[quiz.id]
+    if student_ids:
+        publish_after_commit(db.session(), 'quiz.availability_changed', {
+            'quiz_id': quiz.id,
+            'start_time': quiz.start_time,
+            'end_time': quiz.end_time
+        }, user_ids=student_ids)
+
+def publish_quiz_scored(student_quiz, professor_id=None):
+    """Tell the student (and the quiz's professor) an attempt was scored, once the session commits"""
+    user_ids = [student_quiz.student_id] + ([professor_id] if professor_id else [])
+    publish_after_commit(db.session(), 'quiz.scored', {
+        'quiz_id': student_quiz.quiz_id,
+        'student_quiz_id': student_quiz.id,
+        'student_id': student_quiz.student_id,
+        'score': student_quiz.score
+    }, user_ids=user_ids)
+
+def publish_knowledge_updated(student_id):
+    """Tell the student and the professors' dashboards that knowledge levels changed, once the session commits"""
+    session = db.session()
+    publish_after_commit(session, 'knowledge.updated', {'student_id': student_id}, user_ids=[student_id])
+    publish_after_commit(session, 'knowledge.updated', {'student_id': student_id}, user_type='professor')
+
+def publish_quiz_transitions(since, now):
+    """
+    Publish quiz.opened for windows that started in (since, now] and
+    quiz.closed for windows that ended in [since, now). Only students with
+    an uncompleted assignment are told. Returns the number of events.
+    """
+    rows = db.session.query(Quiz.id, Quiz.start_time, Quiz.end_time).filter(
+        (and_(Quiz.start_time > since, Quiz.start_time <= now)) |
+        (and_(Quiz.end_time >= since, Quiz.end_time < now))
+    ).all()
+    if not rows:
+        return 0
+
+    assigned = get_assigned_student_ids([row[0] for row in rows], status='uncompleted')
+    published = 0
+    for quiz_id, start_time, end_time in rows:
+        student_ids = assigned[quiz_id]
+        if not student_ids:
+            continue
+        if start_time and since < start_time <= now:
+            event_hub.publish('quiz.opened', {'quiz_id': quiz_id, 'end_time': end_time}, user_ids=student_ids)
+            published += 1
+        if end_time and since <= end_time < now:
+            event_hub.publish('quiz.closed', {'quiz_id': quiz_id}, user_ids=student_ids)
+            published += 1
+    return published
+
+class QuizTransitionWatcher:
+    """
+    Background thread that turns quiz windows opening and closing into
+    events. It runs one query per interval while anyone is subscribed,
+    however many subscribers there are, and none otherwise.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(app, app.config.get('EVENTS_TRANSITION_INTERVAL', 15)),
+                name='quiz-transition-watcher',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, app, interval):
+        with app.app_context():
+            since = get_ist_datetime_for_db()
+            while not self._stop.wait(interval):
+                now = get_ist_datetime_for_db()
+                if event_hub.has_subscribers():
+                    try:
+                        count = publish_quiz_transitions(since, now)
+                        trace.debug('Published %s quiz transition events', count)
+                    except Exception as e:
+                        trace.exception('Quiz transition check failed: %s', e)
+                    finally:
+                        db.session.remove()
+                since = now
+
+# Shared watcher for the whole process
+transition_watcher = QuizTransitionWatcher()
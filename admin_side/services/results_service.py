@@ -0,0 +1,343 @@
+# admin_side/services/results_service.py
+import numpy as np
+from sqlalchemy import func
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from models.QuizModel import Question
+from models.UserModel import Student
+from app import db
+
+# Multiple choice questions have up to four options (0-based indexes)
+NUM_OPTIONS = 4
+
+# Share of attempts in the upper and lower groups for the discrimination index
+DISCRIMINATION_GROUP_FRACTION = 0.27
+
+def get_quiz_questions(quiz_id):
+    """Load a quiz's questions once, in display order"""
+    return Question.query.filter_by(quiz_id=quiz_id).order_by(Question.id).all()
+
+def get_completed_attempts(quiz_id, student_id=None, after_id=None, limit=None):
+    """
+    Load completed attempts with their student in one joined query, ordered by
+    attempt id. after_id/limit give keyset pagination over large classes.
+    """
+    query = db.session.query(StudentQuiz, Student) \
+        .join(Student, Student.id == StudentQuiz.student_id) \
+        .filter(StudentQuiz.quiz_id == quiz_id, StudentQuiz.status == 'completed')
+
+    if student_id is not None:
+        query = query.filter(StudentQuiz.student_id == student_id)
+    if after_id is not None:
+        query = query.filter(StudentQuiz.id > after_id)
+
+    query = query.order_by(StudentQuiz.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query.all()
+
+def index_answers(student_quiz_ids):
+    """
+    Load every answer of the given attempts with one query, indexed by
+    (attempt id, question id). The first answer per question wins.
+    """
+    answers = {}
+    if not student_quiz_ids:
+        return answers
+
+    for answer in StudentAnswer.query.filter(
+        StudentAnswer.student_quiz_id.in_(student_quiz_ids)
+    ).order_by(StudentAnswer.id):
+        answers.setdefault((answer.student_quiz_id, answer.question_id), answer)
+
+    return answers
+
+def build_attempt_result(student_quiz, student, questions, answers, include_student):
+    """Build the detailed result of one attempt from preloaded questions and answers"""
+    answer_details = []
+    total_correct = 0
+    total_points = 0
+    max_possible_points = 0
+    topic_performance = {}
+
+    for question in questions:
+        # Find the student's answer for this question
+        student_answer = answers.get((student_quiz.id, question.id))
+
+        # Calculate points
+        question_points = question.weight
+        max_possible_points += question_points
+
+        is_correct = bool(student_answer and student_answer.is_correct)
+        if is_correct:
+            total_correct += 1
+            total_points += question_points
+
+        answer_details.append({
+            'question_id': question.id,
+            'question_text': question.content.text,
+            'question_topic': question.topic,
+            'question_weight': question.weight,
+            # Filter out empty options
+            'options': [opt for opt in question.options if opt.strip()],
+            'correct_answer': question.correct_answer,
+            'student_answer': student_answer.selected_option if student_answer else None,
+            'is_correct': student_answer.is_correct if student_answer else False,
+            'points_earned': question_points if is_correct else 0,
+            'answered_at': student_answer.created_at if student_answer else None
+        })
+
+        # Calculate topic-wise performance
+        topic = question.topic
+        if topic and topic.strip():
+            perf = topic_performance.setdefault(topic, {
+                'total_questions': 0,
+                'correct_answers': 0,
+                'total_points': 0,
+                'earned_points': 0
+            })
+            perf['total_questions'] += 1
+            perf['total_points'] += question.weight
+            if is_correct:
+                perf['correct_answers'] += 1
+                perf['earned_points'] += question_points
+
+    # Calculate topic scores
+    for perf in topic_performance.values():
+        perf['accuracy'] = (perf['correct_answers'] / perf['total_questions']) * 100 if perf['total_questions'] > 0 else 0
+        perf['score_percentage'] = (perf['earned_points'] / perf['total_points']) * 100 if perf['total_points'] > 0 else 0
+
+    result = {
+        'student': {
+            'id': student.id,
+            'first_name': student.first_name,
+            'last_name': student.last_name,
+            'email': student.email,
+            'student_id': student.student_id
+        } if include_student else None,
+        'attempt': {
+            'id': student_quiz.id,
+            'status': student_quiz.status,
+            # Datetimes are serialized by the app's JSON provider
+            'start_time': student_quiz.start_time,
+            'end_time': student_quiz.end_time,
+            'duration_taken': None,  # Calculate if both times available
+            'score_percentage': student_quiz.score,
+            'total_correct': total_correct,
+            'total_questions': len(questions),
+            'total_points': total_points,
+            'max_possible_points': max_possible_points
+        },
+        'topic_performance': topic_performance,
+        'answers': answer_details
+    }
+
+    # Calculate duration taken if both times are available
+    if student_quiz.start_time and student_quiz.end_time:
+        duration = student_quiz.end_time - student_quiz.start_time
+        result['attempt']['duration_taken'] = {
+            'total_seconds': duration.total_seconds(),
+            'minutes': int(duration.total_seconds() // 60),
+            'seconds': int(duration.total_seconds() % 60)
+        }
+
+    return result
+
+def get_response_matrices(quiz_id, questions):
+    """
+    Load every answer of every completed attempt with one column query and
+    arrange them as attempts x questions arrays: correct (0/1) and the
+    selected option (-1 when unanswered).
+    """
+    rows = db.session.query(
+        StudentAnswer.student_quiz_id,
+        StudentAnswer.question_id,
+        StudentAnswer.selected_option,
+        StudentAnswer.is_correct
+    ).join(
+        StudentQuiz, StudentQuiz.id == StudentAnswer.student_quiz_id
+    ).filter(
+        StudentQuiz.quiz_id == quiz_id,
+        StudentQuiz.status == 'completed'
+    ).order_by(StudentAnswer.id.desc()).all()
+
+    attempt_ids = sorted({row[0] for row in rows})
+    attempt_index = {attempt_id: i for i, attempt_id in enumerate(attempt_ids)}
+    question_index = {question.id: j for j, question in enumerate(questions)}
+
+    correct = np.zeros((len(attempt_ids), len(questions)), dtype=float)
+    selected = np.full((len(attempt_ids), len(questions)), -1, dtype=int)
+
+    # Rows come newest first, so the first answer per question is written last
+    for student_quiz_id, question_id, selected_option, is_correct in rows:
+        j = question_index.get(question_id)
+        if j is None:
+            continue
+        i = attempt_index[student_quiz_id]
+        correct[i, j] = 1.0 if is_correct else 0.0
+        in_range = selected_option is not None and 0 <= selected_option < NUM_OPTIONS
+        selected[i, j] = selected_option if in_range else -1
+
+    return correct, selected
+
+def _rounded(values, digits=4):
+    """Convert a NumPy vector to a list of rounded floats, with None for NaN"""
+    return [None if np.isnan(value) else round(float(value), digits) for value in values]
+
+def compute_item_statistics(questions, correct, selected):
+    """
+    Classical item analysis over all attempts:
+    - p_value: share of attempts answering the item correctly (difficulty)
+    - discrimination: corrected item-total (point-biserial) correlation
+    - discrimination_index: p_value in the top 27% minus the bottom 27% by rest score
+    - option_distribution: how often each option was chosen, plus unanswered
+    """
+    num_attempts, num_questions = correct.shape
+    if num_attempts == 0 or num_questions == 0:
+        return []
+
+    weights = np.array([question.weight or 1.0 for question in questions], dtype=float)
+
+    p_values = correct.mean(axis=0)
+
+    # Rest score: weighted total without the item itself
+    totals = correct @ weights
+    rest = totals[:, None] - correct * weights[None, :]
+
+    item_centered = correct - p_values
+    rest_centered = rest - rest.mean(axis=0)
+    covariance = (item_centered * rest_centered).sum(axis=0)
+    spread = np.sqrt((item_centered ** 2).sum(axis=0) * (rest_centered ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        discrimination = np.where(spread > 0, covariance / spread, np.nan)
+
+    # Upper/lower groups by total score
+    group_size = max(1, int(round(num_attempts * DISCRIMINATION_GROUP_FRACTION)))
+    order = np.argsort(totals, kind='stable')
+    if num_attempts >= 2:
+        discrimination_index = correct[order[-group_size:]].mean(axis=0) - correct[order[:group_size]].mean(axis=0)
+    else:
+        discrimination_index = np.full(num_questions, np.nan)
+
+    # Option counts per question: shift by one so unanswered (-1) lands in column 0
+    offsets = (selected + 1) + np.arange(num_questions)[None, :] * (NUM_OPTIONS + 1)
+    option_counts = np.bincount(offsets.ravel(), minlength=num_questions * (NUM_OPTIONS + 1)) \
+        .reshape(num_questions, NUM_OPTIONS + 1)
+
+    p_values = _rounded(p_values)
+    discrimination = _rounded(discrimination)
+    discrimination_index = _rounded(discrimination_index)
+
+    return [
+        {
+            'question_id': question.id,
+            # Shared pool questions can be compared across quizzes by bank item
+            'bank_item_id': question.bank_item_id,
+            'question_topic': question.topic,
+            'correct_answer': question.correct_answer,
+            'p_value': p_values[j],
+            'discrimination': discrimination[j],
+            'discrimination_index': discrimination_index[j],
+            'option_distribution': {
+                'unanswered': int(option_counts[j, 0]),
+                **{str(option): int(option_counts[j, option + 1]) for option in range(NUM_OPTIONS)}
+            }
+        }
+        for j, question in enumerate(questions)
+    ]
+
+def compute_topic_statistics(questions, correct):
+    """Accuracy and weighted score per topic across all attempts"""
+    if correct.shape[0] == 0:
+        return {}
+
+    weights = np.array([question.weight or 1.0 for question in questions], dtype=float)
+    topics = [question.topic.strip() if question.topic and question.topic.strip() else None for question in questions]
+
+    statistics = {}
+    for topic in dict.fromkeys(t for t in topics if t):
+        columns = np.array([t == topic for t in topics])
+        topic_correct = correct[:, columns]
+        topic_weights = weights[columns]
+
+        # Per-attempt weighted score for the topic
+        attempt_scores = topic_correct @ topic_weights / topic_weights.sum() * 100
+        statistics[topic] = {
+            'total_questions': int(columns.sum()),
+            'accuracy': round(float(topic_correct.mean() * 100), 2),
+            'average_score_percentage': round(float(attempt_scores.mean()), 2),
+            'min_score_percentage': round(float(attempt_scores.min()), 2),
+            'max_score_percentage': round(float(attempt_scores.max()), 2)
+        }
+
+    return statistics
+
+def get_score_summary(quiz_id):
+    """Attempt count and score range over all completed attempts in one aggregate query"""
+    attempts, average, highest, lowest = db.session.query(
+        func.count(StudentQuiz.id),
+        func.avg(StudentQuiz.score),
+        func.max(StudentQuiz.score),
+        func.min(StudentQuiz.score)
+    ).filter(
+        StudentQuiz.quiz_id == quiz_id,
+        StudentQuiz.status == 'completed'
+    ).one()
+
+    return {
+        'total_attempts': attempts,
+        'average_score': float(average or 0),
+        'highest_score': float(highest or 0),
+        'lowest_score': float(lowest or 0),
+        'completion_rate': 100 if attempts else 0
+    }
+
+def get_quiz_results(quiz, student_id=None, cursor=None, limit=None, include_statistics=True):
+    """
+    Build the quiz results payload with a constant number of queries.
+
+    student_id restricts the results to one student's attempt (student view,
+    without student details or class statistics). cursor/limit paginate the
+    attempts by id; class statistics cover every attempt and are only
+    computed when include_statistics is set.
+    """
+    questions = get_quiz_questions(quiz.id)
+    attempts = get_completed_attempts(quiz.id, student_id=student_id, after_id=cursor, limit=limit)
+    answers = index_answers([student_quiz.id for student_quiz, _ in attempts])
+
+    include_student = student_id is None
+
+    quiz_results = {
+        'quiz': {
+            'id': quiz.id,
+            'title': quiz.title,
+            'description': quiz.description,
+            'duration_minutes': quiz.duration_minutes,
+            'total_questions': len(questions)
+        },
+        'results': [
+            build_attempt_result(student_quiz, student, questions, answers, include_student)
+            for student_quiz, student in attempts
+        ]
+    }
+
+    if limit is not None:
+        has_more = len(attempts) == limit
+        quiz_results['pagination'] = {
+            'limit': limit,
+            'cursor': cursor,
+            'next_cursor': attempts[-1][0].id if has_more else None,
+            'has_more': has_more
+        }
+
+    # Add summary statistics for professors
+    if include_student and include_statistics:
+        summary = get_score_summary(quiz.id)
+        if summary['total_attempts']:
+            quiz_results['summary'] = summary
+
+            correct, selected = get_response_matrices(quiz.id, questions)
+            quiz_results['item_statistics'] = compute_item_statistics(questions, correct, selected)
+            quiz_results['topic_statistics'] = compute_topic_statistics(questions, correct)
+
+    return quiz_results
@@ -0,0 +1,160 @@
+# admin_side/services/review_service.py
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, distinct, func, or_
+from models.ModuleModel import Module
+from models.QuizModel import Quiz, Question, QuestionBankItem
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from app import db
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Sort key for completed attempts without an end time: they go last
+_NO_END_TIME = datetime(1970, 1, 1)
+
+def _completed_at():
+    return func.coalesce(StudentQuiz.end_time, _NO_END_TIME)
+
+def encode_cursor(completed_at, student_quiz_id, answer_id):
+    """Opaque token for the position after the given feed row"""
+    payload = json.dumps([completed_at.isoformat(), student_quiz_id, answer_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Decode a cursor token into (completed_at, student_quiz_id, answer_id). Raises ValueError."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        completed_at, student_quiz_id, answer_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(completed_at), int(student_quiz_id), int(answer_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def _incorrect_answers_query(student_id):
+    """Incorrect answers of the student's completed quizzes"""
+    return db.session.query(StudentAnswer).join(
+        StudentQuiz, StudentQuiz.id == StudentAnswer.student_quiz_id
+    ).join(
+        Question, Question.id == StudentAnswer.question_id
+    ).filter(
+        StudentQuiz.student_id == student_id,
+        StudentQuiz.status == 'completed',
+        StudentAnswer.is_correct == False  # noqa: E712
+    )
+
+def get_incorrect_answer_page(student_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of the incorrect-answer feed from a single joined query.
+
+    Rows are ordered by quiz completion (newest first), then by answer within
+    the quiz. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    completed_at = _completed_at()
+
+    query = db.session.query(
+        completed_at,
+        StudentQuiz.id, StudentQuiz.end_time, StudentQuiz.score,
+        Quiz.id, Quiz.title, Module.name,
+        Question.id,
+        # Bank-linked questions keep their content in question_bank_items
+        func.coalesce(QuestionBankItem.text, Question.text), Question.topic, Question.weight,
+        func.coalesce(QuestionBankItem.option_1, Question.option_1),
+        func.coalesce(QuestionBankItem.option_2, Question.option_2),
+        func.coalesce(QuestionBankItem.option_3, Question.option_3),
+        func.coalesce(QuestionBankItem.option_4, Question.option_4),
+        Question.correct_answer,
+        StudentAnswer.id, StudentAnswer.selected_option, StudentAnswer.created_at
+    ).select_from(StudentAnswer).join(
+        StudentQuiz, StudentQuiz.id == StudentAnswer.student_quiz_id
+    ).join(
+        Quiz, Quiz.id == StudentQuiz.quiz_id
+    ).outerjoin(
+        Module, Module.id == Quiz.module_id
+    ).join(
+        Question, Question.id == StudentAnswer.question_id
+    ).outerjoin(
+        QuestionBankItem, QuestionBankItem.id == Question.bank_item_id
+    ).filter(
+        StudentQuiz.student_id == student_id,
+        StudentQuiz.status == 'completed',
+        StudentAnswer.is_correct == False  # noqa: E712
+    )
+
+    if cursor is not None:
+        after_completed_at, after_student_quiz_id, after_answer_id = cursor
+        query = query.filter(or_(
+            completed_at < after_completed_at,
+            and_(completed_at == after_completed_at, StudentQuiz.id < after_student_quiz_id),
+            and_(completed_at == after_completed_at, StudentQuiz.id == after_student_quiz_id,
+                 StudentAnswer.id > after_answer_id)
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(
+        completed_at.desc(), StudentQuiz.id.desc(), StudentAnswer.id
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[0], last[1], last[16])
+
+    incorrect_answers = []
+    for (_, _, end_time, score, quiz_id, quiz_title, module_name,
+         question_id, text, topic, weight, option_1, option_2, option_3, option_4, correct_answer,
+         _, selected_option, answered_at) in rows:
+        incorrect_answers.append({
+            'quiz_id': quiz_id,
+            'quiz_title': quiz_title,
+            # Datetimes are serialized by the app's JSON provider
+            'quiz_completed_at': end_time,
+            'quiz_score': score,
+            'module_name': module_name,
+            'question_id': question_id,
+            'question_text': text,
+            'question_topic': topic,
+            'question_weight': weight,
+            # Filter out empty options
+            'options': [opt for opt in (option_1, option_2, option_3, option_4) if opt.strip()],
+            'correct_answer': correct_answer,
+            'student_answer': selected_option,
+            'answered_at': answered_at,
+            'points_lost': weight
+        })
+
+    return incorrect_answers, next_cursor
+
+def get_incorrect_topic_analysis(student_id):
+    """Incorrect answer counts and points lost per topic from one GROUP BY query, most missed first"""
+    rows = _incorrect_answers_query(student_id).with_entities(
+        Question.topic,
+        func.count(StudentAnswer.id),
+        func.sum(Question.weight),
+        func.count(distinct(StudentQuiz.id))
+    ).filter(
+        Question.topic.isnot(None),
+        func.trim(Question.topic) != ''
+    ).group_by(Question.topic).order_by(func.count(StudentAnswer.id).desc(), Question.topic).all()
+
+    return [
+        {
+            'topic': topic,
+            'incorrect_count': incorrect_count,
+            'total_points_lost': float(points_lost or 0),
+            'quiz_count': quiz_count
+        }
+        for topic, incorrect_count, points_lost, quiz_count in rows
+    ]
+
+def get_incorrect_answer_totals(student_id):
+    """(completed quizzes, incorrect answers) for the student with one query"""
+    incorrect = _incorrect_answers_query(student_id).with_entities(func.count(StudentAnswer.id)).scalar_subquery()
+    completed, total_incorrect = db.session.query(
+        func.count(StudentQuiz.id), incorrect
+    ).filter(
+        StudentQuiz.student_id == student_id,
+        StudentQuiz.status == 'completed'
+    ).one()
+    return completed, total_incorrect or 0
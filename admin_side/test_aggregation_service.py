@@ -0,0 +1,87 @@
+# admin_side/test_aggregation_service.py
+from datetime import datetime
+from app import db
+from conftest import create_professor, create_quiz, create_students
+from models.ModuleModel import Module
+from models.ProgressModel import StudentQuiz
+from services.aggregation_service import aggregate_module_performance
+from utils.jwt_utils import generate_token
+
+def create_modules(num_modules=4, quizzes_per_module=3, num_students=2):
+    professor = create_professor()
+    students = create_students(num_students)
+
+    for m in range(num_modules):
+        module = Module(name=f'Module {m}', professor_id=professor.id)
+        db.session.add(module)
+        db.session.flush()
+        for q in range(quizzes_per_module):
+            quiz = create_quiz(professor, f'Quiz {m}.{q}', module_id=module.id)
+            for s, student in enumerate(students):
+                # Student s completes the first quizzes_per_module - 1 - s quizzes of each module
+                completed = q < quizzes_per_module - 1 - s
+                db.session.add(StudentQuiz(
+                    student_id=student.id, quiz_id=quiz.id,
+                    status='completed' if completed else 'uncompleted',
+                    score=50.0 + 10 * q + m if completed else None,
+                    end_time=datetime.utcnow() if completed else None
+                ))
+
+    # A module without quizzes
+    db.session.add(Module(name='Empty module', professor_id=professor.id))
+    db.session.commit()
+    return professor, students
+
+def test_module_aggregates(app):
+    professor, students = create_modules()
+
+    performance = aggregate_module_performance(student_id=students[0].id)
+    assert len(performance) == 4
+    first = next(data for data in performance.values() if data['module_name'] == 'Module 0')
+    assert first['assigned_count'] == 3
+    assert first['completed_count'] == 2
+    assert first['average_score'] == 55.0
+    assert round(first['completion_rate'], 2) == 66.67
+
+    overall = aggregate_module_performance(professor_id=professor.id)
+    first = next(data for data in overall.values() if data['module_name'] == 'Module 0')
+    assert first['quiz_count'] == 3
+    assert first['assigned_count'] == 6
+    assert first['completed_count'] == 3
+    assert first['student_count'] == 2
+    assert first['average_score'] == 160.0 / 3
+
+def test_module_views_query_count_is_independent_of_attempts(app, query_counter):
+    professor, students = create_modules(num_modules=6, quizzes_per_module=5)
+    client = app.test_client()
+
+    token = generate_token(students[0].id, 'student')
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/api/students/module-performance', headers=headers)
+
+    query_counter.clear()
+    response = client.get('/api/students/module-performance', headers=headers)
+    data = response.get_json()
+    # Principal + user lookup, the GROUP BY and the per-quiz scores
+    assert len(query_counter) <= 4
+    assert response.status_code == 200
+    assert data['total_modules'] == 6
+    assert all(module['total_quizzes'] == 5 for module in data['modules'])
+    assert all(module['completed_quizzes'] == 4 for module in data['modules'])
+    assert all(len(module['quiz_details']) == 4 for module in data['modules'])
+    # Sorted by average percentage, highest first
+    assert data['modules'][0]['module_name'] == 'Module 5'
+    assert data['modules'][0]['average_percentage'] == 70.0
+
+    token = generate_token(professor.id, 'professor')
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/api/professors/modules', headers=headers)
+
+    query_counter.clear()
+    data = client.get('/api/professors/modules', headers=headers).get_json()
+    assert len(query_counter) <= 2
+    assert len(data['modules']) == 7
+    statistics = {module['name']: module['statistics'] for module in data['modules']}
+    assert statistics['Empty module']['quiz_count'] == 0
+    assert statistics['Module 0']['assigned_count'] == 10
+    assert statistics['Module 0']['completed_count'] == 7
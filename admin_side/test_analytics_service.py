@@ -0,0 +1,107 @@
+# admin_side/test_analytics_service.py
+import threading
+from datetime import datetime
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_students
+from models.ProgressModel import KnowledgeLevel
+from models.AnalyticsModel import StudentAnalytics
+from services import analytics_service, ml_service
+from services.analytics_service import refresh_student_analytics
+from services.job_queue import JobQueue
+from utils.jwt_utils import generate_token
+
+def create_students_with_levels(levels):
+    """Create one student per (overall score, topic level) pair"""
+    professor = create_professor()
+    students = create_students(len(levels))
+    for student, (score, topic_level) in zip(students, levels):
+        if score is not None:
+            level = 'Low' if score < 0.5 else 'Normal' if score < 0.8 else 'High'
+            db.session.add(KnowledgeLevel(student_id=student.id, topic='OVERALL', score=score, level=level))
+            db.session.add(KnowledgeLevel(student_id=student.id, topic='SDLC', score=score, level=topic_level))
+    db.session.commit()
+    return professor, students
+
+def get_analytics(client, professor, query=''):
+    token = generate_token(professor.id, 'professor')
+    return client.get(f'/api/professors/analytics/students{query}', headers={'Authorization': f'Bearer {token}'})
+
+def test_analytics_reads_sorted_pages_from_the_snapshot(app):
+    professor, students = create_students_with_levels([(0.9, 'High'), (0.3, 'Low'), (0.6, 'Normal'), (None, None)])
+    client = app.test_client()
+
+    # Students without a snapshot get one on the first request
+    response = get_analytics(client, professor, '?sort=score&order=asc&page=1&per_page=2')
+    assert response.status_code == 200
+    data = response.get_json()
+
+    assert StudentAnalytics.query.count() == 4
+    assert data['total_students'] == 4
+    assert [s['overall_knowledge']['score'] for s in data['students']] == [0, 0.3]
+    assert data['overall_statistics']['students_by_level'] == {'high': 1, 'normal': 1, 'low': 1, 'no_data': 1}
+    assert data['topic_analytics']['SDLC'] == {
+        'total_assessments': 3, 'high_count': 1, 'normal_count': 1, 'low_count': 1, 'average_score': 0.6
+    }
+
+    # Default ordering is by level, strongest first, and returns everyone
+    data = get_analytics(client, professor).get_json()
+    assert [s['overall_knowledge']['level'] for s in data['students']] == ['High', 'Normal', 'Low', 'No Data']
+
+    assert get_analytics(client, professor, '?sort=password').status_code == 400
+
+def test_refresh_updates_a_single_student(app):
+    professor, students = create_students_with_levels([(0.3, 'Low'), (0.3, 'Low')])
+    refresh_student_analytics()
+    db.session.commit()
+
+    overall = KnowledgeLevel.query.filter_by(student_id=students[0].id, topic='OVERALL').first()
+    overall.score, overall.level = 0.95, 'High'
+    refresh_student_analytics([students[0].id])
+    db.session.commit()
+
+    assert db.session.get(StudentAnalytics, students[0].id).overall_level == 'High'
+    assert db.session.get(StudentAnalytics, students[1].id).overall_level == 'Low'
+
+def test_refresh_runs_after_the_last_knowledge_update(app, monkeypatch):
+    professor, (student,) = create_students_with_levels([(0.3, 'Low')])
+    attempts = []
+    for number in range(2):
+        quiz = create_quiz(professor, f'Quiz {number}')
+        attempt, = create_attempts(quiz, [student], status='completed', score=80.0, end_time=datetime(2025, 1, 1 + number))
+        attempts.append(attempt.id)
+    db.session.commit()
+    student_id = student.id
+
+    app.config.update(JOB_QUEUE_ASYNC=True, JOB_QUEUE_WORKERS=1)
+    jobs = JobQueue()
+    monkeypatch.setattr(ml_service, 'job_queue', jobs)
+    monkeypatch.setattr(analytics_service, 'job_queue', jobs)
+
+    order = []
+    second_submitted = threading.Event()
+    publish = ml_service.publish_knowledge_updated
+    refresh = analytics_service.refresh_student_analytics_job
+
+    def knowledge_updated(student_id):
+        order.append('knowledge')
+        # Hold the first update until the second quiz is submitted
+        second_submitted.wait(5)
+        publish(student_id)
+
+    def refreshed(student_id):
+        order.append('refresh')
+        refresh(student_id)
+
+    monkeypatch.setattr(ml_service, 'publish_knowledge_updated', knowledge_updated)
+    monkeypatch.setattr(analytics_service, 'refresh_student_analytics_job', refreshed)
+
+    ml_service.schedule_knowledge_update(student_id, attempts[0])
+    while not order:
+        threading.Event().wait(0.01)
+    ml_service.schedule_knowledge_update(student_id, attempts[1])
+    second_submitted.set()
+    jobs.join()
+
+    # The first update's refresh is queued behind the second update and folds in the second's
+    assert order == ['knowledge', 'knowledge', 'refresh']
+    assert db.session.get(StudentAnalytics, student_id) is not None
@@ -0,0 +1,58 @@
+# admin_side/test_assignment_service.py
+from app import db
+from conftest import create_professor, create_quiz, create_students
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from services.assignment_service import assign_quiz, unassign_quiz
+
+def create_quiz_and_students(num_students):
+    quiz = create_quiz(create_professor())
+    students = create_students(num_students)
+    db.session.commit()
+    return quiz, students
+
+def assigned_student_ids(quiz_id):
+    return {sq.student_id for sq in StudentQuiz.query.filter_by(quiz_id=quiz_id)}
+
+def test_assign_quiz_uses_a_constant_number_of_queries(app, query_counter):
+    quiz, students = create_quiz_and_students(300)
+    quiz_id = quiz.id
+    student_ids = {student.id for student in students}
+
+    query_counter.clear()
+    result = assign_quiz(quiz_id)
+    db.session.commit()
+
+    # Load students, load assignments, one multi-row insert
+    assert len(query_counter) <= 4
+    assert result['created'] == 300
+    assert assigned_student_ids(quiz_id) == student_ids
+    assert set(result['timings']) == {'load_students_ms', 'load_assignments_ms', 'delete_ms', 'insert_ms'}
+
+    # Assigning again is a no-op
+    assert assign_quiz(quiz_id)['created'] == 0
+
+def test_replace_keeps_completed_attempts(app):
+    quiz, students = create_quiz_and_students(5)
+    assign_quiz(quiz.id)
+    db.session.commit()
+
+    # Student 0 already took the quiz, student 1 saved an answer
+    completed = StudentQuiz.query.filter_by(quiz_id=quiz.id, student_id=students[0].id).first()
+    completed.status = 'completed'
+    in_progress = StudentQuiz.query.filter_by(quiz_id=quiz.id, student_id=students[1].id).first()
+    db.session.add(StudentAnswer(student_quiz_id=in_progress.id, question_id=1, selected_option=1))
+    db.session.commit()
+
+    result = assign_quiz(quiz.id, [students[2].id, students[3].id, 999999], replace=True)
+    db.session.commit()
+
+    assert result['created'] == 0
+    assert result['removed'] == 2
+    assert assigned_student_ids(quiz.id) == {students[0].id, students[2].id, students[3].id}
+    assert StudentAnswer.query.count() == 0
+
+    result = unassign_quiz(quiz.id)
+    db.session.commit()
+
+    assert result['removed'] == 2
+    assert assigned_student_ids(quiz.id) == {students[0].id}
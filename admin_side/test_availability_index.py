@@ -0,0 +1,87 @@
+# admin_side/test_availability_index.py
+import random
+from datetime import datetime, timedelta
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student
+from services.availability_index import AvailabilityIndex, open_quiz_ids, query_open_quiz_ids
+from utils.jwt_utils import generate_token
+from utils.timezone_utils import get_ist_datetime_for_db
+
+BASE = datetime(2026, 3, 1)
+
+def random_windows(rng, count):
+    windows = []
+    for quiz_id in range(count):
+        start = BASE + timedelta(hours=rng.randrange(0, 500))
+        end = start + timedelta(hours=rng.randrange(0, 100))
+        # Some windows are open on one side
+        if rng.random() < 0.1:
+            start = None
+        elif rng.random() < 0.1:
+            end = None
+        windows.append((quiz_id, start, end))
+    return windows
+
+def brute_force(windows, when):
+    return {quiz_id for quiz_id, start, end in windows
+            if (start is None or start <= when) and (end is None or when <= end)}
+
+def test_open_at_matches_brute_force():
+    rng = random.Random(7)
+    windows = random_windows(rng, 300)
+    index = AvailabilityIndex(windows)
+
+    for _ in range(200):
+        when = BASE + timedelta(minutes=rng.randrange(-600, 40000))
+        assert set(index.open_at(when)) == brute_force(windows, when)
+
+    # Window ends are inclusive
+    start, end = windows[0][1], windows[0][2]
+    for point in (start, end):
+        if point is not None:
+            assert index.is_open(0, point)
+
+def test_empty_and_unbounded_windows():
+    assert AvailabilityIndex([]).open_at(BASE) == []
+    index = AvailabilityIndex([(1, None, None), (2, BASE, BASE)])
+    assert sorted(index.open_at(BASE)) == [1, 2]
+    assert index.open_at(BASE + timedelta(seconds=1)) == [1]
+
+def create_assignments(windows):
+    professor = create_professor()
+    student = create_student()
+    quizzes = []
+    for start, end in windows:
+        quiz = create_quiz(professor, start_time=start, end_time=end)
+        create_attempts(quiz, [student])
+        quizzes.append(quiz)
+    db.session.commit()
+    return student, quizzes
+
+def test_index_and_database_agree_and_follow_edits(app):
+    now = get_ist_datetime_for_db()
+    student, quizzes = create_assignments([
+        (now - timedelta(hours=1), now + timedelta(hours=1)),
+        (now + timedelta(days=1), now + timedelta(days=2)),
+        (None, None),
+        (now - timedelta(days=2), now - timedelta(days=1)),
+    ])
+    expected = {quizzes[0].id, quizzes[2].id}
+    assert open_quiz_ids(student.id, now) == expected
+    assert query_open_quiz_ids(now, student.id) == expected
+
+    # Editing a window through the ORM drops the cached index
+    quizzes[1].start_time = now - timedelta(minutes=5)
+    db.session.commit()
+    assert open_quiz_ids(student.id, now) == expected | {quizzes[1].id}
+    assert query_open_quiz_ids(now, student.id) == expected | {quizzes[1].id}
+
+def test_student_listing_uses_the_ist_clock(app):
+    # Open in IST right now, but already closed by UTC wall-clock time
+    ist_now = get_ist_datetime_for_db()
+    student, quizzes = create_assignments([(ist_now - timedelta(minutes=30), ist_now + timedelta(minutes=30))])
+
+    token = generate_token(student.id, 'student')
+    data = app.test_client().get('/api/students/quizzes', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert data['quizzes'][0]['is_available'] is True
+    assert data['quizzes'][0]['can_start'] is True
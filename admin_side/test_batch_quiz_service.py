@@ -0,0 +1,131 @@
+# admin_side/test_batch_quiz_service.py
+import csv
+from datetime import datetime
+import pytest
+from app import db
+from conftest import create_professor, create_students
+from models.QuizModel import Quiz, Question, QuestionBankItem
+from models.ProgressModel import StudentQuiz, KnowledgeLevel
+from services import batch_quiz_service
+from services.batch_quiz_service import generate_cohort_quizzes, insert_quizzes, schedule_cohort_quizzes, select_cohort_questions
+from services.job_queue import batch_job_queue, job_queue
+from services.question_sampler import QuestionSampler
+from utils.jwt_utils import generate_token
+
+TOPICS = ('Loops', 'Arrays', 'Recursion')
+
+@pytest.fixture
+def question_pool(app, tmp_path):
+    path = tmp_path / 'pool.csv'
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['QID', 'Question Text', 'Answer 1', 'Answer 2', 'Answer 3', 'Answer 4',
+                         'Correct Answer', 'Question Weight', 'Topic'])
+        for topic in TOPICS:
+            for n in range(20):
+                writer.writerow([f'{topic}-{n}', f'{topic} question {n}', 'A', 'B', 'C', 'D', n % 4, 1 + n % 5, topic])
+    app.config['QUESTION_POOL_PATH'] = str(path)
+
+def create_cohort(count):
+    professor = create_professor()
+    students = create_students(count, intake_no='21')
+    # Only the first student has been assessed
+    db.session.add_all([
+        KnowledgeLevel(student_id=students[0].id, topic='Loops', score=0.2, level='Low'),
+        KnowledgeLevel(student_id=students[0].id, topic='Arrays', score=0.9, level='High')
+    ])
+    db.session.commit()
+    return professor, students
+
+def test_cohort_quizzes_are_saved_with_progress(app, question_pool, monkeypatch):
+    # Two transactions, saved within the same second
+    monkeypatch.setattr(batch_quiz_service, 'COHORT_SAVE_CHUNK_SIZE', 3)
+    professor, students = create_cohort(4)
+    student_ids = [student.id for student in students] + [9999]
+
+    job = schedule_cohort_quizzes(professor.id, student_ids, 'Practice', num_questions=10, seed=3)
+
+    assert job.status == 'finished'
+    assert job.progress == {'total': 4, 'selected': 4, 'saved': 4, 'skipped': 1}
+    # Cohort jobs run on their own queue but are polled like any other job
+    assert batch_job_queue.get(job.id) is job and job_queue.get(job.id) is None
+    response = app.test_client().get(f'/api/jobs/{job.id}', headers={'Authorization': f'Bearer {generate_token(professor.id, "professor")}'})
+    assert response.get_json()['job']['progress']['saved'] == 4
+
+    quizzes = Quiz.query.order_by(Quiz.id).all()
+    assert len(quizzes) == 4
+    assert {quiz.professor_id for quiz in quizzes} == {professor.id}
+    assert quizzes[0].description == 'Personalized quiz for Test Student'
+    assignments = StudentQuiz.query.all()
+    assert {(a.student_id, a.quiz_id) for a in assignments} == {(s.id, q.id) for s, q in zip(students, quizzes)}
+
+    for quiz in quizzes:
+        questions = Question.query.filter_by(quiz_id=quiz.id).all()
+        assert len(questions) == len({q.source_qid for q in questions}) == 10
+        assert all(q.bank_item_id is not None for q in questions)
+    # The weak topic gets the most questions, from the easy end
+    first = Question.query.filter_by(quiz_id=quizzes[0].id).all()
+    assert sum(q.topic == 'Loops' for q in first) > sum(q.topic == 'Arrays' for q in first)
+    assert db.session.query(QuestionBankItem).count() <= 60
+
+def test_statements_do_not_grow_with_the_cohort(app, question_pool, query_counter):
+    professor, students = create_cohort(30)
+    professor_id, student_ids = professor.id, [s.id for s in students]
+
+    del query_counter[:]
+    generate_cohort_quizzes(professor_id, student_ids[:5], 'Small', num_questions=5)
+    small = len(query_counter)
+
+    del query_counter[:]
+    generate_cohort_quizzes(professor_id, student_ids, 'Large', num_questions=5)
+    assert len(query_counter) == small
+    assert Quiz.query.filter_by(title='Large').count() == 30
+
+def test_parallel_selection_matches_in_process(app, monkeypatch):
+    questions = [{'QID': f'{topic}-{n}', 'Topic': topic, 'Question Weight': n} for topic in TOPICS for n in range(20)]
+    sampler = QuestionSampler(questions)
+    cohort_levels = {student_id: ({'Loops': 0.1 * (student_id % 10)} if student_id % 2 else {})
+                     for student_id in range(1, 41)}
+
+    in_process = select_cohort_questions(sampler, cohort_levels, 10, seed=11, workers=1)
+
+    monkeypatch.setattr(batch_quiz_service, 'PARALLEL_MIN_STUDENTS', 0)
+    monkeypatch.setattr(batch_quiz_service, 'COHORT_SELECT_CHUNK_SIZE', 7)
+    parallel = select_cohort_questions(sampler, cohort_levels, 10, seed=11, workers=2)
+
+    assert parallel == in_process
+    assert all(len(indices) == len(set(indices)) == 10 for indices in parallel.values())
+
+def test_batch_route_validates_num_questions(app, question_pool):
+    professor, students = create_cohort(2)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(professor.id, "professor")}'}
+    body = {'title': 'Practice', 'student_ids': [student.id for student in students]}
+
+    for num_questions in (0, -3, 'many', 10_000, None, True):
+        response = client.post('/api/quizzes/generate-batch', headers=headers, json={**body, 'num_questions': num_questions})
+        assert response.status_code == 400, num_questions
+
+    response = client.post('/api/quizzes/generate-batch', headers=headers, json={**body, 'num_questions': '5'})
+    assert response.status_code == 202
+    assert Question.query.count() == 10
+
+@pytest.mark.parametrize('returning', [True, False])
+def test_inserted_quiz_ids_ignore_concurrent_quizzes(app, returning):
+    professor, students = create_cohort(1)
+    created_at = datetime(2026, 3, 1, 9, 0, 0)
+    row = {'title': 'Practice', 'professor_id': professor.id, 'created_at': created_at}
+
+    # Another request's quiz with the same professor, title and second
+    other = Quiz(**row)
+    db.session.add(other)
+    db.session.flush()
+
+    rows = [{**row, 'description': f'Quiz {n}'} for n in range(3)]
+    quiz_ids = insert_quizzes(rows, returning=returning)
+    db.session.commit()
+
+    assert other.id not in quiz_ids
+    assert [db.session.get(Quiz, quiz_id).description for quiz_id in quiz_ids] == ['Quiz 0', 'Quiz 1', 'Quiz 2']
+    assert Quiz.query.filter_by(title='Practice').count() == 4
+
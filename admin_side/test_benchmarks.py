@@ -0,0 +1,54 @@
+# admin_side/test_benchmarks.py
+from app import db
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from models.QuizModel import Question
+from utils.jwt_utils import generate_token
+from benchmarks.data import generate_dataset
+from benchmarks.load_test import LoadTestContext, compare, run_scenario
+
+def build_context(dataset):
+    quiz_questions = {}
+    for question_id, quiz_id in db.session.query(Question.id, Question.quiz_id).order_by(Question.id):
+        quiz_questions.setdefault(quiz_id, []).append(question_id)
+    return LoadTestContext(
+        dataset,
+        generate_token(dataset.professor_id, 'professor'),
+        {student_id: generate_token(student_id, 'student') for student_id in dataset.student_ids},
+        quiz_questions
+    )
+
+def test_generate_dataset(app):
+    dataset = generate_dataset(students=10, modules=2, quizzes=4, questions_per_quiz=3, history=0.5, seed=1)
+
+    assert len(dataset.student_ids) == 10 and len(dataset.quiz_ids) == 4
+    assert StudentQuiz.query.count() == 40
+    completed = StudentQuiz.query.filter_by(status='completed').count()
+    assert completed + sum(len(quiz_ids) for quiz_ids in dataset.pending.values()) == 40
+    assert StudentAnswer.query.count() == dataset.answers == completed * 3
+
+def test_scenarios_report_latency_and_queries(app):
+    dataset = generate_dataset(students=5, modules=2, quizzes=3, questions_per_quiz=3, history=0.3, seed=2)
+    context = build_context(dataset)
+
+    for name in ('submit', 'results', 'modules'):
+        summary = run_scenario(app, context, name, requests=4, concurrency=1, warmup=1)
+        assert summary['errors'] == 0, summary.get('first_error')
+        assert summary['requests'] == 4
+        assert summary['p50_ms'] <= summary['p99_ms'] <= summary['max_ms']
+        # Server-Timing was parsed; cached responses may issue no queries
+        assert summary['mean_queries'] is not None
+
+def test_compare_flags_regressions_over_budget():
+    scenario = {'errors': 0, 'p50_ms': 10.0, 'p90_ms': 20.0, 'p99_ms': 40.0, 'mean_queries': 5.0, 'max_queries': 5}
+    baseline = {'budget': {'latency': 0.5, 'queries': 0.1}, 'scenarios': {'results': scenario}}
+
+    within = {**scenario, 'p50_ms': 14.0, 'mean_queries': 5.4}
+    assert compare({'scenarios': {'results': within}}, baseline) == []
+
+    slower = {**scenario, 'p90_ms': 40.0, 'max_queries': 7}
+    regressions = compare({'scenarios': {'results': slower}}, baseline)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('results: p90_ms')
+
+    # A looser budget from the command line wins over the recorded one
+    assert compare({'scenarios': {'results': slower}}, baseline, {'latency': 2.0, 'queries': 0.5}) == []
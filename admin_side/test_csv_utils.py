@@ -0,0 +1,58 @@
+# admin_side/test_csv_utils.py
+import csv
+import os
+import pytest
+from utils.csv_utils import QuestionPool, get_question_by_id, get_question_pool, parse_question_weight
+
+FIELDS = ['QID', 'Topic', 'Question', 'Question Weight']
+
+def write_pool(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+@pytest.fixture
+def pool_path(app, tmp_path):
+    path = tmp_path / 'pool.csv'
+    write_pool(path, [
+        {'QID': 'L1', 'Topic': 'Loops', 'Question': 'First loop', 'Question Weight': 3},
+        {'QID': 'A1', 'Topic': 'Arrays', 'Question': 'First array', 'Question Weight': 2},
+        {'QID': 'L2', 'Topic': 'Loops', 'Question': 'Second loop', 'Question Weight': 1}
+    ])
+    app.config['QUESTION_POOL_PATH'] = str(path)
+    return path
+
+def test_indexes():
+    pool = QuestionPool([
+        {'QID': 'L1', 'Topic': 'Loops', 'Question Weight': 3},
+        {'QID': 'L2', 'Topic': 'Loops', 'Question Weight': 'not a number'},
+        {'QID': 'L3', 'Topic': 'Loops', 'Question Weight': 2},
+        {'QID': 'L1', 'Topic': 'Arrays', 'Question Weight': 1},
+        {'QID': 'X1'}
+    ])
+
+    assert len(pool) == 5
+    # The first question with a QID wins, like the old linear scan
+    assert pool.get('L1')['Topic'] == 'Loops'
+    assert pool.get('missing') is None
+    assert pool.topics == ['Loops', 'Arrays', 'Unknown']
+    assert [q['QID'] for q in pool.topic_questions('Loops')] == ['L1', 'L2', 'L3']
+    assert pool.topic_questions('Recursion') == []
+    # Unparseable weights count as 1.0
+    assert [parse_question_weight(q) for q in pool.topic_questions('Loops')] == [3.0, 1.0, 2.0]
+
+def test_pool_is_shared_until_the_file_changes(pool_path):
+    pool = get_question_pool()
+    assert get_question_pool() is pool
+    assert [q['QID'] for q in pool.topic_questions('Loops')] == ['L1', 'L2']
+
+    write_pool(pool_path, [{'QID': 'R1', 'Topic': 'Recursion', 'Question': 'Base case', 'Question Weight': 1}])
+    stat = os.stat(pool_path)
+    os.utime(pool_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+    reloaded = get_question_pool()
+    assert reloaded is not pool
+    assert reloaded.topics == ['Recursion']
+    assert get_question_by_id('R1')['Question'] == 'Base case'
+    assert get_question_by_id('L1') is None
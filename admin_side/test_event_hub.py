@@ -0,0 +1,155 @@
+# admin_side/test_event_hub.py
+import json
+from datetime import timedelta
+import pytest
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_students
+from models.ProgressModel import StudentQuiz
+from services.event_hub import EventHub, SubscriptionLimitError, event_hub, publish_after_commit
+from services.quiz_events import publish_quiz_transitions
+from services.quiz_service import score_quiz
+from utils.jwt_utils import generate_token
+from utils.timezone_utils import get_ist_datetime_for_db
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+def parse_frame(frame):
+    fields = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+@pytest.fixture
+def hub(app):
+    """The shared hub, emptied by the app fixture"""
+    return event_hub
+
+def test_publish_reaches_users_and_types():
+    hub = EventHub()
+    student, _ = hub.subscribe(1, 'student')
+    other_student, _ = hub.subscribe(2, 'student')
+    professor, _ = hub.subscribe(10, 'professor')
+
+    hub.publish('quiz.scored', {'quiz_id': 5}, user_ids=[1, 10])
+    hub.publish('knowledge.updated', {'student_id': 1}, user_type='professor')
+    hub.publish('notice', {})
+
+    assert [event.type for event in drain(student)] == ['quiz.scored', 'notice']
+    assert [event.type for event in drain(other_student)] == ['notice']
+    assert [event.type for event in drain(professor)] == ['quiz.scored', 'knowledge.updated', 'notice']
+
+    event, data = parse_frame(hub.publish('quiz.closed', {'quiz_id': 5}, user_ids=[2]).frame)
+    assert event == 'quiz.closed' and data['quiz_id'] == 5
+
+def test_connection_limits():
+    hub = EventHub(max_subscribers=3, max_per_user=2)
+    first, _ = hub.subscribe(1, 'student')
+    hub.subscribe(1, 'student')
+    with pytest.raises(SubscriptionLimitError) as error:
+        hub.subscribe(1, 'student')
+    assert error.value.status_code == 429
+
+    hub.subscribe(2, 'student')
+    with pytest.raises(SubscriptionLimitError) as error:
+        hub.subscribe(3, 'student')
+    assert error.value.status_code == 503
+
+    hub.unsubscribe(first)
+    hub.unsubscribe(first)
+    hub.subscribe(3, 'student')
+    assert hub.stats()['subscribers'] == 3 and hub.stats()['rejected'] == 2
+
+def test_replay_after_last_event_id_and_drop_oldest():
+    hub = EventHub(replay_size=3)
+    for quiz_id in range(5):
+        hub.publish('assignment.added', {'quiz_id': quiz_id}, user_ids=[1 if quiz_id % 2 else 2])
+
+    # Only retained events after the id, and only this user's
+    _, missed = hub.subscribe(1, 'student', last_event_id=2)
+    assert [event.data['quiz_id'] for event in missed] == [3]
+
+    slow, _ = hub.subscribe(1, 'student', max_queue=2)
+    for quiz_id in range(4):
+        hub.publish('assignment.added', {'quiz_id': quiz_id}, user_ids=[1])
+    assert [event.data['quiz_id'] for event in drain(slow)] == [2, 3]
+    assert slow.dropped == 2
+
+def test_events_are_published_only_after_commit(hub):
+    subscription, _ = hub.subscribe(1, 'student')
+
+    StudentQuiz.query.count()
+    publish_after_commit(db.session(), 'assignment.added', {'quiz_id': 1}, user_ids=[1])
+    db.session.rollback()
+    db.session.commit()
+    assert drain(subscription) == []
+
+    publish_after_commit(db.session(), 'assignment.added', {'quiz_id': 2}, user_ids=[1])
+    assert drain(subscription) == []
+    db.session.commit()
+    assert [event.data['quiz_id'] for event in drain(subscription)] == [2]
+
+def create_assigned_quiz(start_time=None, end_time=None, students=1):
+    professor = create_professor()
+    quiz = create_quiz(professor, start_time=start_time, end_time=end_time)
+    assignments = create_attempts(quiz, create_students(students))
+    db.session.commit()
+    return professor, quiz, assignments
+
+def test_stream_delivers_scoring_event(app, hub):
+    professor, quiz, (student_quiz,) = create_assigned_quiz()
+    client = app.test_client()
+
+    response = client.get('/api/events', buffered=False,
+                          headers={'Authorization': f'Bearer {generate_token(student_quiz.student_id, "student")}'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    professor_stream, _ = hub.subscribe(professor.id, 'professor')
+    score_quiz(student_quiz)
+
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry: ')
+    event, data = parse_frame(next(chunks).decode())
+    assert event == 'quiz.scored'
+    assert data['quiz_id'] == quiz.id and data['student_id'] == student_quiz.student_id
+    assert 'quiz.scored' in [event.type for event in drain(professor_stream)]
+
+    # Idle streams get heartbeats; closing the response unsubscribes
+    assert b': heartbeat\n\n' in [next(chunks) for _ in range(3)]
+    response.close()
+    assert hub.stats()['users'] == 1
+
+def test_stream_authentication_and_limits(app, hub):
+    _, _, (student_quiz,) = create_assigned_quiz()
+    client = app.test_client()
+    assert client.get('/api/events').status_code == 401
+
+    # EventSource cannot send headers, so the token may be a query parameter
+    token = generate_token(student_quiz.student_id, 'student')
+    streams = [client.get(f'/api/events?token={token}', buffered=False) for _ in range(hub.max_per_user)]
+    assert all(stream.status_code == 200 for stream in streams)
+    assert client.get(f'/api/events?token={token}').status_code == 429
+    for stream in streams:
+        stream.close()
+
+def test_quiz_transitions_reach_uncompleted_assignments(app, hub):
+    now = get_ist_datetime_for_db()
+    _, quiz, assignments = create_assigned_quiz(start_time=now - timedelta(seconds=5), end_time=now + timedelta(hours=1), students=2)
+    assignments[1].status = 'completed'
+    db.session.commit()
+    pending, _ = hub.subscribe(assignments[0].student_id, 'student')
+    completed, _ = hub.subscribe(assignments[1].student_id, 'student')
+
+    assert publish_quiz_transitions(now - timedelta(seconds=10), now) == 1
+    assert [(event.type, event.data['quiz_id']) for event in drain(pending)] == [('quiz.opened', quiz.id)]
+    assert drain(completed) == []
+
+    later = now + timedelta(hours=2)
+    assert publish_quiz_transitions(now, later) == 1
+    assert [event.type for event in drain(pending)] == ['quiz.closed']
+    assert publish_quiz_transitions(later, later + timedelta(minutes=1)) == 0
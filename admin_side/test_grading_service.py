@@ -0,0 +1,133 @@
+# admin_side/test_grading_service.py
+import pytest
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student
+from models.QuizModel import Question
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from services.grading_service import GradeResult, grade_answers, grade_stored_answers, load_answer_key, upsert_answers
+from services.quiz_service import AttemptAlreadyCompletedError, score_quiz
+from utils.jwt_utils import generate_token
+
+def create_graded_quiz(num_questions=10):
+    professor = create_professor()
+    student = create_student()
+    quiz = create_quiz(professor, 'Loops')
+    other_quiz = create_quiz(professor, 'Other')
+
+    questions = []
+    for n in range(num_questions):
+        question = Question(quiz_id=quiz.id, text=f'Question {n}', option_1='A', option_2='B', option_3='C',
+                            option_4='D', correct_answer=n % 4, weight=1.0 + n % 3, topic='Loops')
+        db.session.add(question)
+        questions.append(question)
+    foreign_question = Question(quiz_id=other_quiz.id, text='Elsewhere', option_1='A', option_2='B',
+                                option_3='C', option_4='D', correct_answer=0)
+    db.session.add(foreign_question)
+
+    student_quiz, = create_attempts(quiz, [student])
+    db.session.commit()
+    return student, quiz, questions, foreign_question, student_quiz
+
+def test_grade_answers_matches_the_answer_key(app):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz()
+    answer_key = load_answer_key(quiz.id)
+    assert len(answer_key) == 10
+
+    answers = [{'question_id': q.id, 'selected_option': 0} for q in questions[:6]]
+    answers.append({'question_id': questions[6].id, 'selected_option': None})
+    answers.append({'question_id': foreign_question.id, 'selected_option': 0})
+    # The last answer per question wins
+    answers.append({'question_id': questions[1].id, 'selected_option': 1})
+
+    result = grade_answers(answer_key, student_quiz.id, answers)
+    assert len(result.rows) == 7
+    assert [row['is_correct'] for row in result.rows] == [True, True, False, False, True, False, False]
+    # Weights cycle 1, 2, 3: correct questions 0, 1, 4 earn 1 + 2 + 2
+    assert result.total_points == 5.0
+    assert result.max_points == 1 + 2 + 3 + 1 + 2 + 3 + 1
+    assert result.score == 5.0 / 13 * 100
+
+def test_options_are_normalized_before_grading(app):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz(num_questions=8)
+    answer_key = load_answer_key(quiz.id)
+
+    # Correct answers cycle 0, 1, 2, 3
+    options = [0.0, 1.5, '2', True, 2 ** 70, -2 ** 70, 2.0, 3]
+    answers = [{'question_id': q.id, 'selected_option': option} for q, option in zip(questions, options)]
+
+    result = grade_answers(answer_key, student_quiz.id, answers)
+    assert [row['is_correct'] for row in result.rows] == [True, False, False, False, False, False, True, True]
+    assert [row['selected_option'] for row in result.rows] == [0, None, None, None, None, None, 2, 3]
+
+def test_out_of_range_options_are_graded_wrong_not_rejected(app):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz(num_questions=3)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(student.id, "student")}'}
+
+    # Written by hand: the JSON encoder refuses these integers, but clients can still send them
+    body = ('{"answers": [{"question_id": %d, "selected_option": 0.0}, '
+            '{"question_id": %d, "selected_option": 18446744073709551615}, '
+            '{"question_id": %d, "selected_option": 100000000000000000000000000000}]}'
+            % (questions[0].id, questions[1].id, questions[2].id))
+    response = client.post(f'/api/students/quizzes/{quiz.id}/submit', headers=headers, data=body,
+                           content_type='application/json')
+    assert response.status_code == 200
+    # Only question 0 (weight 1 of 1 + 2 + 3) is right
+    data = response.get_json()
+    assert (data['total_points'], data['max_points']) == (1, 6)
+
+def test_upsert_updates_saved_answers(app):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz(num_questions=3)
+    answer_key = load_answer_key(quiz.id)
+
+    upsert_answers(grade_answers(answer_key, student_quiz.id, [{'question_id': questions[0].id, 'selected_option': 2}]).rows)
+    db.session.commit()
+    first_id = StudentAnswer.query.one().id
+
+    answers = [{'question_id': q.id, 'selected_option': 0} for q in questions]
+    upsert_answers(grade_answers(answer_key, student_quiz.id, answers).rows)
+    db.session.commit()
+
+    saved = StudentAnswer.query.order_by(StudentAnswer.question_id).all()
+    assert len(saved) == 3
+    assert saved[0].id == first_id
+    assert saved[0].selected_option == 0 and saved[0].is_correct is True
+
+    assert grade_stored_answers(student_quiz.id).total_points == 1.0
+
+def test_submit_is_a_constant_number_of_statements(app, query_counter):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz(num_questions=40)
+    quiz_id = quiz.id
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(student.id, "student")}'}
+    client.get('/api/students/quizzes', headers=headers)  # Warm the token cache
+
+    answers = [{'question_id': q.id, 'selected_option': q.correct_answer if i % 2 else 3} for i, q in enumerate(questions)]
+    query_counter.clear()
+    response = client.post(f'/api/students/quizzes/{quiz_id}/submit', headers=headers, json={'answers': answers})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['score'] == data['total_points'] / data['max_points'] * 100
+
+    # Attempt, quiz, answer key, answer upsert and score update; the knowledge update job runs after
+    scored = next(i for i, s in enumerate(query_counter) if s.startswith('UPDATE student_quizzes'))
+    assert scored + 1 <= 5
+    assert len([s for s in query_counter[:scored] if 'student_answers' in s]) == 1
+    assert StudentAnswer.query.count() == 40
+
+    # Grading the saved answers gives the same result
+    db.session.expire_all()
+    assert grade_stored_answers(student_quiz.id).score == data['score']
+
+def test_attempt_is_completed_and_applied_once(app):
+    student, quiz, questions, foreign_question, student_quiz = create_graded_quiz(num_questions=3)
+
+    # A second submission that read the attempt while it was still uncompleted
+    # neither overwrites the score nor schedules another knowledge update
+    score, job = score_quiz(student_quiz.id)
+    assert job is not None
+    with pytest.raises(AttemptAlreadyCompletedError):
+        score_quiz(student_quiz.id, grade=GradeResult([], 0.0, 1.0))
+
+    db.session.expire_all()
+    assert StudentQuiz.query.get(student_quiz.id).score == score
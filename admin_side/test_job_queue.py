@@ -0,0 +1,107 @@
+# admin_side/test_job_queue.py
+import threading
+from services.job_queue import JobQueue, report_progress
+
+def merge_items(queued_payload, payload):
+    queued_payload['items'].extend(payload['items'])
+
+def test_queued_jobs_for_the_same_key_are_coalesced(app):
+    app.config['JOB_QUEUE_ASYNC'] = True
+    jobs = JobQueue()
+    release = threading.Event()
+    processed = []
+
+    def blocking_job():
+        release.wait(5)
+
+    def record(items):
+        processed.append(list(items))
+
+    # Keep the worker for this key busy so the next submissions stay queued
+    running = jobs.submit('block', 'student-1', blocking_job, {})
+    first = jobs.submit('record', 'student-1', record, {'items': [1]}, merge=merge_items)
+    second = jobs.submit('record', 'student-1', record, {'items': [2]}, merge=merge_items)
+    release.set()
+    jobs.join()
+
+    assert second is first
+    assert first.coalesced == 1
+    assert processed == [[1, 2]]
+    assert running.status == 'finished'
+    assert jobs.get(first.id).status == 'finished'
+    assert jobs.stats()['coalesced'] == 1
+
+def test_failed_jobs_report_their_error(app):
+    jobs = JobQueue()
+
+    def failing_job():
+        raise ValueError('boom')
+
+    # TestConfig runs jobs synchronously
+    job = jobs.submit('fail', 'student-1', failing_job, {})
+
+    assert job.status == 'failed'
+    assert job.error == 'boom'
+
+def test_failed_jobs_are_retried(app):
+    jobs = JobQueue()
+    calls = []
+
+    def flaky_job():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ValueError('try again')
+
+    job = jobs.submit('flaky', 'student-1', flaky_job, {}, retries=2)
+    assert job.status == 'finished' and job.attempts == 3
+
+    calls.clear()
+    job = jobs.submit('flaky', 'student-1', flaky_job, {}, retries=1)
+    assert job.status == 'failed' and job.attempts == 2 and job.error == 'try again'
+    assert jobs.stats()['retried'] == 3
+
+def test_unfinished_jobs_do_not_stop_eviction(app):
+    app.config['JOB_QUEUE_ASYNC'] = True
+    jobs = JobQueue(max_jobs=3)
+    release = threading.Event()
+    running = jobs.submit('block', 'student-1', lambda: release.wait(5), {})
+
+    # While the oldest job keeps running, later jobs finish and the oldest of those are forgotten
+    app.config['JOB_QUEUE_ASYNC'] = False
+    finished = [jobs.submit('noop', 'student-2', lambda: None, {}) for _ in range(10)]
+
+    assert jobs.stats()['tracked_jobs'] == 3
+    assert jobs.get(running.id) is running
+    assert [jobs.get(job.id) for job in finished[-2:]] == finished[-2:]
+    release.set()
+    jobs.join()
+
+def test_jobs_report_progress(app):
+    jobs = JobQueue()
+
+    def counting_job(total):
+        for done in range(1, total + 1):
+            report_progress(done=done, total=total)
+
+    job = jobs.submit('count', 'professor-1', counting_job, {'total': 3})
+
+    assert job.to_dict()['progress'] == {'done': 3, 'total': 3}
+    # Outside a job there is nothing to update
+    report_progress(done=1)
+
+def test_queues_size_their_own_workers(app):
+    app.config.update(JOB_QUEUE_ASYNC=True, JOB_QUEUE_WORKERS=3, BATCH_JOBS=1)
+    shared = JobQueue()
+    batch = JobQueue(workers_setting='BATCH_JOBS', default_workers=2, name='batch')
+    release = threading.Event()
+
+    # A long batch job does not hold up the shared queue's jobs
+    long_job = batch.submit('cohort', 'cohort-1', release.wait, {'timeout': 5})
+    quick = shared.submit('record', 'cohort-1', lambda: None, {})
+    shared.join()
+
+    assert quick.status == 'finished' and not long_job.done
+    assert shared.stats()['workers'] == 3 and batch.stats()['workers'] == 1
+    release.set()
+    batch.join()
+    assert long_job.status == 'finished'
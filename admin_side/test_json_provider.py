@@ -0,0 +1,75 @@
+# admin_side/test_json_provider.py
+import gzip
+import json
+from datetime import date, datetime
+import numpy as np
+from flask import jsonify, request
+from utils.json_provider import OrjsonJSONProvider, StdlibJSONProvider
+
+PAYLOAD = {
+    'answered_at': datetime(2026, 3, 1, 9, 30, 15, 250000),
+    'due': date(2026, 3, 8),
+    'score': np.float64(87.5),
+    'counts': np.array([1, 2, 3]),
+    'by_quiz': {2: 'b', 1: 'a'},
+    'missing': None
+}
+
+def test_providers_serialize_the_same_values(app):
+    expected = {
+        'answered_at': '2026-03-01T09:30:15.250000',
+        'due': '2026-03-08',
+        'score': 87.5,
+        'counts': [1, 2, 3],
+        'by_quiz': {'1': 'a', '2': 'b'},
+        'missing': None
+    }
+    for provider_class in (OrjsonJSONProvider, StdlibJSONProvider):
+        provider = provider_class(app)
+        assert json.loads(provider.dumps(PAYLOAD)) == expected
+        # Keys stay sorted, as with Flask's default provider
+        assert provider.dumps({'b': 1, 'a': 2}).replace(' ', '') == '{"a":2,"b":1}'
+
+def test_orjson_provider_is_installed(app):
+    assert isinstance(app.json, OrjsonJSONProvider)
+    response = app.json.response(PAYLOAD)
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['answered_at'] == '2026-03-01T09:30:15.250000'
+
+def register_routes(app):
+    @app.route('/test/large')
+    def large():
+        response = jsonify({'rows': [{'id': n, 'text': 'answer ' * 5} for n in range(200)]})
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route('/test/small')
+    def small():
+        return jsonify({'ok': True})
+
+def test_large_responses_are_gzipped_when_accepted(app):
+    register_routes(app)
+    client = app.test_client()
+
+    plain = client.get('/test/large')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    compressed = client.get('/test/large', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert int(compressed.headers['Content-Length']) < int(plain.headers['Content-Length']) // 5
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+
+    # The ETag of the compressed body is weak, and still revalidates
+    etag = compressed.headers['ETag']
+    assert etag.startswith('W/')
+    revalidated = client.get('/test/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+    small = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+def test_compression_can_be_refused(app):
+    register_routes(app)
+    response = app.test_client().get('/test/large', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,57 @@
+# admin_side/test_jwt_utils.py
+import time
+from app import db
+from conftest import create_student
+from utils.jwt_utils import generate_token, principal_cache
+
+def get_job(client, token):
+    # The job status route only needs the caller's id and type
+    return client.get('/api/jobs/missing', headers={'Authorization': f'Bearer {token}'})
+
+def test_cached_principal_skips_the_user_query(app, query_counter):
+    student = create_student()
+    db.session.commit()
+    token = generate_token(student.id, 'student')
+    client = app.test_client()
+
+    query_counter.clear()
+    assert get_job(client, token).status_code == 404
+    assert len(query_counter) == 1
+
+    query_counter.clear()
+    hits_before = principal_cache.stats()['hits']
+    assert get_job(client, token).status_code == 404
+    assert len(query_counter) == 0
+    assert principal_cache.stats()['hits'] == hits_before + 1
+
+def test_profile_changes_and_deletion_invalidate_the_cache(app):
+    student = create_student()
+    db.session.commit()
+    token = generate_token(student.id, 'student')
+    client = app.test_client()
+
+    get_job(client, token)
+    assert principal_cache.stats()['size'] == 1
+
+    student.first_name = 'Renamed'
+    db.session.commit()
+    assert principal_cache.stats()['size'] == 0
+
+    get_job(client, token)
+    db.session.delete(student)
+    db.session.commit()
+
+    response = get_job(client, token)
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'User not found'
+
+def test_entries_do_not_outlive_the_token(app):
+    student = create_student()
+    db.session.commit()
+    token = generate_token(student.id, 'student')
+
+    from utils.jwt_utils import Principal
+    principal_cache.put(token, Principal(student.id, 'student'), time.time() - 1, max_size=10)
+
+    assert principal_cache.get(token) is None
+    assert principal_cache.stats()['expired'] == 1
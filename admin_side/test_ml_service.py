@@ -0,0 +1,254 @@
+# admin_side/test_ml_service.py
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student, create_students
+from models.QuizModel import Question
+from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel, TopicKnowledgeState
+from services import ml_service
+from services.model_registry import ModelVersion
+from services.ml_service import (
+    determine_knowledge_levels_with_model, find_unreconciled_students, get_completed_quiz_stats,
+    predict_knowledge_levels, reconcile_knowledge_levels, update_knowledge_levels, update_knowledge_levels_incremental
+)
+
+TOPICS = ['SDLC', 'Agile', 'OSI Model']
+
+def create_student_with_history(num_quizzes, questions_per_quiz=15, student_number=1, spacing=timedelta(days=1)):
+    """Create a student with completed quizzes, one day apart by default"""
+    professor = create_professor(student_number)
+    student = create_student(student_number)
+
+    latest = datetime(2025, 1, 31, 12, 0)
+    for quiz_number in range(num_quizzes):
+        quiz = create_quiz(professor, f'Quiz {quiz_number}')
+        student_quiz, = create_attempts(quiz, [student], status='completed', score=50.0,
+                                        end_time=latest - spacing * quiz_number)
+
+        for question_number in range(questions_per_quiz):
+            question = Question(
+                quiz_id=quiz.id,
+                text=f'Question {question_number}',
+                option_1='A', option_2='B', option_3='C', option_4='D',
+                correct_answer=0,
+                weight=1.0 + question_number % 3,
+                topic=TOPICS[question_number % len(TOPICS)]
+            )
+            db.session.add(question)
+            db.session.flush()
+
+            db.session.add(StudentAnswer(
+                student_quiz_id=student_quiz.id,
+                question_id=question.id,
+                selected_option=0,
+                is_correct=(question_number + quiz_number) % 2 == 0
+            ))
+
+    db.session.commit()
+    return student
+
+def test_update_knowledge_levels_query_count_is_constant(app, query_counter):
+    student = create_student_with_history(num_quizzes=50)
+
+    query_counter.clear()
+    update_knowledge_levels(student.id)
+    first_run = len(query_counter)
+
+    # The first run inserts every record, later runs update them in bulk
+    query_counter.clear()
+    update_knowledge_levels(student.id)
+    second_run = len(query_counter)
+
+    # 50 quizzes x 15 questions used to cost ~800 queries
+    assert first_run <= 6
+    assert second_run <= 6
+
+def test_update_knowledge_levels_scores(app):
+    student = create_student_with_history(num_quizzes=1, questions_per_quiz=6)
+
+    update_knowledge_levels(student.id)
+
+    levels = {kl.topic: kl for kl in KnowledgeLevel.query.filter_by(student_id=student.id)}
+    assert set(levels) == set(TOPICS) | {'OVERALL'}
+
+    # Questions 0 and 3 are SDLC (weights 1 and 1), only question 0 is correct
+    assert levels['SDLC'].score == 0.5
+    # Questions 1 and 4 are Agile (weights 2 and 2), only question 4 is correct
+    assert levels['Agile'].score == 0.5
+    # Questions 2 and 5 are OSI Model (weights 3 and 3), only question 2 is correct
+    assert levels['OSI Model'].score == 0.5
+    assert levels['OVERALL'].score == 0.5
+    assert levels['OVERALL'].level == 'Normal'
+
+    # A second update blends the stored score with the new one
+    update_knowledge_levels(student.id)
+    assert KnowledgeLevel.query.filter_by(student_id=student.id).count() == len(TOPICS) + 1
+
+def knowledge_scores(student_id):
+    return {kl.topic: kl.score for kl in KnowledgeLevel.query.filter_by(student_id=student_id)}
+
+def test_incremental_update_matches_full_recomputation(app):
+    # Irregular spacing so the decay uses fractional days
+    spacing = timedelta(days=1, hours=7, minutes=13)
+    full = create_student_with_history(num_quizzes=12, student_number=1, spacing=spacing)
+    incremental = create_student_with_history(num_quizzes=12, student_number=2, spacing=spacing)
+
+    # Replay both histories oldest quiz first, as if each quiz was just submitted
+    histories = {}
+    for student in (full, incremental):
+        quizzes = StudentQuiz.query.filter_by(student_id=student.id).order_by(StudentQuiz.end_time).all()
+        for student_quiz in quizzes:
+            student_quiz.status = 'uncompleted'
+        histories[student.id] = [student_quiz.id for student_quiz in quizzes]
+    db.session.commit()
+
+    for full_quiz_id, incremental_quiz_id in zip(histories[full.id], histories[incremental.id]):
+        db.session.get(StudentQuiz, full_quiz_id).status = 'completed'
+        db.session.get(StudentQuiz, incremental_quiz_id).status = 'completed'
+        db.session.commit()
+
+        update_knowledge_levels(full.id)
+        update_knowledge_levels_incremental(incremental.id, [incremental_quiz_id])
+
+        expected = knowledge_scores(full.id)
+        actual = knowledge_scores(incremental.id)
+        assert set(actual) == set(expected)
+        for topic, score in expected.items():
+            assert actual[topic] == pytest.approx(score, rel=1e-9, abs=1e-12)
+
+    assert TopicKnowledgeState.query.filter_by(student_id=incremental.id).count() == len(TOPICS)
+
+def test_incremental_update_rebuilds_missing_running_sums(app):
+    # History recorded before the running sums existed
+    full = create_student_with_history(num_quizzes=5, student_number=1)
+    incremental = create_student_with_history(num_quizzes=5, student_number=2)
+    latest_quiz = StudentQuiz.query.filter_by(student_id=incremental.id).order_by(StudentQuiz.end_time.desc()).first()
+
+    update_knowledge_levels(full.id)
+    update_knowledge_levels_incremental(incremental.id, [latest_quiz.id])
+
+    expected = knowledge_scores(full.id)
+    actual = knowledge_scores(incremental.id)
+    for topic, score in expected.items():
+        assert actual[topic] == pytest.approx(score)
+    assert TopicKnowledgeState.query.filter_by(student_id=incremental.id).count() == len(TOPICS)
+
+def test_incremental_update_rebuilds_when_an_attempt_was_never_applied(app):
+    full = create_student_with_history(num_quizzes=6, student_number=1)
+    incremental = create_student_with_history(num_quizzes=6, student_number=2)
+    quizzes = StudentQuiz.query.filter_by(student_id=incremental.id).order_by(StudentQuiz.end_time).all()
+    for student_quiz in quizzes[-2:]:
+        student_quiz.status = 'uncompleted'
+    db.session.commit()
+    update_knowledge_levels_incremental(incremental.id, [quizzes[-3].id])
+    assert {state.applied_attempts for state in TopicKnowledgeState.query.filter_by(student_id=incremental.id)} == {4}
+
+    # The update for the fifth attempt was lost; the sixth one notices and rebuilds
+    quizzes[-2].status = 'completed'
+    quizzes[-1].status = 'completed'
+    db.session.commit()
+    update_knowledge_levels_incremental(incremental.id, [quizzes[-1].id])
+
+    update_knowledge_levels(full.id)
+    expected = knowledge_scores(full.id)
+    actual = knowledge_scores(incremental.id)
+    for topic, score in expected.items():
+        assert actual[topic] == pytest.approx(score)
+    states = TopicKnowledgeState.query.filter_by(student_id=incremental.id).all()
+    assert {state.applied_attempts for state in states} == {6}
+    assert sum(state.total for state in states) == 6 * 15
+
+    # Applying the same attempt again is caught the same way instead of counting it twice
+    update_knowledge_levels_incremental(incremental.id, [quizzes[-1].id])
+    assert sum(state.total for state in TopicKnowledgeState.query.filter_by(student_id=incremental.id)) == 6 * 15
+
+def test_reconcile_finds_and_repairs_lost_updates(app, query_counter):
+    up_to_date = create_student_with_history(num_quizzes=3, student_number=1)
+    lost = create_student_with_history(num_quizzes=3, student_number=2)
+    never_updated = create_student_with_history(num_quizzes=2, student_number=3)
+    for student in (up_to_date, lost):
+        latest = StudentQuiz.query.filter_by(student_id=student.id).order_by(StudentQuiz.end_time.desc()).first()
+        update_knowledge_levels_incremental(student.id, [latest.id])
+
+    # A quiz completed after the last update whose own update never ran
+    quiz = create_quiz(create_professor(4), 'Late quiz')
+    create_attempts(quiz, [lost], status='completed', score=80.0, end_time=datetime(2025, 2, 1))
+    db.session.commit()
+    expected = [lost.id, never_updated.id]
+
+    query_counter.clear()
+    assert find_unreconciled_students() == expected
+    assert len(query_counter) == 1
+
+    for student_id in find_unreconciled_students():
+        reconcile_knowledge_levels(student_id)
+    assert find_unreconciled_students() == []
+
+    # Nothing to do for students whose sums are complete
+    up_to_date_id = up_to_date.id
+    query_counter.clear()
+    reconcile_knowledge_levels(up_to_date_id)
+    assert not any(statement.startswith(('INSERT', 'UPDATE', 'DELETE')) for statement in query_counter)
+
+def create_scored_students(scores_by_student):
+    """Students with one completed quiz per score (None for an unscored one) and an uncompleted quiz"""
+    professor = create_professor()
+    quizzes = [create_quiz(professor, f'Quiz {number}')
+               for number in range(max(len(scores) for scores in scores_by_student) + 1)]
+
+    students = create_students(len(scores_by_student))
+    for student, scores in zip(students, scores_by_student):
+        for day, score in enumerate(scores):
+            create_attempts(quizzes[day], [student], status='completed', score=score, end_time=datetime(2025, 1, 1 + day))
+        create_attempts(quizzes[-1], [student], score=100.0)
+    db.session.commit()
+    return [student.id for student in students]
+
+def test_completed_quiz_stats_use_one_query_per_chunk(app, query_counter, monkeypatch):
+    student_ids = create_scored_students([[40.0, 60.0], [90.0, None, 30.0], [], [75.0], [20.0]])
+    monkeypatch.setattr(ml_service, 'STUDENT_ID_CHUNK_SIZE', 2)
+
+    query_counter.clear()
+    stats = get_completed_quiz_stats(student_ids)
+    assert len(query_counter) == 3
+
+    assert stats[student_ids[0]] == {'completed': 2, 'scored': 2, 'total_score': 100.0, 'latest_end_time': datetime(2025, 1, 2)}
+    assert stats[student_ids[1]]['completed'] == 3 and stats[student_ids[1]]['scored'] == 2
+    assert stats[student_ids[1]]['total_score'] == 120.0
+    # Students without a completed quiz are left out
+    assert student_ids[2] not in stats
+    assert get_completed_quiz_stats() == stats
+
+class BrokenModel:
+    def predict(self, features):
+        raise ValueError('model is broken')
+
+def test_batch_prediction_matches_single_predictions(app):
+    inputs = [0.1, 0.45, 0.55, 0.75, 0.85, 1.0]
+
+    levels = predict_knowledge_levels(inputs)
+    assert levels == [predict_knowledge_levels([value])[0] for value in inputs]
+    assert set(levels) <= {'Low', 'Normal', 'High'}
+    assert predict_knowledge_levels([]) == []
+
+def test_prediction_falls_back_to_rules(app, tmp_path, monkeypatch):
+    inputs = [0.2, 0.5, 0.79, 0.8]
+    rules = ['Low', 'Normal', 'Normal', 'High']
+
+    # Missing model files
+    monkeypatch.setattr(ml_service, 'get_ml_model_paths', lambda: (str(tmp_path / 'model.pkl'), str(tmp_path / 'encoder.pkl')))
+    assert predict_knowledge_levels(inputs) == rules
+
+    # A model that fails to predict
+    broken = ModelVersion(BrokenModel(), None, None, 'broken', 0.0)
+    monkeypatch.setattr(ml_service, 'get_ml_model_version', lambda: broken)
+    assert predict_knowledge_levels(inputs) == rules
+
+def test_levels_for_many_students(app, monkeypatch):
+    student_ids = create_scored_students([[30.0], [60.0, 70.0], [95.0], []])
+    monkeypatch.setattr(ml_service, 'get_ml_model_version', lambda: None)
+
+    # Duplicates are predicted once; students without quizzes average 0
+    levels = determine_knowledge_levels_with_model(student_ids + [student_ids[0]])
+    assert levels == dict(zip(student_ids, ['Low', 'Normal', 'High', 'Low']))
+    assert determine_knowledge_levels_with_model([]) == {}
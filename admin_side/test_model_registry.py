@@ -0,0 +1,85 @@
+# admin_side/test_model_registry.py
+import os
+import pickle
+import joblib
+from services import model_registry as registry_module
+from services.model_registry import ModelRegistry
+
+def write_model(tmp_path, model, encoder):
+    model_path, encoder_path = tmp_path / 'model.pkl', tmp_path / 'encoder.pkl'
+    joblib.dump(model, model_path)
+    joblib.dump(encoder, encoder_path)
+    return str(model_path), str(encoder_path)
+
+def touch(path, seconds=5):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+def counting_loads(registry):
+    calls = []
+    load = registry._load
+
+    def counted(*args):
+        calls.append(args)
+        return load(*args)
+
+    registry._load = counted
+    return calls
+
+def test_missing_files_give_no_model(app, tmp_path):
+    assert ModelRegistry().get(str(tmp_path / 'model.pkl'), str(tmp_path / 'encoder.pkl')) is None
+
+def test_model_is_loaded_once_and_swapped_when_files_change(app, tmp_path):
+    registry = ModelRegistry()
+    model_path, encoder_path = write_model(tmp_path, {'name': 'v1'}, ['Beginner', 'Advanced'])
+    loads = counting_loads(registry)
+
+    first = registry.get(model_path, encoder_path)
+    assert first.model == {'name': 'v1'} and first.label_encoder == ['Beginner', 'Advanced']
+    assert registry.get(model_path, encoder_path) is first
+    assert len(loads) == 1
+
+    # Same bytes under a new mtime: a new key, but the unpickled objects are reused
+    touch(model_path)
+    same = registry.get(model_path, encoder_path)
+    assert same is not first and same.version == first.version and same.model is first.model
+    assert registry.stats()['load_count'] == 1
+
+    # New content (size changes too) swaps in the new version
+    joblib.dump({'name': 'version two'}, model_path)
+    touch(model_path, 10)
+    second = registry.get(model_path, encoder_path)
+    assert second.model == {'name': 'version two'} and second.version != first.version
+    assert registry.stats()['load_count'] == 2 and registry.stats()['version'] == second.version
+
+def test_failed_load_is_not_retried_until_the_file_changes(app, tmp_path):
+    registry = ModelRegistry()
+    model_path, encoder_path = write_model(tmp_path, {'name': 'v1'}, ['Beginner'])
+    good = registry.get(model_path, encoder_path)
+
+    with open(model_path, 'wb') as file:
+        file.write(b'not a pickle')
+    touch(model_path)
+    loads = counting_loads(registry)
+
+    # The last good version keeps serving and the broken file is read once
+    assert registry.get(model_path, encoder_path) is good
+    assert registry.get(model_path, encoder_path) is good
+    assert len(loads) == 1
+
+    joblib.dump({'name': 'fixed'}, model_path)
+    touch(model_path, 10)
+    assert registry.get(model_path, encoder_path).model == {'name': 'fixed'}
+    assert len(loads) == 2
+
+def test_plain_pickle_fallback(app, tmp_path, monkeypatch):
+    model_path, encoder_path = tmp_path / 'model.pkl', tmp_path / 'encoder.pkl'
+    model_path.write_bytes(pickle.dumps({'name': 'pickled'}))
+    encoder_path.write_bytes(pickle.dumps(['Beginner']))
+
+    def joblib_fails(*args, **kwargs):
+        raise ValueError('not a joblib file')
+
+    monkeypatch.setattr(registry_module.joblib, 'load', joblib_fails)
+    loaded = ModelRegistry().get(str(model_path), str(encoder_path))
+    assert loaded.model == {'name': 'pickled'} and loaded.label_encoder == ['Beginner']
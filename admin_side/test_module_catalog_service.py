@@ -0,0 +1,80 @@
+# admin_side/test_module_catalog_service.py
+from datetime import datetime, timedelta
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student
+from models.ModuleModel import Module
+from models.ProgressModel import StudentQuiz
+from services.assignment_service import assign_quiz
+from services.module_catalog_service import availability_cache, catalog_cache
+from utils.jwt_utils import generate_token
+
+def create_catalog(num_modules=3, quizzes_per_module=4):
+    professor = create_professor()
+    student = create_student()
+
+    now = datetime.utcnow()
+    quizzes = []
+    for m in range(num_modules):
+        module = Module(name=f'Module {m}', professor_id=professor.id)
+        db.session.add(module)
+        db.session.flush()
+        for q in range(quizzes_per_module):
+            # Alternate between an open window and one that has already closed
+            start = now - timedelta(hours=1) if q % 2 == 0 else now - timedelta(days=2)
+            quiz = create_quiz(professor, f'Quiz {m}.{q}', module_id=module.id,
+                               start_time=start, end_time=start + timedelta(days=1))
+            create_attempts(quiz, [student])
+            quizzes.append(quiz)
+
+    db.session.commit()
+    return student, quizzes
+
+def get_modules(client, student):
+    token = generate_token(student.id, 'student')
+    return client.get('/api/modules/available', headers={'Authorization': f'Bearer {token}'})
+
+def test_catalog_is_one_query_and_cached(app, query_counter):
+    student, quizzes = create_catalog()
+    client = app.test_client()
+    get_modules(client, student)  # Warm the token cache
+
+    # Availability comes from the same rows, not a second query
+    catalog_cache.clear()
+    availability_cache.clear()
+    query_counter.clear()
+    data = get_modules(client, student).get_json()
+    assert len(query_counter) == 1
+
+    assert data['total'] == 3
+    assert [m['total_quizzes'] for m in data['modules']] == [4, 4, 4]
+    assert [m['available_quizzes'] for m in data['modules']] == [2, 2, 2]
+    assert data['modules'][0]['quizzes'][0]['can_start'] is True
+    assert data['modules'][0]['quizzes'][1]['can_start'] is False
+
+    query_counter.clear()
+    get_modules(client, student)
+    assert len(query_counter) == 0
+
+def test_catalog_is_invalidated_by_attempts_and_assignments(app):
+    student, quizzes = create_catalog(num_modules=1, quizzes_per_module=2)
+    student_id = student.id
+    client = app.test_client()
+    get_modules(client, student)
+
+    # Starting a quiz changes the attempt through the ORM
+    attempt = StudentQuiz.query.filter_by(student_id=student_id, quiz_id=quizzes[0].id).first()
+    attempt.start_time = datetime.utcnow()
+    db.session.commit()
+    data = get_modules(client, student).get_json()
+    assert data['modules'][0]['quizzes'][0]['can_continue'] is True
+
+    # Bulk assignment statements skip the ORM events
+    module = Module(name='New module', professor_id=quizzes[0].professor_id)
+    db.session.add(module)
+    db.session.flush()
+    quiz = create_quiz(quizzes[0].professor, 'New quiz', module_id=module.id)
+    assign_quiz(quiz.id, [student_id])
+    db.session.commit()
+
+    data = get_modules(client, student).get_json()
+    assert data['total'] == 2
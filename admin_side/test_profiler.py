@@ -0,0 +1,65 @@
+# admin_side/test_profiler.py
+from sqlalchemy import text
+from app import db
+from conftest import create_professor, create_student
+from utils.jwt_utils import generate_token
+from utils.profiler import caller_frame, fingerprint, profiler
+
+def create_users():
+    professor, student = create_professor(), create_student()
+    db.session.commit()
+    return professor, student
+
+def auth(user):
+    return {'Authorization': f'Bearer {generate_token(user.id, user.user_type)}'}
+
+def test_fingerprint_folds_literals():
+    assert fingerprint("SELECT * FROM quizzes WHERE id IN (1, 2, 3) AND title = 'It''s'") == \
+        'SELECT * FROM quizzes WHERE id IN (...) AND title = ?'
+    assert fingerprint('SELECT *\n  FROM students WHERE id IN (?, ?, ?)') == 'SELECT * FROM students WHERE id IN (...)'
+
+def test_caller_frame_is_application_code():
+    assert caller_frame().startswith('test_profiler.py:')
+
+def test_requests_are_aggregated_per_endpoint(app):
+    professor, student = create_users()
+    client = app.test_client()
+
+    # The knowledge levels are always read with a query, whatever the session or caches hold
+    response = client.get(f'/api/students/{student.id}/knowledge', headers=auth(professor))
+    assert response.status_code == 200
+    assert 'queries"' in response.headers['Server-Timing']
+    client.get(f'/api/students/{student.id}/knowledge', headers=auth(professor))
+
+    perf = client.get('/debug/perf', headers=auth(professor)).get_json()['perf']
+    endpoint = next(item for item in perf['endpoints'] if item['endpoint'] == 'GET /api/students/<int:student_id>/knowledge')
+    assert endpoint['requests'] == 2
+    assert endpoint['queries'] >= 2
+
+    assert client.get('/debug/perf', headers=auth(student)).status_code == 403
+    assert client.get('/debug/perf').status_code == 401
+
+def test_debug_statistics_are_for_professors_only(app):
+    professor, student = create_users()
+    client = app.test_client()
+
+    for path in ('/debug/ml-model', '/debug/jobs', '/debug/auth-cache', '/debug/catalog-cache',
+                 '/debug/question-cache', '/debug/events'):
+        assert client.get(path).status_code == 401, path
+        assert client.get(path, headers=auth(student)).status_code == 403, path
+        assert client.get(path, headers=auth(professor)).status_code == 200, path
+
+def test_slow_queries_are_logged_with_their_plan(app):
+    create_users()
+    profiler.slow_query_ms = 0
+    profiler.explain_slow_queries = True
+    try:
+        db.session.execute(text('SELECT id FROM users WHERE email = :email'), {'email': 'prof@example.com'})
+    finally:
+        profiler.configure(app.config)
+
+    record = profiler.stats()['slow_queries'][0]
+    assert record['fingerprint'] == 'SELECT id FROM users WHERE email = ?'
+    assert record['parameters'] == "('prof@example.com',)"
+    assert record['caller'].startswith('test_profiler.py:')
+    assert record['plan'] and 'detail' in record['plan'][0]
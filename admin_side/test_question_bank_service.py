@@ -0,0 +1,93 @@
+# admin_side/test_question_bank_service.py
+from sqlalchemy import inspect
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_students
+from models.QuizModel import Question, QuestionBankItem
+from migrations.runner import run_migrations
+from migrations.versions import MIGRATIONS
+from services.grading_service import grade_submission
+from services.question_bank_service import (
+    add_pool_questions, get_bank_item_statistics, import_question_bank, link_existing_questions
+)
+from services.question_payload_service import load_question_payload
+
+def pool_question(qid, correct_answer=0, topic='Loops'):
+    return {
+        'QID': qid, 'Question Text': f'Question {qid}', 'Answer 1': 'A', 'Answer 2': 'B',
+        'Answer 3': 'C', 'Answer 4': '', 'Correct Answer': correct_answer,
+        'Question Weight': 2.0, 'Topic': topic
+    }
+
+def create_quizzes(count=2):
+    professor = create_professor()
+    return [create_quiz(professor, f'Quiz {n}') for n in range(count)]
+
+def test_quizzes_share_bank_items(app, query_counter):
+    first, second = create_quizzes()
+    pool = [pool_question(f'Q{n}', correct_answer=n % 3) for n in range(5)]
+
+    del query_counter[:]
+    assert add_pool_questions(first.id, pool) == 5
+    # Bank lookup, bank insert, id lookup and one insert of link rows
+    assert len(query_counter) == 4
+    add_pool_questions(second.id, pool[2:] + [{'Question Text': 'No QID', 'Answer 1': 'Yes', 'Answer 2': 'No',
+                                               'Correct Answer': 1}])
+    db.session.commit()
+
+    assert db.session.query(QuestionBankItem).count() == 5
+    questions = Question.query.filter_by(quiz_id=second.id).order_by(Question.id).all()
+    assert [q.source_qid for q in questions] == ['Q2', 'Q3', 'Q4', '']
+    assert questions[0].text is None and questions[0].bank_item.source_qid == 'Q2'
+    assert questions[-1].bank_item_id is None and questions[-1].text == 'No QID'
+
+    data = questions[0].to_dict(include_answer=True)
+    assert data['text'] == 'Question Q2'
+    assert data['options'] == ['A', 'B', 'C']
+    assert data['correct_answer'] == 2
+
+    payload = load_question_payload(second)
+    assert [q['text'] for q in payload['student']] == ['Question Q2', 'Question Q3', 'Question Q4', 'No QID']
+
+def test_import_and_link_existing_questions(app):
+    quiz, = create_quizzes(count=1)
+    # A question copied in full before the bank existed
+    db.session.add(Question(quiz_id=quiz.id, text='Question Q1', option_1='A', option_2='B', option_3='C',
+                            option_4='', correct_answer=0, source_qid='Q1'))
+    db.session.commit()
+
+    class Pool:
+        questions = [pool_question('Q1'), pool_question('Q2')]
+
+    assert import_question_bank(Pool) == 2
+    assert import_question_bank(Pool) == 0
+    assert link_existing_questions() == 1
+    db.session.commit()
+
+    question = Question.query.filter_by(source_qid='Q1').one()
+    assert question.bank_item.source_qid == 'Q1'
+
+def test_bank_item_statistics_span_quizzes(app):
+    first, second = create_quizzes()
+    pool = [pool_question('Q1', correct_answer=0), pool_question('Q2', correct_answer=1)]
+    add_pool_questions(first.id, pool)
+    add_pool_questions(second.id, pool)
+
+    for quiz, student in zip((first, second), create_students(2)):
+        student_quiz, = create_attempts(quiz, [student], status='completed')
+        questions = Question.query.filter_by(quiz_id=quiz.id).order_by(Question.id).all()
+        # Both students get Q1 right and Q2 wrong; grading reads the per-quiz answer key
+        result = grade_submission(student_quiz, [{'question_id': q.id, 'selected_option': 0} for q in questions])
+        assert result.score == 50.0
+    db.session.commit()
+
+    statistics = get_bank_item_statistics()
+    assert [(item['source_qid'], item['answers'], item['correct'], item['quizzes']) for item in statistics] == [
+        ('Q2', 2, 0, 2), ('Q1', 2, 2, 2)
+    ]
+    assert get_bank_item_statistics(min_answers=3) == []
+
+def test_bank_migration_is_idempotent(app):
+    run_migrations(db.engine, MIGRATIONS, log=lambda message: None)
+    assert 'question_bank_items' in inspect(db.engine).get_table_names()
+    assert 'bank_item_id' in {column['name'] for column in inspect(db.engine).get_columns('questions')}
+    assert run_migrations(db.engine, MIGRATIONS, log=lambda message: None) == []
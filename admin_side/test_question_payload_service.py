@@ -0,0 +1,73 @@
+# admin_side/test_question_payload_service.py
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student
+from models.QuizModel import Question
+from models.ProgressModel import StudentQuiz, StudentAnswer
+from services.question_payload_service import question_payload_cache
+from utils.jwt_utils import generate_token
+
+def create_quiz_with_questions(num_questions=8):
+    professor = create_professor()
+    student = create_student()
+    quiz = create_quiz(professor, 'Loops', duration_minutes=30)
+    for n in range(num_questions):
+        db.session.add(Question(quiz_id=quiz.id, text=f'Question {n}', option_1='A', option_2='B',
+                                option_3='C', option_4='', correct_answer=n % 3, topic='Loops'))
+    create_attempts(quiz, [student])
+    db.session.commit()
+    return professor, student, quiz
+
+def test_student_questions_are_cached_and_conditional(app, query_counter):
+    professor, student, quiz = create_quiz_with_questions()
+    quiz_id = quiz.id
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(student.id, "student")}'}
+    url = f'/api/students/quizzes/{quiz_id}/questions'
+
+    # First load starts the quiz and fills the cache
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    questions = response.get_json()['questions']
+    assert len(questions) == 8
+    assert questions[0]['options'] == ['A', 'B', 'C']
+    assert 'correct_answer' not in questions[0]
+    assert questions[0]['selected_answer'] is None
+
+    query_counter.clear()
+    response = client.get(url, headers=headers)
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    # Assignment, quiz and saved answers only: questions come from the cache
+    assert len(query_counter) <= 3
+    assert not any('FROM questions' in statement for statement in query_counter)
+
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Saving an answer changes the body and so the ETag
+    attempt = StudentQuiz.query.filter_by(student_id=student.id, quiz_id=quiz_id).first()
+    db.session.add(StudentAnswer(student_quiz_id=attempt.id, question_id=questions[2]['id'], selected_option=1, is_correct=False))
+    db.session.commit()
+
+    response = client.get(url, headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['questions'][2]['selected_answer'] == 1
+
+def test_quiz_update_and_delete_invalidate_the_payload(app):
+    professor, student, quiz = create_quiz_with_questions(num_questions=3)
+    quiz_id = quiz.id
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(professor.id, "professor")}'}
+
+    data = client.get(f'/api/quizzes/{quiz_id}/questions', headers=headers).get_json()
+    assert data['questions'][0]['quiz_title'] == 'Loops'
+    assert data['questions'][0]['correct_answer'] == 0
+    assert question_payload_cache.stats()['size'] == 1
+
+    client.put(f'/api/professors/quizzes/{quiz_id}', headers=headers, json={'title': 'While loops'})
+    data = client.get(f'/api/quizzes/{quiz_id}/questions', headers=headers).get_json()
+    assert data['questions'][0]['quiz_title'] == 'While loops'
+
+    client.delete(f'/api/professors/quizzes/{quiz_id}', headers=headers)
+    assert question_payload_cache.stats()['size'] == 0
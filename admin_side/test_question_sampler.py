@@ -0,0 +1,66 @@
+# admin_side/test_question_sampler.py
+from services.question_sampler import QuestionSampler, band_for_level, band_for_score, get_question_sampler
+from utils.csv_utils import QuestionPool
+
+def make_pool(topics=('Loops', 'Arrays', 'Recursion'), per_topic=20):
+    questions = []
+    for topic in topics:
+        for n in range(per_topic):
+            # Weights in reverse file order so sorting matters
+            questions.append({'QID': f'{topic}-{n}', 'Topic': topic, 'Question Weight': per_topic - n})
+    return QuestionPool(questions)
+
+def qids(questions):
+    return [q['QID'] for q in questions]
+
+def test_same_seed_gives_same_selection():
+    sampler = QuestionSampler(make_pool().questions)
+
+    def select(seed):
+        draw = sampler.draw(seed)
+        draw.sample_topic('Loops', 5, 'easy')
+        draw.sample_topic('Arrays', 5)
+        draw.fill(15)
+        return qids(draw.questions(limit=15))
+
+    assert select(42) == select(42)
+    assert select(42) != select(43)
+
+def test_bands_follow_difficulty():
+    sampler = QuestionSampler(make_pool().questions)
+    weights = {q['QID']: q['Question Weight'] for q in sampler.questions}
+
+    draw = sampler.draw(1)
+    draw.sample_topic('Loops', 12, 'easy')
+    # The easiest 60% of weights 1..20
+    assert sorted(weights[qid] for qid in qids(draw.questions())) == list(range(1, 13))
+
+    draw = sampler.draw(1)
+    draw.sample_topic('Loops', 50, 'hard')
+    assert sorted(weights[qid] for qid in qids(draw.questions())) == list(range(9, 21))
+
+    assert [band_for_score(s) for s in (0.1, 0.5, 0.9)] == ['easy', 'medium', 'hard']
+    assert [band_for_level(level) for level in ('Low', 'Normal', 'High')] == ['easy', 'medium', 'hard']
+
+def test_draws_never_repeat_a_question():
+    sampler = QuestionSampler(make_pool(per_topic=5).questions)
+    draw = sampler.draw(7)
+    assert draw.sample_topic('Loops', 5) == 5
+    # Everything in the topic is already taken
+    assert draw.sample_topic('Loops', 3, 'easy') == 0
+    assert draw.fill(100) == 10
+
+    selected = qids(draw.questions())
+    assert len(selected) == len(set(selected)) == 15
+
+def test_tiny_topic_band_falls_back_to_whole_topic():
+    sampler = QuestionSampler(make_pool(topics=('Loops',), per_topic=1).questions)
+    draw = sampler.draw(0)
+    assert draw.sample_topic('Loops', 1, 'easy') == 1
+    assert draw.sample_topic('Missing', 3) == 0
+
+def test_sampler_is_rebuilt_with_the_pool():
+    pool = make_pool()
+    sampler = get_question_sampler(pool)
+    assert get_question_sampler(pool) is sampler
+    assert get_question_sampler(make_pool()) is not sampler
@@ -0,0 +1,77 @@
+# admin_side/test_results_service.py
+import pytest
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_students
+from models.QuizModel import Quiz, Question
+from models.ProgressModel import StudentAnswer
+from services.results_service import get_quiz_results
+
+# Selected option per attempt and question; every question's correct answer is 0
+SELECTIONS = [
+    [0, 0, 0],
+    [0, 0, 1],
+    [0, 1, 2],
+    [1, None, 3],
+]
+
+def create_quiz_with_attempts(selections=SELECTIONS):
+    quiz = create_quiz(create_professor())
+
+    questions = [
+        Question(quiz_id=quiz.id, text=f'Question {j}', option_1='A', option_2='B', option_3='C', option_4='D',
+                 correct_answer=0, weight=1.0, topic='SDLC' if j < 2 else 'Agile')
+        for j in range(len(selections[0]))
+    ]
+    db.session.add_all(questions)
+    db.session.flush()
+
+    for student, row in zip(create_students(len(selections)), selections):
+        student_quiz, = create_attempts(quiz, [student], status='completed',
+                                        score=100.0 * sum(option == 0 for option in row) / len(row))
+        for question, option in zip(questions, row):
+            if option is not None:
+                db.session.add(StudentAnswer(student_quiz_id=student_quiz.id, question_id=question.id,
+                                             selected_option=option, is_correct=option == question.correct_answer))
+
+    db.session.commit()
+    return quiz
+
+def test_item_statistics(app):
+    quiz = create_quiz_with_attempts()
+
+    results = get_quiz_results(quiz)
+    items = results['item_statistics']
+
+    assert [item['p_value'] for item in items] == [0.75, 0.5, 0.25]
+    assert items[1]['option_distribution'] == {'unanswered': 1, '0': 2, '1': 1, '2': 0, '3': 0}
+    assert items[2]['option_distribution'] == {'unanswered': 0, '0': 1, '1': 1, '2': 1, '3': 1}
+    # Stronger students get every item right more often
+    assert all(item['discrimination'] > 0 for item in items)
+    assert all(item['discrimination_index'] == 1.0 for item in items)
+
+    assert results['topic_statistics']['SDLC']['accuracy'] == pytest.approx(62.5)
+    assert results['topic_statistics']['Agile']['accuracy'] == pytest.approx(25.0)
+    assert results['summary']['total_attempts'] == 4
+
+    last_attempt = results['results'][3]
+    assert [answer['student_answer'] for answer in last_attempt['answers']] == [1, None, 3]
+    assert last_attempt['attempt']['total_correct'] == 0
+
+def test_results_are_paginated_with_a_constant_number_of_queries(app, query_counter):
+    quiz = create_quiz_with_attempts(SELECTIONS * 10)
+    quiz_id = quiz.id
+    quiz = db.session.get(Quiz, quiz_id)
+
+    query_counter.clear()
+    first_page = get_quiz_results(quiz, limit=25)
+    # Questions, attempts, answers, summary and the response matrix
+    assert len(query_counter) <= 5
+    assert len(first_page['results']) == 25
+    assert first_page['pagination']['has_more']
+
+    second_page = get_quiz_results(quiz, cursor=first_page['pagination']['next_cursor'], limit=25, include_statistics=False)
+    assert len(second_page['results']) == 15
+    assert 'item_statistics' not in second_page
+
+    attempt_ids = [r['attempt']['id'] for r in first_page['results'] + second_page['results']]
+    assert attempt_ids == sorted(set(attempt_ids))
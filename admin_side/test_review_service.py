@@ -0,0 +1,85 @@
+# admin_side/test_review_service.py
+from datetime import datetime, timedelta
+from app import db
+from conftest import create_attempts, create_professor, create_quiz, create_student
+from models.QuizModel import Question
+from models.ProgressModel import StudentAnswer
+from services.review_service import decode_cursor, encode_cursor, get_incorrect_topic_analysis
+from utils.jwt_utils import generate_token
+
+TOPICS = ['Loops', 'Functions', 'Recursion']
+
+def create_answered_attempts(num_quizzes=4, questions_per_quiz=6):
+    professor = create_professor()
+    student = create_student()
+
+    finished = datetime(2025, 1, 1, 12, 0)
+    for q in range(num_quizzes):
+        quiz = create_quiz(professor, f'Quiz {q}')
+        # The last two quizzes finish at the same time to exercise the tie-breaker
+        end_time = finished + timedelta(hours=min(q, num_quizzes - 2))
+        attempt, = create_attempts(quiz, [student], status='completed', score=50.0, end_time=end_time)
+        for n in range(questions_per_quiz):
+            question = Question(quiz_id=quiz.id, text=f'Question {q}.{n}', option_1='A', option_2='B',
+                                option_3='C', option_4='', correct_answer=0, weight=1.0 + n % 2,
+                                topic=TOPICS[n % len(TOPICS)])
+            db.session.add(question)
+            db.session.flush()
+            # Every other question is answered incorrectly
+            is_correct = n % 2 == 0
+            db.session.add(StudentAnswer(student_quiz_id=attempt.id, question_id=question.id,
+                                         selected_option=0 if is_correct else 1, is_correct=is_correct))
+
+    db.session.commit()
+    return student
+
+def test_cursor_round_trip():
+    cursor = (datetime(2025, 1, 1, 12, 30), 7, 42)
+    assert decode_cursor(encode_cursor(*cursor)) == cursor
+
+    for token in ('not-a-cursor', encode_cursor(datetime(2025, 1, 1), 1, 2)[:-3]):
+        try:
+            decode_cursor(token)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+
+def test_feed_pages_cover_every_incorrect_answer(app, query_counter):
+    student = create_answered_attempts()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {generate_token(student.id, "student")}'}
+
+    data = client.get('/api/students/quiz-results?limit=5', headers=headers).get_json()
+    assert data['total_incorrect'] == 12
+    assert data['total_quizzes'] == 4
+    assert data['topic_analysis'][0]['incorrect_count'] == 4
+    assert {topic['topic'] for topic in data['topic_analysis']} == set(TOPICS)
+    assert data['incorrect_answers'][0]['options'] == ['A', 'B', 'C']
+
+    rows = data['incorrect_answers']
+    cursor = data['pagination']['next_cursor']
+    while cursor:
+        query_counter.clear()
+        data = client.get(f'/api/students/quiz-results?limit=5&cursor={cursor}', headers=headers).get_json()
+        # Principal + user lookup and the page query, independent of history size
+        assert len(query_counter) <= 3
+        assert 'topic_analysis' not in data
+        rows += data['incorrect_answers']
+        cursor = data['pagination']['next_cursor']
+
+    assert len(rows) == 12
+    assert len({(row['quiz_id'], row['question_id']) for row in rows}) == 12
+    # Newest quiz first; ties broken by the later attempt first
+    assert [row['quiz_title'] for row in rows[::3]] == ['Quiz 3', 'Quiz 2', 'Quiz 1', 'Quiz 0']
+
+    response = client.get('/api/students/quiz-results?cursor=garbage', headers=headers)
+    assert response.status_code == 400
+
+def test_topic_analysis_points_lost(app):
+    student = create_answered_attempts(num_quizzes=2, questions_per_quiz=3)
+    analysis = {topic['topic']: topic for topic in get_incorrect_topic_analysis(student.id)}
+    # Only the second question of each quiz (Functions, weight 2) is answered incorrectly
+    assert list(analysis) == ['Functions']
+    assert analysis['Functions']['incorrect_count'] == 2
+    assert analysis['Functions']['total_points_lost'] == 4.0
+    assert analysis['Functions']['quiz_count'] == 2
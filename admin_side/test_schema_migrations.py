@@ -0,0 +1,77 @@
+# admin_side/test_schema_migrations.py
+from sqlalchemy import inspect, text
+from app import db
+from migrations.plans import core_queries
+from migrations.runner import get_applied_versions, run_migrations, verify_query_plans
+from migrations.versions import MIGRATIONS
+
+def drop_index(name):
+    with db.engine.begin() as connection:
+        connection.execute(text(f'DROP INDEX {name}'))
+
+def test_migrations_are_recorded_and_idempotent(app):
+    # create_all() already built the schema, so every migration is a no-op here
+    applied = run_migrations(db.engine, MIGRATIONS, log=lambda message: None)
+    assert applied == [migration.version for migration in MIGRATIONS]
+    assert get_applied_versions(db.engine) == set(applied)
+
+    assert run_migrations(db.engine, MIGRATIONS, log=lambda message: None) == []
+
+def test_migrations_add_missing_indexes_without_losing_data(app):
+    # Simulate a database created before the indexes existed
+    for name in ('ix_student_quizzes_student_status_end', 'ix_student_quizzes_quiz_status',
+                 'ix_knowledge_levels_student_topic', 'ix_questions_quiz_id'):
+        drop_index(name)
+    with db.engine.begin() as connection:
+        connection.execute(text("INSERT INTO knowledge_levels (student_id, topic, score, level) VALUES (1, 'Loops', 0.5, 'Normal')"))
+
+    problems = verify_query_plans(db.engine, core_queries())
+    assert {problem['query'] for problem in problems} >= {'completed attempts of a quiz', 'knowledge level of a topic'}
+
+    run_migrations(db.engine, MIGRATIONS, log=lambda message: None)
+
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes('student_quizzes')}
+    assert {'ix_student_quizzes_student_status_end', 'ix_student_quizzes_quiz_status'} <= indexes
+    with db.engine.connect() as connection:
+        assert connection.execute(text('SELECT COUNT(*) FROM knowledge_levels')).scalar() == 1
+
+    assert verify_query_plans(db.engine, core_queries()) == []
+
+def test_unique_key_migration_removes_duplicates(app):
+    run_migrations(db.engine, MIGRATIONS, target='0003', log=lambda message: None)
+
+    # An older database without the unique key on answers
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE student_answers'))
+        connection.execute(text("""
+            CREATE TABLE student_answers (
+                id INTEGER PRIMARY KEY, student_quiz_id INTEGER NOT NULL, question_id INTEGER NOT NULL,
+                selected_option INTEGER, is_correct BOOLEAN, created_at DATETIME
+            )
+        """))
+        connection.execute(text("""
+            INSERT INTO student_answers (id, student_quiz_id, question_id, selected_option, is_correct)
+            VALUES (1, 1, 1, 0, 1), (2, 1, 1, 2, 0), (3, 1, 2, 1, 0)
+        """))
+
+    assert run_migrations(db.engine, MIGRATIONS, log=lambda message: None) == ['0004', '0005', '0006', '0007', '0008']
+
+    with db.engine.connect() as connection:
+        assert [row[0] for row in connection.execute(text('SELECT id FROM student_answers ORDER BY id'))] == [1, 3]
+    uniques = {constraint['name'] for constraint in inspect(db.engine).get_indexes('student_answers') if constraint['unique']}
+    assert 'uq_student_answers_attempt_question' in uniques
+
+def test_applied_attempts_column_is_added_to_existing_sums(app):
+    run_migrations(db.engine, MIGRATIONS, target='0007', log=lambda message: None)
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE topic_knowledge_states DROP COLUMN applied_attempts'))
+        connection.execute(text("""
+            INSERT INTO topic_knowledge_states (student_id, topic, weighted_correct, weighted_total, correct, total, last_update)
+            VALUES (1, 'Loops', 1.0, 2.0, 1, 2, '2025-01-01 00:00:00')
+        """))
+
+    assert run_migrations(db.engine, MIGRATIONS, log=lambda message: None) == ['0008']
+
+    # Existing sums count no attempts, so their next update rebuilds them
+    with db.engine.connect() as connection:
+        assert connection.execute(text('SELECT applied_attempts FROM topic_knowledge_states')).scalar() == 0
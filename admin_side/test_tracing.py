@@ -0,0 +1,83 @@
+# admin_side/test_tracing.py
+import io
+import logging
+from datetime import datetime, timedelta
+import pytest
+from models.QuizModel import Quiz
+from services.quiz_service import is_quiz_available
+from utils import tracing
+from utils.tracing import configure_tracing, get_tracer, lazy
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+@pytest.fixture
+def recorded():
+    handler = RecordingHandler()
+    root = logging.getLogger(tracing.ROOT_LOGGER)
+    root.addHandler(handler)
+    yield handler.records
+    root.removeHandler(handler)
+    configure_tracing()
+
+def test_disabled_trace_points_never_format(recorded):
+    configure_tracing('INFO')
+
+    def explode():
+        raise AssertionError('formatted a disabled trace point')
+
+    get_tracer('test').debug('value %s', lazy(explode))
+    assert recorded == []
+
+def test_per_subsystem_levels_are_inherited(recorded):
+    configure_tracing('WARNING', levels='test=DEBUG,test.quiet=ERROR')
+
+    get_tracer('test.child').debug('child %s', 1, attempt=7)
+    get_tracer('test.quiet').warning('dropped')
+    get_tracer('other').info('dropped')
+
+    assert [record.getMessage() for record in recorded] == ['child 1']
+    assert recorded[0].subsystem == 'test.child'
+    assert recorded[0].trace_fields == {'attempt': 7}
+    assert recorded[0].filename == 'test_tracing.py'
+
+def test_sampling_skips_debug_but_keeps_warnings(recorded):
+    configure_tracing('DEBUG', sample_rates={'test': 0.0})
+
+    tracer = get_tracer('test')
+    for _ in range(20):
+        tracer.debug('sampled out')
+    tracer.warning('kept')
+
+    assert [record.getMessage() for record in recorded] == ['kept']
+
+def test_async_handler_writes_from_background_thread():
+    stream = io.StringIO()
+    configure_tracing('DEBUG')
+    tracing.stop_async_handler()
+    tracing.start_async_handler(stream=stream, queue_size=10)
+    try:
+        get_tracer('test').info('queued %s', 'record', attempt=3)
+    finally:
+        tracing.stop_async_handler()
+        configure_tracing()
+
+    line = stream.getvalue()
+    assert 'INFO test: queued record attempt=3' in line
+
+def test_quiz_availability_traces_only_when_enabled(app, recorded):
+    now = datetime(2026, 3, 1, 10, 0)
+    quiz = Quiz(id=1, title='Quiz', start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1))
+
+    configure_tracing('INFO')
+    assert is_quiz_available(quiz, now)[0] is True
+    assert recorded == []
+
+    configure_tracing('INFO', levels='quiz=DEBUG')
+    is_quiz_available(quiz, now)
+    assert recorded[0].getMessage() == 'Availability check for quiz 1 at 2026-03-01 10:00:00'
@@ -6,7 +6,10 @@ from models.ProgressModel import StudentQuiz, StudentAnswer, KnowledgeLevel
 app = create_app()
 
 def update_database():
-    """Drop and recreate all tables with new schema"""
+    """
+    Drop and recreate all tables with new schema. This deletes all data;
+    use migrate.py to update an existing database instead.
+    """
     with app.app_context():
         print("Dropping all tables...")
         db.drop_all()
@@ -0,0 +1,69 @@
+# admin_side/utils/compression.py
+import gzip
+from flask import request
+
+# brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(body, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output (and anything derived from it) stable
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+def _should_compress(response, min_size):
+    if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+        return False
+    # Streams (e.g. server-sent events) are never buffered
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return response.content_length is not None and response.content_length >= min_size
+
+def compress_response(response, config):
+    """Compress a response for the current request when the client accepts it and it is big enough"""
+    # Whatever happens, caches must key on the client's Accept-Encoding
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+
+    if not _should_compress(response, config.get('COMPRESS_MIN_SIZE', 1024)):
+        return response
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+
+    body = compress(
+        response.get_data(),
+        encoding,
+        gzip_level=config.get('COMPRESS_LEVEL', 6),
+        brotli_quality=config.get('COMPRESS_BROTLI_QUALITY', 4)
+    )
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes differ from the ones a strong ETag was computed on
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+def init_compression(app):
+    """Negotiate gzip / brotli compression for every large text response"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, app.config)
@@ -1,50 +1,128 @@
 # admin_side/utils/csv_utils.py
 import pandas as pd
 import os
+import threading
 from flask import current_app
 import csv
+from utils.tracing import get_tracer
 
-def get_questions_from_csv():
-    """Read and parse questions from the CSV file"""
+trace = get_tracer('question_pool')
+
+def parse_question_weight(question, default=1.0):
+    """Parse the 'Question Weight' column of a CSV question, falling back to a default"""
+    try:
+        return float(question.get('Question Weight', default))
+    except (ValueError, TypeError):
+        return default
+
+def resolve_question_pool_path():
+    """Find the question pool CSV file on disk"""
     csv_path = current_app.config.get('QUESTION_POOL_PATH')
-    
-    if not os.path.exists(csv_path):
+
+    if not csv_path or not os.path.exists(csv_path):
         # Try alternative path
         csv_path = os.path.join(os.path.dirname(current_app.root_path), 'MLSPIS Question Pool  Question Pool.csv')
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"Question pool CSV file not found at {csv_path}")
-    
+
+    return csv_path
+
+def read_questions_file(csv_path):
+    """Read and parse every question row from the CSV file"""
     try:
         # Try pandas read
         df = pd.read_csv(csv_path)
         questions = df.to_dict('records')
     except Exception as e:
-        print(f"Error reading CSV with pandas: {str(e)}")
+        trace.warning('Error reading CSV with pandas, falling back to the csv module: %s', e)
         # Fallback to csv module
         questions = []
         with open(csv_path, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             for row in reader:
                 questions.append(dict(row))
-    
+
     return questions
 
+class QuestionPool:
+    """
+    Parsed question pool with precomputed lookup indexes.
+
+    The pool is built once from the CSV file and shared by every request in the
+    process, so the question dicts it hands out must be treated as read-only.
+    """
+
+    def __init__(self, questions, path=None, mtime=None):
+        self.path = path
+        self.mtime = mtime
+        self.questions = questions
+
+        # Index by QID (first occurrence wins, like the old linear scan)
+        self.by_qid = {}
+        for q in questions:
+            self.by_qid.setdefault(q.get('QID'), q)
+
+        # Index by topic, preserving file order within each topic
+        self.by_topic = {}
+        for q in questions:
+            self.by_topic.setdefault(q.get('Topic', 'Unknown'), []).append(q)
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def topics(self):
+        return list(self.by_topic.keys())
+
+    def get(self, qid):
+        """Get a question by its QID"""
+        return self.by_qid.get(qid)
+
+    def topic_questions(self, topic):
+        """Get the questions for a topic in file order"""
+        return self.by_topic.get(topic, [])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_question_pool():
+    """
+    Get the process-wide question pool.
+
+    The CSV file is only parsed again when its modification time changes.
+    """
+    global _pool
+
+    csv_path = resolve_question_pool_path()
+    mtime = os.stat(csv_path).st_mtime
+
+    pool = _pool
+    if pool is not None and pool.path == csv_path and pool.mtime == mtime:
+        return pool
+
+    with _pool_lock:
+        # Another thread may have reloaded the pool while we waited for the lock
+        pool = _pool
+        if pool is None or pool.path != csv_path or pool.mtime != mtime:
+            pool = QuestionPool(read_questions_file(csv_path), path=csv_path, mtime=mtime)
+            _pool = pool
+
+    return pool
+
+def invalidate_question_pool():
+    """Drop the cached question pool so the next access re-reads the CSV"""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def get_questions_from_csv():
+    """Get all questions from the question pool (read-only, shared between requests)"""
+    return get_question_pool().questions
+
 def get_questions_by_topic(topic):
     """Get questions filtered by topic"""
-    questions = get_questions_from_csv()
-    
-    # Filter questions by topic
-    filtered = [q for q in questions if q.get('Topic') == topic]
-    
-    return filtered
+    return get_question_pool().topic_questions(topic)
 
 def get_question_by_id(qid):
     """Get a specific question by its QID"""
-    questions = get_questions_from_csv()
-    
-    # Find the question with the matching QID
-    for q in questions:
-        if q.get('QID') == qid:
-            return q
-    
-    return None
\ No newline at end of file
+    return get_question_pool().get(qid)
@@ -0,0 +1,97 @@
+# admin_side/utils/json_provider.py
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from flask.json.provider import _default as flask_default
+from werkzeug.utils import import_string
+from utils.tracing import get_tracer
+
+trace = get_tracer('app')
+
+# orjson is optional; without it the stdlib provider is used
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _default(value):
+    """Types json can't serialize. Datetimes become ISO 8601, like the orjson provider."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if np is not None:
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+    # UUIDs, dataclasses, Decimal and Markup
+    return flask_default(value)
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, but with ISO 8601 datetimes and NumPy values"""
+
+    default = staticmethod(_default)
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    datetimes, dates, dict keys of any type and NumPy values are serialized
+    natively, so to_dict() trees can hold datetime objects instead of
+    calling isoformat() per field. Responses are built straight from bytes.
+    Calls with json.dumps-only arguments fall back to the stdlib provider.
+    """
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        return orjson.dumps(obj, default=_default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+JSON_PROVIDERS = {
+    'orjson': OrjsonJSONProvider,
+    'stdlib': StdlibJSONProvider
+}
+
+def get_json_provider_class(name=None):
+    """
+    Provider class for the JSON_PROVIDER setting: 'orjson' (default),
+    'stdlib', or the import path of a JSONProvider subclass
+    """
+    name = name or 'orjson'
+    if name == 'orjson' and orjson is None:
+        trace.warning('orjson is not installed, using the stdlib JSON provider')
+        return StdlibJSONProvider
+    if name in JSON_PROVIDERS:
+        return JSON_PROVIDERS[name]
+    return import_string(name)
+
+def init_json_provider(app):
+    """Install the configured JSON provider on the app"""
+    app.json = get_json_provider_class(app.config.get('JSON_PROVIDER'))(app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', True)
+    return app.json
+
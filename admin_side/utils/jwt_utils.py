@@ -1,5 +1,9 @@
 # admin_side/utils/jwt_utils.py
+import hashlib
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify, current_app
 from datetime import datetime, timedelta
@@ -34,49 +38,206 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         raise Exception('Invalid token')
 
+class Principal:
+    """Verified identity behind a token: enough for routes that only check id and type"""
+    __slots__ = ('id', 'user_type')
+
+    def __init__(self, id, user_type):
+        self.id = id
+        self.user_type = user_type
+
+    def load_user(self):
+        """Load the full user model (one query)"""
+        from models.UserModel import User, Student, Professor
+        if self.user_type == 'student':
+            return Student.query.get(self.id)
+        elif self.user_type == 'professor':
+            return Professor.query.get(self.id)
+        return User.query.get(self.id)
+
+class PrincipalCache:
+    """
+    Bounded, TTL-based cache of verified tokens to principals.
+
+    Entries are keyed by a hash of the token, so a token is only served from
+    the cache after its signature was verified once. An entry never outlives
+    the token's own expiry, and all entries of a user are dropped when the
+    user is updated or deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token hash -> (principal, expires_at), least recently used first
+        self._keys_by_user = {}  # user id -> token hashes
+        self._counts = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _remove(self, key):
+        # Called with the lock held
+        principal, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[principal.id]
+
+    def get(self, token):
+        """Get the cached principal for a token, or None"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self._counts['expired'] += 1
+                self._counts['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            return principal
+
+    def put(self, token, principal, expires_at, max_size):
+        """Cache a verified principal until expires_at (epoch seconds)"""
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (principal, expires_at)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+
+            while len(self._entries) > max_size:
+                self._remove(next(iter(self._entries)))
+                self._counts['evictions'] += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user"""
+        with self._lock:
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self._counts['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        """Describe the cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self._counts['hits'] + self._counts['misses']
+            return {
+                'size': len(self._entries),
+                'users': len(self._keys_by_user),
+                'hit_rate': round(self._counts['hits'] / lookups, 4) if lookups else None,
+                **self._counts
+            }
+
+# Shared cache for the whole process
+principal_cache = PrincipalCache()
+
+def get_request_token():
+    """Get the token from the Authorization header (None if missing)"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return None
+    
+    # Handle both "Bearer <token>" and just "<token>" formats
+    if auth_header.startswith('Bearer '):
+        return auth_header.split("Bearer ")[1].strip()
+    return auth_header.strip()
+
+def authenticate(token):
+    """
+    Resolve a token to (principal, user).
+    user is None when the principal came from the cache, so routes that
+    only need the id and type can skip loading it.
+    """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal, None
+    
+    # Decode token
+    payload = decode_token(token)
+    
+    # Get user from database based on type
+    user = Principal(payload['sub'], payload.get('type')).load_user()
+    if not user:
+        raise LookupError('User not found')
+    
+    principal = Principal(user.id, user.user_type)
+    ttl = current_app.config.get('AUTH_CACHE_TTL', 300)
+    expires_at = min(time.time() + ttl, payload.get('exp', 0))
+    if ttl > 0:
+        principal_cache.put(token, principal, expires_at, current_app.config.get('AUTH_CACHE_SIZE', 10000))
+    
+    return principal, user
+
+def _authenticate_request(load_user):
+    """Authenticate the current request; returns (identity, error response)"""
+    token = get_request_token()
+    if not token:
+        return None, (jsonify({'message': 'Token is missing'}), 401)
+    
+    try:
+        principal, user = authenticate(token)
+        if load_user and user is None:
+            user = principal.load_user()
+            if not user:
+                principal_cache.invalidate_user(principal.id)
+                raise LookupError('User not found')
+    except LookupError as e:
+        return None, (jsonify({'message': str(e)}), 401)
+    except Exception as e:
+        return None, (jsonify({'message': f'Token error: {str(e)}'}), 401)
+    
+    return (user if load_user else principal), None
+
 def token_required(f):
-    """Decorator for endpoints that require authentication"""
+    """Decorator for endpoints that require authentication (passes the full user model)"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Get token from header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                # Handle both "Bearer <token>" and just "<token>" formats
-                if auth_header.startswith('Bearer '):
-                    token = auth_header.split("Bearer ")[1].strip()
-                else:
-                    token = auth_header.strip()
-            except IndexError:
-                return jsonify({'message': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'message': 'Token is missing'}), 401
-        
-        try:
-            # Decode token
-            from models.UserModel import User, Student, Professor
-            payload = decode_token(token)
-            user_id = payload['sub']
-            user_type = payload.get('type')
-            
-            # Get user from database based on type
-            if user_type == 'student':
-                current_user = Student.query.get(user_id)
-            elif user_type == 'professor':
-                current_user = Professor.query.get(user_id)
-            else:
-                current_user = User.query.get(user_id)
-            
-            if not current_user:
-                return jsonify({'message': 'User not found'}), 401
-            
-        except Exception as e:
-            return jsonify({'message': f'Token error: {str(e)}'}), 401
+        current_user, error = _authenticate_request(load_user=True)
+        if error:
+            return error
         
         # Pass user to route
         return f(current_user, *args, **kwargs)
     
-    return decorated
\ No newline at end of file
+    return decorated
+
+def principal_required(f):
+    """
+    Decorator for endpoints that only need the caller's id and user_type.
+    Passes a Principal; on a cache hit no database query is made.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        principal, error = _authenticate_request(load_user=False)
+        if error:
+            return error
+        
+        return f(principal, *args, **kwargs)
+    
+    return decorated
+
+def _invalidate_cached_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+def register_principal_cache_events():
+    """Drop cached tokens whenever a user (student or professor) is updated or deleted"""
+    from sqlalchemy import event
+    from models.UserModel import User
+    
+    for event_name in ('after_update', 'after_delete'):
+        if not event.contains(User, event_name, _invalidate_cached_principal):
+            event.listen(User, event_name, _invalidate_cached_principal, propagate=True)
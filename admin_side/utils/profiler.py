@@ -0,0 +1,215 @@
+# admin_side/utils/profiler.py
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from flask import g, has_request_context, request
+from utils.tracing import get_tracer
+
+trace = get_tracer('perf')
+
+# Frames from these paths are skipped when looking for the code that issued a query
+_LIBRARY_PATHS = (os.sep + 'site-packages' + os.sep, os.sep + 'sqlalchemy' + os.sep, os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s|:\w+|__\[POSTCOMPILE_\w+\])(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def fingerprint(statement):
+    """Statement with literals and IN lists folded, so repeats of one query group together"""
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _PLACEHOLDER_LIST.sub('(...)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+def caller_frame():
+    """'file:line in function' of the innermost application frame on the stack"""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if not any(path in frame.filename for path in _LIBRARY_PATHS):
+            return f"{os.path.relpath(frame.filename)}:{frame.lineno} in {frame.name}"
+    return None
+
+def _short_repr(value, limit=500):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+class EndpointStats:
+    """Running totals for one endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.max_db_ms = 0.0
+        self.total_ms = 0.0
+        self.slow_queries = 0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'queries': self.queries,
+            'avg_queries': round(self.queries / self.requests, 2) if self.requests else 0,
+            'max_queries': self.max_queries,
+            'db_ms': round(self.db_ms, 3),
+            'avg_db_ms': round(self.db_ms / self.requests, 3) if self.requests else 0,
+            'max_db_ms': round(self.max_db_ms, 3),
+            'avg_total_ms': round(self.total_ms / self.requests, 3) if self.requests else 0,
+            'slow_queries': self.slow_queries
+        }
+
+class QueryProfiler:
+    """
+    Counts queries and database time per request from SQLAlchemy engine
+    events, aggregates them per endpoint and keeps the most recent slow
+    queries. Queries outside a request (background jobs) only feed the
+    slow-query log.
+    """
+
+    def __init__(self, slow_query_ms=100, explain_slow_queries=False, slow_log_size=200):
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow_queries = explain_slow_queries
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+
+    def configure(self, config):
+        self.slow_query_ms = config.get('PERF_SLOW_QUERY_MS', 100)
+        self.explain_slow_queries = config.get('PERF_EXPLAIN_SLOW_QUERIES', False)
+        with self._lock:
+            self._slow_queries = deque(self._slow_queries, maxlen=config.get('PERF_SLOW_QUERY_LOG_SIZE', 200))
+
+    # Engine events
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profiler_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('profiler_started')
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+
+        in_request = has_request_context()
+        if in_request:
+            g.perf_queries = g.get('perf_queries', 0) + 1
+            g.perf_db_ms = g.get('perf_db_ms', 0.0) + elapsed_ms
+
+        if elapsed_ms >= self.slow_query_ms:
+            self._record_slow_query(conn, cursor, statement, parameters, executemany, elapsed_ms, in_request)
+
+    def handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('profiler_started'):
+            connection.info['profiler_started'].pop()
+
+    def _record_slow_query(self, conn, cursor, statement, parameters, executemany, elapsed_ms, in_request):
+        record = {
+            'at': datetime.utcnow().isoformat(),
+            'endpoint': self._endpoint_name() if in_request else None,
+            'duration_ms': round(elapsed_ms, 3),
+            'fingerprint': fingerprint(statement),
+            'parameters': _short_repr(parameters),
+            'caller': caller_frame(),
+            'plan': None
+        }
+        if self.explain_slow_queries and not executemany and statement.lstrip().upper().startswith('SELECT'):
+            record['plan'] = self._explain(conn, cursor, statement, parameters)
+
+        if in_request:
+            g.perf_slow_queries = g.get('perf_slow_queries', 0) + 1
+        with self._lock:
+            self._slow_queries.append(record)
+
+        trace.warning('Slow query %sms at %s: %s', record['duration_ms'], record['caller'], record['fingerprint'][:300])
+
+    def _explain(self, conn, cursor, statement, parameters):
+        # A raw cursor on the same connection, so the EXPLAIN itself is not profiled
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            explain_cursor = cursor.connection.cursor()
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                columns = [column[0] for column in explain_cursor.description]
+                return [dict(zip(columns, row)) for row in explain_cursor.fetchall()]
+            finally:
+                explain_cursor.close()
+        except Exception as e:
+            return [{'error': str(e)}]
+
+    # Requests
+
+    @staticmethod
+    def _endpoint_name():
+        rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+        return f"{request.method} {rule}"
+
+    def start_request(self):
+        g.perf_started = time.perf_counter()
+        g.perf_queries = 0
+        g.perf_db_ms = 0.0
+        g.perf_slow_queries = 0
+
+    def finish_request(self, response):
+        if 'perf_started' not in g:
+            return response
+
+        total_ms = (time.perf_counter() - g.perf_started) * 1000
+        queries, db_ms = g.perf_queries, g.perf_db_ms
+
+        with self._lock:
+            stats = self._endpoints.setdefault(self._endpoint_name(), EndpointStats())
+            stats.requests += 1
+            stats.queries += queries
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.db_ms += db_ms
+            stats.max_db_ms = max(stats.max_db_ms, db_ms)
+            stats.total_ms += total_ms
+            stats.slow_queries += g.perf_slow_queries
+
+        # Visible in the browser's network panel
+        response.headers['Server-Timing'] = f'db;dur={db_ms:.1f};desc="{queries} queries", app;dur={total_ms:.1f}'
+        return response
+
+    def stats(self, sort='db_ms', limit=None):
+        """Per-endpoint statistics (most expensive first) and the recent slow queries"""
+        with self._lock:
+            endpoints = [{'endpoint': name, **stats.to_dict()} for name, stats in self._endpoints.items()]
+            slow_queries = list(self._slow_queries)
+
+        endpoints.sort(key=lambda item: item.get(sort, 0), reverse=True)
+        return {
+            'slow_query_ms': self.slow_query_ms,
+            'explain_slow_queries': self.explain_slow_queries,
+            'endpoints': endpoints[:limit],
+            'slow_queries': list(reversed(slow_queries))
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow_queries.clear()
+
+# Shared profiler for the whole process
+profiler = QueryProfiler()
+
+def init_profiler(app, engine):
+    """Hook the profiler into the engine's events and the app's request cycle"""
+    from sqlalchemy import event
+
+    if not app.config.get('PERF_ENABLED', True):
+        return
+    profiler.configure(app.config)
+
+    for name in ('before_cursor_execute', 'after_cursor_execute', 'handle_error'):
+        listener = getattr(profiler, name)
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+
+    app.before_request(profiler.start_request)
+    app.after_request(profiler.finish_request)
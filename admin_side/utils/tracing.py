@@ -0,0 +1,233 @@
+# admin_side/utils/tracing.py
+"""
+Tracing for services and routes, on top of the standard logging module.
+
+    from utils.tracing import get_tracer
+    trace = get_tracer('quiz')
+
+    trace.debug('Scoring attempt %s', student_quiz.id, points=grade.total_points)
+
+Every subsystem has its own level (TRACE_LEVEL and TRACE_LEVELS) and an
+optional sample rate for records below WARNING (TRACE_SAMPLE_RATES). A
+disabled trace point is one attribute comparison: the message is only
+formatted when the record is emitted, and lazy() defers expensive
+arguments the same way. Records go through a bounded queue to a
+background thread that writes them, so request threads never block on
+stdout; when the queue is full records are dropped and counted.
+"""
+import atexit
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+ROOT_LOGGER = 'spis'
+
+class lazy:
+    """Argument computed only if the record is emitted"""
+
+    __slots__ = ('func',)
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self):
+        return str(self.func())
+
+    def __repr__(self):
+        return repr(self.func())
+
+class Tracer:
+    """Trace points of one subsystem"""
+
+    def __init__(self, subsystem, level=INFO, sample_rate=1.0):
+        self.subsystem = subsystem
+        self.logger = logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+        self.level = level
+        self.sample_rate = sample_rate
+
+    def enabled_for(self, level):
+        return level >= self.level
+
+    @property
+    def debug_enabled(self):
+        return self.level <= DEBUG
+
+    def _log(self, level, msg, args, fields, exc_info=False):
+        if level < WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self.logger.log(level, msg, *args, exc_info=exc_info, stacklevel=3,
+                        extra={'subsystem': self.subsystem, 'trace_fields': fields})
+
+    def debug(self, msg, *args, **fields):
+        if self.level <= DEBUG:
+            self._log(DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        if self.level <= INFO:
+            self._log(INFO, msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        if self.level <= WARNING:
+            self._log(WARNING, msg, args, fields)
+
+    def error(self, msg, *args, **fields):
+        if self.level <= ERROR:
+            self._log(ERROR, msg, args, fields)
+
+    def exception(self, msg, *args, **fields):
+        """Error with the current exception's traceback"""
+        if self.level <= ERROR:
+            self._log(ERROR, msg, args, fields, exc_info=True)
+
+class TraceFormatter(logging.Formatter):
+    """'time LEVEL subsystem: message key=value ...'"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(subsystem)s: %(message)s')
+
+    def format(self, record):
+        if not hasattr(record, 'subsystem'):
+            record.subsystem = record.name
+        line = super().format(record)
+        fields = getattr(record, 'trace_fields', None)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Format in the caller's thread: arguments may be ORM objects bound to its session
+        record = super().prepare(record)
+        fields = getattr(record, 'trace_fields', None)
+        if fields:
+            record.trace_fields = {key: str(value) for key, value in fields.items()}
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_lock = threading.Lock()
+_tracers = {}
+_settings = {'level': INFO, 'levels': {}, 'sample_rates': {}}
+_handler = None
+_listener = None
+
+def _parse_mapping(value, convert):
+    """'quiz=DEBUG,ml=INFO' (or a dict) as {subsystem: converted value}"""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = (part.split('=', 1) for part in value.split(',') if '=' in part)
+    return {name.strip(): convert(setting) for name, setting in items}
+
+def _parse_level(value):
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(str(value).strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown trace level: {value}")
+    return level
+
+def _apply(tracer):
+    # 'quiz.availability' inherits the settings of 'quiz' unless it has its own
+    parts = tracer.subsystem.split('.')
+    tracer.level = _settings['level']
+    tracer.sample_rate = 1.0
+    for end in range(1, len(parts) + 1):
+        name = '.'.join(parts[:end])
+        tracer.level = _settings['levels'].get(name, tracer.level)
+        tracer.sample_rate = _settings['sample_rates'].get(name, tracer.sample_rate)
+    tracer.logger.setLevel(tracer.level)
+
+def get_tracer(subsystem):
+    """The process-wide tracer of a subsystem"""
+    tracer = _tracers.get(subsystem)
+    if tracer is None:
+        with _lock:
+            tracer = _tracers.get(subsystem)
+            if tracer is None:
+                tracer = Tracer(subsystem)
+                _apply(tracer)
+                _tracers[subsystem] = tracer
+    return tracer
+
+def configure_tracing(level=INFO, levels=None, sample_rates=None):
+    """Set the default level, per-subsystem levels and sample rates of every tracer"""
+    with _lock:
+        _settings['level'] = _parse_level(level)
+        _settings['levels'] = _parse_mapping(levels, _parse_level)
+        _settings['sample_rates'] = _parse_mapping(sample_rates, float)
+        for tracer in _tracers.values():
+            _apply(tracer)
+
+def start_async_handler(stream=None, queue_size=10000):
+    """Write trace records from a background thread (idempotent)"""
+    global _handler, _listener
+
+    with _lock:
+        if _listener is not None:
+            return _handler
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(TraceFormatter())
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+        _listener.start()
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.addHandler(_handler)
+        root.propagate = False
+    return _handler
+
+def stop_async_handler():
+    """Flush queued records and stop the writer thread"""
+    global _handler, _listener
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _handler = None
+        _listener = None
+
+def dropped_records():
+    return _handler.dropped if _handler is not None else 0
+
+def init_tracing(app):
+    """Configure tracing from TRACE_* settings and start the async writer"""
+    configure_tracing(
+        app.config.get('TRACE_LEVEL', 'INFO'),
+        app.config.get('TRACE_LEVELS'),
+        app.config.get('TRACE_SAMPLE_RATES')
+    )
+    if app.config.get('TRACE_ASYNC', True):
+        start_async_handler(queue_size=app.config.get('TRACE_QUEUE_SIZE', 10000))
+    else:
+        # Synchronous output, e.g. for tests and one-off scripts
+        root = logging.getLogger(ROOT_LOGGER)
+        if not root.handlers:
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(TraceFormatter())
+            root.addHandler(output)
+            root.propagate = False
+
+atexit.register(stop_async_handler)
@@ -0,0 +1,6 @@
+# admin_side/wsgi.py
+from app import create_app
+
+# Entry point for WSGI servers (gunicorn wsgi:app). run.py only builds the app
+# when run directly, so spawned worker processes can import it cheaply.
+app = create_app()